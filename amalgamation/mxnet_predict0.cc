@@ -22,6 +22,7 @@
 #include "src/ndarray/ndarray.cc"
 #include "src/engine/engine.cc"
 #include "src/engine/naive_engine.cc"
+#include "src/engine/profiler.cc"
 #include "src/symbol/graph_executor.cc"
 #include "src/symbol/static_graph.cc"
 #include "src/symbol/symbol.cc"
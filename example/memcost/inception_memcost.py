@@ -78,13 +78,19 @@ softmax = inception(1000, 1.0)
 batch_size = 32
 softmax = inception(1000, 1.0)
 
-if len(sys.argv) == 2:
+if len(sys.argv) >= 2:
     grad_req = sys.argv[1]
 else:
     grad_req = 'write'
+if len(sys.argv) >= 3:
+    strategy = sys.argv[2]
+else:
+    strategy = 'best_fit'
 
-texec = softmax.simple_bind(ctx=mx.cpu(),
-                            data=(batch_size, 3, 224, 224),
-                            grad_req=grad_req)
-# We extract the memory cost from the execution plan
-print(texec.debug_str().split('\n')[-3])
+# We extract the memory cost from the plan, without allocating it
+plan = softmax.plan_memory(ctx=mx.cpu(),
+                           data=(batch_size, 3, 224, 224),
+                           grad_req=grad_req,
+                           strategy=strategy)
+print('Total %d MB allocated' % (plan['internal_bytes'] >> 20))
+print('Peak %d MB including arguments, gradients and auxiliary states' % (plan['peak_bytes'] >> 20))
@@ -92,6 +92,53 @@ struct NDArrayOpInfo {
   void* p_list_arguments;
   void* p_declare_backward_dependency;
 };
+
+/*!
+ * \brief callbacks of an operator created by a CustomOpPropInfo.
+ *  forward and backward take the arrays as NDArrayHandle, owned by the
+ *  callee, their tags (0 in_data, 1 out_data, 2 in_grad, 3 out_grad,
+ *  4 aux, 5 scratch), the OpReqType of each output and is_train.
+ *  They run on the callback threads, the operator completes when the
+ *  operations they push on the arrays complete.
+ */
+struct CustomOpInfo {
+  bool (*forward)(int, void**, const int*, const int*, bool, void*);
+  bool (*backward)(int, void**, const int*, const int*, bool, void*);
+  bool (*del)(void*);
+  // all functions also pass a payload void* pointer
+  void* p_forward;
+  void* p_backward;
+  void* p_del;
+};
+
+/*! \brief callbacks describing a custom operator, see CustomOpInfo */
+struct CustomOpPropInfo {
+  bool (*list_arguments)(char***, void*);
+  bool (*list_outputs)(char***, void*);
+  bool (*list_auxiliary_states)(char***, void*);
+  /*! \brief shapes of the inputs, then the outputs and auxiliary states */
+  bool (*infer_shape)(int, int*, unsigned**, void*);
+  bool (*declare_backward_dependency)(const int*, const int*, const int*,
+                                      int*, int**, void*);
+  /*!
+   * \brief pairs of indices that can share memory, (in_data, out_data) for
+   *  forward and (out_grad, in_grad) for backward.
+   */
+  bool (*inplace_option)(bool, int*, int**, void*);
+  /*! \brief shape of the scratch array from the shapes of the inputs */
+  bool (*scratch_shape)(int, int*, unsigned**, int*, unsigned**, void*);
+  /*! \brief create an operator on the device of type and id */
+  bool (*create_operator)(int, int, CustomOpInfo*, void*);
+  // all functions also pass a payload void* pointer
+  void* p_list_arguments;
+  void* p_list_outputs;
+  void* p_list_auxiliary_states;
+  void* p_infer_shape;
+  void* p_declare_backward_dependency;
+  void* p_inplace_option;
+  void* p_scratch_shape;
+  void* p_create_operator;
+};
 }
 /*!
  * \brief return str message of the last error
@@ -121,6 +168,40 @@ MXNET_DLL int MXRandomSeed(int seed);
  * \return 0 when success, -1 when failure happens.
  */
 MXNET_DLL int MXNotifyShutdown();
+/*!
+ * \brief Start or stop recording the operators executed by the engine.
+ * \param state 1 to start recording, 0 to stop.
+ * \return 0 when success, -1 when failure happens.
+ */
+MXNET_DLL int MXSetProfilerState(int state);
+/*!
+ * \brief Write the recorded operators as a chrome://tracing json file,
+ *  and clear them.
+ * \param fname the output file name.
+ * \return 0 when success, -1 when failure happens.
+ */
+MXNET_DLL int MXDumpProfile(const char *fname);
+/*!
+ * \brief Get the memory statistics of the storage of a device.
+ * \param dev_type device type.
+ * \param dev_id device id.
+ * \param out_size number of statistics.
+ * \param out_keys names of the statistics.
+ * \param out_vals values of the statistics.
+ * \return 0 when success, -1 when failure happens.
+ */
+MXNET_DLL int MXStorageGetStats(int dev_type,
+                                int dev_id,
+                                mx_uint *out_size,
+                                const char ***out_keys,
+                                const uint64_t **out_vals);
+/*!
+ * \brief Release the memory kept for reuse by the storage of a device.
+ * \param dev_type device type.
+ * \param dev_id device id.
+ * \return 0 when success, -1 when failure happens.
+ */
+MXNET_DLL int MXStorageReleaseAll(int dev_type, int dev_id);
 //-------------------------------------
 // Part 1: NDArray creation and deletion
 //-------------------------------------
@@ -419,6 +500,30 @@ MXNET_DLL int MXFuncInvokeEx(FunctionHandle fun,
                              int num_params,
                              char **param_keys,
                              char **param_vals);
+/*!
+ * \brief invoke a list of functions in one call.
+ *  The arguments of all the functions are concatenated, each function takes
+ *  as many of them as given by MXFuncDescribe, and num_params[i] parameters.
+ * \param num_funs number of functions to invoke
+ * \param funs the functions, in invocation order
+ * \param use_vars the normal arguments of all the functions
+ * \param scalar_args the scalar arguments of all the functions
+ * \param mutate_vars the mutate arguments of all the functions
+ * \param num_params number of keyword parameters of each function
+ * \param param_keys keys for keyword parameters of all the functions
+ * \param param_vals values for keyword parameters of all the functions
+ * \return 0 when success, -1 when failure happens,
+ *  the functions before the failing one are invoked
+ * \sa MXFuncInvokeEx
+ */
+MXNET_DLL int MXFuncInvokeBatch(mx_uint num_funs,
+                                FunctionHandle *funs,
+                                NDArrayHandle *use_vars,
+                                mx_float *scalar_args,
+                                NDArrayHandle *mutate_vars,
+                                int *num_params,
+                                char **param_keys,
+                                char **param_vals);
 //--------------------------------------------
 // Part 3: symbolic configuration generation
 //--------------------------------------------
@@ -898,6 +1003,43 @@ MXNET_DLL int MXExecutorBindEX(SymbolHandle symbol_handle,
                                NDArrayHandle *aux_states,
                                ExecutorHandle *shared_exec,
                                ExecutorHandle *out);
+/*!
+ * \brief Plan the memory of MXExecutorBindEX without binding nor allocating.
+ *  The NDArrays can be created with delay_alloc, only their shapes,
+ *  types and contexts are used.
+ *
+ * \param symbol_handle symbol handle
+ * \param dev_type device type of default context
+ * \param dev_id device id of default context
+ * \param num_map_keys size of group2ctx map
+ * \param map_keys keys of group2ctx map
+ * \param map_dev_types device type of group2ctx map
+ * \param map_dev_ids device id of group2ctx map
+ * \param len length
+ * \param in_args in args array
+ * \param arg_grad_store arg grads handle array
+ * \param grad_req_type grad req array
+ * \param aux_states_len length of auxiliary states
+ * \param aux_states auxiliary states array
+ * \param strategy planning strategy, "best_fit" or "greedy_lifetime"
+ * \param out_json the memory plan as a json string
+ * \return 0 when success, -1 when failure happens
+ */
+MXNET_DLL int MXExecutorPlanMemory(SymbolHandle symbol_handle,
+                                   int dev_type,
+                                   int dev_id,
+                                   mx_uint num_map_keys,
+                                   const char** map_keys,
+                                   const int* map_dev_types,
+                                   const int* map_dev_ids,
+                                   mx_uint len,
+                                   NDArrayHandle *in_args,
+                                   NDArrayHandle *arg_grad_store,
+                                   mx_uint *grad_req_type,
+                                   mx_uint aux_states_len,
+                                   NDArrayHandle *aux_states,
+                                   const char *strategy,
+                                   const char **out_json);
 /*!
  * \brief set a call back to notify the completion of operation
  */
@@ -1187,6 +1329,16 @@ MXNET_DLL int MXKVStoreSendCommmandToServers(KVStoreHandle handle,
 */
 MXNET_DLL int MXRecordIOWriterCreate(const char *uri, RecordIOHandle *out);
 
+/**
+ * \brief Create a RecordIO writer object with a file mode
+ * \param uri path to file
+ * \param mode "w" to truncate the file or "a" to append to it
+ * \param out handle pointer to the created object
+ * \return 0 when success, -1 when failure happens
+*/
+MXNET_DLL int MXRecordIOWriterCreateEx(const char *uri, const char *mode,
+                                       RecordIOHandle *out);
+
 /**
  * \brief Delete a RecordIO writer object
  * \param handle handle to RecordIO object
@@ -1204,6 +1356,14 @@ MXNET_DLL int MXRecordIOWriterFree(RecordIOHandle handle);
 MXNET_DLL int MXRecordIOWriterWriteRecord(RecordIOHandle *handle,
                                           const char *buf, size_t size);
 
+/**
+ * \brief Get the current writer pointer position
+ * \param handle handle to RecordIO object
+ * \param pos handle to output position
+ * \return 0 when success, -1 when failure happens
+*/
+MXNET_DLL int MXRecordIOWriterTell(RecordIOHandle *handle, size_t *pos);
+
 /**
  * \brief Create a RecordIO reader object
  * \param uri path to file
@@ -1229,6 +1389,14 @@ MXNET_DLL int MXRecordIOReaderFree(RecordIOHandle *handle);
 MXNET_DLL int MXRecordIOReaderReadRecord(RecordIOHandle *handle,
                                         char const **buf, size_t *size);
 
+/**
+ * \brief Set the current reader pointer position
+ * \param handle handle to RecordIO object
+ * \param pos target position, must be the start of a record
+ * \return 0 when success, -1 when failure happens
+*/
+MXNET_DLL int MXRecordIOReaderSeek(RecordIOHandle *handle, size_t pos);
+
 /**
  * \brief Create a MXRtc object
 */
@@ -1272,4 +1440,33 @@ MXNET_DLL int MXOptimizerUpdate(OptimizerHandle handle,
                                 mx_float lr,
                                 mx_float wd);
 
+/*!
+ * \brief update a group of weights in one call, pushing one engine
+ *  operation per device instead of several per weight.
+ * \param name the algorithm, one of "sgd", "adam" and "rmsprop"
+ * \param num_weights number of weights
+ * \param weights the weights to update
+ * \param grads gradients of the weights
+ * \param num_states number of states of each weight
+ * \param states states of the weights, states[i * num_states + j] is the
+ *  j-th state of weights[i]
+ * \param lrs learning rate of each weight
+ * \param wds weight decay of each weight
+ * \param num_param number of keyword parameters of the algorithm
+ * \param keys keys of the keyword parameters
+ * \param vals values of the keyword parameters
+ * \return 0 when success, -1 when failure happens
+ */
+MXNET_DLL int MXOptimizerMultiUpdate(const char *name,
+                                     mx_uint num_weights,
+                                     NDArrayHandle *weights,
+                                     NDArrayHandle *grads,
+                                     mx_uint num_states,
+                                     NDArrayHandle *states,
+                                     const mx_float *lrs,
+                                     const mx_float *wds,
+                                     mx_uint num_param,
+                                     const char **keys,
+                                     const char **vals);
+
 #endif  // MXNET_C_API_H_
@@ -63,6 +63,25 @@ class Optimizer {
    * \return a new constructed Optimizer
    */
   static Optimizer *Create(const char* type_name);
+  /*!
+   * \brief update a group of weights with one engine operation per device.
+   *  The states are created by the caller, states[i * k + j] is the j-th state
+   *  of weights[i], where k is the number of states the algorithm uses.
+   * \param name the algorithm, one of "sgd", "adam" and "rmsprop".
+   * \param weights the weights to update.
+   * \param grads gradients for the weights.
+   * \param states states of the weights.
+   * \param lrs learning rate for each weight.
+   * \param wds weight decay for each weight.
+   * \param kwargs the keyword arguments of the algorithm.
+   */
+  static void MultiUpdate(const std::string &name,
+                          const std::vector<NDArray> &weights,
+                          const std::vector<NDArray> &grads,
+                          const std::vector<NDArray> &states,
+                          const std::vector<float> &lrs,
+                          const std::vector<float> &wds,
+                          const std::vector<std::pair<std::string, std::string> > &kwargs);
 };
 
 #if DMLC_USE_CXX11
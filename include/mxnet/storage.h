@@ -33,6 +33,25 @@ class MXNET_API Storage {
      */
     Context ctx;
   };
+  /*!
+   * \brief Memory statistics of the storage of a device.
+   */
+  struct Stats {
+    /*! \brief bytes allocated from the device, in use or pooled */
+    uint64_t allocated_bytes = 0;
+    /*! \brief bytes kept in the pool for reuse */
+    uint64_t pooled_bytes = 0;
+    /*! \brief bytes requested by the allocations in use, before rounding */
+    uint64_t requested_bytes = 0;
+    /*! \brief maximum of allocated_bytes */
+    uint64_t peak_allocated_bytes = 0;
+    /*! \brief number of allocations */
+    uint64_t num_alloc = 0;
+    /*! \brief number of allocations served by the pool */
+    uint64_t num_pool_hit = 0;
+    /*! \brief number of pooled blocks released to the device */
+    uint64_t num_released = 0;
+  };
   /*!
    * \brief Allocate a new contiguous memory for a given size.
    * \param size Total size of memory in bytes.
@@ -45,6 +64,17 @@ class MXNET_API Storage {
    * \param handle Handle struect.
    */
   virtual void Free(Handle handle) = 0;
+  /*!
+   * \brief Get the memory statistics of a device.
+   * \param ctx Context information about the device and ID.
+   * \return the statistics.
+   */
+  virtual Stats GetStats(Context ctx) = 0;
+  /*!
+   * \brief Release the memory pooled for reuse on a device.
+   * \param ctx Context information about the device and ID.
+   */
+  virtual void ReleaseAll(Context ctx) = 0;
   /*!
    * \brief Destructor.
    */
@@ -359,6 +359,30 @@ class Executor {
                         const std::vector<OpReqType> &grad_req_type,
                         const std::vector<NDArray> &aux_states,
                         Executor* shared_exec = NULL);
+  /*!
+   * \brief Plan the memory of Bind without binding nor allocating it.
+   *  The NDArrays can be created with delay_alloc, only their shapes,
+   *  types and contexts are used.
+   *
+   * \param symbol the symbol that specifies the output of Forward pass.
+   * \param default_ctx the default context of binding.
+   * \param group2ctx Context mapping group to context.
+   * \param in_args the NDArray that stores the input arguments to the symbol.
+   * \param arg_grad_store NDArray that is used to store the gradient output of the input arguments.
+   * \param grad_req_type requirment type of gradient saving. Can only be in {kNullOp, kAddTo, kWriteTo}.
+   * \param aux_states NDArray that is used as internal state in op
+   * \param strategy the planning strategy, "best_fit" or "greedy_lifetime".
+   * \return the plan as a json string, with the planned bytes, the storages
+   *  and the storage assigned to each internal output of the graph.
+   */
+  static std::string PlanMemory(Symbol symbol,
+                                const Context& default_ctx,
+                                const std::map<std::string, Context>& group2ctx,
+                                const std::vector<NDArray> &in_args,
+                                const std::vector<NDArray> &arg_grad_store,
+                                const std::vector<OpReqType> &grad_req_type,
+                                const std::vector<NDArray> &aux_states,
+                                const std::string &strategy);
   /*!
    * \brief the prototype of user-defined monitor callback
    */
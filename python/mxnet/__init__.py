@@ -40,6 +40,9 @@ from .attribute import AttrScope
 
 from . import monitor
 from . import monitor as mon
+from . import profiler
+from . import serving
+from . import storage
 
 from . import torch
 from . import torch as th
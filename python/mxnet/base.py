@@ -4,7 +4,10 @@
 from __future__ import absolute_import
 
 import sys
+import os
 import ctypes
+import hashlib
+import json
 import numpy as np
 import atexit
 from . import libinfo
@@ -30,17 +33,17 @@ class MXNetError(Exception):
     pass
 
 def _load_lib():
-    """Load libary by searching possible path."""
+    """Load libary by searching possible path, return the library and its path."""
     lib_path = libinfo.find_lib_path()
     lib = ctypes.cdll.LoadLibrary(lib_path[0])
     # DMatrix functions
     lib.MXGetLastError.restype = ctypes.c_char_p
-    return lib
+    return lib, lib_path[0]
 
 # version number
 __version__ = libinfo.__version__
 # library instance of mxnet
-_LIB = _load_lib()
+_LIB, _LIB_PATH = _load_lib()
 
 # type definitions
 mx_uint = ctypes.c_uint
@@ -200,6 +203,77 @@ def ctypes2docstring(num_args, arg_names, arg_types, arg_descs, remove_dup=True)
     doc_str = doc_str % ('\n'.join(param_str))
     return doc_str
 
+def _replace_file(src, dst):
+    """Rename src to dst, replacing dst if it exists, also on Windows."""
+    if hasattr(os, 'replace'):
+        os.replace(src, dst)
+    else:
+        # python 2 has no atomic replace on Windows, where rename fails if dst exists
+        if os.name == 'nt' and os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
+
+def _op_cache_file(kind, num_ops):
+    """Path of the signature cache of a kind of operators, None when disabled.
+
+    The name depends on the path, size and modification time of the library,
+    so that a rebuilt library does not use the signatures of the previous build.
+    """
+    cache_dir = os.environ.get('MXNET_OP_CACHE_DIR', os.path.join('~', '.mxnet', 'op_cache'))
+    if not cache_dir:
+        return None
+    stat = os.stat(_LIB_PATH)
+    build = '%s:%d:%d:%s:%d' % (os.path.abspath(_LIB_PATH), stat.st_size,
+                                int(stat.st_mtime * 1e6), __version__, num_ops)
+    return os.path.join(os.path.expanduser(cache_dir), '%s-%s.json' % (
+        kind, hashlib.md5(build.encode('utf-8')).hexdigest()))
+
+def _load_op_signatures(kind, num_ops, describe):
+    """Get the signatures of the operators listed by the library.
+
+    Getting the signature of an operator takes several calls to the library,
+    which add up at import time, so the signatures are cached on disk, in
+    ``MXNET_OP_CACHE_DIR`` or ~/.mxnet/op_cache. Set it to an empty string
+    to disable the cache.
+
+    Parameters
+    ----------
+    kind : str
+        The kind of operators, the name of the cache.
+    num_ops : int
+        Number of operators listed by the library.
+    describe : function
+        Takes the index of an operator in the list and returns its signature,
+        a json serializable object.
+
+    Returns
+    -------
+    signatures : list
+        The signature of each operator, by index.
+    """
+    fname = _op_cache_file(kind, num_ops)
+    if fname is not None:
+        try:
+            with open(fname) as fin:
+                signatures = json.load(fin)
+            if len(signatures) == num_ops:
+                return signatures
+        except (IOError, OSError, ValueError):
+            pass
+    signatures = [describe(i) for i in range(num_ops)]
+    if fname is not None:
+        try:
+            if not os.path.isdir(os.path.dirname(fname)):
+                os.makedirs(os.path.dirname(fname))
+            # write to a temporary file first, other processes may read it
+            tmp = '%s.%d.tmp' % (fname, os.getpid())
+            with open(tmp, 'w') as fout:
+                json.dump(signatures, fout)
+            _replace_file(tmp, fname)
+        except (IOError, OSError):
+            pass
+    return signatures
+
 def _notify_shutdown():
     """Notify MXNet about a shutdown."""
     check_call(_LIB.MXNotifyShutdown())
@@ -2,11 +2,26 @@
 """Callback functions that can be used to track various status during epoch."""
 from __future__ import absolute_import
 
+import os
 import sys
 import math
+import json
+import zlib
+import atexit
 import logging
+import threading
 import time
-from .model import save_checkpoint
+import weakref
+import numpy as np
+from . import ndarray as nd
+from .base import _replace_file
+from .context import Context, cpu
+from .model import save_checkpoint, _param_file_name
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
 
 def do_checkpoint(prefix):
     """Callback to checkpoint the model to prefix every epoch.
@@ -27,6 +42,180 @@ def do_checkpoint(prefix):
     return _callback
 
 
+def _write_checkpoint(prefix, delta, written, param_name, sym, save_dict):
+    """Write a checkpoint of AsyncCheckpoint, called on the background thread."""
+    sym.save('%s-symbol.json' % prefix)
+    if not delta:
+        nd.save(param_name, save_dict)
+        logging.info('Saved checkpoint to \"%s\"', param_name)
+        return
+    fname = os.path.basename(param_name)
+    changed = {}
+    new_written = {}
+    manifest = {}
+    for key, buf in save_dict.items():
+        checksum = zlib.crc32(buf.asnumpy().tobytes())
+        last = written.get(key)
+        if last is not None and last[0] == checksum:
+            manifest[key] = last[1]
+        else:
+            changed[key] = buf
+            new_written[key] = (checksum, fname)
+            manifest[key] = fname
+    if changed:
+        nd.save(param_name, changed)
+    with open(param_name + '.json', 'w') as fout:
+        json.dump({'arrays': manifest}, fout)
+    written.update(new_written)
+    logging.info('Saved checkpoint to \"%s\", %d of %d arrays changed',
+                 param_name, len(changed), len(save_dict))
+
+def _async_checkpoint_worker(prefix, delta, written, tasks, idle, errors):
+    """Thread entry of AsyncCheckpoint, which it does not reference so that a
+    dropped AsyncCheckpoint is collected and stops the thread."""
+    while True:
+        item = tasks.get()
+        if item is None:
+            break
+        try:
+            _write_checkpoint(prefix, delta, written, *item)
+        except Exception as err: # pylint: disable=broad-except
+            errors.append(err)
+        idle.set()
+
+# the AsyncCheckpoint objects alive, whose pending checkpoint is waited for
+# when the program exits
+_LIVE_CHECKPOINTS = weakref.WeakSet()
+
+@atexit.register
+def _wait_checkpoints():
+    """Do not lose the last checkpoints when the program exits."""
+    for ckpt in list(_LIVE_CHECKPOINTS):
+        ckpt._idle.wait() # pylint: disable=protected-access
+
+
+class AsyncCheckpoint(object):
+    """Checkpoint the model to prefix on a background thread.
+
+    The parameters are copied into host buffers by asynchronous engine
+    operations, ordered after the pending updates, so training goes on while
+    the copies run and the files are written. The files have the same
+    names as save_checkpoint and can be loaded with model.load_checkpoint.
+    The background thread is a daemon, stopped by close or when the
+    AsyncCheckpoint is collected, and the pending checkpoint is written
+    before the program exits.
+
+    Parameters
+    ----------
+    prefix : str
+        The file prefix to checkpoint to.
+    period : int
+        Number of epochs between two checkpoints.
+    batch_period : int, optional
+        Also checkpoint every batch_period batches within an epoch, when the
+        batch_end method is passed as batch_end_callback to fit. The file is
+        prefix-epoch-nbatch.params, epoch counting from 0, and holds the
+        parameters and auxiliary states of the first device. A mid-epoch
+        checkpoint is skipped if the previous one is still being written.
+    delta : bool
+        Only write the arrays that changed since the previous checkpoint, for
+        instance when some layers are fixed. A manifest prefix-epoch.params.json
+        lists the file holding each array, so the files of earlier checkpoints
+        must be kept.
+
+    Examples
+    --------
+    >>> ckpt = mx.callback.AsyncCheckpoint('model', batch_period=1000)
+    >>> model.fit(X, epoch_end_callback=ckpt, batch_end_callback=ckpt.batch_end)
+    >>> ckpt.close()
+    """
+    def __init__(self, prefix, period=1, batch_period=None, delta=False):
+        self.prefix = prefix
+        self.period = period
+        self.batch_period = batch_period
+        self.delta = delta
+        # host buffers, reused by every checkpoint
+        self._bufs = {}
+        # key -> (checksum, file) of the last written value, for delta writes
+        self._written = {}
+        self._errors = []
+        self._idle = threading.Event()
+        self._idle.set()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=_async_checkpoint_worker,
+            args=(prefix, delta, self._written, self._queue, self._idle, self._errors))
+        self._thread.daemon = True
+        self._thread.start()
+        # the pending checkpoint is waited for when the program exits
+        _LIVE_CHECKPOINTS.add(self)
+
+    def __call__(self, iter_no, sym, arg, aux):
+        """Epoch end callback, waits only for the previous checkpoint."""
+        if (iter_no + 1) % self.period == 0:
+            self.wait()
+            self._snapshot(_param_file_name(self.prefix, iter_no + 1), sym, arg, aux)
+
+    def batch_end(self, param):
+        """Batch end callback for mid-epoch checkpoints."""
+        if self.batch_period is None or param.nbatch % self.batch_period != 0:
+            return
+        if not self._idle.is_set():
+            logging.warning('Skip the checkpoint of Epoch[%d] Batch[%d], '
+                            'the previous one is still being written', param.epoch, param.nbatch)
+            return
+        self._raise_error()
+        manager = param.locals['executor_manager']
+        arg = dict(zip(manager.param_names, [block[0] for block in manager.param_arrays]))
+        aux = dict(zip(manager.aux_names, [block[0] for block in manager.aux_arrays]))
+        self._snapshot(_param_file_name(self.prefix, param.epoch, param.nbatch),
+                       param.locals['symbol'], arg, aux)
+
+    def wait(self):
+        """Wait until the pending checkpoint is written."""
+        self._idle.wait()
+        self._raise_error()
+
+    def close(self):
+        """Wait for the pending checkpoint and stop the background thread."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        self._raise_error()
+
+    def __del__(self):
+        if getattr(self, '_thread', None) is not None:
+            self.close()
+
+    def _raise_error(self):
+        """Raise the error of the last write if any."""
+        if self._errors:
+            err = self._errors[0]
+            del self._errors[:]
+            raise err
+
+    def _snapshot(self, param_name, sym, arg, aux):
+        """Copy the parameters to the host buffers and queue the write."""
+        save_dict = {}
+        for tp, params in (('arg', arg), ('aux', aux)):
+            for name, src in params.items():
+                key = '%s:%s' % (tp, name)
+                buf = self._bufs.get(key)
+                if buf is None or buf.shape != src.shape:
+                    if src.context.device_type == 'gpu':
+                        ctx = Context('cpu_pinned', src.context.device_id)
+                    else:
+                        ctx = cpu()
+                    buf = nd.empty(src.shape, ctx, dtype=src.dtype)
+                    self._bufs[key] = buf
+                src.copyto(buf)
+                save_dict[key] = buf
+        self._idle.clear()
+        self._queue.put((param_name, sym, save_dict))
+
+
 def log_train_metric(period, auto_reset=False):
     """Callback to log the training evaluation result every period.
 
@@ -93,6 +282,105 @@ class Speedometer(object):
             self.tic = time.time()
 
 
+class Telemetry(object):
+    """Report where the training time of each batch goes.
+
+    The time of every batch is split into the phases recorded by fit:
+    data_wait (waiting for the data iterator and loading the batch),
+    forward_backward, update (parameter update and kvstore communication)
+    and metric. Every `frequent` batches the 50th, 95th and 99th percentiles
+    of each phase over the last `frequent` batches are logged and, if
+    filename is given, exported.
+
+    Parameters
+    ----------
+    batch_size : int
+        Batch size of data.
+    frequent : int
+        Number of batches between two reports.
+    filename : str, optional
+        File to export the reports to.
+    fmt : str
+        'json' appends one json object per report to filename, 'prometheus'
+        rewrites filename in the prometheus text format, to be read by the
+        textfile collector of the node exporter.
+    sync_phases : bool
+        Wait for the computation at the end of each phase. Operations are
+        executed asynchronously, so without waiting the forward_backward and
+        update times are only the time to issue the operations, and the
+        computation shows up in whichever later phase first waits for it.
+        Waiting costs some throughput because the phases no longer overlap.
+    """
+    PHASES = ['data_wait', 'forward_backward', 'update', 'metric']
+    QUANTILES = [50, 95, 99]
+
+    def __init__(self, batch_size, frequent=50, filename=None, fmt='json',
+                 sync_phases=True):
+        if fmt not in ('json', 'prometheus'):
+            raise ValueError('Unknown telemetry format %s' % fmt)
+        self.batch_size = batch_size
+        self.frequent = frequent
+        self.filename = filename
+        self.fmt = fmt
+        self.sync_phases = sync_phases
+        self.samples = {phase: [] for phase in self.PHASES + ['batch']}
+
+    def __call__(self, param):
+        """Callback to record the phase times of the batch."""
+        batch_timing = param.locals.get('batch_timing') if param.locals else None
+        if batch_timing is None:
+            return
+        for phase in self.PHASES:
+            self.samples[phase].append(batch_timing.get(phase, 0.0))
+        self.samples['batch'].append(sum(batch_timing.values()))
+        if len(self.samples['batch']) >= self.frequent:
+            self._report(param)
+
+    def _report(self, param):
+        """Log and export the statistics of the recorded batches."""
+        stats = {}
+        for phase, samples in self.samples.items():
+            quantiles = np.percentile(np.array(samples), self.QUANTILES)
+            stats[phase] = dict(('p%d' % q, float(v)) for q, v in zip(self.QUANTILES, quantiles))
+            stats[phase]['mean'] = float(np.mean(samples))
+        speed = self.batch_size / stats['batch']['mean'] if stats['batch']['mean'] > 0 else 0.0
+        logging.info('Epoch[%d] Batch [%d]\tSpeed: %.2f samples/sec\t%s', param.epoch,
+                     param.nbatch, speed,
+                     '\t'.join('%s: p50=%.2fms p95=%.2fms p99=%.2fms' % (
+                         phase, stats[phase]['p50'] * 1000, stats[phase]['p95'] * 1000,
+                         stats[phase]['p99'] * 1000) for phase in self.PHASES))
+        if self.filename is not None:
+            if self.fmt == 'json':
+                record = {'time': time.time(), 'epoch': param.epoch, 'nbatch': param.nbatch,
+                          'samples_per_sec': speed, 'phases': stats}
+                with open(self.filename, 'a') as fout:
+                    fout.write(json.dumps(record, sort_keys=True) + '\n')
+            else:
+                self._write_prometheus(param, speed, stats)
+        for samples in self.samples.values():
+            del samples[:]
+
+    def _write_prometheus(self, param, speed, stats):
+        """Rewrite filename with the latest statistics in prometheus text format."""
+        lines = ['# HELP mxnet_train_phase_seconds Time of each phase of a training batch.',
+                 '# TYPE mxnet_train_phase_seconds summary']
+        for phase in self.PHASES + ['batch']:
+            for q in self.QUANTILES:
+                lines.append('mxnet_train_phase_seconds{phase="%s",quantile="%g"} %g' % (
+                    phase, q / 100.0, stats[phase]['p%d' % q]))
+        lines += ['# HELP mxnet_train_samples_per_second Training throughput.',
+                  '# TYPE mxnet_train_samples_per_second gauge',
+                  'mxnet_train_samples_per_second %g' % speed,
+                  '# HELP mxnet_train_epoch Current training epoch.',
+                  '# TYPE mxnet_train_epoch gauge',
+                  'mxnet_train_epoch %d' % param.epoch]
+        # write then rename, so a scraper never reads a partial file
+        tmp = self.filename + '.tmp'
+        with open(tmp, 'w') as fout:
+            fout.write('\n'.join(lines) + '\n')
+        _replace_file(tmp, self.filename)
+
+
 class ProgressBar(object):
     """Show a progress bar.
 
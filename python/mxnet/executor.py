@@ -208,17 +208,18 @@ class Executor(object):
         ValueError
             If there is additional parameters in the dict but allow_extra_params=False
         """
-        for name, array in arg_params.items():
+        # index by name, so that lazily loaded params not needed are never read
+        for name in arg_params:
             if name in self.arg_dict:
-                array.copyto(self.arg_dict[name])
+                arg_params[name].copyto(self.arg_dict[name])
             else:
                 if not allow_extra_params:
                     raise ValueError('Find name \"%s\" that is not in the arguments' % name)
         if aux_params is None:
             aux_params = {}
-        for name, array in aux_params.items():
+        for name in aux_params:
             if name in self.aux_dict:
-                array.copyto(self.aux_dict[name])
+                aux_params[name].copyto(self.aux_dict[name])
             else:
                 if not allow_extra_params:
                     raise ValueError('Find name %s that is not in the auxiliary states' % name)
@@ -10,12 +10,24 @@ import sys
 import numpy as np
 import logging
 import threading
+import multiprocessing
+from collections import deque
+try:
+    import Queue as queue
+except ImportError:
+    import queue
 from .base import _LIB
 from .base import c_array, c_str, mx_uint, py_str
 from .base import DataIterHandle, NDArrayHandle
 from .base import check_call, ctypes2docstring
 from .ndarray import NDArray
-from .ndarray import array
+from .ndarray import array, empty
+from .recordio import MXRecordIO, unpack_img
+try:
+    import cv2
+    opencv_available = True
+except ImportError:
+    opencv_available = False
 
 
 class DataBatch(object):
@@ -308,6 +320,47 @@ def _init_data(data, allow_empty, default_name):
 
     return list(data.items())
 
+def _batch_index(idx, cursor, batch_size, num_data):
+    """Indices of the batch starting at cursor, wrapped around the end of data."""
+    end = cursor + batch_size
+    if end <= num_data:
+        return idx[cursor:end]
+    return np.concatenate((idx[cursor:num_data], idx[:end - num_data]))
+
+def _copy_batch(src, cursor, batch_size, num_data, dst, idx=None, staging=None):
+    """Copy the batch starting at cursor from numpy array src into NDArray dst.
+    Batches running over the end of data are wrapped around to the beginning,
+    without building an intermediate concatenated array.
+    When idx is given, rows are gathered through the permutation idx into
+    the preallocated numpy array staging first."""
+    if idx is not None:
+        np.take(src, _batch_index(idx, cursor, batch_size, num_data), axis=0, out=staging,
+                mode='clip')
+        dst[:] = staging
+        return
+    end = cursor + batch_size
+    if end <= num_data:
+        dst[:] = src[cursor:end]
+    else:
+        first = num_data - cursor
+        dst[:first] = src[cursor:num_data]
+        dst[first:] = src[:end - num_data]
+
+def _prefetch_batches(sources, idx, staging, cursor, batch_size, num_data, free, ready, stop):
+    """Thread entry of NDArrayIter prefetching.
+    Fill free buffer slots with the batches following cursor until the end
+    of epoch, then put None to ready."""
+    while True:
+        cursor += batch_size
+        slot = free.get()
+        if stop.is_set() or cursor >= num_data:
+            free.put(slot)
+            ready.put(None)
+            return
+        for i, src in enumerate(sources):
+            _copy_batch(src, cursor, batch_size, num_data, slot[i], idx, staging[i])
+        ready.put(slot)
+
 class NDArrayIter(DataIter):
     """NDArrayIter object in mxnet. Taking NDArray or numpy array to get dataiter.
     Parameters
@@ -319,16 +372,30 @@ class NDArrayIter(DataIter):
     batch_size: int
         Batch Size
     shuffle: bool
-        Whether to shuffle the data
+        Whether to shuffle the data. A new permutation is drawn on every reset,
+        and batches are gathered from the original arrays (which can be
+        numpy.memmap) instead of keeping a shuffled copy of them.
     last_batch_handle: 'pad', 'discard' or 'roll_over'
         How to handle the last batch
+    prefetch_buffer: int
+        Number of batches to assemble ahead on a background thread.
+        When positive, prefetch_buffer + 1 batches of NDArrays are allocated
+        once and filled in place, instead of creating new NDArrays every batch.
+    ctx: Context, optional
+        The context of the prefetch buffers, e.g. Context('cpu_pinned')
+        to speed up copies to GPU. Default to current default context.
     Note
     ----
     This iterator will pad, discard or roll over the last batch if
     the size of data does not match batch_size. Roll over is intended
     for training and can cause problems if used for prediction.
+
+    With prefetch_buffer, the NDArrays returned by getdata and getlabel are
+    recycled: they stay valid until the next call of iter_next or reset.
+    Copy them if they need to be kept longer.
     """
-    def __init__(self, data, label=None, batch_size=1, shuffle=False, last_batch_handle='pad'):
+    def __init__(self, data, label=None, batch_size=1, shuffle=False, last_batch_handle='pad',
+                 prefetch_buffer=0, ctx=None):
         # pylint: disable=W0201
 
         super(NDArrayIter, self).__init__()
@@ -336,34 +403,72 @@ class NDArrayIter(DataIter):
         self.data = _init_data(data, allow_empty=False, default_name='data')
         self.label = _init_data(label, allow_empty=True, default_name='softmax_label')
 
-        # shuffle data
-        if shuffle:
-            idx = np.arange(self.data[0][1].shape[0])
-            np.random.shuffle(idx)
-            self.data = [(k, v[idx]) for k, v in self.data]
-            self.label = [(k, v[idx]) for k, v in self.label]
-
         self.data_list = [x[1] for x in self.data] + [x[1] for x in self.label]
         self.num_source = len(self.data_list)
 
         # batching
-        if last_batch_handle == 'discard':
-            new_n = self.data_list[0].shape[0] - self.data_list[0].shape[0] % batch_size
-            data_dict = OrderedDict(self.data)
-            label_dict = OrderedDict(self.label)
-            for k, _ in self.data:
-                data_dict[k] = data_dict[k][:new_n]
-            for k, _ in self.label:
-                label_dict[k] = label_dict[k][:new_n]
-            self.data = data_dict.items()
-            self.label = label_dict.items()
         self.num_data = self.data_list[0].shape[0]
+        if last_batch_handle == 'discard':
+            self.num_data -= self.num_data % batch_size
         assert self.num_data >= batch_size, \
             "batch_size need to be smaller than data size when not padding."
         self.cursor = -batch_size
         self.batch_size = batch_size
         self.last_batch_handle = last_batch_handle
 
+        # shuffle through a permutation of indices, batches are gathered lazily
+        self.shuffle = shuffle
+        self.idx = None
+        if shuffle:
+            self.idx = np.arange(self.data_list[0].shape[0])
+            np.random.shuffle(self.idx)
+
+        # prefetching into recycled buffers
+        self.prefetch_buffer = prefetch_buffer
+        self.current_slot = None
+        self.prefetch_thread = None
+        if prefetch_buffer > 0:
+            shapes = [s for _, s in self.provide_data + self.provide_label]
+            self.staging = [None] * self.num_source
+            if shuffle:
+                self.staging = [np.empty(s, dtype=x.dtype) for s, x in zip(shapes, self.data_list)]
+            self.free_slots = queue.Queue()
+            for _ in range(prefetch_buffer + 1):
+                self.free_slots.put([empty(s, ctx) for s in shapes])
+            self.ready_slots = queue.Queue()
+            self._start_prefetch()
+
+    def __del__(self):
+        if getattr(self, 'prefetch_thread', None) is not None:
+            self._stop_prefetch()
+
+    def _start_prefetch(self):
+        """Start assembling the batches after the current cursor."""
+        self.prefetch_exhausted = False
+        self.prefetch_stop = threading.Event()
+        self.prefetch_thread = threading.Thread(
+            target=_prefetch_batches,
+            args=[self.data_list, self.idx, self.staging,
+                  self.cursor, self.batch_size, self.num_data,
+                  self.free_slots, self.ready_slots, self.prefetch_stop])
+        self.prefetch_thread.setDaemon(True)
+        self.prefetch_thread.start()
+
+    def _stop_prefetch(self):
+        """Stop the prefetching thread and return all buffers to the free list."""
+        self.prefetch_stop.set()
+        if self.current_slot is not None:
+            self.free_slots.put(self.current_slot)
+            self.current_slot = None
+        while not self.prefetch_exhausted:
+            slot = self.ready_slots.get()
+            if slot is None:
+                self.prefetch_exhausted = True
+            else:
+                self.free_slots.put(slot)
+        self.prefetch_thread.join()
+        self.prefetch_thread = None
+
     @property
     def provide_data(self):
         """The name and shape of data provided by this iterator"""
@@ -378,15 +483,35 @@ class NDArrayIter(DataIter):
     def hard_reset(self):
         """Igore roll over data and set to start"""
         self.cursor = -self.batch_size
+        if self.prefetch_thread is not None:
+            self._stop_prefetch()
+            self._start_prefetch()
 
     def reset(self):
         if self.last_batch_handle == 'roll_over' and self.cursor > self.num_data:
             self.cursor = -self.batch_size + (self.cursor%self.num_data)%self.batch_size
         else:
             self.cursor = -self.batch_size
+        if self.prefetch_thread is not None:
+            self._stop_prefetch()
+        if self.shuffle:
+            np.random.shuffle(self.idx)
+        if self.prefetch_buffer > 0:
+            self._start_prefetch()
 
     def iter_next(self):
         self.cursor += self.batch_size
+        if self.prefetch_buffer > 0:
+            if self.current_slot is not None:
+                self.free_slots.put(self.current_slot)
+                self.current_slot = None
+            if self.prefetch_exhausted:
+                return False
+            self.current_slot = self.ready_slots.get()
+            if self.current_slot is None:
+                self.prefetch_exhausted = True
+                return False
+            return True
         if self.cursor < self.num_data:
             return True
         else:
@@ -402,17 +527,26 @@ class NDArrayIter(DataIter):
     def _getdata(self, data_source):
         """Load data from underlying arrays, internal use only"""
         assert(self.cursor < self.num_data), "DataIter needs reset."
+        if self.idx is not None:
+            batch_idx = _batch_index(self.idx, self.cursor, self.batch_size, self.num_data)
+            return [array(np.take(x[1], batch_idx, axis=0)) for x in data_source]
         if self.cursor + self.batch_size <= self.num_data:
             return [array(x[1][self.cursor:self.cursor+self.batch_size]) for x in data_source]
         else:
             pad = self.batch_size - self.num_data + self.cursor
-            return [array(np.concatenate((x[1][self.cursor:], x[1][:pad]),
+            return [array(np.concatenate((x[1][self.cursor:self.num_data], x[1][:pad]),
                                          axis=0)) for x in data_source]
 
     def getdata(self):
+        if self.prefetch_buffer > 0:
+            assert self.current_slot is not None, "DataIter needs reset."
+            return self.current_slot[:len(self.data)]
         return self._getdata(self.data)
 
     def getlabel(self):
+        if self.prefetch_buffer > 0:
+            assert self.current_slot is not None, "DataIter needs reset."
+            return self.current_slot[len(self.data):]
         return self._getdata(self.label)
 
     def getpad(self):
@@ -423,6 +557,159 @@ class NDArrayIter(DataIter):
             return 0
 
 
+# state of a decoding worker process of RecordIOImageIter
+_decode_state = {}
+
+def _init_decode_worker(shared, shape, mean, scale, aug_list):
+    """Initialize a decoding worker with the shared output buffers."""
+    _decode_state['buffer'] = np.frombuffer(shared, dtype=np.float32).reshape(shape)
+    _decode_state['mean'] = mean
+    _decode_state['scale'] = scale
+    _decode_state['aug_list'] = aug_list
+
+def _decode_record(task):
+    """Decode, augment and normalize one record into the shared buffer.
+    Returns the label of the record."""
+    slot, i, record = task
+    out = _decode_state['buffer'][slot, i]
+    channels, height, width = out.shape
+    header, img = unpack_img(record, 1 if channels == 3 else 0)
+    for aug in _decode_state['aug_list']:
+        img = aug(img)
+    if img.shape[0] != height or img.shape[1] != width:
+        img = cv2.resize(img, (width, height))
+    if img.ndim == 2:
+        img = img[np.newaxis, :, :]
+    else:
+        # OpenCV stores as BGR and we want RGB
+        img = img[:, :, ::-1].transpose(2, 0, 1)
+    out[:] = img
+    out -= _decode_state['mean']
+    out *= _decode_state['scale']
+    return header.label
+
+class RecordIOImageIter(DataIter):
+    """Image data iterator over a RecordIO file, decoding in a process pool.
+    Records are read sequentially and fanned out to worker processes, which
+    decode, augment, resize and normalize them directly into shared memory.
+    Batches are returned in the order of the file.
+
+    Parameters
+    ----------
+    path_imgrec : str
+        Path to the image RecordIO file, e.g. created by tools/im2rec.py.
+    data_shape : tuple of int
+        Shape of one image (channels, height, width). Images are resized to it.
+    batch_size : int
+        Batch Size
+    mean_r, mean_g, mean_b : float
+        Mean pixel value subtracted from the R, G and B channels.
+    scale : float
+        Multiplied to the pixel values after mean subtraction.
+    aug_list : list of callable
+        Functions mapping a decoded numpy image (height, width, channels in
+        OpenCV BGR order) to an augmented one, run in the worker processes
+        before resizing. They must be picklable, e.g. module level functions.
+    num_workers : int
+        Number of decoding processes.
+    prefetch_buffer : int
+        Number of batches decoded ahead.
+    data_name : str
+        Name of the data.
+    label_name : str
+        Name of the label.
+    """
+    def __init__(self, path_imgrec, data_shape, batch_size,
+                 mean_r=0.0, mean_g=0.0, mean_b=0.0, scale=1.0, aug_list=None,
+                 num_workers=4, prefetch_buffer=4,
+                 data_name='data', label_name='softmax_label'):
+        super(RecordIOImageIter, self).__init__()
+        assert opencv_available, "RecordIOImageIter requires OpenCV"
+        assert prefetch_buffer > 0
+        data_shape = tuple(data_shape)
+        assert len(data_shape) == 3 and data_shape[0] in (1, 3), \
+            "data_shape must be (channels, height, width) with 1 or 3 channels"
+        self.batch_size = batch_size
+        self.provide_data = [(data_name, (batch_size,) + data_shape)]
+        self.provide_label = [(label_name, (batch_size,))]
+        if data_shape[0] == 3:
+            mean = np.array([mean_r, mean_g, mean_b], dtype=np.float32).reshape((3, 1, 1))
+        else:
+            mean = np.float32(mean_r)
+
+        self.record = MXRecordIO(path_imgrec, 'r')
+        shape = (prefetch_buffer, batch_size) + data_shape
+        shared = multiprocessing.RawArray(ctypes.c_float, int(np.prod(shape)))
+        self.buffer = np.frombuffer(shared, dtype=np.float32).reshape(shape)
+        self.pool = multiprocessing.Pool(num_workers, _init_decode_worker,
+                                         (shared, shape, mean, scale, aug_list or []))
+        self.free_slots = deque(range(prefetch_buffer))
+        # (slot, async result of labels, number of real images) in file order
+        self.pending = deque()
+        self.end_of_file = False
+        self.current_batch = None
+        self._submit()
+
+    def __del__(self):
+        if getattr(self, 'pool', None) is not None:
+            self.pool.terminate()
+
+    def _submit(self):
+        """Read records and submit decoding of batches into all free slots."""
+        while self.free_slots and not self.end_of_file:
+            tasks = []
+            slot = self.free_slots[0]
+            while len(tasks) < self.batch_size:
+                record = self.record.read()
+                if record is None:
+                    self.end_of_file = True
+                    break
+                tasks.append((slot, len(tasks), record))
+            if not tasks:
+                break
+            self.free_slots.popleft()
+            self.pending.append((slot, self.pool.map_async(_decode_record, tasks), len(tasks)))
+
+    def reset(self):
+        for _, result, _ in self.pending:
+            result.wait()
+        self.free_slots.extend(slot for slot, _, _ in self.pending)
+        self.pending.clear()
+        self.record.reset()
+        self.end_of_file = False
+        self._submit()
+
+    def iter_next(self):
+        if not self.pending:
+            return False
+        slot, result, num_real = self.pending.popleft()
+        label = result.get()
+        pad = self.batch_size - num_real
+        if pad:
+            self.buffer[slot, num_real:] = 0
+            label += [0] * pad
+        self.current_batch = DataBatch(data=[array(self.buffer[slot])],
+                                       label=[array(label)],
+                                       pad=pad, index=None)
+        self.free_slots.append(slot)
+        self._submit()
+        return True
+
+    def next(self):
+        if self.iter_next():
+            return self.current_batch
+        else:
+            raise StopIteration
+
+    def getdata(self):
+        return self.current_batch.data
+
+    def getlabel(self):
+        return self.current_batch.label
+
+    def getpad(self):
+        return self.current_batch.pad
+
 class MXDataIter(DataIter):
     """DataIter built in MXNet. List all the needed functions here.
     Parameters
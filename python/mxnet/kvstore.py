@@ -4,7 +4,8 @@ from __future__ import absolute_import
 
 import ctypes
 import pickle
-from .ndarray import NDArray
+import numpy as np
+from .ndarray import NDArray, empty
 from .base import _LIB
 from .base import check_call, c_array, c_str, string_types, mx_uint, py_str
 from .base import NDArrayHandle, KVStoreHandle
@@ -36,13 +37,42 @@ def _ctype_key_value(keys, vals):
         return (c_array(ctypes.c_int, c_keys), c_array(NDArrayHandle, c_vals))
 
 
-def _updater_wrapper(updater):
-    """ a wrapper for the user-defined handle """
+def _key_value_pairs(keys, vals):
+    """
+    Return a list of (key, list of NDArray) for the key-value args, for internal use
+    """
+    if isinstance(keys, int):
+        if isinstance(vals, NDArray):
+            return [(keys, [vals])]
+        return [(keys, list(vals))]
+    assert(len(keys) == len(vals))
+    pairs = []
+    for k, v in zip(keys, vals):
+        pairs += _key_value_pairs(k, v)
+    return pairs
+
+
+def _bucket_view(flat, begin, end, shape):
+    """ the part of a flat bucket array holding one key """
+    return flat[begin:end].reshape(shape)
+
+
+def _updater_wrapper(updater, bucket_layout=None):
+    """ a wrapper for the user-defined handle
+
+    A bucket key is unpacked, and the updater is called on the
+    part of the bucket belonging to each of its keys.
+    """
     def updater_handle(key, lhs_handle, rhs_handle, _):
         """ ctypes function """
         lhs = NDArray(NDArrayHandle(lhs_handle))
         rhs = NDArray(NDArrayHandle(rhs_handle))
-        updater(key, lhs, rhs)
+        if bucket_layout and key in bucket_layout:
+            for k, begin, end, shape in bucket_layout[key]:
+                updater(k, _bucket_view(lhs, begin, end, shape),
+                        _bucket_view(rhs, begin, end, shape))
+        else:
+            updater(key, lhs, rhs)
     return updater_handle
 
 
@@ -59,6 +89,19 @@ class KVStore(object):
         assert isinstance(handle, KVStoreHandle)
         self.handle = handle
         self._updater_func = None
+        # gradient bucketing, see set_bucket_size
+        self._bucket_size = 0
+        self._max_key = -1
+        # bucket key -> list of (key, begin, end, shape)
+        self._bucket_layout = {}
+        # key -> bucket key
+        self._key_bucket = {}
+        # (bucket key, contexts) -> flat staging arrays, one per device
+        self._bucket_bufs = {}
+        # bucket key -> (contexts, keys pushed since the bucket was last sent)
+        self._bucket_pending = {}
+        # (bucket key, contexts) -> keys pulled since the bucket was last fetched
+        self._bucket_served = {}
 
     def __del__(self):
         check_call(_LIB.MXKVStoreFree(self.handle))
@@ -95,7 +138,14 @@ class KVStore(object):
         >>> keys = [5, 7, 9]
         >>> kv.init(keys, [mx.nd.ones(shape)]*len(keys))
         """
-        ckeys, cvals = _ctype_key_value(key, value)
+        pairs = _key_value_pairs(key, value)
+        for k, _ in pairs:
+            if k in self._bucket_layout:
+                raise ValueError('key %d is already used by a bucket' % k)
+            self._max_key = max(self._max_key, k)
+        if self._bucket_size > 0 and not isinstance(key, int):
+            pairs = self._make_buckets(pairs)
+        ckeys, cvals = _ctype_key_value([k for k, _ in pairs], [v for _, v in pairs])
         check_call(_LIB.MXKVStoreInit(
             self.handle, mx_uint(len(ckeys)), ckeys, cvals))
 
@@ -160,7 +210,12 @@ class KVStore(object):
         [[ 4.  4.  4.]
         [ 4.  4.  4.]]
         """
-        ckeys, cvals = _ctype_key_value(key, value)
+        pairs = _key_value_pairs(key, value)
+        if self._key_bucket:
+            pairs = self._push_buckets(pairs)
+        if len(pairs) == 0:
+            return
+        ckeys, cvals = _ctype_key_value([k for k, _ in pairs], [v for _, v in pairs])
         check_call(_LIB.MXKVStorePush(
             self.handle, mx_uint(len(ckeys)), ckeys, cvals,
             ctypes.c_int(priority)))
@@ -223,10 +278,155 @@ class KVStore(object):
         [ 2.  2.  2.]]
         """
         assert(out is not None)
-        ckeys, cvals = _ctype_key_value(key, out)
-        check_call(_LIB.MXKVStorePull(
-            self.handle, mx_uint(len(ckeys)), ckeys, cvals,
-            ctypes.c_int(priority)))
+        pairs = _key_value_pairs(key, out)
+        if self._key_bucket:
+            pairs, unpack = self._pull_buckets(pairs)
+        else:
+            unpack = []
+        if len(pairs) > 0:
+            ckeys, cvals = _ctype_key_value([k for k, _ in pairs], [v for _, v in pairs])
+            check_call(_LIB.MXKVStorePull(
+                self.handle, mx_uint(len(ckeys)), ckeys, cvals,
+                ctypes.c_int(priority)))
+        for src, dst in unpack:
+            src.copyto(dst)
+
+    def set_bucket_size(self, bucket_size):
+        """Pack small keys into contiguous buckets.
+
+        Keys initialized afterwards by a list init whose values have fewer
+        than bucket_size elements are packed, in key order, into buckets
+        of at most bucket_size elements. A bucket is reduced and transferred
+        as a single key, and unpacked transparently on pull, which saves the
+        per-key overhead of many tiny arrays such as BatchNorm gamma and beta.
+
+        A bucket is sent when all of its keys have been pushed, so every key
+        of a bucket must be pushed before any of them is pulled again.
+
+        Parameters
+        ----------
+        bucket_size : int
+            Maximal number of elements in a bucket, 0 to disable bucketing.
+
+        Examples
+        --------
+        >>> kv = mx.kv.create('local')
+        >>> kv.set_bucket_size(1024)
+        >>> keys = [5, 7, 9]
+        >>> kv.init(keys, [mx.nd.ones(shape)]*len(keys))
+        >>> kv.push(keys, [mx.nd.ones(shape)*2]*len(keys))
+        >>> b = [mx.nd.zeros(shape)]*len(keys)
+        >>> kv.pull(keys, out=b)
+        >>> print b[1].asnumpy()
+        [[ 2.  2.  2.]
+        [ 2.  2.  2.]]
+        """
+        self._bucket_size = bucket_size
+
+    def _make_buckets(self, pairs):
+        """Pack the small keys of an init into buckets, return the pairs to init."""
+        out = []
+        groups = []
+        group, group_size = [], 0
+        for k, v in sorted(pairs, key=lambda x: x[0]):
+            size = int(np.prod(v[0].shape))
+            if size >= self._bucket_size:
+                out.append((k, v))
+                continue
+            if group_size + size > self._bucket_size:
+                groups.append(group)
+                group, group_size = [], 0
+            group.append((k, v[0]))
+            group_size += size
+        groups.append(group)
+        layout = {}
+        for group in groups:
+            if len(group) < 2:
+                out += [(k, [v]) for k, v in group]
+                continue
+            self._max_key += 1
+            bucket_key = self._max_key
+            members, begin = [], 0
+            for k, v in group:
+                end = begin + int(np.prod(v.shape))
+                members.append((k, begin, end, v.shape))
+                begin = end
+            value = empty((begin,))
+            for (k, b, e, shape), (_, v) in zip(members, group):
+                v.copyto(_bucket_view(value, b, e, shape))
+                self._key_bucket[k] = bucket_key
+            self._bucket_layout[bucket_key] = members
+            layout[bucket_key] = members
+            out.append((bucket_key, [value]))
+        if layout and 'dist' in self.type and self.rank == 0:
+            # the servers unpack buckets for the optimizer
+            self._send_command_to_servers(1, pickle.dumps(layout, 0))
+        return out
+
+    def _bucket_buffers(self, bucket_key, vals):
+        """Return the flat staging arrays of a bucket on the devices of vals."""
+        ctxs = tuple(str(v.context) for v in vals)
+        bufs = self._bucket_bufs.get((bucket_key, ctxs))
+        if bufs is None:
+            size = self._bucket_layout[bucket_key][-1][2]
+            bufs = [empty((size,), v.context) for v in vals]
+            self._bucket_bufs[(bucket_key, ctxs)] = bufs
+        return ctxs, bufs
+
+    def _bucket_views(self, key, bufs):
+        """Return the views of key in the staging arrays of its bucket."""
+        for k, begin, end, shape in self._bucket_layout[self._key_bucket[key]]:
+            if k == key:
+                return [_bucket_view(b, begin, end, shape) for b in bufs]
+
+    def _push_buckets(self, pairs):
+        """Stage bucketed keys, return the pairs to push."""
+        out = []
+        for k, vals in pairs:
+            if k not in self._key_bucket:
+                out.append((k, vals))
+                continue
+            bucket_key = self._key_bucket[k]
+            ctxs, bufs = self._bucket_buffers(bucket_key, vals)
+            pending_ctxs, pending = self._bucket_pending.get(bucket_key, (ctxs, set()))
+            if pending_ctxs != ctxs:
+                raise ValueError('keys of bucket %d are pushed from different devices'
+                                 % bucket_key)
+            for v, view in zip(vals, self._bucket_views(k, bufs)):
+                v.copyto(view)
+            pending.add(k)
+            if len(pending) == len(self._bucket_layout[bucket_key]):
+                del self._bucket_pending[bucket_key]
+                for served in self._bucket_served:
+                    if served[0] == bucket_key:
+                        self._bucket_served[served] = None
+                out.append((bucket_key, bufs))
+            else:
+                self._bucket_pending[bucket_key] = (ctxs, pending)
+        return out
+
+    def _pull_buckets(self, pairs):
+        """Return the pairs to pull and the (view, out) copies unpacking buckets."""
+        out, unpack = [], []
+        for k, vals in pairs:
+            if k not in self._key_bucket:
+                out.append((k, vals))
+                continue
+            bucket_key = self._key_bucket[k]
+            if bucket_key in self._bucket_pending:
+                raise ValueError('key %d is pulled before all keys of its bucket '
+                                 'were pushed' % k)
+            ctxs, bufs = self._bucket_buffers(bucket_key, vals)
+            served = self._bucket_served.get((bucket_key, ctxs))
+            if served is None or k in served:
+                # fetch the bucket once per round of pulls
+                served = set()
+                if not any(b is bufs for _, b in out):
+                    out.append((bucket_key, bufs))
+            served.add(k)
+            self._bucket_served[(bucket_key, ctxs)] = served
+            unpack += zip(self._bucket_views(k, bufs), vals)
+        return out, unpack
 
     def set_optimizer(self, optimizer):
         """Register an optimizer to the store
@@ -324,7 +524,7 @@ class KVStore(object):
         """
         _updater_proto = ctypes.CFUNCTYPE(
             None, ctypes.c_int, NDArrayHandle, NDArrayHandle, ctypes.c_void_p)
-        self._updater_func = _updater_proto(_updater_wrapper(updater))
+        self._updater_func = _updater_proto(_updater_wrapper(updater, self._bucket_layout))
         check_call(_LIB.MXKVStoreSetUpdater(self.handle, self._updater_func, None))
 
 
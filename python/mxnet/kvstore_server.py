@@ -38,6 +38,9 @@ class KVStoreServer(object):
                 except:
                     raise
                 self.kvstore.set_optimizer(optimizer)
+            elif cmd_id == 1:
+                # layout of the buckets packing small keys, see KVStore.set_bucket_size
+                self.kvstore._bucket_layout.update(pickle.loads(cmd_body))
             else:
                 print ("server %d, unknown command (%d, %s)" % (
                     self.kvstore.rank, cmd_id, cmd_body))
@@ -5,6 +5,11 @@
 from __future__ import absolute_import
 from . import ndarray
 import numpy
+import threading
+try:
+    import Queue as queue
+except ImportError:
+    import queue
 
 def check_label_shapes(labels, preds, shape=0):
     """Check to see if the two arrays are the same size."""
@@ -18,8 +23,26 @@ def check_label_shapes(labels, preds, shape=0):
         raise ValueError("Shape of labels {} does not match shape of "
                          "predictions {}".format(label_shape, pred_shape))
 
+def _as_label(label, pred):
+    """Move label to the device of pred, with the shape of pred."""
+    if label.shape != pred.shape and label.size == pred.size:
+        label = label.reshape(pred.shape)
+    check_label_shapes(label, pred, shape=1)
+    if str(label.context) != str(pred.context):
+        label = label.copyto(pred.context)
+    return label
+
 class EvalMetric(object):
-    """Base class of all evaluation metrics."""
+    """Base class of all evaluation metrics.
+
+    Subclasses can add statistics computed on device with add_on_device, which
+    does not wait for the computation. Each value is folded into the float
+    sum_metric a few values later, when it is most likely computed already, or
+    when get is called, so that the sum of a large epoch does not lose the
+    precision of float32.
+    """
+    # number of values added on device not folded into sum_metric yet
+    max_pending = 16
 
     def __init__(self, name):
         self.name = name
@@ -38,10 +61,34 @@ class EvalMetric(object):
         """
         raise NotImplementedError()
 
+    def add_on_device(self, value):
+        """Add value to sum_metric asynchronously.
+
+        Parameters
+        ----------
+        value : NDArray
+            An NDArray of shape (1,), the statistic of one batch.
+        """
+        self.device_pending.append(value)
+        if len(self.device_pending) > self.max_pending:
+            self.sum_metric += float(self.device_pending.pop(0).asscalar())
+
+    def sync(self):
+        """Fold the statistics added on device into sum_metric."""
+        for value in self.device_pending:
+            self.sum_metric += float(value.asscalar())
+        self.device_pending = []
+
+    def wait(self):
+        """Wait for the statistics added on device to be computed."""
+        for value in self.device_pending:
+            value.wait_to_read()
+
     def reset(self):
         """Clear the internal statistics to initial state."""
         self.num_inst = 0
         self.sum_metric = 0.0
+        self.device_pending = []
 
     def get(self):
         """Get the current evaluation result.
@@ -53,11 +100,89 @@ class EvalMetric(object):
         value : float
            Value of the evaluation.
         """
+        self.sync()
         if self.num_inst == 0:
             return (self.name, float('nan'))
         else:
             return (self.name, self.sum_metric / self.num_inst)
 
+def _async_metric_worker(metric, tasks, errors):
+    """Thread entry of AsyncMetric, which it does not reference so that a
+    dropped AsyncMetric is collected and stops the thread."""
+    while True:
+        item = tasks.get()
+        if item is None:
+            tasks.task_done()
+            break
+        try:
+            metric.update(*item)
+        except Exception as err: # pylint: disable=broad-except
+            errors.append(err)
+        tasks.task_done()
+
+class AsyncMetric(EvalMetric):
+    """Update a metric on a background thread.
+    update only copies labels and predictions, so that the caller can go on
+    with the next batch while the metric is computed. get and reset wait for
+    all pending updates.
+
+    The thread is a daemon, stopped by close or when the AsyncMetric is
+    collected.
+
+    Parameters
+    ----------
+    metric : EvalMetric
+        The metric to update.
+    """
+    def __init__(self, metric):
+        self.metric = metric
+        self.queue = queue.Queue()
+        self.errors = []
+        self.thread = threading.Thread(target=_async_metric_worker,
+                                       args=(metric, self.queue, self.errors))
+        self.thread.daemon = True
+        self.thread.start()
+        super(AsyncMetric, self).__init__(metric.name)
+
+    def _wait(self):
+        """Wait for pending updates and raise their error if any."""
+        self.queue.join()
+        if self.errors:
+            err = self.errors[0]
+            del self.errors[:]
+            raise err
+
+    def update(self, labels, preds):
+        check_label_shapes(labels, preds)
+        # outputs and labels are overwritten by the next batch, copy them
+        labels = [label.copyto(label.context) for label in labels]
+        preds = [pred.copyto(pred.context) for pred in preds]
+        self.queue.put((labels, preds))
+
+    def wait(self):
+        self._wait()
+        self.metric.wait()
+
+    def reset(self):
+        self._wait()
+        self.metric.reset()
+
+    def get(self):
+        self._wait()
+        return self.metric.get()
+
+    def close(self):
+        """Wait for pending updates and stop the background thread."""
+        if self.thread is None:
+            return
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+
+    def __del__(self):
+        if getattr(self, 'thread', None) is not None:
+            self.close()
+
 ########################
 # CLASSIFICATION METRICS
 ########################
@@ -71,14 +196,14 @@ class Accuracy(EvalMetric):
     def update(self, labels, preds):
         check_label_shapes(labels, preds)
 
-        for i in range(len(labels)):
-            pred_label = ndarray.argmax_channel(preds[i]).asnumpy().astype('int32')
-            label = labels[i].asnumpy().astype('int32')
-
-            check_label_shapes(label, pred_label)
+        for label, pred in zip(labels, preds):
+            pred_label = ndarray.argmax_channel(pred)
+            label = _as_label(label, pred_label)
 
-            self.sum_metric += (pred_label.flat == label.flat).sum()
-            self.num_inst += len(pred_label.flat)
+            # number of mismatches is the sum of |sign(pred - label)|
+            mismatch = ndarray.sum(ndarray.abs(ndarray.sign(pred_label - label)))
+            self.add_on_device(float(pred_label.size) - mismatch)
+            self.num_inst += int(pred_label.size)
 
 class F1(EvalMetric):
     """Calculate the F1 score of a binary classification problem."""
@@ -98,15 +223,9 @@ class F1(EvalMetric):
             if len(numpy.unique(label)) > 2:
                 raise ValueError("F1 currently only supports binary classification.")
 
-            true_positives, false_positives, false_negatives = 0., 0., 0.
-
-            for y_pred, y_true in zip(pred_label, label):
-                if y_pred == 1 and y_true == 1:
-                    true_positives += 1.
-                elif y_pred == 1 and y_true == 0:
-                    false_positives += 1.
-                elif y_pred == 0 and y_true == 1:
-                    false_negatives += 1.
+            true_positives = float(numpy.sum((pred_label == 1) & (label == 1)))
+            false_positives = float(numpy.sum((pred_label == 1) & (label == 0)))
+            false_negatives = float(numpy.sum((pred_label == 0) & (label == 1)))
 
             if true_positives + false_positives > 0:
                 precision = true_positives / (true_positives + false_positives)
@@ -140,16 +259,10 @@ class MAE(EvalMetric):
         check_label_shapes(labels, preds)
 
         for label, pred in zip(labels, preds):
-            label = label.asnumpy()
-            pred = pred.asnumpy()
+            label = _as_label(label, pred)
 
-            if len(label.shape) == 1:
-                label = label.reshape(label.shape[0], 1)
-
-            check_label_shapes(label, pred, shape=1)
-
-            self.sum_metric += numpy.abs(label - pred).sum()
-            self.num_inst += numpy.prod(label.shape)
+            self.add_on_device(ndarray.sum(ndarray.abs(label - pred)))
+            self.num_inst += int(pred.size)
 
 class MSE(EvalMetric):
     """Calculate Mean Squared Error loss"""
@@ -160,16 +273,10 @@ class MSE(EvalMetric):
         check_label_shapes(labels, preds)
 
         for label, pred in zip(labels, preds):
-            label = label.asnumpy()
-            pred = pred.asnumpy()
-
-            if len(label.shape) == 1:
-                label = label.reshape(label.shape[0], 1)
+            label = _as_label(label, pred)
 
-            check_label_shapes(label, pred, shape=1)
-
-            self.sum_metric += ((label - pred)**2.0).mean()
-            self.num_inst += numpy.prod(label.shape)
+            self.add_on_device(ndarray.sum(ndarray.square(label - pred)))
+            self.num_inst += int(pred.size)
 
 class RMSE(EvalMetric):
     """Calculate Root Mean Squred Error loss"""
@@ -180,15 +287,10 @@ class RMSE(EvalMetric):
         check_label_shapes(labels, preds)
 
         for label, pred in zip(labels, preds):
-            label = label.asnumpy()
-            pred = pred.asnumpy()
-
-            if len(label.shape) == 1:
-                label = label.reshape(label.shape[0], 1)
-
-            check_label_shapes(label, pred, shape=1)
+            label = _as_label(label, pred)
 
-            self.sum_metric += numpy.sqrt(((label - pred)**2.0).mean())
+            self.add_on_device(ndarray.sqrt(
+                ndarray.sum(ndarray.square(label - pred)) / float(pred.size)))
         self.num_inst += 1
 
 class Torch(EvalMetric):
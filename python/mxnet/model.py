@@ -4,6 +4,8 @@
 from __future__ import absolute_import
 
 import numpy as np
+import os
+import json
 import time
 import logging
 from . import io
@@ -14,7 +16,7 @@ from . import metric
 from . import kvstore as kvs
 from .context import Context, cpu
 from .initializer import Uniform
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 from .optimizer import get_updater
 from .executor_manager import DataParallelExecutorManager, _check_arguments, _load_data
 
@@ -78,42 +80,79 @@ def _create_kvstore(kvstore, num_device, arg_params):
 def _initialize_kvstore(kvstore, param_arrays, arg_params, param_names,
                         update_on_kvstore):
     """ Initialize kvstore"""
-    for idx in range(len(param_arrays)):
-        param_on_devs = param_arrays[idx]
-        kvstore.init(idx, arg_params[param_names[idx]])
-
-        if update_on_kvstore:
+    # init all keys in one call, so that the kvstore can bucket small ones
+    kvstore.init(list(range(len(param_arrays))),
+                 [arg_params[name] for name in param_names[:len(param_arrays)]])
+    if update_on_kvstore:
+        for idx, param_on_devs in enumerate(param_arrays):
             kvstore.pull(idx, param_on_devs, priority=-idx)
 
 def _update_params_on_kvstore(param_arrays, grad_arrays, kvstore):
     """ Perform update of param_arrays from grad_arrays on kvstore."""
-    for index, pair in enumerate(zip(param_arrays, grad_arrays)):
-        arg_list, grad_list = pair
+    # push all gradients before pulling, so that bucketed keys are complete
+    for index, grad_list in enumerate(grad_arrays):
         if grad_list[0] is None:
             continue
         # push gradient, priority is negative index
         kvstore.push(index, grad_list, priority=-index)
+    for index, pair in enumerate(zip(param_arrays, grad_arrays)):
+        arg_list, grad_list = pair
+        if grad_list[0] is None:
+            continue
         # pull back the weights
         kvstore.pull(index, arg_list, priority=-index)
 
 def _update_params(param_arrays, grad_arrays, updater, num_device,
                    kvstore=None):
     """ Perform update of param_arrays from grad_arrays not on kvstore."""
-    for index, pair in enumerate(zip(param_arrays, grad_arrays)):
-        arg_list, grad_list = pair
-        if grad_list[0] is None:
-            continue
-        if kvstore:
+    if kvstore:
+        # push all gradients before pulling, so that bucketed keys are complete
+        for index, grad_list in enumerate(grad_arrays):
+            if grad_list[0] is None:
+                continue
             # push gradient, priority is negative index
             kvstore.push(index, grad_list, priority=-index)
+        for index, grad_list in enumerate(grad_arrays):
+            if grad_list[0] is None:
+                continue
             # pull back the sum gradients, to the same locations.
             kvstore.pull(index, grad_list, priority=-index)
+    indices, grads, weights = [], [], []
+    for index, pair in enumerate(zip(param_arrays, grad_arrays)):
+        arg_list, grad_list = pair
+        if grad_list[0] is None:
+            continue
         for k, p in enumerate(zip(arg_list, grad_list)):
             # faked an index here, to make optimizer create diff
             # state for the same index but on diff devs, TODO(mli)
             # use a better solution latter
             w, g = p
-            updater(index*num_device+k, g, w)
+            indices.append(index*num_device+k)
+            grads.append(g)
+            weights.append(w)
+    # update all parameters on all devices in one grouped call
+    updater(indices, grads, weights)
+
+def _need_phase_sync(callbacks):
+    """Whether one of the batch end callbacks asks to wait for each phase."""
+    if callbacks is None:
+        return False
+    if not isinstance(callbacks, list):
+        callbacks = [callbacks]
+    return any(getattr(call, 'sync_phases', False) for call in callbacks)
+
+def _wait_arrays(arrays):
+    """Wait for all the NDArrays in a list of per-device lists."""
+    for array_list in arrays:
+        for array in array_list:
+            if array is not None:
+                array.wait_to_read()
+
+def _end_phase(batch_timing, phase, phase_tic):
+    """Record the time since phase_tic as the time of phase and return now."""
+    toc = time.time()
+    batch_timing[phase] = toc - phase_tic
+    return toc
 
 def _train_multi_device(symbol, ctx, arg_names, param_names, aux_names,
                         arg_params, aux_params,
@@ -122,7 +161,8 @@ def _train_multi_device(symbol, ctx, arg_names, param_names, aux_names,
                         train_data, eval_data=None, eval_metric=None,
                         epoch_end_callback=None, batch_end_callback=None,
                         logger=None, work_load_list=None, monitor=None,
-                        eval_batch_end_callback=None, sym_gen=None):
+                        eval_batch_end_callback=None, sym_gen=None,
+                        metric_period=1, async_metric=False):
     """Internal training function on multiple devices.
     This function will also work for single device as well.
     Parameters
@@ -174,12 +214,18 @@ def _train_multi_device(symbol, ctx, arg_names, param_names, aux_names,
     monitor : Monitor, optional
         Monitor installed to executor,
         for monitoring outputs, weights, and gradients for debugging.
+    metric_period : int, optional
+        Update the training metric every metric_period batches.
+    async_metric : bool, optional
+        Whether to update the metric on a background thread.
     Notes
     -----
     - This function will inplace update the NDArrays in arg_params and aux_states.
     """
     if logger is None:
         logger = logging
+    if async_metric:
+        eval_metric = metric.AsyncMetric(eval_metric)
     executor_manager = DataParallelExecutorManager(symbol=symbol,
                                                    sym_gen=sym_gen,
                                                    ctx=ctx,
@@ -207,6 +253,10 @@ def _train_multi_device(symbol, ctx, arg_names, param_names, aux_names,
     if update_on_kvstore:
         kvstore.set_optimizer(optimizer)
 
+    # callbacks such as Telemetry ask to wait for each phase, so that the
+    # phase times are not only the time to push the operations
+    sync_phases = _need_phase_sync(batch_end_callback)
+
     # Now start training
     train_data.reset()
     for epoch in range(begin_epoch, end_epoch):
@@ -217,14 +267,21 @@ def _train_multi_device(symbol, ctx, arg_names, param_names, aux_names,
         # Iterate over training data.
         while True:
             do_reset = True
+            phase_tic = time.time()
             for data_batch in train_data:
                 executor_manager.load_data_batch(data_batch)
+                # seconds spent in each phase of this batch
+                batch_timing = {}
+                phase_tic = _end_phase(batch_timing, 'data_wait', phase_tic)
 
                 if monitor is not None:
                     monitor.tic()
 
                 executor_manager.forward(is_train=True)
                 executor_manager.backward()
+                if sync_phases:
+                    _wait_arrays(executor_manager.grad_arrays)
+                phase_tic = _end_phase(batch_timing, 'forward_backward', phase_tic)
 
                 if update_on_kvstore:
                     _update_params_on_kvstore(executor_manager.param_arrays,
@@ -236,12 +293,21 @@ def _train_multi_device(symbol, ctx, arg_names, param_names, aux_names,
                                    updater=updater,
                                    num_device=len(ctx),
                                    kvstore=kvstore)
+                if sync_phases:
+                    _wait_arrays(executor_manager.param_arrays)
+                phase_tic = _end_phase(batch_timing, 'update', phase_tic)
 
                 if monitor is not None:
                     monitor.toc_print()
+                    # the time spent printing the stats is not part of any phase
+                    phase_tic = time.time()
 
                 # evaluate at end, so we can lazy copy
-                executor_manager.update_metric(eval_metric, data_batch.label)
+                if nbatch % metric_period == 0:
+                    executor_manager.update_metric(eval_metric, data_batch.label)
+                    if sync_phases:
+                        eval_metric.wait()
+                phase_tic = _end_phase(batch_timing, 'metric', phase_tic)
 
                 nbatch += 1
                 # batch callback (for print purpose)
@@ -256,6 +322,9 @@ def _train_multi_device(symbol, ctx, arg_names, param_names, aux_names,
                     else:
                         batch_end_callback(batch_end_params)
 
+                # the time spent in the callbacks is not part of any phase
+                phase_tic = time.time()
+
                 # this epoch is done possibly earlier
                 if epoch_size is not None and nbatch >= epoch_size:
                     do_reset = False
@@ -269,6 +338,10 @@ def _train_multi_device(symbol, ctx, arg_names, param_names, aux_names,
             if epoch_size is None or nbatch >= epoch_size:
                 break
 
+        if monitor is not None:
+            # stats still in flight with async_stats
+            monitor.flush_print()
+
         name, value = eval_metric.get()
         logger.info('Epoch[%d] Train-%s=%f', epoch, name, value)
         toc = time.time()
@@ -305,10 +378,36 @@ def _train_multi_device(symbol, ctx, arg_names, param_names, aux_names,
             name, value = eval_metric.get()
             logger.info('Epoch[%d] Validation-%s=%f', epoch, name, value)
     # end of all epochs
+    if async_metric:
+        eval_metric.close()
     return
 
 
-def save_checkpoint(prefix, epoch, symbol, arg_params, aux_params):
+def _param_file_name(prefix, epoch, nbatch=None):
+    """Name of the parameter file of a checkpoint, taken after nbatch batches
+    of epoch for mid-epoch checkpoints."""
+    if nbatch is None:
+        return '%s-%04d.params' % (prefix, epoch)
+    return '%s-%04d-%06d.params' % (prefix, epoch, nbatch)
+
+
+def _load_delta(param_name):
+    """Load the parameters of a checkpoint saved with delta writes.
+    The manifest param_name.json maps each parameter to the file holding
+    its latest value."""
+    with open(param_name + '.json') as fin:
+        manifest = json.load(fin)['arrays']
+    dirname = os.path.dirname(param_name)
+    files = {}
+    save_dict = {}
+    for key, fname in manifest.items():
+        if fname not in files:
+            files[fname] = nd.load(os.path.join(dirname, fname))
+        save_dict[key] = files[fname][key]
+    return save_dict
+
+
+def save_checkpoint(prefix, epoch, symbol, arg_params, aux_params, mmap=False):
     """Checkpoint the model data into file.
     Parameters
     ----------
@@ -322,6 +421,9 @@ def save_checkpoint(prefix, epoch, symbol, arg_params, aux_params):
         Model parameter, dict of name to NDArray of net's weights.
     aux_params : dict of str to NDArray
         Model parameter, dict of name to NDArray of net's auxiliary states.
+    mmap : bool, optional
+        Save the parameters with nd.save_mmap, so that they can be loaded
+        lazily with load_checkpoint(..., lazy=True).
     Notes
     -----
     - ``prefix-symbol.json`` will be saved for symbol.
@@ -330,12 +432,15 @@ def save_checkpoint(prefix, epoch, symbol, arg_params, aux_params):
     symbol.save('%s-symbol.json' % prefix)
     save_dict = {('arg:%s' % k) : v for k, v in arg_params.items()}
     save_dict.update({('aux:%s' % k) : v for k, v in aux_params.items()})
-    param_name = '%s-%04d.params' % (prefix, epoch)
-    nd.save(param_name, save_dict)
+    param_name = _param_file_name(prefix, epoch)
+    if mmap:
+        nd.save_mmap(param_name, save_dict)
+    else:
+        nd.save(param_name, save_dict)
     logging.info('Saved checkpoint to \"%s\"', param_name)
 
 
-def load_checkpoint(prefix, epoch):
+def load_checkpoint(prefix, epoch, lazy=False, names=None, ctx=None, nbatch=None):
     """Load model checkpoint from file.
     Parameters
     ----------
@@ -343,6 +448,17 @@ def load_checkpoint(prefix, epoch):
         Prefix of model name.
     epoch : int
         Epoch number of model we would like to load.
+    lazy : bool, optional
+        Map the parameters saved with save_checkpoint(..., mmap=True) instead
+        of reading them, each parameter is read when first accessed.
+        Without lazy, such parameters are all read when loading.
+    names : list of str, optional
+        Names of the parameters to load, all of them by default.
+    ctx : Context, optional
+        The context the parameters saved with mmap=True are created on.
+    nbatch : int, optional
+        Load the mid-epoch checkpoint taken after nbatch batches of epoch,
+        see callback.AsyncCheckpoint.
     Returns
     -------
     symbol : Symbol
@@ -357,15 +473,34 @@ def load_checkpoint(prefix, epoch):
     - parameters will be loaded from ``prefix-epoch.params``.
     """
     symbol = sym.load('%s-symbol.json' % prefix)
-    save_dict = nd.load('%s-%04d.params' % (prefix, epoch))
-    arg_params = {}
-    aux_params = {}
-    for k, v in save_dict.items():
+    param_name = _param_file_name(prefix, epoch, nbatch)
+    if lazy:
+        save_dict = nd.load_mmap(param_name, ctx=ctx)
+    elif os.path.exists(param_name + '.json'):
+        save_dict = _load_delta(param_name)
+    elif nd._is_mmap_file(param_name): # pylint: disable=protected-access
+        # saved with mmap=True, the arrays are read when selected below
+        save_dict = nd.load_mmap(param_name, ctx=ctx)
+    else:
+        save_dict = nd.load(param_name)
+    arg_names = {}
+    aux_names = {}
+    for k in save_dict.keys():
         tp, name = k.split(':', 1)
+        if names is not None and name not in names:
+            continue
         if tp == 'arg':
-            arg_params[name] = v
+            arg_names[name] = k
         if tp == 'aux':
-            aux_params[name] = v
+            aux_names[name] = k
+    if names is not None:
+        missing = [name for name in names if name not in arg_names and name not in aux_names]
+        if missing:
+            raise ValueError('Cannot find %s in %s' % (', '.join(missing), param_name))
+    if lazy:
+        return (symbol, save_dict.select(arg_names), save_dict.select(aux_names))
+    arg_params = {name : save_dict[k] for name, k in arg_names.items()}
+    aux_params = {name : save_dict[k] for name, k in aux_names.items()}
     return (symbol, arg_params, aux_params)
 
 
@@ -402,6 +537,9 @@ class FeedForward(BASE_ESTIMATOR):
         contain extra parameters than needed.
     begin_epoch : int, optional
         The begining training epoch.
+    pred_cache_size : int, optional
+        Maximum number of executors kept by predict and score, one for each
+        distinct set of input shapes. The executors share the parameters.
     **kwargs : dict
         The additional keyword arguments passed to optimizer.
     """
@@ -412,6 +550,7 @@ class FeedForward(BASE_ESTIMATOR):
                  arg_params=None, aux_params=None,
                  allow_extra_params=False,
                  begin_epoch=0,
+                 pred_cache_size=4,
                  **kwargs):
 
         if isinstance(symbol, sym.Symbol):
@@ -445,7 +584,11 @@ class FeedForward(BASE_ESTIMATOR):
         self.initializer = initializer
         self.numpy_batch_size = numpy_batch_size
         # internal helper state
+        self.pred_cache_size = pred_cache_size
         self._pred_exec = None
+        # executors of predict by input shapes, least recently used first
+        self._pred_execs = OrderedDict()
+        self._pred_cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
         self.begin_epoch = begin_epoch
 
     def _check_arguments(self):
@@ -508,22 +651,55 @@ class FeedForward(BASE_ESTIMATOR):
     def __getstate__(self):
         this = self.__dict__.copy()
         this['_pred_exec'] = None
+        this['_pred_execs'] = OrderedDict()
         return this
 
     def __setstate__(self, state):
         self.__dict__.update(state)
+        # models pickled before the predict executors were cached
+        self.__dict__.setdefault('pred_cache_size', 4)
+        self.__dict__.setdefault('_pred_execs', OrderedDict())
+        self.__dict__.setdefault('_pred_cache_stats', {'hits': 0, 'misses': 0, 'evictions': 0})
 
     def _init_predictor(self, input_shapes):
-        """Initialize the predictor module for running prediction."""
-        if self._pred_exec is not None:
-            return
-        # for now only use the first device
-        pred_exec = self.symbol.simple_bind(
-            self.ctx[0], grad_req='null', **dict(input_shapes))
-        pred_exec.copy_params_from(self.arg_params, self.aux_params)
-
-        _check_arguments(self.symbol)
+        """Return the executor for running prediction on input_shapes.
+        Executors are cached by input shapes, a new one is reshaped from
+        the most recently used one so that they all share the parameters."""
+        key = tuple(sorted((name, tuple(shape)) for name, shape in input_shapes))
+        pred_exec = self._pred_execs.pop(key, None)
+        if pred_exec is not None:
+            self._pred_cache_stats['hits'] += 1
+        else:
+            self._pred_cache_stats['misses'] += 1
+            if self._pred_execs:
+                base = self._pred_execs[next(reversed(self._pred_execs))]
+                pred_exec = base.reshape(partial_shaping=True, allow_up_sizing=True,
+                                         **dict(input_shapes))
+            else:
+                # for now only use the first device
+                pred_exec = self.symbol.simple_bind(
+                    self.ctx[0], grad_req='null', **dict(input_shapes))
+                pred_exec.copy_params_from(self.arg_params, self.aux_params)
+                _check_arguments(self.symbol)
+            while self._pred_execs and len(self._pred_execs) >= self.pred_cache_size:
+                self._pred_execs.popitem(last=False)
+                self._pred_cache_stats['evictions'] += 1
+        self._pred_execs[key] = pred_exec
         self._pred_exec = pred_exec
+        return pred_exec
+
+    def predictor_cache_stats(self):
+        """Return the hits, misses and evictions of the executor cache of predict.
+
+        Returns
+        -------
+        stats : dict of str to int
+            Number of calls that found an executor for their input shapes,
+            that had to create one, and of executors dropped from the cache.
+        """
+        stats = dict(self._pred_cache_stats)
+        stats['size'] = len(self._pred_execs)
+        return stats
 
     def _init_iter(self, X, y, is_train):
         """Initialize the iterator given input."""
@@ -588,10 +764,10 @@ class FeedForward(BASE_ESTIMATOR):
             X.reset()
         data_shapes = X.provide_data
         data_names = [x[0] for x in data_shapes]
-        self._init_predictor(data_shapes)
+        pred_exec = self._init_predictor(data_shapes)
         batch_size = X.batch_size
-        data_arrays = [self._pred_exec.arg_dict[name] for name in data_names]
-        output_list = [[] for _ in range(len(self._pred_exec.outputs))]
+        data_arrays = [pred_exec.arg_dict[name] for name in data_names]
+        output_list = [[] for _ in range(len(pred_exec.outputs))]
         if return_data:
             data_list = [[] for _ in X.provide_data]
             label_list = [[] for _ in X.provide_label]
@@ -602,12 +778,22 @@ class FeedForward(BASE_ESTIMATOR):
                 break
             i += 1
 
-            _load_data(batch, data_arrays)
-            self._pred_exec.forward(is_train=False)
             padded = batch.pad
             real_size = batch_size - padded
+            if padded > 0:
+                # run the trailing partial batch without the padding
+                last_exec = self._init_predictor(
+                    [(name, (real_size,) + tuple(shape[1:])) for name, shape in data_shapes])
+                for name, x in zip(data_names, batch.data):
+                    x[0:real_size].copyto(last_exec.arg_dict[name])
+                last_exec.forward(is_train=False)
+                outputs = last_exec.outputs
+            else:
+                _load_data(batch, data_arrays)
+                pred_exec.forward(is_train=False)
+                outputs = pred_exec.outputs
 
-            for o_list, o_nd in zip(output_list, self._pred_exec.outputs):
+            for o_list, o_nd in zip(output_list, outputs):
                 o_list.append(o_nd[0:real_size].asnumpy())
 
             if return_data:
@@ -631,6 +817,65 @@ class FeedForward(BASE_ESTIMATOR):
         else:
             return outputs
 
+    def predict_iter(self, X, num_batch=None, reset=True, out=None):
+        """Run the prediction and yield the outputs of each batch, always only use one device.
+        The outputs of a batch are copied to the host while the next batch is
+        computed, and the padding of the last batch is removed.
+        Parameters
+        ----------
+        X : mxnet.DataIter
+        num_batch : int or None
+            the number of batch to run. Go though all batches if None
+        out : numpy.ndarray or list of numpy.ndarray, optional
+            Preallocated arrays with one row per sample, one for each output,
+            for instance numpy.memmap. The outputs are copied into their rows
+            without intermediate host arrays.
+        Returns
+        -------
+        y : generator of list of numpy.ndarray
+            The outputs of each batch, views of out if out is given.
+        """
+        X = self._init_iter(X, None, is_train=False)
+        if reset:
+            X.reset()
+        data_names = [x[0] for x in X.provide_data]
+        pred_exec = self._init_predictor(X.provide_data)
+        data_arrays = [pred_exec.arg_dict[name] for name in data_names]
+        if out is not None and not isinstance(out, list):
+            out = [out]
+        # two sets of host buffers, so the copy of a batch overlaps the
+        # computation of the next one
+        host_outputs = [[nd.empty(o.shape, cpu(), dtype=o.dtype) for o in pred_exec.outputs]
+                        for _ in range(2)]
+        offset = 0
+        pending = None
+        for i, batch in enumerate(X):
+            if num_batch is not None and i == num_batch:
+                break
+            _load_data(batch, data_arrays)
+            pred_exec.forward(is_train=False)
+            buffers = host_outputs[i % 2]
+            for o_nd, buf in zip(pred_exec.outputs, buffers):
+                o_nd.copyto(buf)
+            if pending is not None:
+                yield self._collect_outputs(pending[0], pending[1], out, offset)
+                offset += pending[1]
+            pending = (buffers, X.batch_size - batch.pad)
+        if pending is not None:
+            yield self._collect_outputs(pending[0], pending[1], out, offset)
+
+    @staticmethod
+    def _collect_outputs(buffers, real_size, out, offset):
+        """Copy the first real_size rows of buffers into numpy arrays, or into out from offset."""
+        if out is None:
+            return [buf[0:real_size].asnumpy() for buf in buffers]
+        outputs = []
+        for buf, dst in zip(buffers, out):
+            if offset + real_size > dst.shape[0]:
+                raise ValueError('out has %d rows, too few for the outputs' % dst.shape[0])
+            outputs.append(buf[0:real_size].asnumpy(out=dst[offset:offset + real_size]))
+        return outputs
+
     def score(self, X, eval_metric='acc', num_batch=None, batch_end_callback=None, reset=True):
         """Run the model on X and calculate the score with eval_metric
         Parameters
@@ -655,15 +900,15 @@ class FeedForward(BASE_ESTIMATOR):
 
         data_shapes = X.provide_data
         data_names = [x[0] for x in data_shapes]
-        self._init_predictor(data_shapes)
-        data_arrays = [self._pred_exec.arg_dict[name] for name in data_names]
+        pred_exec = self._init_predictor(data_shapes)
+        data_arrays = [pred_exec.arg_dict[name] for name in data_names]
 
         for i, batch in enumerate(X):
             if num_batch is not None and i == num_batch:
                 break
             _load_data(batch, data_arrays)
-            self._pred_exec.forward(is_train=False)
-            eval_metric.update(batch.label, self._pred_exec.outputs)
+            pred_exec.forward(is_train=False)
+            eval_metric.update(batch.label, pred_exec.outputs)
 
             if batch_end_callback != None:
                 batch_end_params = BatchEndParam(epoch=0,
@@ -680,7 +925,8 @@ class FeedForward(BASE_ESTIMATOR):
 
     def fit(self, X, y=None, eval_data=None, eval_metric='acc',
             epoch_end_callback=None, batch_end_callback=None, kvstore='local', logger=None,
-            work_load_list=None, monitor=None, eval_batch_end_callback=None):
+            work_load_list=None, monitor=None, eval_batch_end_callback=None,
+            metric_period=1, async_metric=False):
         """Fit the model.
         Parameters
         ----------
@@ -719,6 +965,12 @@ class FeedForward(BASE_ESTIMATOR):
         work_load_list : float or int, optional
             The list of work load for different devices,
             in the same order as ctx
+        metric_period : int, optional
+            Update the training metric every metric_period batches,
+            instead of after every batch.
+        async_metric : bool, optional
+            Whether to update the metric on a background thread, against copies
+            of the outputs, so that the next batch can start in the meantime.
         """
 
         data = self._init_iter(X, y, is_train=True)
@@ -764,7 +1016,11 @@ class FeedForward(BASE_ESTIMATOR):
                             kvstore=kvstore, update_on_kvstore=update_on_kvstore,
                             logger=logger, work_load_list=work_load_list, monitor=monitor,
                             eval_batch_end_callback=eval_batch_end_callback,
-                            sym_gen=self.sym_gen)
+                            sym_gen=self.sym_gen,
+                            metric_period=metric_period, async_metric=async_metric)
+        # the cached predictors hold a copy of the parameters before training
+        self._pred_execs.clear()
+        self._pred_exec = None
 
 
     def save(self, prefix, epoch=None):
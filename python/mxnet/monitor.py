@@ -4,10 +4,43 @@
 import ctypes
 from .ndarray import NDArray
 from .base import NDArrayHandle
+from .context import cpu
 from . import ndarray
 import logging
 from math import sqrt
 import re
+import threading
+import weakref
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+
+def _monitor_worker(jobs, results):
+    """Thread entry of Monitor in async_stats mode, turning the host buffers
+    into result strings. It does not reference the Monitor so that a dropped
+    Monitor is collected and stops the thread."""
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+        entries, copies = job
+        values = [[None] * num for _, _, num in entries]
+        for host_buf, slots in copies:
+            data = host_buf.asnumpy()
+            for i, j, begin, end, shape in slots:
+                values[i][j] = data[begin:end].reshape(shape)
+        res = []
+        for (n, k, _), v_list in zip(entries, values):
+            s = ''
+            for v in v_list:
+                if v.shape == (1,):
+                    s += str(v[0]) + '\t'
+                else:
+                    s += str(v) + '\t'
+            res.append((n, k, s))
+        results.put(res)
 
 
 class Monitor(object):
@@ -26,8 +59,16 @@ class Monitor(object):
         Only tensors with names that match name_pattern will be included.
         For example, '.*weight|.*output' will print all weights and outputs;
         '.*backward.*' will print all gradients.
+    async_stats : bool
+        If True, training is never blocked on the statistics. They are
+        packed into one preallocated buffer per device, copied to host in
+        a single copy, and converted on a background thread. toc then
+        returns the results of the previous sampled batch, and flush
+        returns the ones still pending. The background thread is a daemon,
+        stopped by close or when the Monitor is collected.
     """
-    def __init__(self, interval, stat_func=None, pattern='.*', sort=False):
+    def __init__(self, interval, stat_func=None, pattern='.*', sort=False,
+                 async_stats=False):
         if stat_func is None:
             def asum_stat(x):
                 """returns |x|/size(x), async execution."""
@@ -41,13 +82,31 @@ class Monitor(object):
         self.exes = []
         self.re_prog = re.compile(pattern)
         self.sort = sort
+        self.async_stats = async_stats
+        # (layout) -> (device buffers, two host buffers used in turn)
+        self.buffers = {}
+        self.num_pending = 0
+        self.jobs = None
+        self.results = None
+        self.worker = None
+        if async_stats:
+            self.jobs = queue.Queue()
+            self.results = queue.Queue()
+            self.worker = threading.Thread(target=_monitor_worker,
+                                           args=(self.jobs, self.results))
+            self.worker.daemon = True
+            self.worker.start()
+        # a weak reference, so that the Monitor is not part of a cycle and
+        # __del__ stops the thread when it is dropped
+        monitor = weakref.ref(self)
         def stat_helper(name, array):
             """wrapper for executor callback"""
-            if not self.activated or not self.re_prog.match(name):
+            mon = monitor()
+            if mon is None or not mon.activated or not mon.re_prog.match(name):
                 return
             array = ctypes.cast(array, NDArrayHandle)
             array = NDArray(array, writable=False)
-            self.queue.append((self.step, name, self.stat_func(array)))
+            mon.queue.append((mon.step, name, mon.stat_func(array)))
         self.stat_helper = stat_helper
 
     def install(self, exe):
@@ -66,9 +125,10 @@ class Monitor(object):
         """start collecting stats for current batch.
         Call before forward"""
         if self.step % self.interval == 0:
-            for exe in self.exes:
-                for array in exe.arg_arrays:
-                    array.wait_to_read()
+            if not self.async_stats:
+                for exe in self.exes:
+                    for array in exe.arg_arrays:
+                        array.wait_to_read()
             self.queue = []
             self.activated = True
         self.step += 1
@@ -83,17 +143,20 @@ class Monitor(object):
         res : list of """
         if not self.activated:
             return []
-        for exe in self.exes:
-            for array in exe.arg_arrays:
-                array.wait_to_read()
+        if not self.async_stats:
+            for exe in self.exes:
+                for array in exe.arg_arrays:
+                    array.wait_to_read()
         for exe in self.exes:
             for name, array in zip(exe._symbol.list_arguments(), exe.arg_arrays):
                 if self.re_prog.match(name):
                     self.queue.append((self.step, name, self.stat_func(array)))
         self.activated = False
-        res = []
         if self.sort:
             self.queue.sort(key=lambda x: x[1])
+        if self.async_stats:
+            return self._toc_async()
+        res = []
         for n, k, v_list in self.queue:
             if isinstance(v_list, NDArray):
                 v_list = [v_list]
@@ -109,12 +172,88 @@ class Monitor(object):
         self.queue = []
         return res
 
+    def _toc_async(self):
+        """Pack the stats of this batch into the device buffers and push one
+        copy to host per device, then return the results of the previous batch."""
+        entries = []
+        for n, k, v_list in self.queue:
+            if isinstance(v_list, NDArray):
+                v_list = [v_list]
+            assert isinstance(v_list, list)
+            for v in v_list:
+                assert isinstance(v, NDArray)
+            entries.append((n, k, v_list))
+        self.queue = []
+        # group the stats by device
+        devices = {}
+        for i, (_, _, v_list) in enumerate(entries):
+            for j, v in enumerate(v_list):
+                devices.setdefault(str(v.context), (v.context, []))[1].append((i, j, v))
+        copies = []
+        for ctx_name in sorted(devices):
+            ctx, stats = devices[ctx_name]
+            layout = (ctx_name,) + tuple((i, j, v.shape) for i, j, v in stats)
+            if layout not in self.buffers:
+                size = sum(v.size for _, _, v in stats)
+                self.buffers[layout] = [ndarray.empty((size,), ctx),
+                                        [ndarray.empty((size,), cpu()) for _ in range(2)], 0]
+            dev_buf, host_bufs, turn = self.buffers[layout]
+            self.buffers[layout][2] = 1 - turn
+            begin = 0
+            slots = []
+            for i, j, v in stats:
+                end = begin + v.size
+                v.copyto(dev_buf[begin:end].reshape(v.shape))
+                slots.append((i, j, begin, end, v.shape))
+                begin = end
+            dev_buf.copyto(host_bufs[turn])
+            copies.append((host_bufs[turn], slots))
+        self.jobs.put(([(n, k, len(v_list)) for n, k, v_list in entries], copies))
+        self.num_pending += 1
+        res = []
+        # keep the batch just pushed in flight, return the previous ones
+        while self.num_pending > 1:
+            res += self.results.get()
+            self.num_pending -= 1
+        return res
+
+    def flush(self):
+        """Wait for and return the results still pending in async_stats mode.
+
+        Returns
+        -------
+        res : list of (step, name, value string)
+        """
+        res = []
+        while self.num_pending > 0:
+            res += self.results.get()
+            self.num_pending -= 1
+        return res
+
+    def close(self):
+        """Stop the background thread of async_stats mode. The results still
+        pending can be returned by flush afterwards."""
+        if self.worker is None:
+            return
+        self.jobs.put(None)
+        self.worker.join()
+        self.worker = None
+
+    def __del__(self):
+        if getattr(self, 'worker', None) is not None:
+            self.close()
+
     def toc_print(self):
         """End collecting and print results"""
         res = self.toc()
         for n, k, v in res:
             logging.info('Batch: {:7d} {:30s} {:s}'.format(n, k, v))
 
+    def flush_print(self):
+        """Print the results still pending in async_stats mode"""
+        for n, k, v in self.flush():
+            logging.info('Batch: {:7d} {:30s} {:s}'.format(n, k, v))
+
 
 
 
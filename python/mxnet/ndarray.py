@@ -3,16 +3,25 @@
 from __future__ import absolute_import
 
 import ctypes
+import os
 import warnings
 import sys
+import json
+import struct
+import threading
 import numpy as np
 from .base import _LIB, string_types, numeric_types
 from .base import c_array, py_str, c_str, mx_real_t
 from .base import mx_uint, mx_float, NDArrayHandle, FunctionHandle
 from .base import ctypes2buffer
-from .base import check_call, ctypes2docstring
+from .base import check_call, ctypes2docstring, _load_op_signatures
 from .context import Context
 
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
 _DTYPE_NP_TO_MX = {
     np.float32 : 0,
     np.float64 : 1,
@@ -91,16 +100,22 @@ class NDArray(object):
         check_call(_LIB.MXNDArrayFree(self.handle))
 
     def __add__(self, other):
+        if _FUSE.depth:
+            return _lazy(self) + other
         if isinstance(other, NDArray):
             return NDArray._plus(self, other)
         elif isinstance(other, numeric_types):
             return NDArray._plus_scalar(self, float(other))
+        elif isinstance(other, FusedExpr):
+            return _lazy(self) + other
         else:
             raise TypeError('type %s not supported' % str(type(other)))
 
     def __iadd__(self, other):
         if not self.writable:
             raise ValueError('trying to add to a readonly NDArray')
+        if _FUSE.depth or isinstance(other, FusedExpr):
+            return (_lazy(self) + other).eval(out=self)
         if isinstance(other, NDArray):
             return NDArray._plus(self, other, out=self)
         elif isinstance(other, numeric_types):
@@ -112,15 +127,21 @@ class NDArray(object):
         return self.__add__(other)
 
     def __sub__(self, other):
+        if _FUSE.depth:
+            return _lazy(self) - other
         if isinstance(other, NDArray):
             return NDArray._minus(self, other)
         elif isinstance(other, numeric_types):
             return NDArray._minus_scalar(self, float(other))
+        elif isinstance(other, FusedExpr):
+            return _lazy(self) - other
         else:
             raise TypeError('type %s not supported' % str(type(other)))
     def __isub__(self, other):
         if not self.writable:
             raise ValueError('trying to subtract from a readonly NDArray')
+        if _FUSE.depth or isinstance(other, FusedExpr):
+            return (_lazy(self) - other).eval(out=self)
         if isinstance(other, NDArray):
             return NDArray._minus(self, other, out=self)
         elif isinstance(other, numeric_types):
@@ -129,25 +150,35 @@ class NDArray(object):
             raise TypeError('type %s not supported' % str(type(other)))
 
     def __rsub__(self, other):
+        if _FUSE.depth:
+            return other - _lazy(self)
         if isinstance(other, numeric_types):
             return NDArray._rminus_scalar(self, float(other))
         else:
             raise TypeError('type %s not supported' % str(type(other)))
 
     def __mul__(self, other):
+        if _FUSE.depth:
+            return _lazy(self) * other
         if isinstance(other, NDArray):
             return NDArray._mul(self, other)
         elif isinstance(other, numeric_types):
             return NDArray._mul_scalar(self, float(other))
+        elif isinstance(other, FusedExpr):
+            return _lazy(self) * other
         else:
             raise TypeError('type %s not supported' % str(type(other)))
 
     def __neg__(self):
+        if _FUSE.depth:
+            return -_lazy(self)
         return NDArray._mul_scalar(self, -1.0)
 
     def __imul__(self, other):
         if not self.writable:
             raise ValueError('trying to multiply to a readonly NDArray')
+        if _FUSE.depth or isinstance(other, FusedExpr):
+            return (_lazy(self) * other).eval(out=self)
         if isinstance(other, NDArray):
             return NDArray._mul(self, other, out=self)
         elif isinstance(other, numeric_types):
@@ -159,14 +190,20 @@ class NDArray(object):
         return self.__mul__(other)
 
     def __div__(self, other):
+        if _FUSE.depth:
+            return _lazy(self) / other
         if isinstance(other, NDArray):
             return NDArray._div(self, other)
         elif isinstance(other, numeric_types):
             return NDArray._div_scalar(self, float(other))
+        elif isinstance(other, FusedExpr):
+            return _lazy(self) / other
         else:
             raise TypeError('type %s not supported' % str(type(other)))
 
     def __rdiv__(self, other):
+        if _FUSE.depth:
+            return other / _lazy(self)
         if isinstance(other, numeric_types):
             return NDArray._rdiv_scalar(self, float(other))
         else:
@@ -175,6 +212,8 @@ class NDArray(object):
     def __idiv__(self, other):
         if not self.writable:
             raise ValueError('trying to divide from a readonly NDArray')
+        if _FUSE.depth or isinstance(other, FusedExpr):
+            return (_lazy(self) / other).eval(out=self)
         if isinstance(other, NDArray):
             return NDArray._div(self, other, out=self)
         elif isinstance(other, numeric_types):
@@ -223,6 +262,8 @@ class NDArray(object):
                 value.copyto(self)
         elif isinstance(value, numeric_types):
             NDArray._set_value(float(value), out=self)
+        elif isinstance(value, FusedExpr):
+            value.eval(out=self)
         elif isinstance(value, (np.ndarray, np.generic)):
             self._sync_copyfrom(value)
         else:
@@ -353,15 +394,29 @@ class NDArray(object):
             self.handle, ctypes.byref(mx_dtype)))
         return _DTYPE_MX_TO_NP[mx_dtype.value]
 
-    def asnumpy(self):
+    def asnumpy(self, out=None):
         """Return a copied numpy array of current array.
 
+        Parameters
+        ----------
+        out : numpy.ndarray, optional
+            C contiguous array of the same shape and dtype to copy into,
+            for instance rows of a numpy.memmap.
+
         Returns
         -------
         array : numpy.ndarray
             A copy of array content.
         """
-        data = np.empty(self.shape, dtype=self.dtype)
+        if out is None:
+            data = np.empty(self.shape, dtype=self.dtype)
+        else:
+            if out.shape != self.shape or out.dtype != self.dtype:
+                raise ValueError('out must have shape %s and dtype %s' % (
+                    str(self.shape), str(np.dtype(self.dtype))))
+            if not out.flags['C_CONTIGUOUS'] or not out.flags['WRITEABLE']:
+                raise ValueError('out must be a writeable C contiguous array')
+            data = out
         check_call(_LIB.MXNDArraySyncCopyToCPU(
             self.handle,
             data.ctypes.data_as(ctypes.c_void_p),
@@ -624,6 +679,169 @@ def save(fname, data):
                                   c_array(NDArrayHandle, handles),
                                   keys))
 
+# file format of save_mmap: magic, header length as little endian uint64, json
+# header, then the arrays, each starting at a page aligned offset
+_MMAP_MAGIC = b'MXNDMMAP'
+_MMAP_ALIGN = 4096
+
+def _mmap_align(offset):
+    """Round offset up to a multiple of _MMAP_ALIGN."""
+    return (offset + _MMAP_ALIGN - 1) // _MMAP_ALIGN * _MMAP_ALIGN
+
+def save_mmap(fname, data):
+    """Save dict of str->NDArray to a local file that can be loaded lazily with load_mmap.
+
+    Each array is stored uncompressed at a page aligned offset listed in a json
+    header, so that load_mmap can map the file and only read the arrays used.
+
+    Parameters
+    ----------
+    fname : str
+        The name of the file, must be on a local file system.
+    data : dict of str to NDArray
+        The data to be saved.
+    """
+    if not isinstance(data, dict):
+        raise TypeError('save_mmap only accept dict str->NDArray')
+    entries = []
+    offset = 0
+    for key in sorted(data.keys()):
+        val = data[key]
+        if not isinstance(key, string_types) or not isinstance(val, NDArray):
+            raise TypeError('save_mmap only accept dict str->NDArray')
+        dtype = np.dtype(val.dtype)
+        entries.append({'name': key, 'shape': list(val.shape), 'dtype': dtype.str,
+                        'offset': offset})
+        offset = _mmap_align(offset + int(np.prod(val.shape)) * dtype.itemsize)
+    header = json.dumps({'arrays': entries}).encode('utf-8')
+    data_start = _mmap_align(len(_MMAP_MAGIC) + 8 + len(header))
+    with open(fname, 'wb') as fout:
+        fout.write(_MMAP_MAGIC)
+        fout.write(struct.pack('<Q', len(header)))
+        fout.write(header)
+        for entry in entries:
+            fout.seek(data_start + entry['offset'])
+            fout.write(data[entry['name']].asnumpy().tobytes())
+        # make the file cover the padding of the last array
+        fout.truncate(data_start + offset)
+
+def _is_mmap_file(fname):
+    """Whether fname is a local file saved by save_mmap."""
+    if not os.path.isfile(fname):
+        return False
+    with open(fname, 'rb') as fin:
+        return fin.read(len(_MMAP_MAGIC)) == _MMAP_MAGIC
+
+def load_mmap(fname, names=None, ctx=None):
+    """Load a file saved by save_mmap without reading the arrays.
+
+    The file is mapped into memory and an array is copied to ctx only when it
+    is first accessed, so loading a subset of a large file only reads the
+    pages of that subset.
+
+    Parameters
+    ----------
+    fname : str
+        The name of the file, must be on a local file system.
+    names : list of str, optional
+        Names of the arrays to load, all of them by default.
+    ctx : Context, optional
+        The context the arrays are loaded to, the default context by default.
+
+    Returns
+    -------
+    out : LazyNDArrayDict
+        Read only dict of str->NDArray.
+    """
+    with open(fname, 'rb') as fin:
+        if fin.read(len(_MMAP_MAGIC)) != _MMAP_MAGIC:
+            raise ValueError('%s is not a file saved by save_mmap, use load instead' % fname)
+        header_len, = struct.unpack('<Q', fin.read(8))
+        header = json.loads(fin.read(header_len).decode('utf-8'))
+    data_start = _mmap_align(len(_MMAP_MAGIC) + 8 + header_len)
+    entries = {}
+    for entry in header['arrays']:
+        entry['offset'] += data_start
+        entries[entry['name']] = entry
+    out = LazyNDArrayDict(np.memmap(fname, dtype=np.uint8, mode='r'), entries, ctx)
+    if names is not None:
+        out = out.select(names)
+    return out
+
+class LazyNDArrayDict(Mapping):
+    """Read only dict of str->NDArray backed by a memory mapped file.
+
+    Returned by load_mmap. An NDArray is created and filled from the file the
+    first time its name is accessed, and is the same NDArray afterwards.
+    """
+    def __init__(self, buf, entries, ctx):
+        self._buf = buf
+        self._entries = entries
+        self._ctx = ctx
+        self._loaded = {}
+
+    def view(self, name):
+        """Read only numpy view of an array in the mapped file, without any copy.
+
+        Parameters
+        ----------
+        name : str
+            Name of the array.
+
+        Returns
+        -------
+        out : numpy.ndarray
+            The array, its pages are read when its elements are accessed.
+        """
+        entry = self._entries[name]
+        dtype = np.dtype(entry['dtype'])
+        size = int(np.prod(entry['shape'])) * dtype.itemsize
+        begin = entry['offset']
+        return self._buf[begin:begin + size].view(dtype).reshape(entry['shape'])
+
+    def is_loaded(self, name):
+        """Whether the NDArray of name was already created."""
+        return name in self._loaded
+
+    def select(self, names):
+        """Select some of the arrays without loading them.
+
+        Parameters
+        ----------
+        names : list of str or dict of str to str
+            Names of the arrays to keep, or dict of new name to name to rename them.
+
+        Returns
+        -------
+        out : LazyNDArrayDict
+            Dict of the selected arrays, sharing the mapped file.
+        """
+        if not isinstance(names, dict):
+            names = dict((name, name) for name in names)
+        missing = [name for name in names.values() if name not in self._entries]
+        if missing:
+            raise KeyError('Cannot find %s in the file' % ', '.join(missing))
+        out = LazyNDArrayDict(self._buf, dict((new_name, self._entries[name])
+                                              for new_name, name in names.items()),
+                              self._ctx)
+        for new_name, name in names.items():
+            if name in self._loaded:
+                out._loaded[new_name] = self._loaded[name]
+        return out
+
+    def __getitem__(self, name):
+        if name not in self._loaded:
+            entry = self._entries[name]
+            self._loaded[name] = array(self.view(name), ctx=self._ctx,
+                                       dtype=np.dtype(entry['dtype']).type)
+        return self._loaded[name]
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
 def imdecode(str_img, clip_rect=(0, 0, 0, 0), out=None, index=0, channels=3, mean=None):
     """Decode an image from string. Requires OpenCV to work.
 
@@ -666,10 +884,8 @@ def imdecode(str_img, clip_rect=(0, 0, 0, 0), out=None, index=0, channels=3, mea
                                  out=out)
 
 # pylint: disable=too-many-locals, invalid-name
-def _make_ndarray_function(handle):
-    """Create a NDArray function from the FunctionHandle."""
-    NDARRAY_ARG_BEFORE_SCALAR = 1
-    ACCEPT_EMPTY_MUTATE_TARGET = 1 << 2
+def _describe_ndarray_function(handle):
+    """Get the signature of a NDArray function, used by _make_ndarray_function."""
     # Get the property of NDArray
     n_used_vars = mx_uint()
     n_scalars = mx_uint()
@@ -681,18 +897,6 @@ def _make_ndarray_function(handle):
         ctypes.byref(n_scalars),
         ctypes.byref(n_mutate_vars),
         ctypes.byref(type_mask)))
-    n_mutate_vars = n_mutate_vars.value
-    n_used_vars = n_used_vars.value
-    n_scalars = n_scalars.value
-    type_mask = type_mask.value
-    accept_empty_mutate = (type_mask & ACCEPT_EMPTY_MUTATE_TARGET) != 0
-    # infer type of the function
-    if (type_mask & NDARRAY_ARG_BEFORE_SCALAR) != 0:
-        use_vars_range = range(0, n_used_vars)
-        scalar_range = range(n_used_vars, n_used_vars + n_scalars)
-    else:
-        scalar_range = range(0, n_scalars)
-        use_vars_range = range(n_scalars, n_used_vars + n_scalars)
 
     # Get the information from the function
     name = ctypes.c_char_p()
@@ -710,7 +914,6 @@ def _make_ndarray_function(handle):
         ctypes.byref(arg_types),
         ctypes.byref(arg_descs),
         ctypes.byref(ret_type)))
-    func_name = py_str(name.value)
     param_str = ctypes2docstring(num_args, arg_names, arg_types, arg_descs)
     doc_str = ('%s\n\n' +
                '%s\n' +
@@ -721,6 +924,43 @@ def _make_ndarray_function(handle):
                'out : NDArray\n'+
                '    The output of binary function.')
     doc_str = doc_str % (py_str(desc.value), param_str)
+    return {'name': py_str(name.value),
+            'doc': doc_str,
+            'n_used_vars': n_used_vars.value,
+            'n_scalars': n_scalars.value,
+            'n_mutate_vars': n_mutate_vars.value,
+            'type_mask': type_mask.value}
+
+# empty arguments, shared by all the calls that have none
+_NO_SCALARS = (mx_float * 0)()
+_NO_PARAMS = (ctypes.c_char_p * 0)()
+# how to call each NDArray function, keyed by the function itself, used by invoke_batch
+_FUNCTION_ARGS = {}
+
+def _make_ndarray_function(handle, signature):
+    """Create a NDArray function from the FunctionHandle and its signature."""
+    NDARRAY_ARG_BEFORE_SCALAR = 1
+    ACCEPT_EMPTY_MUTATE_TARGET = 1 << 2
+    n_mutate_vars = signature['n_mutate_vars']
+    n_used_vars = signature['n_used_vars']
+    n_scalars = signature['n_scalars']
+    type_mask = signature['type_mask']
+    accept_empty_mutate = (type_mask & ACCEPT_EMPTY_MUTATE_TARGET) != 0
+    # infer type of the function
+    if (type_mask & NDARRAY_ARG_BEFORE_SCALAR) != 0:
+        use_vars_range = range(0, n_used_vars)
+        scalar_range = range(n_used_vars, n_used_vars + n_scalars)
+    else:
+        scalar_range = range(0, n_scalars)
+        use_vars_range = range(n_scalars, n_used_vars + n_scalars)
+    func_name = str(signature['name'])
+    # the argument array types and the C function are looked up once here,
+    # for small arrays building them at every call costs more than the kernel
+    use_vars_type = NDArrayHandle * n_used_vars
+    scalars_type = mx_float * n_scalars
+    mutate_vars_type = NDArrayHandle * n_mutate_vars
+    invoke = _LIB.MXFuncInvokeEx
+    fused_op = _FUSED_UNARY.get(func_name)
 
     # Definition of internal functions.
     def binary_ndarray_function(lhs, rhs, out=None):
@@ -735,17 +975,18 @@ def _make_ndarray_function(handle):
             if not accept_empty_mutate:
                 raise TypeError('argument out is required to call %s' % func_name)
             out = NDArray(_new_empty_handle())
-        check_call(_LIB.MXFuncInvokeEx(handle,
-                                       c_array(NDArrayHandle, (lhs.handle, rhs.handle)),
-                                       c_array(mx_float, ()),
-                                       c_array(NDArrayHandle, (out.handle,)),
-                                       ctypes.c_int(0),
-                                       c_array(ctypes.c_char_p, []),
-                                       c_array(ctypes.c_char_p, [])))
+        check_call(invoke(handle,
+                          use_vars_type(lhs.handle, rhs.handle),
+                          _NO_SCALARS,
+                          mutate_vars_type(out.handle),
+                          0, _NO_PARAMS, _NO_PARAMS))
         return out
 
     def unary_ndarray_function(src, out=None):
         """internal NDArray function"""
+        if fused_op is not None and (_FUSE.depth or isinstance(src, FusedExpr)):
+            expr = _lazy(src)._unary(fused_op)
+            return expr if out is None else expr.eval(out=out)
         if out:
             if isinstance(out, NDArray) == False:
                 raise TypeError('out must be NDArray')
@@ -755,14 +996,11 @@ def _make_ndarray_function(handle):
             if not accept_empty_mutate:
                 raise TypeError('argument out is required to call %s' % func_name)
             out = NDArray(_new_empty_handle())
-        check_call(_LIB.MXFuncInvokeEx( \
-                handle, \
-                c_array(NDArrayHandle, (src.handle,)), \
-                c_array(mx_float, ()), \
-                c_array(NDArrayHandle, (out.handle,)), \
-                ctypes.c_int(0), \
-                c_array(ctypes.c_char_p, []), \
-                c_array(ctypes.c_char_p, [])))
+        check_call(invoke(handle,
+                          use_vars_type(src.handle),
+                          _NO_SCALARS,
+                          mutate_vars_type(out.handle),
+                          0, _NO_PARAMS, _NO_PARAMS))
         return out
 
     def generic_ndarray_function(*args, **kwargs):
@@ -793,14 +1031,16 @@ def _make_ndarray_function(handle):
                     NDArray(_new_empty_handle()) for i in range(n_mutate_vars))
             else:
                 raise TypeError('argument out is required to call %s' % func_name)
-        check_call(_LIB.MXFuncInvokeEx( \
-                handle, \
-                c_array(NDArrayHandle, [args[i].handle for i in use_vars_range]), \
-                c_array(mx_float, [args[i] for i in scalar_range]), \
-                c_array(NDArrayHandle, [v.handle for v in mutate_vars]), \
-                ctypes.c_int(len(kwargs)), \
-                c_array(ctypes.c_char_p, kwargs.keys()), \
-                c_array(ctypes.c_char_p, [str(i) for i in kwargs.values()])))
+        if kwargs:
+            param_keys = c_array(ctypes.c_char_p, kwargs.keys())
+            param_vals = c_array(ctypes.c_char_p, [str(i) for i in kwargs.values()])
+        else:
+            param_keys = param_vals = _NO_PARAMS
+        check_call(invoke(handle,
+                          use_vars_type(*[args[i].handle for i in use_vars_range]),
+                          scalars_type(*[args[i] for i in scalar_range]),
+                          mutate_vars_type(*[v.handle for v in mutate_vars]),
+                          len(kwargs), param_keys, param_vals))
         if n_mutate_vars == 1:
             return mutate_vars[0]
         else:
@@ -813,13 +1053,303 @@ def _make_ndarray_function(handle):
     else:
         ret_function = generic_ndarray_function
     ret_function.__name__ = func_name
-    ret_function.__doc__ = doc_str
+    ret_function.__doc__ = signature['doc']
+    _FUNCTION_ARGS[ret_function] = (handle, use_vars_range, scalar_range, n_mutate_vars)
     return ret_function
 
+def invoke_batch(calls):
+    """Invoke a list of NDArray functions with one call to the library.
+
+    The functions are pushed to the engine in order, as if they were called
+    one by one, but the Python and ctypes overhead is paid once for the batch,
+    which matters for many functions on small arrays.
 
+    Parameters
+    ----------
+    calls : list of tuple
+        Each call is ``(function, args, out)`` or ``(function, args, out, kwargs)``,
+        with a function of this module or a static method of NDArray, its
+        positional arguments, the NDArray or tuple of NDArray to hold its
+        output, which is required, and its keyword parameters.
+
+    Returns
+    -------
+    outs : list
+        The out of each call.
+
+    Examples
+    --------
+    >>> mx.nd.invoke_batch([(mx.nd.NDArray._plus, (a, b), c),
+    ...                     (mx.nd.clip, (c, -1.0, 1.0), c)])
+    """
+    funs = []
+    use_vars = []
+    scalars = []
+    mutate_vars = []
+    num_params = []
+    param_keys = []
+    param_vals = []
+    outs = []
+    for call in calls:
+        function, args, out = call[:3]
+        kwargs = call[3] if len(call) > 3 else {}
+        try:
+            handle, use_vars_range, scalar_range, n_mutate_vars = _FUNCTION_ARGS[function]
+        except (KeyError, TypeError):
+            raise TypeError('%s is not a NDArray function' % str(function))
+        if len(args) != len(use_vars_range) + len(scalar_range):
+            raise TypeError('%s takes %d arguments, got %d' % (
+                function.__name__, len(use_vars_range) + len(scalar_range), len(args)))
+        targets = (out,) if isinstance(out, NDArray) else tuple(out)
+        if len(targets) != n_mutate_vars:
+            raise TypeError('expect %d out in %s' % (n_mutate_vars, function.__name__))
+        for target in targets:
+            if not isinstance(target, NDArray) or not target.writable:
+                raise TypeError('out must be writable NDArray')
+        funs.append(handle)
+        use_vars.extend(args[i].handle for i in use_vars_range)
+        scalars.extend(args[i] for i in scalar_range)
+        mutate_vars.extend(target.handle for target in targets)
+        num_params.append(len(kwargs))
+        param_keys.extend(c_str(k) for k in kwargs.keys())
+        param_vals.extend(c_str(str(v)) for v in kwargs.values())
+        outs.append(out)
+    check_call(_LIB.MXFuncInvokeBatch(
+        mx_uint(len(funs)),
+        c_array(FunctionHandle, funs),
+        c_array(NDArrayHandle, use_vars),
+        c_array(mx_float, scalars),
+        c_array(NDArrayHandle, mutate_vars),
+        c_array(ctypes.c_int, num_params),
+        c_array(ctypes.c_char_p, param_keys),
+        c_array(ctypes.c_char_p, param_vals)))
+    return outs
 
 # pylint: enable=too-many-locals, invalid-name
 
+class _FuseState(threading.local):
+    """Number of nested fuse scopes of the current thread."""
+    depth = 0
+
+_FUSE = _FuseState()
+# NDArray functions recorded in fused expressions, to their fused operation
+_FUSED_UNARY = {'sqrt': 'sqrt', 'square': 'square', 'abs': 'abs', 'exp': 'exp', 'log': 'log'}
+# limits of one fused kernel, see ndarray::FusedProgram
+_FUSED_MAX_INPUTS = 8
+_FUSED_MAX_INSTRS = 64
+_FUSED_MAX_STACK = 16
+
+class _FuseScope(object):
+    """Context manager returned by fuse."""
+    def __enter__(self):
+        _FUSE.depth += 1
+        return self
+
+    def __exit__(self, ptype, value, trace):
+        _FUSE.depth -= 1
+
+def fuse():
+    """Record the elementwise arithmetic of NDArray as fused expressions.
+
+    In the scope, the arithmetic operators of NDArray and the functions
+    sqrt, square, abs, exp and log return a FusedExpr instead of running.
+    The whole expression runs as one kernel when it is assigned to an
+    NDArray, which saves the temporary arrays and the memory traffic of
+    running each operation alone. An expression reads its inputs when it
+    is evaluated, not when it is created.
+
+    Returns
+    -------
+    scope : context manager
+        The scope, expressions created in it can be evaluated after it.
+
+    Examples
+    --------
+    >>> with mx.nd.fuse():
+    ...     mean[:] = beta1 * mean + (1 - beta1) * grad
+    ...     weight[:] -= lr * mean / (mx.nd.sqrt(var) + eps)
+    """
+    return _FuseScope()
+
+def _lazy(value):
+    """Wrap an NDArray as a FusedExpr, FusedExpr are returned as is."""
+    if isinstance(value, FusedExpr):
+        return value
+    return FusedExpr([value])
+
+def _fused_fits(tokens):
+    """Whether the postfix tokens of an expression fit in one fused kernel."""
+    if len(tokens) > _FUSED_MAX_INSTRS:
+        return False
+    inputs = set()
+    depth = max_depth = 0
+    for token in tokens:
+        if isinstance(token, NDArray):
+            inputs.add(id(token))
+            depth += 1
+        elif token[0] == 'c':
+            depth += 1
+        elif token in ('add', 'sub', 'mul', 'div'):
+            depth -= 1
+        max_depth = max(max_depth, depth)
+    return len(inputs) <= _FUSED_MAX_INPUTS and max_depth <= _FUSED_MAX_STACK
+
+class FusedExpr(object):
+    """A lazy elementwise expression of NDArrays of the same shape.
+
+    Created by the arithmetic of NDArray in a fuse scope and evaluated by
+    one kernel with eval, asnumpy, by assigning it with ``array[:] = expr``
+    or by an in-place operator of NDArray. An expression too large for one
+    kernel evaluates its operands first. Any other NDArray function
+    evaluates the expression and uses the result.
+    """
+    def __init__(self, tokens):
+        # postfix program, NDArray for the inputs, str for the rest
+        self._tokens = tokens
+
+    def _operand(self, other):
+        """Tokens of the other operand of a binary operation."""
+        if isinstance(other, FusedExpr):
+            return other._tokens
+        elif isinstance(other, NDArray):
+            return [other]
+        elif isinstance(other, numeric_types):
+            return ['c%r' % float(other)]
+        else:
+            raise TypeError('type %s not supported' % str(type(other)))
+
+    def _leaf(self):
+        """Tokens reading the value of the expression, evaluated if needed."""
+        if len(self._tokens) > 1:
+            self._tokens = [self.eval()]
+        return self._tokens
+
+    def _binary(self, other, op, reverse=False):
+        """Expression of a binary operation with another operand."""
+        lhs, rhs = self._tokens, self._operand(other)
+        if reverse:
+            lhs, rhs = rhs, lhs
+        tokens = lhs + rhs + [op]
+        if not _fused_fits(tokens):
+            # too large for one kernel, evaluate the operands first
+            lhs = self._leaf()
+            if not isinstance(other, numeric_types):
+                rhs = _lazy(other)._leaf()
+            if reverse:
+                lhs, rhs = rhs, lhs
+            tokens = lhs + rhs + [op]
+        return FusedExpr(tokens)
+
+    def _unary(self, op):
+        """Expression of a unary operation."""
+        tokens = self._tokens + [op]
+        if not _fused_fits(tokens):
+            tokens = self._leaf() + [op]
+        return FusedExpr(tokens)
+
+    def __add__(self, other):
+        return self._binary(other, 'add')
+
+    def __radd__(self, other):
+        return self._binary(other, 'add', reverse=True)
+
+    def __sub__(self, other):
+        return self._binary(other, 'sub')
+
+    def __rsub__(self, other):
+        return self._binary(other, 'sub', reverse=True)
+
+    def __mul__(self, other):
+        return self._binary(other, 'mul')
+
+    def __rmul__(self, other):
+        return self._binary(other, 'mul', reverse=True)
+
+    def __div__(self, other):
+        return self._binary(other, 'div')
+
+    def __rdiv__(self, other):
+        return self._binary(other, 'div', reverse=True)
+
+    def __truediv__(self, other):
+        return self._binary(other, 'div')
+
+    def __rtruediv__(self, other):
+        return self._binary(other, 'div', reverse=True)
+
+    def __neg__(self):
+        return self._unary('neg')
+
+    def _inputs(self):
+        """The NDArray inputs of the expression, without duplicates."""
+        inputs = []
+        seen = set()
+        for token in self._tokens:
+            if isinstance(token, NDArray) and id(token) not in seen:
+                seen.add(id(token))
+                inputs.append(token)
+        return inputs
+
+    @property
+    def shape(self):
+        """Shape of the result."""
+        return self._inputs()[0].shape
+
+    @property
+    def context(self):
+        """Context of the result."""
+        return self._inputs()[0].context
+
+    @property
+    def dtype(self):
+        """Type of the result."""
+        return self._inputs()[0].dtype
+
+    @property
+    def handle(self):
+        """Handle of the result, the expression is evaluated once and then
+        reads the result, so that it can be passed to any NDArray function."""
+        return self._leaf()[0].handle
+
+    def eval(self, out=None):
+        """Evaluate the expression with one kernel.
+
+        Parameters
+        ----------
+        out : NDArray, optional
+            The output NDArray, may be one of the inputs.
+
+        Returns
+        -------
+        out : NDArray
+            The result.
+        """
+        if out is not None and (not isinstance(out, NDArray) or not out.writable):
+            raise TypeError('out must be writable NDArray')
+        if len(self._tokens) == 1 and self._tokens[0] is out:
+            return out
+        inputs = self._inputs()
+        index = dict((id(arr), i) for i, arr in enumerate(inputs))
+        program = ' '.join('i%d' % index[id(token)] if isinstance(token, NDArray) else token
+                           for token in self._tokens)
+        if out is None:
+            out = NDArray(_new_empty_handle())
+        handles = [arr.handle for arr in inputs]
+        handles += [handles[0]] * (_FUSED_MAX_INPUTS - len(handles))
+        check_call(_LIB.MXFuncInvokeEx(
+            _FUNCTION_ARGS[NDArray._fused_elemwise][0],
+            c_array(NDArrayHandle, handles),
+            _NO_SCALARS,
+            c_array(NDArrayHandle, [out.handle]),
+            2,
+            c_array(ctypes.c_char_p, [c_str('num_inputs'), c_str('program')]),
+            c_array(ctypes.c_char_p, [c_str(str(len(inputs))), c_str(program)])))
+        return out
+
+    def asnumpy(self):
+        """Evaluate the expression and return the result as numpy.ndarray."""
+        return self.eval().asnumpy()
+
 def _init_ndarray_module():
     """List and add all the ndarray functions to current module."""
     plist = ctypes.POINTER(FunctionHandle)()
@@ -827,10 +1357,12 @@ def _init_ndarray_module():
     check_call(_LIB.MXListFunctions(ctypes.byref(size),
                                     ctypes.byref(plist)))
 
+    signatures = _load_op_signatures(
+        'ndarray', size.value, lambda i: _describe_ndarray_function(FunctionHandle(plist[i])))
     module_obj = sys.modules[__name__]
     for i in range(size.value):
         hdl = FunctionHandle(plist[i])
-        function = _make_ndarray_function(hdl)
+        function = _make_ndarray_function(hdl, signatures[i])
         # if function name starts with underscore, register as static method of NDArray
         if function.__name__.startswith('_'):
             setattr(NDArray, function.__name__, staticmethod(function))
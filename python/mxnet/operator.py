@@ -6,8 +6,10 @@ from __future__ import absolute_import
 from ctypes import CFUNCTYPE, POINTER, Structure, pointer
 from ctypes import c_void_p, cast, c_int, c_char, c_char_p, cast, c_bool
 c_int_p = POINTER(c_int)
+import itertools
 from .base import c_array, c_str, mx_uint, mx_float, ctypes2numpy_shared, NDArrayHandle
 from . import symbol
+from .context import Context
 from .ndarray import NDArray
 
 class PythonOp(object):
@@ -117,6 +119,35 @@ class PythonOp(object):
         """
         return self.need_top_grad_
 
+def _shape_array(cache, shape):
+    """A mx_uint array of shape, kept alive in cache for the C side to read."""
+    shape = tuple(shape)
+    arr = cache.get(shape)
+    if arr is None:
+        arr = cache[shape] = cast(c_array(mx_uint, shape), POINTER(mx_uint))
+    return arr
+
+def _numpy_views(cache, num_tensor, tensor_ptrs, tensor_dims, tensor_shapes, tensor_tags):
+    """numpy arrays sharing the memory of the tensors of a NumpyOp callback,
+    grouped by tag.
+
+    The arrays are cached by pointer and shape, the buffers of a NumpyOp are
+    reused by every call so the same arrays are returned until a shape changes.
+    """
+    ptrs = cast(tensor_ptrs, POINTER(c_void_p))[:num_tensor]
+    tags = tensor_tags[:num_tensor]
+    key = (tuple(ptrs), tuple(tags),
+           tuple(tuple(tensor_shapes[i][:tensor_dims[i]]) for i in range(num_tensor)))
+    tensors = cache.get(key)
+    if tensors is None:
+        if len(cache) >= 16:
+            cache.clear()
+        tensors = [[] for i in range(4)]
+        for i in range(num_tensor):
+            tensors[tags[i]].append(ctypes2numpy_shared(tensor_ptrs[i], key[2][i]))
+        cache[key] = tensors
+    return [list(t) for t in tensors]
+
 class NumpyOp(PythonOp):
     """Base class for numpy operators. numpy operators allow parts
     of computation in symbolic graph to be writen in numpy. This feature
@@ -125,9 +156,21 @@ class NumpyOp(PythonOp):
     a bottleneck.
     Note that if your operator contains internal states (like arrays),
     it cannot be used for multi-gpu training.
+
+    Parameters
+    ----------
+    need_top_grad : bool
+        the default need_top_grad() function returns this value
+    async_callback : bool
+        run forward and backward on the callback threads, whose number is
+        set by MXNET_CALLBACK_NTHREADS, instead of the engine thread. The
+        engine runs other operators while they wait for the interpreter.
+        Ignored with MXNET_ENGINE_TYPE=NaiveEngine, which runs every
+        operator synchronously. For ndarray operators see CustomOp.
     """
-    def __init__(self, need_top_grad=True):
+    def __init__(self, need_top_grad=True, async_callback=False):
         super(NumpyOp, self).__init__(need_top_grad)
+        self.async_callback = async_callback
 
     def get_symbol(self, *args, **kwargs):
         fb_functype = CFUNCTYPE(None, c_int, POINTER(POINTER(mx_float)), POINTER(c_int),
@@ -149,24 +192,21 @@ class NumpyOp(PythonOp):
                 ('p_list_outputs', c_void_p),
                 ('p_list_arguments', c_void_p),
                 ]
+        forward_views = {}
+        backward_views = {}
+        shape_arrays = {}
         def forward_entry(num_tensor, tensor_ptrs, tensor_dims,
                           tensor_shapes, tensor_tags, _):
             """C Callback for NumpyOp::Forward"""
-            tensors = [[] for i in range(4)]
-            for i in range(num_tensor):
-                shape = [tensor_shapes[i][j] for j in range(tensor_dims[i])]
-                buff = ctypes2numpy_shared(tensor_ptrs[i], shape)
-                tensors[tensor_tags[i]].append(buff)
+            tensors = _numpy_views(forward_views, num_tensor, tensor_ptrs, tensor_dims,
+                                   tensor_shapes, tensor_tags)
             self.forward(in_data=tensors[0], out_data=tensors[1])
 
         def backward_entry(num_tensor, tensor_ptrs, tensor_dims,
                            tensor_shapes, tensor_tags, _):
             """C Callback for NumpyOp::Backward"""
-            tensors = [[] for i in range(4)]
-            for i in range(num_tensor):
-                shape = [tensor_shapes[i][j] for j in range(tensor_dims[i])]
-                buff = ctypes2numpy_shared(tensor_ptrs[i], shape)
-                tensors[tensor_tags[i]].append(buff)
+            tensors = _numpy_views(backward_views, num_tensor, tensor_ptrs, tensor_dims,
+                                   tensor_shapes, tensor_tags)
             self.backward(in_data=tensors[0], out_data=tensors[1],
                           in_grad=tensors[2], out_grad=tensors[3])
 
@@ -177,13 +217,13 @@ class NumpyOp(PythonOp):
             n_out = len(self.list_outputs())
             assert num_tensor == n_in + n_out
 
-            shapes = [[tensor_shapes[i][j] for j in range(tensor_dims[i])] for i in range(n_in)]
+            shapes = [tensor_shapes[i][:tensor_dims[i]] for i in range(n_in)]
             ishape, oshape = self.infer_shape(shapes)
             assert len(oshape) == n_out
             assert len(ishape) == n_in
             rshape = list(ishape) + list(oshape)
             for i in range(n_in+n_out):
-                tensor_shapes[i] = cast(c_array(mx_uint, rshape[i]), POINTER(mx_uint))
+                tensor_shapes[i] = _shape_array(shape_arrays, rshape[i])
                 tensor_dims[i] = len(rshape[i])
 
         def list_outputs_entry(out, _):
@@ -212,6 +252,7 @@ class NumpyOp(PythonOp):
         sym = symbol.Symbol._Native(*args,
                                     info=cb_ptr,
                                     need_top_grad=self.need_top_grad(),
+                                    async_callback=self.async_callback,
                                     **kwargs)
         # keep a reference of ourself in PythonOp so we don't get garbage collected.
         PythonOp._ref_holder.append(self)
@@ -252,6 +293,7 @@ class NDArrayOp(PythonOp):
                 ('p_list_arguments', c_void_p),
                 ('p_declare_backward_dependency', c_void_p)
                 ]
+        shape_arrays = {}
         def forward_entry(num_ndarray, ndarraies, tags, _):
             """C Callback for NDArrayOp::Forward"""
             try:
@@ -295,13 +337,13 @@ class NDArrayOp(PythonOp):
                 n_out = len(self.list_outputs())
                 assert num_tensor == n_in + n_out
 
-                shapes = [[tensor_shapes[i][j] for j in range(tensor_dims[i])] for i in range(n_in)]
+                shapes = [tensor_shapes[i][:tensor_dims[i]] for i in range(n_in)]
                 ishape, oshape = self.infer_shape(shapes)
                 assert len(oshape) == n_out
                 assert len(ishape) == n_in
                 rshape = list(ishape) + list(oshape)
                 for i in range(n_in+n_out):
-                    tensor_shapes[i] = cast(c_array(mx_uint, rshape[i]), POINTER(mx_uint))
+                    tensor_shapes[i] = _shape_array(shape_arrays, rshape[i])
                     tensor_dims[i] = len(rshape[i])
             except Exception as e:
                 print('Error in NDArrayOp.infer_shape: ', str(e))
@@ -386,3 +428,439 @@ class NDArrayOp(PythonOp):
         deps.extend(in_data)
         deps.extend(out_data)
         return deps
+
+_custom_fb_functype = CFUNCTYPE(c_bool, c_int, POINTER(c_void_p), c_int_p, c_int_p,
+                                c_bool, c_void_p)
+_custom_del_functype = CFUNCTYPE(c_bool, c_void_p)
+
+class _CustomOpInfo(Structure):
+    """Structure that holds the callbacks of an operator created by CustomOpProp"""
+    _fields_ = [
+        ('forward', _custom_fb_functype),
+        ('backward', _custom_fb_functype),
+        ('delete', _custom_del_functype),
+        ('p_forward', c_void_p),
+        ('p_backward', c_void_p),
+        ('p_del', c_void_p)
+        ]
+
+_custom_list_functype = CFUNCTYPE(c_bool, POINTER(POINTER(POINTER(c_char))), c_void_p)
+_custom_infer_functype = CFUNCTYPE(c_bool, c_int, c_int_p, POINTER(POINTER(mx_uint)), c_void_p)
+_custom_deps_functype = CFUNCTYPE(c_bool, c_int_p, c_int_p, c_int_p,
+                                  c_int_p, POINTER(c_int_p), c_void_p)
+_custom_inplace_functype = CFUNCTYPE(c_bool, c_bool, c_int_p, POINTER(c_int_p), c_void_p)
+_custom_scratch_functype = CFUNCTYPE(c_bool, c_int, c_int_p, POINTER(POINTER(mx_uint)),
+                                     c_int_p, POINTER(POINTER(mx_uint)), c_void_p)
+_custom_create_functype = CFUNCTYPE(c_bool, c_int, c_int, POINTER(_CustomOpInfo), c_void_p)
+
+class _CustomOpPropInfo(Structure):
+    """Structure that holds the callbacks of a CustomOpProp. Passed to CustomOpProp"""
+    _fields_ = [
+        ('list_arguments', _custom_list_functype),
+        ('list_outputs', _custom_list_functype),
+        ('list_auxiliary_states', _custom_list_functype),
+        ('infer_shape', _custom_infer_functype),
+        ('declare_backward_dependency', _custom_deps_functype),
+        ('inplace_option', _custom_inplace_functype),
+        ('scratch_shape', _custom_scratch_functype),
+        ('create_operator', _custom_create_functype),
+        ('p_list_arguments', c_void_p),
+        ('p_list_outputs', c_void_p),
+        ('p_list_auxiliary_states', c_void_p),
+        ('p_infer_shape', c_void_p),
+        ('p_declare_backward_dependency', c_void_p),
+        ('p_inplace_option', c_void_p),
+        ('p_scratch_shape', c_void_p),
+        ('p_create_operator', c_void_p)
+        ]
+
+_CUSTOM_REQ = ['null', 'write', 'inplace', 'add']
+
+class CustomOp(object):
+    """Base class for operators implemented in python with NDArray, created by
+    CustomOpProp.create_operator.
+
+    forward and backward run on the callback threads, whose number is set by
+    MXNET_CALLBACK_NTHREADS, and take the arrays as NDArray without any copy.
+    The operations they push on the arrays run asynchronously, the engine runs
+    other operators meanwhile, and the operator completes when they complete.
+    """
+    def forward(self, is_train, req, in_data, out_data, aux):
+        """forward interface. override to create new operators
+
+        Parameters
+        ----------
+        is_train : bool
+            whether this is a forward for training.
+        req : list of str
+            how to write each output, see assign.
+        in_data, out_data, aux : list of NDArray
+            inputs, outputs and auxiliary states.
+        scratch : NDArray
+            passed only if the CustomOpProp declares a scratch_shape, temporary
+            space that is not kept between calls.
+        """
+        raise NotImplementedError("Must override this")
+
+    def backward(self, req, out_grad, in_data, out_data, in_grad, aux):
+        """backward interface. override to create new operators
+
+        Parameters
+        ----------
+        req : list of str
+            how to write each gradient of in_grad, see assign.
+        out_grad, in_data, out_data, in_grad, aux : list of NDArray
+            input and output for backward. See document for
+            corresponding arguments of Operator::Backward
+        scratch : NDArray
+            passed only if the CustomOpProp declares a scratch_shape.
+        """
+        raise NotImplementedError("Must override this")
+
+    def assign(self, dst, req, src):
+        """Write src to dst as requested by req.
+
+        Parameters
+        ----------
+        dst : NDArray
+            the output.
+        req : str
+            'null' to skip, 'write' or 'inplace' to overwrite, 'add' to add.
+        src : NDArray or number
+            the value.
+        """
+        if req == 'null':
+            return
+        elif req in ('write', 'inplace'):
+            dst[:] = src
+        elif req == 'add':
+            dst[:] += src
+
+class CustomOpProp(object):
+    """Base class for the declaration of an operator implemented in python with
+    NDArray. Like the operators of the library, it declares the arguments,
+    outputs and auxiliary states, the dependencies of backward, the arrays
+    that can share memory and the scratch space, and creates a CustomOp per
+    device to do the computation.
+
+    Parameters
+    ----------
+    need_top_grad : bool
+        the default declare_backward_dependency() depends on out_grad if True
+    """
+    _ref_holder = []
+
+    def __init__(self, need_top_grad=True):
+        self.info_ = None
+        self.need_top_grad_ = need_top_grad
+
+    def __call__(self, *args, **kwargs):
+        return self.get_symbol(*args, **kwargs)
+
+    def list_arguments(self):
+        """list_arguments interface. override to create new operators
+
+        Returns
+        -------
+        arguments : list of str
+            list of argument names.
+        """
+        return ['data']
+
+    def list_outputs(self):
+        """list_outputs interface. override to create new operators
+
+        Returns
+        -------
+        outputs : list of str
+            list of output names.
+        """
+        return ['output']
+
+    def list_auxiliary_states(self):
+        """list_auxiliary_states interface. override to create new operators
+
+        Returns
+        -------
+        aux : list of str
+            list of auxiliary state names.
+        """
+        return []
+
+    def infer_shape(self, in_shape):
+        """infer_shape interface. override to create new operators
+
+        Parameters
+        ----------
+        in_shape : list
+            list of argument shapes in the same order as
+            declared in list_arguments.
+
+        Returns
+        -------
+        in_shape : list
+            list of argument shapes. Can be modified from in_shape.
+        out_shape : list
+            list of output shapes, in the same order as declared in list_outputs.
+        aux_shape : list
+            list of auxiliary state shapes, in the same order as declared
+            in list_auxiliary_states.
+        """
+        return in_shape, [in_shape[0]], []
+
+    def declare_backward_dependency(self, out_grad, in_data, out_data):
+        """Declare dependencies of this operator for backward pass.
+
+        Parameters
+        ----------
+        out_grad : list of int
+            ids of out_grad blobs.
+        in_data : list of int
+            ids of in_data blobs.
+        out_data: list of int
+            ids of out_data blobs.
+
+        Returns
+        -------
+        deps : list of int
+            ids of the needed blobs.
+        """
+        deps = []
+        if self.need_top_grad_:
+            deps.extend(out_grad)
+        deps.extend(in_data)
+        deps.extend(out_data)
+        return deps
+
+    def forward_inplace(self):
+        """The pairs (i, j) such that out_data[j] can share the memory of
+        in_data[i] in forward. in_data[i] is then read before out_data[j] is
+        written, and req of out_data[j] is 'inplace'.
+
+        Returns
+        -------
+        pairs : list of tuple of int
+        """
+        return []
+
+    def backward_inplace(self):
+        """The pairs (i, j) such that in_grad[j] can share the memory of
+        out_grad[i] in backward.
+
+        Returns
+        -------
+        pairs : list of tuple of int
+        """
+        return []
+
+    def scratch_shape(self, in_shape):
+        """Shape of the scratch array passed to forward and backward, taken
+        from the temporary space of the device so that it is not allocated at
+        every call.
+
+        Parameters
+        ----------
+        in_shape : list
+            list of argument shapes.
+
+        Returns
+        -------
+        shape : tuple of int or None
+            None for no scratch array.
+        """
+        # pylint: disable=W0613
+        return None
+
+    def create_operator(self, ctx):
+        """Create the operator doing the computation on a device.
+
+        Parameters
+        ----------
+        ctx : Context
+            the device.
+
+        Returns
+        -------
+        op : CustomOp
+        """
+        raise NotImplementedError("Must override this")
+
+    def get_symbol(self, *args, **kwargs):
+        """Create a symbol from the operator.
+
+        Parameters
+        ----------
+        args : list
+            a list of input arguments (symbols)
+
+        Returns
+        -------
+        sym : mxnet.symbol.Symbol
+        """
+        ops = {}
+        keys = itertools.count(1)
+        # arrays read by the C side after the callbacks return
+        keep = {}
+        shape_arrays = {}
+
+        def op_entry(name, writable, num_ndarray, ndarraies, tags, reqs, is_train, key):
+            """C Callback for CustomOp::Forward and CustomOp::Backward"""
+            try:
+                tensors = [[] for i in range(6)]
+                for i in range(num_ndarray):
+                    tensors[tags[i]].append(NDArray(cast(ndarraies[i], NDArrayHandle),
+                                                    writable=tags[i] in writable))
+                kwargs = {'scratch': tensors[5][0]} if tensors[5] else {}
+                op = ops[key]
+                if name == 'forward':
+                    req = [_CUSTOM_REQ[reqs[i]] for i in range(len(tensors[1]))]
+                    op.forward(is_train=is_train, req=req, in_data=tensors[0],
+                               out_data=tensors[1], aux=tensors[4], **kwargs)
+                else:
+                    req = [_CUSTOM_REQ[reqs[i]] for i in range(len(tensors[2]))]
+                    op.backward(req=req, out_grad=tensors[3], in_data=tensors[0],
+                                out_data=tensors[1], in_grad=tensors[2], aux=tensors[4],
+                                **kwargs)
+            except Exception as e:
+                print('Error in CustomOp.%s: ' % name, str(e))
+                return False
+            return True
+
+        def forward_entry(num_ndarray, ndarraies, tags, reqs, is_train, key):
+            """C Callback for CustomOp::Forward"""
+            return op_entry('forward', (1, 4, 5), num_ndarray, ndarraies, tags, reqs,
+                            is_train, key)
+
+        def backward_entry(num_ndarray, ndarraies, tags, reqs, is_train, key):
+            """C Callback for CustomOp::Backward"""
+            return op_entry('backward', (2, 4, 5), num_ndarray, ndarraies, tags, reqs,
+                            is_train, key)
+
+        def del_entry(key):
+            """C Callback for CustomOp::~CustomOp"""
+            ops.pop(key, None)
+            return True
+
+        op_callbacks = [_custom_fb_functype(forward_entry),
+                        _custom_fb_functype(backward_entry),
+                        _custom_del_functype(del_entry)]
+
+        def list_entry(name, func, out):
+            """C Callback for the lists of CustomOpProp"""
+            try:
+                ret = [c_str(i) for i in func()] + [c_char_p(0)]
+                ret = keep[name] = c_array(c_char_p, ret)
+                out[0] = cast(ret, POINTER(POINTER(c_char)))
+            except Exception as e:
+                print('Error in CustomOpProp.%s: ' % name, str(e))
+                return False
+            return True
+
+        def list_arguments_entry(out, _):
+            """C Callback for CustomOpProp::ListArguments"""
+            return list_entry('list_arguments', self.list_arguments, out)
+
+        def list_outputs_entry(out, _):
+            """C Callback for CustomOpProp::ListOutputs"""
+            return list_entry('list_outputs', self.list_outputs, out)
+
+        def list_auxiliary_states_entry(out, _):
+            """C Callback for CustomOpProp::ListAuxiliaryStates"""
+            return list_entry('list_auxiliary_states', self.list_auxiliary_states, out)
+
+        def infer_shape_entry(num_tensor, tensor_dims, tensor_shapes, _):
+            """C Callback for CustomOpProp::InferShape"""
+            try:
+                n_in = len(self.list_arguments())
+                n_out = len(self.list_outputs())
+                n_aux = len(self.list_auxiliary_states())
+                assert num_tensor == n_in + n_out + n_aux
+
+                shapes = [tensor_shapes[i][:tensor_dims[i]] for i in range(n_in)]
+                ishape, oshape, ashape = self.infer_shape(shapes)
+                assert len(ishape) == n_in
+                assert len(oshape) == n_out
+                assert len(ashape) == n_aux
+                rshape = list(ishape) + list(oshape) + list(ashape)
+                for i in range(num_tensor):
+                    tensor_shapes[i] = _shape_array(shape_arrays, rshape[i])
+                    tensor_dims[i] = len(rshape[i])
+            except Exception as e:
+                print('Error in CustomOpProp.infer_shape: ', str(e))
+                return False
+            return True
+
+        def declare_backward_dependency_entry(out_grad, in_data, out_data, num_dep, deps, _):
+            """C Callback for CustomOpProp::DeclareBackwardDependency"""
+            try:
+                n_out = len(self.list_outputs())
+                out_grad = [out_grad[i] for i in range(n_out)]
+                in_data = [in_data[i] for i in range(len(self.list_arguments()))]
+                out_data = [out_data[i] for i in range(n_out)]
+                rdeps = self.declare_backward_dependency(out_grad, in_data, out_data)
+                num_dep[0] = len(rdeps)
+                rdeps = keep['deps'] = c_array(c_int, rdeps)
+                deps[0] = cast(rdeps, c_int_p)
+            except Exception as e:
+                print('Error in CustomOpProp.declare_backward_dependency: ', str(e))
+                return False
+            return True
+
+        def inplace_option_entry(backward, num_pairs, pairs, _):
+            """C Callback for CustomOpProp::ForwardInplaceOption and BackwardInplaceOption"""
+            try:
+                rpairs = self.backward_inplace() if backward else self.forward_inplace()
+                num_pairs[0] = len(rpairs)
+                flat = keep[('inplace', bool(backward))] = c_array(
+                    c_int, [i for pair in rpairs for i in pair])
+                pairs[0] = cast(flat, c_int_p)
+            except Exception as e:
+                print('Error in CustomOpProp.inplace_option: ', str(e))
+                return False
+            return True
+
+        def scratch_shape_entry(num_tensor, tensor_dims, tensor_shapes, ndim, shape, _):
+            """C Callback for the scratch space of CustomOp"""
+            try:
+                in_shape = [tensor_shapes[i][:tensor_dims[i]] for i in range(num_tensor)]
+                rshape = self.scratch_shape(in_shape)
+                rshape = () if rshape is None else rshape
+                ndim[0] = len(rshape)
+                shape[0] = _shape_array(shape_arrays, rshape)
+            except Exception as e:
+                print('Error in CustomOpProp.scratch_shape: ', str(e))
+                return False
+            return True
+
+        def create_operator_entry(dev_type, dev_id, info, _):
+            """C Callback for CustomOpProp::CreateOperator"""
+            try:
+                op = self.create_operator(Context(Context.devtype2str[dev_type], dev_id))
+                key = next(keys)
+                ops[key] = op
+                info[0] = _CustomOpInfo(op_callbacks[0], op_callbacks[1], op_callbacks[2],
+                                        key, key, key)
+            except Exception as e:
+                print('Error in CustomOpProp.create_operator: ', str(e))
+                return False
+            return True
+
+        self.info_ = _CustomOpPropInfo(
+            _custom_list_functype(list_arguments_entry),
+            _custom_list_functype(list_outputs_entry),
+            _custom_list_functype(list_auxiliary_states_entry),
+            _custom_infer_functype(infer_shape_entry),
+            _custom_deps_functype(declare_backward_dependency_entry),
+            _custom_inplace_functype(inplace_option_entry),
+            _custom_scratch_functype(scratch_shape_entry),
+            _custom_create_functype(create_operator_entry),
+            None, None, None, None, None, None, None, None)
+        self.op_callbacks_ = op_callbacks
+        cb_ptr = format(cast(pointer(self.info_), c_void_p).value, 'x')
+        # pylint: disable=E1101
+        sym = symbol.Symbol._Custom(*args,
+                                    info=cb_ptr,
+                                    **kwargs)
+        # keep a reference of ourself in CustomOpProp so we don't get garbage collected.
+        CustomOpProp._ref_holder.append(self)
+        return sym
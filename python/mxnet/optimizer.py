@@ -4,8 +4,8 @@ import math
 import ctypes
 from .base import _LIB, check_call
 from .base import c_array, mx_uint, mx_float, c_str
-from .base import OptimizerHandle, OptimizerCreator
-from .ndarray import NDArray, zeros, clip, sqrt
+from .base import OptimizerHandle, OptimizerCreator, NDArrayHandle
+from .ndarray import NDArray, zeros, clip, sqrt, fuse
 from .random import normal
 
 class Optimizer(object):
@@ -87,6 +87,50 @@ class Optimizer(object):
             ctypes.byref(handle)))
         return handle
 
+    @staticmethod
+    def _multi_update(name, weights, grads, states, lrs, wds, param_keys, param_vals):
+        """Update a group of weights with the fused C++ kernel.
+
+        One engine operation is pushed per device instead of several
+        NDArray operations per weight.
+
+        Parameters
+        ----------
+        name : str
+            the algorithm, one of 'sgd', 'adam' and 'rmsprop'
+        weights : list of NDArray
+            the weights to update
+        grads : list of NDArray
+            gradients of the weights
+        states : list of NDArray
+            flattened states, the states of weights[i] are
+            states[i*k:(i+1)*k] where k = len(states) / len(weights)
+        lrs : list of float
+            learning rate of each weight
+        wds : list of float
+            weight decay of each weight
+        param_keys : list of str
+            names of the algorithm parameters
+        param_vals : list
+            corresponding values
+        """
+        if len(weights) == 0:
+            return
+        assert len(states) % len(weights) == 0
+        param_keys = c_array(ctypes.c_char_p, [c_str(k) for k in param_keys])
+        param_vals = c_array(ctypes.c_char_p, [c_str(str(v)) for v in param_vals])
+        check_call(_LIB.MXOptimizerMultiUpdate(
+            c_str(name),
+            mx_uint(len(weights)),
+            c_array(NDArrayHandle, [w.handle for w in weights]),
+            c_array(NDArrayHandle, [g.handle for g in grads]),
+            mx_uint(len(states) // len(weights)),
+            c_array(NDArrayHandle, [x.handle for x in states]),
+            c_array(mx_float, lrs),
+            c_array(mx_float, wds),
+            mx_uint(len(param_keys)),
+            param_keys, param_vals))
+
     def __init__(self, rescale_grad=1, arg_names=None, wd=0.):
         self.rescale_grad = rescale_grad
         self.lr_scale = {}
@@ -113,6 +157,29 @@ class Optimizer(object):
     def update(self, index, weight, grad, state):
         """Update the parameters. override in implementations"""
 
+    def update_multi(self, indices, weights, grads, states):
+        """Update a group of parameters in one call.
+
+        The default implementation calls update for each parameter,
+        optimizers with a fused kernel override it.
+
+        Parameters
+        ----------
+        indices : list of int
+            the unique keys of the parameters
+
+        weights : list of NDArray
+            weight ndarrays
+
+        grads : list of NDArray
+            grad ndarrays
+
+        states : list
+            the states returned by create_state for each parameter
+        """
+        for index, weight, grad, state in zip(indices, weights, grads, states):
+            self.update(index, weight, grad, state)
+
     def set_lr_scale(self, args_lrscale):
         """Set individual learning rate scale for parameters
 
@@ -136,6 +203,26 @@ class Optimizer(object):
         self._index_update_count[index] += 1
         self.num_update = max(self._index_update_count[index], self.num_update)
 
+    def _get_lr(self, index):
+        """get learning rate for index, advancing the scheduler as update does.
+
+        Parameters
+        ----------
+        index : int
+            The index for weight
+
+        Returns
+        -------
+        lr : float
+            learning rate for this index
+        """
+        if getattr(self, 'lr_scheduler', None) is not None:
+            lr = self.lr_scheduler(self.num_update)
+            self._update_count(index)
+        else:
+            lr = self.lr
+        return lr * self.lr_scale.get(index, 1.0)
+
     def _get_wd(self, index):
         """get weight decay for index.
         Returns 0 for non-weights if the name of weights are provided for __init__.
@@ -250,6 +337,35 @@ class SGD(Optimizer):
             assert self.momentum == 0.0
             weight[:] += -lr * (grad + self.wd * weight)
 
+    def update_multi(self, indices, weights, grads, states):
+        """Update a group of parameters with one fused operation per device.
+
+        Parameters
+        ----------
+        indices : list of int
+            the unique keys of the parameters
+
+        weights : list of NDArray
+            weight ndarrays
+
+        grads : list of NDArray
+            grad ndarrays
+
+        states : list
+            the momentum of each parameter, or None without momentum
+        """
+        lrs = [self._get_lr(index) for index in indices]
+        # as in update, the weight decay without momentum applies to every parameter
+        if self.momentum > 0.0:
+            wds = [self._get_wd(index) for index in indices]
+        else:
+            wds = [self.wd] * len(indices)
+        clip_gradient = -1. if self.clip_gradient is None else self.clip_gradient
+        Optimizer._multi_update(
+            'sgd', weights, grads, states if self.momentum > 0.0 else [], lrs, wds,
+            ['momentum', 'rescale_grad', 'clip_gradient'],
+            [self.momentum, self.rescale_grad, clip_gradient])
+
 @register
 class SGLD(Optimizer):
     """Stochastic Langevin Dynamics Updater to sample from a distribution.
@@ -472,8 +588,8 @@ class Adam(Optimizer):
         self.lr_scheduler = lr_scheduler
         if lr_scheduler is not None:
             self.lr_scheduler.base_lr = learning_rate
-        self.time = 0
-        self.time_first_index = None
+        # time step of each index, advanced by update and update_multi alike
+        self.time = {}
 
     def create_state(self, index, weight):
         """Create additional optimizer state: mean, variance
@@ -484,10 +600,15 @@ class Adam(Optimizer):
             The weight data
 
         """
-        self.time_first_index = None  # time is incremented only on the first index
         return (zeros(weight.shape, weight.context),  # mean
                 zeros(weight.shape, weight.context))  # variance
 
+    def _advance_time(self, index):
+        """Advance the time step of index, return the new one, starting from 1."""
+        t1 = self.time.get(index, 0) + 1
+        self.time[index] = t1
+        return t1
+
     def update(self, index, weight, grad, state):
         """Update the parameters.
 
@@ -516,35 +637,84 @@ class Adam(Optimizer):
 
         mean, variance = state
 
-        # increment time only when the first parameters is called
-        if self.time_first_index is None:
-            self.time_first_index = index
-            self.time = 0  # all parameters share the same time
-        elif self.time_first_index == index:
-            self.time += 1
-
-        t1 = self.time + 1
+        t1 = self._advance_time(index)
         learning_rate = (lr *
                          math.sqrt(1. - self.beta2**t1) /
                          (1. - self.beta1**t1))
         beta_1t = self.beta1 * self.decay_factor ** (t1 - 1)
 
-        grad = grad * self.rescale_grad
-        if self.clip_gradient is not None:
-            grad = clip(grad, -self.clip_gradient, self.clip_gradient)
-
-        mean_t = beta_1t * mean + (1. - beta_1t) * grad
-        variance_t = (self.beta2 * variance +
-                      (1. - self.beta2) * grad * grad)
-        step = (learning_rate * mean_t /
-                (sqrt(variance_t) + self.epsilon))
         wd = self._get_wd(index)
-        if wd > 0.:
-            step += lr * wd * weight
+        # one kernel per updated array, without temporary arrays
+        with fuse():
+            grad = grad * self.rescale_grad
+            if self.clip_gradient is not None:
+                grad = clip(grad, -self.clip_gradient, self.clip_gradient)
+
+            mean[:] = beta_1t * mean + (1. - beta_1t) * grad
+            variance[:] = (self.beta2 * variance +
+                           (1. - self.beta2) * grad * grad)
+            step = (learning_rate * mean /
+                    (sqrt(variance) + self.epsilon))
+            if wd > 0.:
+                step += lr * wd * weight
+
+            weight[:] += -step
+
+    def update_multi(self, indices, weights, grads, states):
+        """Update a group of parameters with one fused operation per device.
+
+        Consecutive parameters sharing the same decayed beta1 are updated
+        together, which is the whole group unless some parameters were
+        updated more times than the others.
 
-        weight[:] += -step
-        mean[:] = mean_t
-        variance[:] = variance_t
+        Parameters
+        ----------
+        indices : list of int
+            the unique keys of the parameters
+
+        weights : list of NDArray
+            weight ndarrays
+
+        grads : list of NDArray
+            grad ndarrays
+
+        states : list of tuple
+            the (mean, variance) of each parameter
+        """
+        clip_gradient = -1. if self.clip_gradient is None else self.clip_gradient
+        group = ([], [], [], [], [])
+        group_beta = None
+        for index, weight, grad, state in zip(indices, weights, grads, states):
+            lr = self._get_lr(index)
+            t1 = self._advance_time(index)
+            learning_rate = (lr *
+                             math.sqrt(1. - self.beta2**t1) /
+                             (1. - self.beta1**t1))
+            beta_1t = self.beta1 * self.decay_factor ** (t1 - 1)
+            if beta_1t != group_beta and len(group[0]) > 0:
+                Optimizer._multi_update(
+                    'adam', *group,
+                    param_keys=['beta1', 'beta2', 'epsilon', 'rescale_grad', 'clip_gradient'],
+                    param_vals=[group_beta, self.beta2, self.epsilon,
+                                self.rescale_grad, clip_gradient])
+                group = ([], [], [], [], [])
+            group_beta = beta_1t
+            # the kernel applies weight decay as learning_rate*wd*weight
+            wd = self._get_wd(index)
+            if wd > 0. and learning_rate != 0.:
+                wd = lr * wd / learning_rate
+            else:
+                wd = 0.
+            group[0].append(weight)
+            group[1].append(grad)
+            group[2].extend(state)
+            group[3].append(learning_rate)
+            group[4].append(wd)
+        Optimizer._multi_update(
+            'adam', *group,
+            param_keys=['beta1', 'beta2', 'epsilon', 'rescale_grad', 'clip_gradient'],
+            param_vals=[group_beta, self.beta2, self.epsilon,
+                        self.rescale_grad, clip_gradient])
 
 @register
 class RMSProp(Optimizer):
@@ -614,13 +784,39 @@ class RMSProp(Optimizer):
         lr *= self.lr_scale.get(index, 1.0)
         n, g, delta = state
         wd = self._get_wd(index)
-        grad = grad * self.rescale_grad
-        if self.clip_gradient is not None:
-            grad = clip(grad, -self.clip_gradient, self.clip_gradient)
-        n[:] = (1 - self.gamma1) * (grad * grad) + self.gamma1 * n
-        g[:] = (1 - self.gamma1) * grad + self.gamma1 * g
-        delta[:] = (self.gamma2) * delta - lr * (grad/sqrt(n - g*g + 1e-4) + wd * weight)
-        weight[:] += delta
+        with fuse():
+            grad = grad * self.rescale_grad
+            if self.clip_gradient is not None:
+                grad = clip(grad, -self.clip_gradient, self.clip_gradient)
+            n[:] = (1 - self.gamma1) * (grad * grad) + self.gamma1 * n
+            g[:] = (1 - self.gamma1) * grad + self.gamma1 * g
+            delta[:] = (self.gamma2) * delta - lr * (grad/sqrt(n - g*g + 1e-4) + wd * weight)
+            weight[:] += delta
+
+    def update_multi(self, indices, weights, grads, states):
+        """Update a group of parameters with one fused operation per device.
+
+        Parameters
+        ----------
+        indices : list of int
+            the unique keys of the parameters
+
+        weights : list of NDArray
+            weight ndarrays
+
+        grads : list of NDArray
+            grad ndarrays
+
+        states : list of tuple
+            the (n, g, delta) of each parameter
+        """
+        lrs = [self.lr * self.lr_scale.get(index, 1.0) for index in indices]
+        wds = [self._get_wd(index) for index in indices]
+        clip_gradient = -1. if self.clip_gradient is None else self.clip_gradient
+        Optimizer._multi_update(
+            'rmsprop', weights, grads, [x for state in states for x in state], lrs, wds,
+            ['gamma1', 'gamma2', 'rescale_grad', 'clip_gradient'],
+            [self.gamma1, self.gamma2, self.rescale_grad, clip_gradient])
 
 @register
 class AdaDelta(Optimizer):
@@ -712,7 +908,17 @@ def get_updater(optimizer):
     """
     states = dict()
     def updater(index, grad, weight):
-        """updater for kvstore"""
+        """updater for kvstore
+
+        index, grad and weight can also be lists of the same length, in which
+        case the whole group is updated with a single update_multi call.
+        """
+        if isinstance(index, (list, tuple)):
+            for i, w in zip(index, weight):
+                if i not in states:
+                    states[i] = optimizer.create_state(i, w)
+            optimizer.update_multi(index, weight, grad, [states[i] for i in index])
+            return
         if index not in states:
             states[index] = optimizer.create_state(index, weight)
         optimizer.update(index, weight, grad, states[index])
@@ -0,0 +1,38 @@
+# coding: utf-8
+"""Profiler of the operators executed by the engine.
+
+Example
+-------
+>>> mx.profiler.start()
+>>> model.fit(...)
+>>> mx.profiler.stop()
+>>> mx.profiler.dump('profile.json')
+
+Open chrome://tracing in Chrome and load the json file. Each device shows
+up as a process and each engine thread as a thread. Every operator is a
+slice labelled with its name, with the bytes of its inputs and outputs as
+an argument.
+"""
+from __future__ import absolute_import
+
+from .base import _LIB, check_call, c_str
+
+def start():
+    """Start recording the operators executed by the engine."""
+    check_call(_LIB.MXSetProfilerState(1))
+
+def stop():
+    """Stop recording. Operators still in flight may not be recorded,
+    call mx.nd.waitall() before stop to include them."""
+    check_call(_LIB.MXSetProfilerState(0))
+
+def dump(filename='profile.json'):
+    """Write the recorded operators as a chrome://tracing json file,
+    and clear them.
+
+    Parameters
+    ----------
+    filename : str
+        The output file.
+    """
+    check_call(_LIB.MXDumpProfile(c_str(filename)))
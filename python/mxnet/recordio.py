@@ -5,10 +5,11 @@
 from __future__ import absolute_import
 from collections import namedtuple
 
+import os
 import ctypes
 from .base import _LIB
 from .base import RecordIOHandle
-from .base import check_call
+from .base import check_call, c_str
 import struct
 import numpy as np
 try:
@@ -25,10 +26,10 @@ class MXRecordIO(object):
     uri : string
         uri path to recordIO file.
     flag : string
-        "r" for reading or "w" writing.
+        "r" for reading, "w" writing or "a" appending.
     """
     def __init__(self, uri, flag):
-        self.uri = ctypes.c_char_p(uri)
+        self.uri = c_str(uri)
         self.handle = RecordIOHandle()
         self.flag = flag
         self.is_open = False
@@ -36,8 +37,9 @@ class MXRecordIO(object):
 
     def open(self):
         """Open record file"""
-        if self.flag == "w":
-            check_call(_LIB.MXRecordIOWriterCreate(self.uri, ctypes.byref(self.handle)))
+        if self.flag == "w" or self.flag == "a":
+            check_call(_LIB.MXRecordIOWriterCreateEx(self.uri, c_str(self.flag),
+                                                     ctypes.byref(self.handle)))
             self.writable = True
         elif self.flag == "r":
             check_call(_LIB.MXRecordIOReaderCreate(self.uri, ctypes.byref(self.handle)))
@@ -57,6 +59,7 @@ class MXRecordIO(object):
             check_call(_LIB.MXRecordIOWriterFree(self.handle))
         else:
             check_call(_LIB.MXRecordIOReaderFree(self.handle))
+        self.is_open = False
 
     def reset(self):
         """Reset pointer to first item. If record is opened with 'w',
@@ -77,6 +80,19 @@ class MXRecordIO(object):
                                                     ctypes.c_char_p(buf),
                                                     ctypes.c_size_t(len(buf))))
 
+    def tell(self):
+        """Get the current write position in the record file.
+
+        Returns
+        -------
+        pos : int
+            offset where the next record will be written.
+        """
+        assert self.writable
+        pos = ctypes.c_size_t()
+        check_call(_LIB.MXRecordIOWriterTell(self.handle, ctypes.byref(pos)))
+        return pos.value
+
     def read(self):
         """Read a record as string
 
@@ -97,6 +113,145 @@ class MXRecordIO(object):
         else:
             return None
 
+class MXIndexedRecordIO(MXRecordIO):
+    """Python interface for read/write RecordIO data formmat with index.
+    The offset of every record is kept in a sidecar index file, which allows
+    random access and splitting the records into parts.
+
+    Parameters
+    ----------
+    idx_path : str
+        path to index file, with one "key\toffset" line per record.
+    uri : str
+        path to recordIO file.
+    flag : str
+        "r" for reading, "w" writing or "a" appending.
+    key_type : type
+        data type for keys.
+    part_index : int
+        index of the part to read, in [0, num_parts).
+    num_parts : int
+        number of parts to split the records into when reading.
+        Each part holds a contiguous range of the records in the index,
+        so that distributed workers can read disjoint parts of one file.
+    """
+    def __init__(self, idx_path, uri, flag, key_type=int, part_index=0, num_parts=1):
+        assert 0 <= part_index < num_parts
+        self.idx_path = idx_path
+        self.idx = {}
+        self.keys = []
+        self.positions = {}
+        self.key_type = key_type
+        self.part_index = part_index
+        self.num_parts = num_parts
+        self.fidx = None
+        self.cursor = 0
+        super(MXIndexedRecordIO, self).__init__(uri, flag)
+
+    def open(self):
+        super(MXIndexedRecordIO, self).open()
+        self.idx = {}
+        self.keys = []
+        self.positions = {}
+        self.cursor = 0
+        if self.flag != "w" and os.path.isfile(self.idx_path):
+            with open(self.idx_path) as fidx:
+                for line in fidx:
+                    line = line.strip().split('\t')
+                    key = self.key_type(line[0])
+                    self.idx[key] = int(line[1])
+                    self.keys.append(key)
+        if self.writable:
+            self.fidx = open(self.idx_path, self.flag)
+        else:
+            # keep the contiguous range of records of this part
+            num_records = len(self.keys)
+            self.keys = self.keys[num_records * self.part_index // self.num_parts:
+                                  num_records * (self.part_index + 1) // self.num_parts]
+            self.positions = dict((key, i) for i, key in enumerate(self.keys))
+            if self.keys:
+                self.seek(self.keys[0])
+
+    def close(self):
+        if not self.is_open:
+            return
+        super(MXIndexedRecordIO, self).close()
+        if self.fidx is not None:
+            self.fidx.close()
+            self.fidx = None
+
+    def seek(self, idx):
+        """Move the read pointer to the record with key idx.
+        Following sequential reads continue from that record.
+
+        Parameters
+        ----------
+        idx : key_type
+            key of the record.
+        """
+        assert not self.writable
+        pos = ctypes.c_size_t(self.idx[idx])
+        check_call(_LIB.MXRecordIOReaderSeek(self.handle, pos))
+        # records outside of this part end sequential reading
+        self.cursor = self.positions.get(idx, len(self.keys))
+
+    def read(self):
+        """Read the next record of this part as string.
+
+        Returns
+        ----------
+        buf : string
+            buffer read, None at the end of the part.
+        """
+        if self.cursor >= len(self.keys):
+            return None
+        self.cursor += 1
+        return super(MXIndexedRecordIO, self).read()
+
+    def read_idx(self, idx):
+        """Read the record with key idx as string.
+
+        Parameters
+        ----------
+        idx : key_type
+            key of the record.
+
+        Returns
+        ----------
+        buf : string
+            buffer read.
+        """
+        self.seek(idx)
+        self.cursor += 1
+        return super(MXIndexedRecordIO, self).read()
+
+    def write(self, buf):
+        """Write a string buffer as a record, keyed by its position in the file.
+
+        Parameters
+        ----------
+        buf : string
+            buffer to write.
+        """
+        self.write_idx(len(self.keys), buf)
+
+    def write_idx(self, idx, buf):
+        """Write a string buffer as a record with key idx.
+
+        Parameters
+        ----------
+        idx : key_type
+            key of the record.
+        buf : string
+            buffer to write.
+        """
+        key = self.key_type(idx)
+        pos = self.tell()
+        super(MXIndexedRecordIO, self).write(buf)
+        self.fidx.write('%s\t%d\n' % (str(key), pos))
+        self.idx[key] = pos
+        self.keys.append(key)
+
 IRHeader = namedtuple('HEADER', ['flag', 'label', 'id', 'id2'])
 _IRFormat = 'IfQQ'
 _IRSize = struct.calcsize(_IRFormat)
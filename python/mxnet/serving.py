@@ -0,0 +1,361 @@
+# coding: utf-8
+# pylint: disable=too-many-arguments, too-many-instance-attributes, too-many-locals
+"""Batched, thread-safe inference server.
+
+Requests submitted from any thread are grouped into batches by a pool of
+workers, each owning an executor that shares the parameters of the other
+workers on the same device. The server can also be exposed over HTTP on a
+TCP port or a Unix socket.
+"""
+from __future__ import absolute_import
+
+import json
+import logging
+import threading
+import time
+import numpy as np
+
+from . import ndarray as nd
+from .context import Context, cpu
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+try:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn, UnixStreamServer
+except ImportError:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn, UnixStreamServer
+
+
+class PredictRequest(object):
+    """A prediction request, completed by a worker of InferenceServer."""
+    def __init__(self, inputs, num_samples):
+        self.inputs = inputs
+        self.num_samples = num_samples
+        self.arrival = time.time()
+        self._outputs = None
+        self._error = None
+        self._done = threading.Event()
+
+    def _complete(self, outputs=None, error=None):
+        """Set the result and wake up the waiting threads."""
+        self._outputs = outputs
+        self._error = error
+        self._done.set()
+
+    def done(self):
+        """Whether the request is completed."""
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """Wait for the outputs of the request.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Seconds to wait, forever by default.
+
+        Returns
+        -------
+        outputs : list of numpy.ndarray
+            The outputs of the network for the samples of the request.
+        """
+        if not self._done.wait(timeout):
+            raise RuntimeError('Prediction did not complete in %f seconds' % timeout)
+        if self._error is not None:
+            raise self._error
+        return self._outputs
+
+
+def _bind_predictor(symbol, ctx, arg_params, aux_params, input_shapes):
+    """Bind an executor for prediction using the given parameter arrays."""
+    arg_shapes, _, _ = symbol.infer_shape(**input_shapes)
+    if arg_shapes is None:
+        raise ValueError('Cannot infer the shapes of the network from %s' % str(input_shapes))
+    args = {}
+    for name, shape in zip(symbol.list_arguments(), arg_shapes):
+        if name in arg_params:
+            if arg_params[name].shape != shape:
+                raise ValueError('Shape of %s is %s, expected %s' % (
+                    name, str(arg_params[name].shape), str(shape)))
+            args[name] = arg_params[name]
+        else:
+            # inputs and unused labels
+            args[name] = nd.zeros(shape, ctx)
+    aux_states = []
+    for name in symbol.list_auxiliary_states():
+        if name not in aux_params:
+            raise ValueError('Cannot find auxiliary state %s' % name)
+        aux_states.append(aux_params[name])
+    return symbol.bind(ctx, args, grad_req='null', aux_states=aux_states)
+
+
+class InferenceServer(object):
+    """Serve the predictions of a network with dynamic batching.
+
+    A worker takes the oldest request and adds the requests that arrive
+    until max_latency seconds after it, or until max_batch_size samples are
+    collected. The batch is padded to the next power of two and run by an
+    executor reshaped to that size, so that a small batch does not pay for
+    max_batch_size samples.
+
+    Parameters
+    ----------
+    symbol : Symbol
+        The network.
+    arg_params : dict of str to NDArray
+        The parameters of the network.
+    aux_params : dict of str to NDArray
+        The auxiliary states of the network.
+    input_shapes : dict of str to tuple
+        Shape of one sample of each input, without the batch dimension.
+    ctx : Context or list of Context, optional
+        The devices to run on, workers are spread over them.
+    num_workers : int
+        Number of workers, each running one batch at a time.
+    max_batch_size : int
+        Maximum number of samples in a batch.
+    max_latency : float
+        Seconds a request waits for other requests to be batched with it.
+
+    Examples
+    --------
+    >>> server = mx.serving.InferenceServer(net, arg_params, aux_params, {'data': (784,)})
+    >>> prob = server.predict(data=np.random.uniform(size=(1, 784)))[0]
+    """
+    def __init__(self, symbol, arg_params, aux_params, input_shapes, ctx=None,
+                 num_workers=4, max_batch_size=32, max_latency=0.005):
+        if ctx is None:
+            ctx = [cpu()]
+        if isinstance(ctx, Context):
+            ctx = [ctx]
+        self.symbol = symbol
+        self.input_shapes = dict((name, tuple(shape)) for name, shape in input_shapes.items())
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._num_requests = 0
+        self._num_batches = 0
+        self._num_samples = 0
+        self._num_padded = 0
+        # one copy of the parameters per device, shared by the workers on it
+        params = {}
+        for dev in ctx:
+            if str(dev) not in params:
+                params[str(dev)] = (
+                    dict((k, v.copyto(dev)) for k, v in arg_params.items()),
+                    dict((k, v.copyto(dev)) for k, v in (aux_params or {}).items()))
+        # bind in the constructor to report errors to the caller
+        executors = []
+        for i in range(num_workers):
+            dev = ctx[i % len(ctx)]
+            arg, aux = params[str(dev)]
+            executors.append(_bind_predictor(
+                symbol, dev, arg, aux,
+                dict((name, (max_batch_size,) + shape)
+                     for name, shape in self.input_shapes.items())))
+        self._workers = []
+        for texec in executors:
+            thread = threading.Thread(target=self._worker, args=(texec,))
+            thread.daemon = True
+            thread.start()
+            self._workers.append(thread)
+
+    def submit(self, **inputs):
+        """Queue a request and return without waiting.
+
+        Parameters
+        ----------
+        **inputs
+            Keyword arguments of input name to an array of samples, the first
+            dimension being the number of samples.
+
+        Returns
+        -------
+        request : PredictRequest
+            Call result() to get the outputs.
+        """
+        if set(inputs.keys()) != set(self.input_shapes.keys()):
+            raise ValueError('Expect inputs %s, got %s' % (
+                str(sorted(self.input_shapes.keys())), str(sorted(inputs.keys()))))
+        num_samples = None
+        for name, value in inputs.items():
+            value = np.asarray(value, dtype=np.float32)
+            if value.shape[1:] != self.input_shapes[name]:
+                raise ValueError('Shape of input %s is %s, expected (n,)+%s' % (
+                    name, str(value.shape), str(self.input_shapes[name])))
+            if num_samples is not None and value.shape[0] != num_samples:
+                raise ValueError('Inputs have different numbers of samples')
+            num_samples = value.shape[0]
+            inputs[name] = value
+        if num_samples < 1 or num_samples > self.max_batch_size:
+            raise ValueError('A request must have between 1 and %d samples, got %d' % (
+                self.max_batch_size, num_samples))
+        request = PredictRequest(inputs, num_samples)
+        self._queue.put(request)
+        return request
+
+    def predict(self, **inputs):
+        """Predict and wait for the outputs, see submit.
+
+        Returns
+        -------
+        outputs : list of numpy.ndarray
+            The outputs of the network for the samples.
+        """
+        return self.submit(**inputs).result()
+
+    def stats(self):
+        """Return the number of requests, batches, samples and padded samples run so far."""
+        with self._lock:
+            return {'num_requests': self._num_requests,
+                    'num_batches': self._num_batches,
+                    'num_samples': self._num_samples,
+                    'num_padded': self._num_padded}
+
+    def close(self):
+        """Finish the queued requests and stop the workers."""
+        for _ in self._workers:
+            self._queue.put(None)
+        for thread in self._workers:
+            thread.join()
+
+    def _bucket(self, size):
+        """The batch size a batch of size samples is padded to."""
+        bucket = 1
+        while bucket < size:
+            bucket *= 2
+        return min(bucket, self.max_batch_size)
+
+    def _worker(self, base_exec):
+        """Thread entry"""
+        # executors by batch size, all sharing the memory of base_exec
+        executors = {self.max_batch_size: base_exec}
+        pending = None
+        stop = False
+        while not stop:
+            first = pending if pending is not None else self._queue.get()
+            pending = None
+            if first is None:
+                break
+            batch = [first]
+            size = first.num_samples
+            deadline = first.arrival + self.max_latency
+            while size < self.max_batch_size:
+                timeout = deadline - time.time()
+                try:
+                    if timeout > 0:
+                        request = self._queue.get(timeout=timeout)
+                    else:
+                        request = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    stop = True
+                    break
+                if size + request.num_samples > self.max_batch_size:
+                    pending = request
+                    break
+                batch.append(request)
+                size += request.num_samples
+            self._run_batch(executors, batch, size)
+        if pending is not None:
+            self._run_batch(executors, [pending], pending.num_samples)
+
+    def _run_batch(self, executors, batch, size):
+        """Run a batch and complete its requests."""
+        bucket = self._bucket(size)
+        try:
+            texec = executors.get(bucket)
+            if texec is None:
+                texec = executors[self.max_batch_size].reshape(
+                    partial_shaping=True,
+                    **dict((name, (bucket,) + shape) for name, shape in self.input_shapes.items()))
+                executors[bucket] = texec
+            for name, shape in self.input_shapes.items():
+                data = [request.inputs[name] for request in batch]
+                if bucket > size:
+                    data.append(np.zeros((bucket - size,) + shape, dtype=np.float32))
+                texec.arg_dict[name][:] = data[0] if len(data) == 1 else np.concatenate(data)
+            texec.forward(is_train=False)
+            outputs = [out.asnumpy() for out in texec.outputs]
+        except Exception as err: # pylint: disable=broad-except
+            for request in batch:
+                request._complete(error=err) # pylint: disable=protected-access
+            return
+        with self._lock:
+            self._num_requests += len(batch)
+            self._num_batches += 1
+            self._num_samples += size
+            self._num_padded += bucket - size
+        begin = 0
+        for request in batch:
+            end = begin + request.num_samples
+            request._complete([out[begin:end] for out in outputs]) # pylint: disable=protected-access
+            begin = end
+
+    def serve(self, address):
+        """Serve the predictions over HTTP on a background thread.
+
+        A POST request takes a json object of input name to a list of
+        samples, and returns {"outputs": [...]} with one list per output.
+
+        Parameters
+        ----------
+        address : tuple of (str, int) or str
+            (host, port) to listen on, or the path of a Unix socket.
+
+        Returns
+        -------
+        server : SocketServer
+            The http server, call its shutdown method to stop serving.
+        """
+        if isinstance(address, tuple):
+            server = _ThreadingHTTPServer(address, _PredictHandler)
+        else:
+            server = _ThreadingUnixHTTPServer(address, _PredictHandler)
+        server.inference = self
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return server
+
+
+class _PredictHandler(BaseHTTPRequestHandler):
+    """Handle the POST requests of InferenceServer.serve."""
+    def do_POST(self): # pylint: disable=invalid-name
+        """Predict the samples of the request."""
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            inputs = json.loads(self.rfile.read(length).decode('utf-8'))
+            outputs = self.server.inference.predict(
+                **dict((str(k), np.array(v, dtype=np.float32)) for k, v in inputs.items()))
+            code, body = 200, {'outputs': [out.tolist() for out in outputs]}
+        except (ValueError, TypeError) as err:
+            code, body = 400, {'error': str(err)}
+        except Exception as err: # pylint: disable=broad-except
+            code, body = 500, {'error': str(err)}
+        body = json.dumps(body).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args): # pylint: disable=redefined-builtin
+        logging.debug(format, *args)
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    """HTTP server handling each connection on a thread."""
+    daemon_threads = True
+
+
+class _ThreadingUnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    """HTTP server on a Unix socket handling each connection on a thread."""
+    daemon_threads = True
@@ -0,0 +1,65 @@
+# coding: utf-8
+"""Statistics and control of the memory pool of each device.
+
+Example
+-------
+>>> stats = mx.storage.stats(mx.gpu(0))
+>>> print(stats['allocated_bytes'], stats['pooled_bytes'])
+>>> mx.storage.release_all(mx.gpu(0))
+
+Freed arrays are kept in a pool for reuse, with sizes rounded up to size
+classes. The pool of a device keeps at most MXNET_STORAGE_POOL_LIMIT_MB
+allocated, above which the pooled blocks of the least recently used size
+classes are released.
+"""
+from __future__ import absolute_import
+
+import ctypes
+from .base import _LIB, check_call, py_str, mx_uint
+from .context import current_context
+
+def stats(ctx=None):
+    """Return the memory statistics of a device.
+
+    Parameters
+    ----------
+    ctx : Context, optional
+        The device, the current context by default.
+
+    Returns
+    -------
+    stats : dict of str to int
+        allocated_bytes : bytes allocated from the device, in use or pooled.
+        pooled_bytes : bytes kept in the pool for reuse.
+        requested_bytes : bytes requested by the arrays in use, before rounding.
+        peak_allocated_bytes : maximum of allocated_bytes.
+        num_alloc : number of allocations.
+        num_pool_hit : number of allocations served by the pool.
+        num_released : number of pooled blocks released to the device.
+    """
+    if ctx is None:
+        ctx = current_context()
+    size = mx_uint()
+    keys = ctypes.POINTER(ctypes.c_char_p)()
+    vals = ctypes.POINTER(ctypes.c_uint64)()
+    check_call(_LIB.MXStorageGetStats(ctypes.c_int(ctx.device_typeid),
+                                      ctypes.c_int(ctx.device_id),
+                                      ctypes.byref(size),
+                                      ctypes.byref(keys),
+                                      ctypes.byref(vals)))
+    return dict((py_str(keys[i]), int(vals[i])) for i in range(size.value))
+
+def release_all(ctx=None):
+    """Release the memory kept in the pool of a device.
+    Arrays freed but not yet collected by the engine stay pooled, call
+    mx.nd.waitall() before to release them as well.
+
+    Parameters
+    ----------
+    ctx : Context, optional
+        The device, the current context by default.
+    """
+    if ctx is None:
+        ctx = current_context()
+    check_call(_LIB.MXStorageReleaseAll(ctypes.c_int(ctx.device_typeid),
+                                        ctypes.c_int(ctx.device_id)))
@@ -5,17 +5,19 @@ from __future__ import absolute_import
 
 import copy
 import ctypes
+import json
 from numbers import Number
 import sys
 import numpy
 from .base import _LIB
 from .base import c_array, c_str, mx_uint, py_str, string_types, mx_real_t
 from .base import NDArrayHandle, ExecutorHandle, SymbolHandle
-from .base import check_call, ctypes2docstring
+from .base import check_call, ctypes2docstring, _load_op_signatures
 from .name import NameManager
 from .attribute import AttrScope
 from .context import Context
 from .ndarray import NDArray, zeros, _DTYPE_NP_TO_MX, _DTYPE_MX_TO_NP
+from .ndarray import _new_alloc_handle
 from .executor import Executor
 
 
@@ -643,6 +645,105 @@ class Symbol(object):
         executor = self.bind(ctx, arg_ndarrays, grad_ndarrays, grad_req, aux_ndarrays)
         return executor
 
+    def plan_memory(self, ctx, grad_req='write', type_dict=None, group2ctx=None,
+                    strategy='best_fit', **kwargs):
+        """Plan the memory of simple_bind without binding nor allocating it.
+
+        Parameters
+        ----------
+        ctx : Context
+            The device context the executor would run on.
+        grad_req: {'write', 'add', 'null'}, or dict of str to str, optional
+            Specifies how the gradients would be updated, as in simple_bind.
+        type_dict  : dict of str->numpy.dtype
+            Input type dictionary, name->dtype
+        group2ctx : dict of string to mx.Context
+            The dict mapping the ``ctx_group`` attribute to the context assignment.
+        strategy : {'best_fit', 'greedy_lifetime'}
+            How buffers are assigned to the outputs of the nodes.
+
+            - 'best_fit' reuses, when an output is produced, the released buffer
+              closest in size. bind uses it unless MXNET_EXEC_MEMORY_STRATEGY is set.
+            - 'greedy_lifetime' plans the whole graph first, placing the largest outputs
+              first into buffers not in use during their lifetime.
+        kwargs : dict of str->shape
+            Input shape dictionary, name->shape
+
+        Returns
+        -------
+        plan : dict
+            - ``peak_bytes``, bytes used by the executor, internal plus external bytes.
+            - ``internal_bytes``, bytes of the buffers bind would allocate.
+            - ``external_bytes``, bytes of the arguments, gradients and auxiliary states.
+            - ``unshared_bytes``, bytes of the internal outputs if no buffer was shared.
+            - ``storages``, list of dict with the ``id``, ``bytes`` and ``ctx`` of each buffer.
+            - ``entries``, list of dict with the ``node``, ``output``, ``shape``, ``bytes``,
+              ``storage_id`` of each internal output, and whether it is computed
+              ``inplace`` of its input. Outputs with the same ``storage_id`` share a buffer.
+            - ``strategy``, the planning strategy.
+
+        Examples
+        --------
+        >>> plan = net.plan_memory(mx.gpu(), data=(128, 3, 224, 224))
+        >>> plan['peak_bytes'] >> 20
+        """
+        # pylint: disable=too-many-locals
+        if not isinstance(ctx, Context):
+            raise TypeError("Context type error")
+        if type_dict is None:
+            type_dict = {k: mx_real_t for k in self.list_arguments()}
+        arg_shapes, _, aux_shapes = self.infer_shape(**kwargs)
+        arg_types, _, aux_types = self.infer_type(**type_dict)
+        if arg_shapes == None or arg_types == None:
+            raise ValueError("Input node is not complete")
+        # arrays are only described, their memory is never allocated
+        def _describe(shape, dtype):
+            return NDArray(_new_alloc_handle(shape, ctx, True, dtype))
+        listed_arguments = self.list_arguments()
+        args = [_describe(shape, dtype) for shape, dtype in zip(arg_shapes, arg_types)]
+        aux_states = [_describe(shape, dtype) for shape, dtype in zip(aux_shapes, aux_types)]
+        req_map = {'null' : 0, 'write' : 1, 'add' : 3}
+        if isinstance(grad_req, string_types):
+            grad_req = dict((name, grad_req) for name in listed_arguments
+                            if not (name.endswith('data') or name.endswith('label')))
+        args_grad = []
+        reqs = []
+        for name, shape, dtype in zip(listed_arguments, arg_shapes, arg_types):
+            req = grad_req.get(name, 'null')
+            if req not in req_map:
+                raise ValueError('grad_req must be in %s' % str(req_map))
+            args_grad.append(_describe(shape, dtype) if req != 'null' else None)
+            reqs.append(mx_uint(req_map[req]))
+
+        ctx_map_keys = []
+        ctx_map_dev_types = []
+        ctx_map_dev_ids = []
+        if group2ctx:
+            for key, val in group2ctx.items():
+                ctx_map_keys.append(c_str(key))
+                ctx_map_dev_types.append(ctypes.c_int(val.device_typeid))
+                ctx_map_dev_ids.append(ctypes.c_int(val.device_id))
+
+        plan = ctypes.c_char_p()
+        check_call(_LIB.MXExecutorPlanMemory(
+            self.handle,
+            ctypes.c_int(ctx.device_typeid),
+            ctypes.c_int(ctx.device_id),
+            mx_uint(len(ctx_map_keys)),
+            c_array(ctypes.c_char_p, ctx_map_keys),
+            c_array(ctypes.c_int, ctx_map_dev_types),
+            c_array(ctypes.c_int, ctx_map_dev_ids),
+            mx_uint(len(args)),
+            c_array(NDArrayHandle, [arr.handle for arr in args]),
+            c_array(NDArrayHandle, [arr.handle if arr is not None else None
+                                    for arr in args_grad]),
+            c_array(mx_uint, reqs),
+            mx_uint(len(aux_states)),
+            c_array(NDArrayHandle, [arr.handle for arr in aux_states]),
+            c_str(strategy),
+            ctypes.byref(plan)))
+        return json.loads(py_str(plan.value))
+
     def bind(self, ctx, args, args_grad=None, grad_req='write',
              aux_states=None, group2ctx=None, shared_exec=None):
         """Bind current symbol to get an executor.
@@ -911,8 +1012,8 @@ def load_json(json_str):
     return Symbol(handle)
 
 
-def _make_atomic_symbol_function(handle):
-    """Create an atomic symbol function by handle and funciton name."""
+def _describe_atomic_symbol(handle):
+    """Get the signature of an atomic symbol, used by _make_atomic_symbol_function."""
     name = ctypes.c_char_p()
     desc = ctypes.c_char_p()
     key_var_num_args = ctypes.c_char_p()
@@ -946,6 +1047,12 @@ def _make_atomic_symbol_function(handle):
                'symbol: Symbol\n'+
                '    The result symbol.')
     doc_str = doc_str % (desc, param_str)
+    return {'name': func_name, 'doc': doc_str, 'key_var_num_args': key_var_num_args}
+
+def _make_atomic_symbol_function(handle, signature):
+    """Create an atomic symbol function by handle and its signature."""
+    func_name = str(signature['name'])
+    key_var_num_args = signature['key_var_num_args']
 
     def creator(*args, **kwargs):
         """Activation Operator of Neural Net.
@@ -1005,7 +1112,7 @@ def _make_atomic_symbol_function(handle):
         return s
 
     creator.__name__ = func_name
-    creator.__doc__ = doc_str
+    creator.__doc__ = signature['doc']
     return creator
 
 
@@ -1016,10 +1123,12 @@ def _init_symbol_module():
 
     check_call(_LIB.MXSymbolListAtomicSymbolCreators(ctypes.byref(size),
                                                      ctypes.byref(plist)))
+    signatures = _load_op_signatures(
+        'symbol', size.value, lambda i: _describe_atomic_symbol(SymbolHandle(plist[i])))
     module_obj = sys.modules[__name__]
     for i in range(size.value):
         hdl = SymbolHandle(plist[i])
-        function = _make_atomic_symbol_function(hdl)
+        function = _make_atomic_symbol_function(hdl, signatures[i])
         if function.__name__.startswith('_'):
             setattr(Symbol, function.__name__, staticmethod(function))
         else:
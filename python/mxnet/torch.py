@@ -8,7 +8,7 @@ import sys
 from .base import _LIB
 from .base import c_array, py_str, ctypes2docstring
 from .base import mx_uint, mx_float, NDArrayHandle, FunctionHandle
-from .base import check_call
+from .base import check_call, _load_op_signatures
 from .ndarray import NDArray, _new_empty_handle
 
 try:
@@ -17,8 +17,8 @@ except OSError:
     pass
 
 # pylint: disable=too-many-locals, invalid-name
-def _make_torch_function(handle):
-    """Create a Torch function from the FunctionHandle."""
+def _describe_torch_function(handle):
+    """Get the signature of a Torch function, None for other NDArray functions."""
     # Get the property of function
     n_used_vars = mx_uint()
     n_scalars = mx_uint()
@@ -67,6 +67,15 @@ def _make_torch_function(handle):
                 'https://github.com/torch/torch7/blob/master/doc/maths.md\n').format(
                     name=func_name[4:], param_str=param_str,
                     res=res))
+    return {'name': func_name[4:],
+            'doc': doc_str,
+            'n_used_vars': n_used_vars,
+            'n_mutate_vars': n_mutate_vars}
+
+def _make_torch_function(handle, signature):
+    """Create a Torch function from the FunctionHandle and its signature."""
+    n_used_vars = signature['n_used_vars']
+    n_mutate_vars = signature['n_mutate_vars']
 
     def generic_torch_function(*args, **kwargs):
         """Invoke this function by passing in parameters
@@ -134,8 +143,8 @@ def _make_torch_function(handle):
             return ndargs[:n_mutate_vars]
     # End of function declaration
     ret_function = generic_torch_function
-    ret_function.__name__ = func_name[4:]
-    ret_function.__doc__ = doc_str
+    ret_function.__name__ = str(signature['name'])
+    ret_function.__doc__ = signature['doc']
     return ret_function
 
 # pylint: enable=too-many-locals, invalid-name
@@ -147,13 +156,14 @@ def _init_torch_module():
     check_call(_LIB.MXListFunctions(ctypes.byref(size),
                                     ctypes.byref(plist)))
 
+    signatures = _load_op_signatures(
+        'torch', size.value, lambda i: _describe_torch_function(FunctionHandle(plist[i])))
     module_obj = sys.modules[__name__]
     for i in range(size.value):
-        hdl = FunctionHandle(plist[i])
-        function = _make_torch_function(hdl)
-        # if function name starts with underscore, register as static method of NDArray
-        if function is not None:
-            setattr(module_obj, function.__name__, function)
+        if signatures[i] is None:
+            continue
+        function = _make_torch_function(FunctionHandle(plist[i]), signatures[i])
+        setattr(module_obj, function.__name__, function)
 
 # Initialize the NDArray module
 _init_torch_module()
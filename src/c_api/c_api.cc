@@ -10,6 +10,7 @@
 #include <dmlc/recordio.h>
 #include <mxnet/base.h>
 #include <mxnet/ndarray.h>
+#include <mxnet/storage.h>
 #include <mxnet/symbolic.h>
 #include <mxnet/operator.h>
 #include <mxnet/optimizer.h>
@@ -26,6 +27,8 @@
 #include <utility>
 #include "./c_api_error.h"
 #include "../common/thread_local.h"
+#include "../engine/profiler.h"
+#include "../operator/callback_pool.h"
 
 using namespace mxnet;
 
@@ -39,6 +42,8 @@ struct MXAPIThreadLocalEntry {
   std::vector<const char *> ret_vec_charp;
   /*! \brief result holder for returning handles */
   std::vector<void *> ret_handles;
+  /*! \brief result holder for returning 64 bit integers */
+  std::vector<uint64_t> ret_vec_uint64;
   /*! \brief result holder for returning shapes */
   std::vector<TShape> arg_shapes, out_shapes, aux_shapes;
   /*! \brief result holder for returning type flags */
@@ -112,6 +117,50 @@ int MXNotifyShutdown() {
   API_END();
 }
 
+int MXSetProfilerState(int state) {
+  API_BEGIN();
+  CHECK(state == engine::Profiler::kNotRunning || state == engine::Profiler::kRunning)
+      << "invalid profiler state " << state;
+  engine::Profiler::Get()->SetState(static_cast<engine::Profiler::ProfilerState>(state));
+  API_END();
+}
+
+int MXDumpProfile(const char *fname) {
+  API_BEGIN();
+  engine::Profiler::Get()->DumpProfile(fname);
+  API_END();
+}
+
+int MXStorageGetStats(int dev_type,
+                      int dev_id,
+                      mx_uint *out_size,
+                      const char ***out_keys,
+                      const uint64_t **out_vals) {
+  static const char *keys[] = {
+    "allocated_bytes", "pooled_bytes", "requested_bytes", "peak_allocated_bytes",
+    "num_alloc", "num_pool_hit", "num_released"
+  };
+  MXAPIThreadLocalEntry *ret = MXAPIThreadLocalStore::Get();
+  API_BEGIN();
+  Context ctx = Context::Create(static_cast<Context::DeviceType>(dev_type), dev_id);
+  Storage::Stats stats = Storage::Get()->GetStats(ctx);
+  ret->ret_vec_uint64 = {
+    stats.allocated_bytes, stats.pooled_bytes, stats.requested_bytes,
+    stats.peak_allocated_bytes, stats.num_alloc, stats.num_pool_hit, stats.num_released
+  };
+  *out_size = static_cast<mx_uint>(ret->ret_vec_uint64.size());
+  *out_keys = keys;
+  *out_vals = dmlc::BeginPtr(ret->ret_vec_uint64);
+  API_END();
+}
+
+int MXStorageReleaseAll(int dev_type, int dev_id) {
+  API_BEGIN();
+  Context ctx = Context::Create(static_cast<Context::DeviceType>(dev_type), dev_id);
+  Storage::Get()->ReleaseAll(ctx);
+  API_END();
+}
+
 int MXNDArrayCreateNone(NDArrayHandle *out) {
   API_BEGIN();
   *out = new NDArray();
@@ -188,24 +237,32 @@ int MXNDArraySyncCopyToCPU(NDArrayHandle handle,
                            size_t size) {
   API_BEGIN();
   static_cast<NDArray*>(handle)->SyncCopyToCPU(data, size);
+  // raise the failure of a callback of an operator implemented in python
+  op::CallbackPool::ThrowIfError();
   API_END();
 }
 
 int MXNDArrayWaitToRead(NDArrayHandle handle) {
   API_BEGIN();
   static_cast<NDArray*>(handle)->WaitToRead();
+  // raise the failure of a callback of an operator implemented in python
+  op::CallbackPool::ThrowIfError();
   API_END();
 }
 
 int MXNDArrayWaitToWrite(NDArrayHandle handle) {
   API_BEGIN();
   static_cast<NDArray*>(handle)->WaitToWrite();
+  // raise the failure of a callback of an operator implemented in python
+  op::CallbackPool::ThrowIfError();
   API_END();
 }
 
 int MXNDArrayWaitAll() {
   API_BEGIN();
   Engine::Get()->WaitForAll();
+  // raise the failure of a callback of an operator implemented in python
+  op::CallbackPool::ThrowIfError();
   API_END();
 }
 
@@ -429,6 +486,30 @@ int MXFuncInvokeEx(FunctionHandle fun,
   API_END();
 }
 
+int MXFuncInvokeBatch(mx_uint num_funs,
+                      FunctionHandle *funs,
+                      NDArrayHandle *use_vars,
+                      mx_float *scalar_args,
+                      NDArrayHandle *mutate_vars,
+                      int *num_params,
+                      char **param_keys,
+                      char **param_vals) {
+  API_BEGIN();
+  NDArray **use_ptr = reinterpret_cast<NDArray**>(use_vars);
+  NDArray **mutate_ptr = reinterpret_cast<NDArray**>(mutate_vars);
+  for (mx_uint i = 0; i < num_funs; ++i) {
+    auto *f = static_cast<const NDArrayFunctionReg*>(funs[i]);
+    f->body(use_ptr, scalar_args, mutate_ptr,
+            num_params[i], param_keys, param_vals);
+    use_ptr += f->num_use_vars;
+    scalar_args += f->num_scalars;
+    mutate_ptr += f->num_mutate_vars;
+    param_keys += num_params[i];
+    param_vals += num_params[i];
+  }
+  API_END();
+}
+
 //--------------------------------------------
 // Part 3: symbolic configuration generation
 //--------------------------------------------
@@ -1015,6 +1096,57 @@ int MXExecutorBindEX(SymbolHandle symbol_handle,
   API_END();
 }
 
+int MXExecutorPlanMemory(SymbolHandle symbol_handle,
+                         int dev_type,
+                         int dev_id,
+                         mx_uint num_map_keys,
+                         const char** map_keys,
+                         const int* map_dev_types,
+                         const int* map_dev_ids,
+                         mx_uint len,
+                         NDArrayHandle *in_args,
+                         NDArrayHandle *arg_grad_store,
+                         mx_uint *grad_req_type,
+                         mx_uint aux_states_len,
+                         NDArrayHandle *aux_states,
+                         const char *strategy,
+                         const char **out_json) {
+  MXAPIThreadLocalEntry *ret = MXAPIThreadLocalStore::Get();
+  API_BEGIN();
+  Symbol *symb = static_cast<Symbol*>(symbol_handle);
+  Context ctx = Context::Create(static_cast<Context::DeviceType>(dev_type), dev_id);
+  std::map<std::string, Context> ctx_map;
+  for (mx_uint i = 0; i < num_map_keys; ++i) {
+    ctx_map[std::string(map_keys[i])] = Context::Create(
+        static_cast<Context::DeviceType>(map_dev_types[i]), map_dev_ids[i]);
+  }
+  NDArray **in_args_ptr = reinterpret_cast<NDArray**>(in_args);
+  NDArray **arg_grad_ptr = reinterpret_cast<NDArray**>(arg_grad_store);
+  NDArray **aux_states_ptr = reinterpret_cast<NDArray**>(aux_states);
+  std::vector<NDArray> in_args_vec;
+  std::vector<NDArray> arg_grad_vec;
+  std::vector<OpReqType> grad_req_vec;
+  std::vector<NDArray> aux_states_vec;
+  for (mx_uint i = 0; i < len; ++i) {
+    in_args_vec.push_back(*(in_args_ptr[i]));
+    if (arg_grad_ptr[i] == nullptr) {
+      arg_grad_vec.push_back(NDArray());
+      grad_req_vec.push_back(kNullOp);
+    } else {
+      arg_grad_vec.push_back(*(arg_grad_ptr[i]));
+      grad_req_vec.push_back(static_cast<OpReqType>(grad_req_type[i]));
+    }
+  }
+  for (mx_uint i = 0; i < aux_states_len; ++i) {
+    aux_states_vec.push_back(*(aux_states_ptr[i]));
+  }
+  ret->ret_str = Executor::PlanMemory(*symb, ctx, ctx_map, in_args_vec,
+                                      arg_grad_vec, grad_req_vec, aux_states_vec,
+                                      strategy);
+  *out_json = ret->ret_str.c_str();
+  API_END();
+}
+
 int MXExecutorSetMonitorCallback(ExecutorHandle handle,
                                  ExecutorMonitorCallback callback,
                                  void* callback_handle) {
@@ -1282,8 +1414,15 @@ struct MXRecordIOContext {
 
 int MXRecordIOWriterCreate(const char *uri,
                            RecordIOHandle *out) {
+  return MXRecordIOWriterCreateEx(uri, "w", out);
+}
+
+int MXRecordIOWriterCreateEx(const char *uri, const char *mode,
+                             RecordIOHandle *out) {
   API_BEGIN();
-  dmlc::Stream *stream = dmlc::Stream::Create(uri, "w");
+  std::string flag(mode);
+  CHECK(flag == "w" || flag == "a") << "RecordIO writer mode must be w or a";
+  dmlc::Stream *stream = dmlc::Stream::Create(uri, mode);
   MXRecordIOContext *context = new MXRecordIOContext;
   context->writer = new dmlc::RecordIOWriter(stream);
   context->reader = NULL;
@@ -1311,6 +1450,16 @@ int MXRecordIOWriterWriteRecord(RecordIOHandle *handle,
   API_END();
 }
 
+int MXRecordIOWriterTell(RecordIOHandle *handle, size_t *pos) {
+  API_BEGIN();
+  MXRecordIOContext *context =
+    reinterpret_cast<MXRecordIOContext*>(handle);
+  dmlc::SeekStream *stream = dynamic_cast<dmlc::SeekStream*>(context->stream);
+  CHECK(stream != nullptr) << "RecordIO writer stream does not support Tell";
+  *pos = stream->Tell();
+  API_END();
+}
+
 int MXRecordIOReaderCreate(const char *uri,
                            RecordIOHandle *out) {
   API_BEGIN();
@@ -1349,6 +1498,19 @@ int MXRecordIOReaderReadRecord(RecordIOHandle *handle,
   API_END();
 }
 
+int MXRecordIOReaderSeek(RecordIOHandle *handle, size_t pos) {
+  API_BEGIN();
+  MXRecordIOContext *context =
+    reinterpret_cast<MXRecordIOContext*>(handle);
+  dmlc::SeekStream *stream = dynamic_cast<dmlc::SeekStream*>(context->stream);
+  CHECK(stream != nullptr) << "RecordIO reader stream does not support Seek";
+  stream->Seek(pos);
+  // recreate the reader to clear its end of stream state
+  delete context->reader;
+  context->reader = new dmlc::RecordIOReader(stream);
+  API_END();
+}
+
 int MXRtcCreate(char* name, mx_uint num_input, mx_uint num_output,
                 char** input_names, char** output_names,
                 NDArrayHandle* inputs, NDArrayHandle* outputs,
@@ -1457,3 +1619,34 @@ int MXOptimizerUpdate(OptimizerHandle handle,
               lr, wd);
   API_END();
 }
+
+int MXOptimizerMultiUpdate(const char *name,
+                           mx_uint num_weights,
+                           NDArrayHandle *weights,
+                           NDArrayHandle *grads,
+                           mx_uint num_states,
+                           NDArrayHandle *states,
+                           const mx_float *lrs,
+                           const mx_float *wds,
+                           mx_uint num_param,
+                           const char **keys,
+                           const char **vals) {
+  API_BEGIN();
+  std::vector<NDArray> w, g, s;
+  for (mx_uint i = 0; i < num_weights; ++i) {
+    w.push_back(*static_cast<NDArray*>(weights[i]));
+    g.push_back(*static_cast<NDArray*>(grads[i]));
+  }
+  for (mx_uint i = 0; i < num_weights * num_states; ++i) {
+    s.push_back(*static_cast<NDArray*>(states[i]));
+  }
+  std::vector<std::pair<std::string, std::string> > kwargs;
+  for (mx_uint i = 0; i < num_param; ++i) {
+    kwargs.push_back({std::string(keys[i]), std::string(vals[i])});
+  }
+  Optimizer::MultiUpdate(name, w, g, s,
+                         std::vector<float>(lrs, lrs + num_weights),
+                         std::vector<float>(wds, wds + num_weights),
+                         kwargs);
+  API_END();
+}
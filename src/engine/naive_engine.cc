@@ -5,7 +5,9 @@
  */
 #include <vector>
 #include <atomic>
+#include <string>
 #include "./engine_impl.h"
+#include "./profiler.h"
 
 namespace mxnet {
 namespace engine {
@@ -18,6 +20,7 @@ class NaiveEngine final : public Engine {
     std::vector<VarHandle> const_vars;
     std::vector<VarHandle> mutable_vars;
     FnProperty prop;
+    std::string opr_name;
   };
 
   NaiveEngine() {
@@ -43,12 +46,14 @@ class NaiveEngine final : public Engine {
   OprHandle NewOperator(AsyncFn fn,
                         std::vector<VarHandle> const& const_vars,
                         std::vector<VarHandle> const& mutable_vars,
-                        FnProperty prop) override {
+                        FnProperty prop,
+                        const char* opr_name = nullptr) override {
     NaiveOpr *opr = new NaiveOpr();
     opr->fn = fn;
     opr->const_vars = const_vars;
     opr->mutable_vars = mutable_vars;
     opr->prop = prop;
+    if (opr_name != nullptr) opr->opr_name = opr_name;
     return opr;
   }
   void DeleteOperator(OprHandle op) override {
@@ -61,17 +66,24 @@ class NaiveEngine final : public Engine {
                     exec_ctx,
                     opr->const_vars,
                     opr->mutable_vars,
-                    opr->prop);
+                    opr->prop,
+                    priority,
+                    opr->opr_name.empty() ? nullptr : opr->opr_name.c_str());
   }
   void PushAsync(AsyncFn exec_fun,
                  Context exec_ctx,
                  std::vector<VarHandle> const& const_vars,
                  std::vector<VarHandle> const& mutable_vars,
                  FnProperty prop,
-                 int priority = 0) override {
+                 int priority = 0,
+                 const char* opr_name = nullptr) override {
     CallbackOnComplete callback = CreateCallback(
         NaiveEngine::OnComplete, nullptr);
     this->req_completed_ = false;
+    OprExecStat *stat = nullptr;
+    if (Profiler::Get()->IsRunning()) {
+      stat = Profiler::Get()->BeginOpr(opr_name, exec_ctx);
+    }
 
     if (exec_ctx.dev_mask() == gpu::kDevMask) {
 #if MXNET_USE_CUDA
@@ -94,6 +106,9 @@ class NaiveEngine final : public Engine {
     }
     CHECK(this->req_completed_)
         << "NaiveEngine only support synchronize Push so far";
+    if (stat != nullptr) {
+      Profiler::Get()->EndOpr(stat);
+    }
   }
   void DeleteVariable(SyncFn delete_fn, Context exec_ctx, VarHandle var) override {
     this->PushSync(delete_fn, exec_ctx, {}, {var}, FnProperty::kNormal);
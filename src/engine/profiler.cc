@@ -0,0 +1,129 @@
+/*!
+ *  Copyright (c) 2016 by Contributors
+ * \file profiler.cc
+ * \brief implements profiler of the operators run by the engine
+ */
+#include <dmlc/base.h>
+#include <dmlc/logging.h>
+#include <chrono>
+#include <fstream>
+#include <set>
+#include "./profiler.h"
+#include "../common/thread_local.h"
+
+namespace mxnet {
+namespace engine {
+
+namespace {
+// the record of the operator running on this thread
+MX_TREAD_LOCAL OprExecStat *current_stat = nullptr;
+// id of this thread in the trace, 0 means not assigned yet
+MX_TREAD_LOCAL uint32_t current_thread_id = 0;
+
+inline const char *DevTypeName(const Context &ctx) {
+  switch (ctx.dev_type) {
+    case Context::kCPU: return "cpu";
+    case Context::kGPU: return "gpu";
+    case Context::kCPUPinned: return "cpu_pinned";
+    default: return "unknown";
+  }
+}
+
+// escape a string for a json literal
+inline std::string JSONEscape(const std::string &str) {
+  std::string ret;
+  for (char c : str) {
+    if (c == '"' || c == '\\') ret += '\\';
+    ret += c;
+  }
+  return ret;
+}
+}  // namespace
+
+Profiler::Profiler() {
+  init_micros_ = std::chrono::duration_cast<std::chrono::microseconds>(
+      std::chrono::high_resolution_clock::now().time_since_epoch()).count();
+}
+
+Profiler *Profiler::Get() {
+  static Profiler inst;
+  return &inst;
+}
+
+void Profiler::SetState(ProfilerState state) {
+  state_.store(state);
+}
+
+uint64_t Profiler::NowMicros() const {
+  uint64_t now = std::chrono::duration_cast<std::chrono::microseconds>(
+      std::chrono::high_resolution_clock::now().time_since_epoch()).count();
+  return now - init_micros_;
+}
+
+uint32_t Profiler::ThreadId() {
+  if (current_thread_id == 0) {
+    std::lock_guard<std::mutex> lock(mutex_);
+    current_thread_id = ++num_threads_;
+  }
+  return current_thread_id;
+}
+
+OprExecStat *Profiler::BeginOpr(const char *opr_name, Context ctx) {
+  OprExecStat *stat = new OprExecStat();
+  stat->opr_name = opr_name != nullptr ? opr_name : "opr";
+  stat->ctx = ctx;
+  stat->thread_id = ThreadId();
+  stat->mem_bytes = 0;
+  stat->start_micros = NowMicros();
+  current_stat = stat;
+  return stat;
+}
+
+void Profiler::EndOpr(OprExecStat *stat) {
+  stat->end_micros = NowMicros();
+  if (current_stat == stat) current_stat = nullptr;
+  std::lock_guard<std::mutex> lock(mutex_);
+  stats_.push_back(stat);
+}
+
+void Profiler::AddMemory(size_t bytes) {
+  if (current_stat != nullptr) current_stat->mem_bytes += bytes;
+}
+
+void Profiler::DumpProfile(const std::string &fname) {
+  std::vector<OprExecStat*> stats;
+  {
+    std::lock_guard<std::mutex> lock(mutex_);
+    stats.swap(stats_);
+  }
+  std::ofstream file(fname.c_str());
+  CHECK(file.is_open()) << "Cannot open " << fname;
+  // one trace process per device, one trace thread per engine thread
+  auto pid = [](const Context &ctx) {
+    return static_cast<int>(ctx.dev_type) * 1000 + ctx.dev_id;
+  };
+  file << "{\n\"traceEvents\": [\n";
+  std::set<int> devices;
+  bool first = true;
+  for (const OprExecStat *stat : stats) {
+    if (devices.insert(pid(stat->ctx)).second) {
+      file << (first ? "" : ",\n")
+           << "{\"name\": \"process_name\", \"ph\": \"M\", \"pid\": " << pid(stat->ctx)
+           << ", \"args\": {\"name\": \"" << DevTypeName(stat->ctx) << "/"
+           << stat->ctx.dev_id << "\"}}";
+      first = false;
+    }
+    file << ",\n{\"name\": \"" << JSONEscape(stat->opr_name) << "\", "
+         << "\"cat\": \"operator\", \"ph\": \"X\", "
+         << "\"ts\": " << stat->start_micros << ", "
+         << "\"dur\": " << stat->end_micros - stat->start_micros << ", "
+         << "\"pid\": " << pid(stat->ctx) << ", "
+         << "\"tid\": " << stat->thread_id << ", "
+         << "\"args\": {\"mem_bytes\": " << stat->mem_bytes << "}}";
+    delete stat;
+  }
+  file << "\n],\n\"displayTimeUnit\": \"ms\"\n}\n";
+}
+
+}  // namespace engine
+}  // namespace mxnet
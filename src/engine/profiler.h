@@ -0,0 +1,95 @@
+/*!
+ *  Copyright (c) 2016 by Contributors
+ * \file profiler.h
+ * \brief implements profiler of the operators run by the engine
+ */
+#ifndef MXNET_ENGINE_PROFILER_H_
+#define MXNET_ENGINE_PROFILER_H_
+
+#include <mxnet/base.h>
+#include <atomic>
+#include <mutex>
+#include <string>
+#include <vector>
+
+namespace mxnet {
+namespace engine {
+
+/*! \brief execution record of one operator */
+struct OprExecStat {
+  /*! \brief name of the operator */
+  std::string opr_name;
+  /*! \brief start time in microseconds, relative to the profiler creation */
+  uint64_t start_micros;
+  /*! \brief end time in microseconds, relative to the profiler creation */
+  uint64_t end_micros;
+  /*! \brief id of the thread that executed the operator */
+  uint32_t thread_id;
+  /*! \brief the device the operator runs on */
+  Context ctx;
+  /*! \brief bytes of the inputs and outputs, 0 when unknown */
+  size_t mem_bytes;
+};
+
+/*!
+ * \brief profiler recording the operators executed by the engine.
+ *  Recording is off until SetState(kRunning), so the only cost when not
+ *  profiling is one atomic load per executed operator.
+ */
+class Profiler {
+ public:
+  enum ProfilerState {
+    kNotRunning = 0,
+    kRunning = 1
+  };
+  /*! \brief start or stop recording */
+  void SetState(ProfilerState state);
+  /*! \return whether the profiler is recording */
+  inline bool IsRunning() const {
+    return state_.load(std::memory_order_relaxed) == kRunning;
+  }
+  /*!
+   * \brief start the record of an operator on the calling thread,
+   *  which stays the current record of the thread until EndOpr.
+   * \param opr_name name of the operator, may be nullptr
+   * \param ctx the device the operator runs on
+   * \return the record, to be passed to EndOpr
+   */
+  OprExecStat *BeginOpr(const char *opr_name, Context ctx);
+  /*! \brief finish the record of an operator */
+  void EndOpr(OprExecStat *stat);
+  /*!
+   * \brief add to the memory touched by the operator running on the
+   *  calling thread, no-op when nothing is being recorded.
+   */
+  static void AddMemory(size_t bytes);
+  /*!
+   * \brief write the finished records as a chrome://tracing json file
+   *  and clear them.
+   * \param fname the output file
+   */
+  void DumpProfile(const std::string &fname);
+  /*! \return the profiler singleton */
+  static Profiler *Get();
+
+ private:
+  Profiler();
+  /*! \return microseconds since the profiler creation */
+  uint64_t NowMicros() const;
+  /*! \return a small id of the calling thread */
+  uint32_t ThreadId();
+  /*! \brief whether recording is on */
+  std::atomic<int> state_{kNotRunning};
+  /*! \brief creation time in microseconds since epoch */
+  uint64_t init_micros_;
+  /*! \brief protects stats_ and thread_ids_ */
+  std::mutex mutex_;
+  /*! \brief finished records */
+  std::vector<OprExecStat*> stats_;
+  /*! \brief number of thread ids handed out */
+  uint32_t num_threads_{0};
+};
+
+}  // namespace engine
+}  // namespace mxnet
+#endif  // MXNET_ENGINE_PROFILER_H_
@@ -186,10 +186,16 @@ ThreadedOpr* ThreadedEngine::NewOperator(
     ThreadedEngine::AsyncFn fn,
     std::vector<VarHandle> const& const_vars,
     std::vector<VarHandle> const& mutable_vars,
-    FnProperty prop) {
+    FnProperty prop,
+    const char* opr_name) {
   auto ret = ThreadedOpr::New();
   ret->fn = fn;
   ret->prop = prop;
+  if (opr_name != nullptr) {
+    ret->opr_name = opr_name;
+  } else {
+    ret->opr_name.clear();
+  }
   ret->const_vars.resize(const_vars.size());
   ret->mutable_vars.resize(mutable_vars.size());
   std::transform(const_vars.begin(), const_vars.end(),
@@ -279,8 +285,9 @@ void ThreadedEngine::Push(OprHandle op, Context exec_ctx, int priority) {
 void ThreadedEngine::PushAsync(AsyncFn fn, Context exec_ctx,
                                std::vector<VarHandle> const& const_vars,
                                std::vector<VarHandle> const& mutable_vars,
-                               FnProperty prop, int priority) {
-  ThreadedOpr *opr = NewOperator(fn, const_vars, mutable_vars, prop);
+                               FnProperty prop, int priority,
+                               const char* opr_name) {
+  ThreadedOpr *opr = NewOperator(fn, const_vars, mutable_vars, prop, opr_name);
   opr->temporary = true;
   Push(opr, exec_ctx, priority);
 }
@@ -17,6 +17,7 @@
 #include <mutex>
 #include <string>
 #include "./engine_impl.h"
+#include "./profiler.h"
 #include "../common/object_pool.h"
 
 namespace mxnet {
@@ -201,6 +202,8 @@ struct ThreadedOpr final : public Opr,
   std::vector<ThreadedVar*> mutable_vars;
   /*! \brief the property of the operator */
   FnProperty prop;
+  /*! \brief the name of the operator shown by the profiler */
+  std::string opr_name;
   /*!
    * \brief Whether this is an temporary operator
    *        that can be deleted right after the operation completed.
@@ -234,14 +237,16 @@ class ThreadedEngine : public Engine {
   ThreadedOpr* NewOperator(AsyncFn fn,
                            std::vector<VarHandle> const& const_vars,
                            std::vector<VarHandle> const& mutable_vars,
-                           FnProperty prop) override;
+                           FnProperty prop,
+                           const char* opr_name = nullptr) override;
   void DeleteOperator(OprHandle op) override;
   void Push(OprHandle op, Context exec_ctx, int priority) override;
   void PushAsync(AsyncFn exec_fun, Context exec_ctx,
                  std::vector<VarHandle> const& const_vars,
                  std::vector<VarHandle> const& mutable_vars,
                  FnProperty prop,
-                 int priority) override;
+                 int priority,
+                 const char* opr_name = nullptr) override;
   void DeleteVariable(SyncFn delete_fn, Context exec_ctx, VarHandle var) override;
   void WaitForVar(VarHandle var) override;
   void WaitForAll() override;
@@ -287,7 +292,17 @@ class ThreadedEngine : public Engine {
         ThreadedEngine::OnCompleteStatic, threaded_opr);
     if (!shutdown_phase_) {
       try {
-        threaded_opr->fn(run_ctx, callback);
+        if (Profiler::Get()->IsRunning()) {
+          // the end is taken when fn returns, which is the completion
+          // of synchronous operators
+          OprExecStat *stat = Profiler::Get()->BeginOpr(
+              threaded_opr->opr_name.empty() ? nullptr : threaded_opr->opr_name.c_str(),
+              opr_block->ctx);
+          threaded_opr->fn(run_ctx, callback);
+          Profiler::Get()->EndOpr(stat);
+        } else {
+          threaded_opr->fn(run_ctx, callback);
+        }
       } catch(dmlc::Error &e) {
         std::string what = e.what();
         if (what.find("driver shutting down") == std::string::npos &&
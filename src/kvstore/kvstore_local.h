@@ -135,8 +135,7 @@ class KVStoreLocal : public KVStore {
   virtual const NDArray& MergePushValue(
       int key, const std::vector<NDArray>& val, int priority) {
     auto& buf = merge_buf_[key];
-    // copy buffer
-    std::vector<Engine::VarHandle> const_vars(val.size() - 1);
+    std::vector<Engine::VarHandle> const_vars(val.size());
     std::vector<NDArray> reduce(val.size());
 
     if (buf.merged.is_none()) {
@@ -145,10 +144,14 @@ class KVStoreLocal : public KVStore {
       buf.merged = NDArray(val[0].shape(), buf.ctx);
     }
 
-    CopyFromTo(val[0], &(buf.merged), priority);
-    reduce[0] = buf.merged;
+    if (val.size() == 1) {
+      CopyFromTo(val[0], &(buf.merged), priority);
+      return buf.merged;
+    }
 
-    for (size_t i = 1; i < val.size(); ++i) {
+    // the sum is written straight into merged, so there is no copy of
+    // val[0] first, and merged is first touched by the reduce threads
+    for (size_t i = 0; i < val.size(); ++i) {
       const NDArray& v = val[i];
       Context ctx = v.ctx();
       if (ctx.dev_mask() == cpu::kDevMask) {
@@ -159,12 +162,13 @@ class KVStoreLocal : public KVStore {
         CopyFromTo(val[i], copy_buf, priority);
         reduce[i] = *copy_buf;
       }
-      const_vars[i - 1] = reduce[i].var();
+      const_vars[i] = reduce[i].var();
     }
 
-    Engine::Get()->PushSync([reduce, this](RunContext rctx) {
-        ReduceSumCPU(reduce);
-      }, Context::CPU(), const_vars, {reduce[0].var()},
+    NDArray merged = buf.merged;
+    Engine::Get()->PushSync([reduce, merged, this](RunContext rctx) {
+        ReduceSumCPU(reduce, merged);
+      }, Context::CPU(), const_vars, {merged.var()},
       FnProperty::kCPUPrioritized, priority);
     return buf.merged;
   }
@@ -177,59 +181,89 @@ class KVStoreLocal : public KVStore {
   size_t bigarray_bound_;
 
  private:
-  inline static void ReduceSumCPU(const std::vector<real_t*> &dptr,
+  // out[offset:offset+size] = sum of in[i][offset:offset+size]
+  // inputs are added four at a time, so out goes through memory once per
+  // four inputs, and mshadow evaluates each sum with SSE packets
+  inline static void ReduceSumCPU(real_t *out, const std::vector<real_t*> &in,
                                   size_t offset, index_t size) {
     using namespace mshadow;  // NOLINT(*)
-    Tensor<cpu, 1> in_0(dptr[0] + offset, Shape1(size));
-    switch (dptr.size()) {
-      case 2: {
-        Tensor<cpu, 1> in_1(dptr[1] + offset, Shape1(size));
-        in_0 += in_1;
-        break;
-      }
-      case 3: {
-        Tensor<cpu, 1> in_1(dptr[1] + offset, Shape1(size));
-        Tensor<cpu, 1> in_2(dptr[2] + offset, Shape1(size));
-        in_0 += in_1 + in_2;
-        break;
-      }
-      case 4: {
-        Tensor<cpu, 1> in_1(dptr[1] + offset, Shape1(size));
-        Tensor<cpu, 1> in_2(dptr[2] + offset, Shape1(size));
-        Tensor<cpu, 1> in_3(dptr[3] + offset, Shape1(size));
-        in_0 += in_1 + in_2 + in_3;
-        break;
-      }
-      default: {
-        for (size_t i = 1; i < dptr.size(); ++i) {
-          Tensor<cpu, 1> in_k(dptr[i] + offset, Shape1(size));
-          in_0 += in_k;
+    Tensor<cpu, 1> dst(out + offset, Shape1(size));
+    for (size_t i = 0; i < in.size(); i += 4) {
+      Tensor<cpu, 1> in_0(in[i] + offset, Shape1(size));
+      switch (std::min(in.size() - i, static_cast<size_t>(4))) {
+        case 1: {
+          if (i == 0) {
+            Copy(dst, in_0);
+          } else {
+            dst += in_0;
+          }
+          break;
+        }
+        case 2: {
+          Tensor<cpu, 1> in_1(in[i + 1] + offset, Shape1(size));
+          if (i == 0) {
+            dst = in_0 + in_1;
+          } else {
+            dst += in_0 + in_1;
+          }
+          break;
+        }
+        case 3: {
+          Tensor<cpu, 1> in_1(in[i + 1] + offset, Shape1(size));
+          Tensor<cpu, 1> in_2(in[i + 2] + offset, Shape1(size));
+          if (i == 0) {
+            dst = in_0 + in_1 + in_2;
+          } else {
+            dst += in_0 + in_1 + in_2;
+          }
+          break;
+        }
+        default: {
+          Tensor<cpu, 1> in_1(in[i + 1] + offset, Shape1(size));
+          Tensor<cpu, 1> in_2(in[i + 2] + offset, Shape1(size));
+          Tensor<cpu, 1> in_3(in[i + 3] + offset, Shape1(size));
+          if (i == 0) {
+            dst = in_0 + in_1 + in_2 + in_3;
+          } else {
+            dst += in_0 + in_1 + in_2 + in_3;
+          }
         }
       }
     }
   }
-  // reduce sum into val[0]
+  // reduce sum of in_data into out
   // this is performance critical
-  inline void ReduceSumCPU(const std::vector<NDArray> &in_data) {
-    const size_t step = 4 << 10;
-    // ge ptr out
+  inline void ReduceSumCPU(const std::vector<NDArray> &in_data, const NDArray &out) {
+    // ranges are multiples of a 4KB page, which also keeps them aligned for SSE
+    const size_t align = 4096 / sizeof(real_t);
+    // get ptr out
     std::vector<real_t*> dptr(in_data.size());
     for (size_t i = 0; i < in_data.size(); ++i) {
       TBlob data = in_data[i].data();
       CHECK(data.CheckContiguous());
       dptr[i] = data.FlatTo2D<cpu, real_t>().dptr_;
     }
-    size_t total = in_data[0].shape().Size();
-    long ntask = (total + 1 - step) / step; // NOLINT(*)
+    TBlob out_data = out.data();
+    CHECK(out_data.CheckContiguous());
+    real_t *out_dptr = out_data.FlatTo2D<cpu, real_t>().dptr_;
+    size_t total = out.shape().Size();
     if (total < bigarray_bound_ || nthread_reduction_ <= 1) {
-      ReduceSumCPU(dptr, 0, total);
-    } else {
-      #pragma omp parallel for schedule(static) num_threads(nthread_reduction_)
-      for (long j = 0; j < ntask; ++j) { // NOLINT(*)
-        size_t k = static_cast<size_t>(j);
-        size_t begin = std::min(k * step, total);
-        size_t end = std::min((k + 1) * step, total);
-        ReduceSumCPU(dptr, begin, static_cast<index_t>(end - begin));
+      ReduceSumCPU(out_dptr, dptr, 0, static_cast<index_t>(total));
+      return;
+    }
+    // one contiguous range per thread. a static schedule gives each thread the
+    // same range on every push, so with first-touch allocation the pages of
+    // merged stay on the NUMA node of the thread reducing them. bind the
+    // threads with OMP_PROC_BIND=spread to spread them over the sockets.
+    long nthread = nthread_reduction_;  // NOLINT(*)
+    size_t chunk = (total + nthread - 1) / nthread;
+    chunk = (chunk + align - 1) / align * align;
+    #pragma omp parallel for schedule(static, 1) num_threads(nthread_reduction_)
+    for (long j = 0; j < nthread; ++j) { // NOLINT(*)
+      size_t begin = std::min(static_cast<size_t>(j) * chunk, total);
+      size_t end = std::min(begin + chunk, total);
+      if (begin < end) {
+        ReduceSumCPU(out_dptr, dptr, begin, static_cast<index_t>(end - begin));
       }
     }
   }
@@ -10,6 +10,9 @@
 #include <mxnet/ndarray.h>
 #include <mxnet/resource.h>
 #include <mshadow/tensor.h>
+#include <algorithm>
+#include <cstring>
+#include <string>
 #include "./ndarray_function.h"
 
 #if MXNET_USE_OPENCV
@@ -243,7 +246,7 @@ void CopyFromTo(const NDArray &from, NDArray *to, int priority) {
         ndarray::Copy<cpu, cpu>(from.data(), &tmp,
                                 from.ctx(), ret.ctx(), ctx);
       }, from.ctx(), const_vars, {ret.var()},
-      FnProperty::kNormal, priority);
+      FnProperty::kNormal, priority, "CopyCPU2CPU");
   } else {
 #if MXNET_USE_CUDA
     if (a == cpu::kDevMask && b == gpu::kDevMask) {
@@ -255,7 +258,7 @@ void CopyFromTo(const NDArray &from, NDArray *to, int priority) {
           // Wait GPU kernel to complete
           ctx.get_stream<gpu>()->Wait();
         }, ret.ctx(), const_vars, {ret.var()},
-        FnProperty::kCopyToGPU, priority);
+        FnProperty::kCopyToGPU, priority, "CopyCPU2GPU");
     } else if (a == gpu::kDevMask && b == cpu::kDevMask) {
       Engine::Get()->PushSync([from, ret](RunContext ctx) {
           ret.CheckAndAlloc();
@@ -265,7 +268,7 @@ void CopyFromTo(const NDArray &from, NDArray *to, int priority) {
           // Wait GPU kernel to complete
           ctx.get_stream<gpu>()->Wait();
         }, from.ctx(), const_vars, {ret.var()},
-        FnProperty::kCopyFromGPU, priority);
+        FnProperty::kCopyFromGPU, priority, "CopyGPU2CPU");
     } else if (a == gpu::kDevMask && b == gpu::kDevMask) {
       Engine::Get()->PushSync([from, ret](RunContext ctx) {
           ret.CheckAndAlloc();
@@ -275,7 +278,7 @@ void CopyFromTo(const NDArray &from, NDArray *to, int priority) {
           // Wait GPU kernel to complete
           ctx.get_stream<gpu>()->Wait();
         }, from.ctx(), const_vars, {ret.var()},
-        FnProperty::kCopyFromGPU, priority);
+        FnProperty::kCopyFromGPU, priority, "CopyGPU2GPU");
     } else {
       LOG(FATAL) << "unknown device mask";
     }
@@ -375,6 +378,61 @@ void ClipOp(const NDArray &src,
   }
 }
 
+void FusedElemwiseOp(const std::vector<NDArray> &in,
+                     const ndarray::FusedProgram &prog,
+                     NDArray *out) {
+  // checked before the push, so that an error is returned to the caller
+  const NDArray &src = in[0];
+  for (size_t k = 1; k < in.size(); ++k) {
+    CHECK(in[k].ctx() == src.ctx()) << "fused inputs must be on the same context";
+    CHECK(in[k].shape() == src.shape()) << "fused inputs must have the same shape";
+    CHECK_EQ(in[k].dtype(), src.dtype()) << "fused inputs must have the same data type";
+  }
+  if (out->is_none()) {
+    *out = NDArray(src.shape(), src.ctx(), true, src.dtype());
+  } else {
+    CHECK(out->ctx() == src.ctx()) << "target context mismatch";
+    CHECK(out->shape() == src.shape()) << "target shape mismatch";
+    CHECK_EQ(out->dtype(), src.dtype()) << "target data type mismatch";
+  }
+  NDArray ret = *out;
+  // the output may also be an input, each element is read before written
+  std::vector<Engine::VarHandle> const_vars;
+  for (const NDArray &arr : in) {
+    if (arr.var() != ret.var() &&
+        std::find(const_vars.begin(), const_vars.end(), arr.var()) == const_vars.end()) {
+      const_vars.push_back(arr.var());
+    }
+  }
+  switch (src.ctx().dev_mask()) {
+    case cpu::kDevMask: {
+      Engine::Get()->PushSync([in, prog, ret](RunContext ctx) {
+          ret.CheckAndAlloc();
+          std::vector<TBlob> source(in.size());
+          for (size_t k = 0; k < in.size(); ++k) source[k] = in[k].data();
+          TBlob tmp = ret.data();
+          ndarray::EvalFused<cpu>(prog, source, &tmp, ctx);
+        }, src.ctx(), const_vars, {ret.var()});
+      break;
+    }
+    #if MXNET_USE_CUDA
+    case gpu::kDevMask: {
+      Engine::Get()->PushSync([in, prog, ret](RunContext ctx) {
+          ret.CheckAndAlloc();
+          std::vector<TBlob> source(in.size());
+          for (size_t k = 0; k < in.size(); ++k) source[k] = in[k].data();
+          TBlob tmp = ret.data();
+          ndarray::EvalFused<gpu>(prog, source, &tmp, ctx);
+          // Wait GPU kernel to complete
+          ctx.get_stream<gpu>()->Wait();
+        }, src.ctx(), const_vars, {ret.var()});
+      break;
+    }
+    #endif
+    default: LOG(FATAL) << MXNET_GPU_NOT_ENABLED_ERROR;
+  }
+}
+
 inline void CopyFromToSimple(const NDArray &from, NDArray *to) {
   CopyFromTo(from, to, 0);
 }
@@ -734,6 +792,36 @@ MXNET_REGISTER_NDARRAY_FUN(clip)
 .add_argument("a_min", "real_t", "Minimum value")
 .add_argument("a_max", "real_t", "Maximum value");
 
+MXNET_REGISTER_NDARRAY_FUN(_fused_elemwise)
+.set_type_mask(kNDArrayArgBeforeScalar | kAcceptEmptyMutateTarget)
+.set_body([](NDArray **u, real_t *s, NDArray **out,
+             int num_params, char **param_keys, char **param_vals) {
+    int num_inputs = 0;
+    std::string program;
+    for (int i = 0; i < num_params; ++i) {
+      if (!strcmp(param_keys[i], "num_inputs")) {
+        num_inputs = atoi(param_vals[i]);
+      } else if (!strcmp(param_keys[i], "program")) {
+        program = param_vals[i];
+      } else {
+        LOG(FATAL) << "unknown parameter " << param_keys[i] << " of _fused_elemwise";
+      }
+    }
+    ndarray::FusedProgram prog = ndarray::FusedProgram::Parse(program, num_inputs);
+    // the unused inputs are padding
+    std::vector<NDArray> in;
+    for (int i = 0; i < num_inputs; ++i) in.push_back(*u[i]);
+    FusedElemwiseOp(in, prog, out[0]);
+  })
+.set_num_use_vars(ndarray::FusedProgram::kMaxInputs)
+.set_num_scalars(0)
+.set_num_mutate_vars(1)
+.describe("Evaluate an elementwise program over up to 8 NDArrays of the same shape "
+          "in one kernel, used by mxnet.ndarray.fuse")
+.add_argument("args", "NDArray[]", "Inputs, padded to 8 NDArrays")
+.add_argument("num_inputs", "int", "Number of inputs used by the program")
+.add_argument("program", "string", "Postfix program, see ndarray::FusedProgram");
+
 void Imdecode(NDArray *ret, NDArray mean, size_t index,
               size_t x0, size_t y0, size_t x1, size_t y1, size_t n_channels,
               size_t size, char *str_img) {
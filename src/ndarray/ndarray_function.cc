@@ -26,5 +26,21 @@ void Copy<cpu, cpu>(const TBlob &from, TBlob *to,
     }
   })
 }
+
+template<>
+void EvalFused<cpu>(const FusedProgram &prog, const std::vector<TBlob> &in,
+                    TBlob *ret, RunContext ctx) {
+  MSHADOW_TYPE_SWITCH(ret->type_flag_, DType, {
+    const DType *dptr[FusedProgram::kMaxInputs];
+    for (size_t k = 0; k < in.size(); ++k) {
+      dptr[k] = in[k].FlatTo2D<cpu, DType>().dptr_;
+    }
+    DType *out = ret->FlatTo2D<cpu, DType>().dptr_;
+    const index_t size = ret->shape_.Size();
+    for (index_t i = 0; i < size; ++i) {
+      out[i] = prog.Eval(dptr, i);
+    }
+  });
+}
 }  // namespace ndarray
 }  // namespace mxnet
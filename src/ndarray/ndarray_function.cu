@@ -1,5 +1,6 @@
 // this will be invoked by nvcc and compile GPU version
 #include <dmlc/logging.h>
+#include <algorithm>
 #include "./ndarray_function.h"
 #include "./ndarray_function-inl.h"
 
@@ -64,5 +65,42 @@ void Copy<gpu, gpu>(const TBlob &from, TBlob *to,
                         s->stream_);
   }
 }
+
+/*! \brief pointers to the inputs of a fused kernel, passed by value */
+template<typename DType>
+struct FusedInputs {
+  const DType *dptr[FusedProgram::kMaxInputs];
+};
+
+template<typename DType>
+__global__ void FusedElemwiseKernel(const FusedProgram prog, const FusedInputs<DType> in,
+                                    DType *out, index_t size) {
+  for (index_t i = blockIdx.x * blockDim.x + threadIdx.x; i < size;
+       i += blockDim.x * gridDim.x) {
+    out[i] = prog.Eval(in.dptr, i);
+  }
+}
+
+template<>
+void EvalFused<gpu>(const FusedProgram &prog, const std::vector<TBlob> &in,
+                    TBlob *ret, RunContext ctx) {
+  using mshadow::cuda::kBaseThreadNum;
+  using mshadow::cuda::kMaxGridNum;
+  mshadow::Stream<gpu> *s = ctx.get_stream<gpu>();
+  MSHADOW_TYPE_SWITCH(ret->type_flag_, DType, {
+    FusedInputs<DType> inputs;
+    for (size_t k = 0; k < in.size(); ++k) {
+      inputs.dptr[k] = in[k].FlatTo2D<gpu, DType>(s).dptr_;
+    }
+    DType *out = ret->FlatTo2D<gpu, DType>(s).dptr_;
+    const index_t size = ret->shape_.Size();
+    if (size == 0) return;
+    const int num_blocks = std::min(
+        static_cast<int>((size + kBaseThreadNum - 1) / kBaseThreadNum), kMaxGridNum);
+    FusedElemwiseKernel<DType>
+        <<<num_blocks, kBaseThreadNum, 0, mshadow::Stream<gpu>::GetStream(s)>>>(
+            prog, inputs, out, size);
+  });
+}
 }  // namespace ndarray
 }  // namespace mxnet
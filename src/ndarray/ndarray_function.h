@@ -10,6 +10,9 @@
 #include <mshadow/tensor.h>
 #include <mxnet/base.h>
 #include <mxnet/resource.h>
+#include <cstdlib>
+#include <sstream>
+#include <string>
 #include <vector>
 #include "../operator/mshadow_op.h"
 
@@ -104,6 +107,126 @@ struct MatFillRowElem {
   }
 };
 
+/*!
+ * \brief an elementwise expression of up to kMaxInputs arrays of the same
+ *  shape, as a postfix program evaluated with a small stack, so that a chain
+ *  of elementwise operations runs as one kernel.
+ *
+ *  The program is a space separated list of tokens: iK pushes input K, cV
+ *  pushes the constant V, and add, sub, mul, div, neg, sqrt, square, abs,
+ *  exp, log pop their operands and push the result,
+ *  e.g. "i0 i1 mul c0.5 add" is in0 * in1 + 0.5.
+ */
+struct FusedProgram {
+  static const int kMaxInputs = 8;
+  static const int kMaxInstrs = 64;
+  static const int kMaxStack = 16;
+  enum OpCode {
+    kInput, kConst, kAdd, kSub, kMul, kDiv, kNeg, kSqrt, kSquare, kAbs, kExp, kLog
+  };
+  /*! \brief number of instructions */
+  int num_instrs;
+  /*! \brief number of inputs */
+  int num_inputs;
+  /*! \brief opcode of each instruction */
+  int code[kMaxInstrs];
+  /*! \brief input index of kInput instructions */
+  int input[kMaxInstrs];
+  /*! \brief value of kConst instructions, in double to keep the precision of double arrays */
+  double value[kMaxInstrs];
+
+  /*!
+   * \brief parse a program, fails if it is invalid.
+   * \param program the program
+   * \param num_inputs number of inputs the program can use
+   */
+  inline static FusedProgram Parse(const std::string &program, int num_inputs) {
+    static const char *names[] = {
+      "", "", "add", "sub", "mul", "div", "neg", "sqrt", "square", "abs", "exp", "log"
+    };
+    CHECK(num_inputs > 0 && num_inputs <= kMaxInputs)
+        << "fused program takes 1 to " << kMaxInputs << " inputs, got " << num_inputs;
+    FusedProgram prog;
+    prog.num_instrs = 0;
+    prog.num_inputs = num_inputs;
+    int depth = 0;
+    std::istringstream is(program);
+    std::string token;
+    while (is >> token) {
+      CHECK(prog.num_instrs < kMaxInstrs)
+          << "fused program has more than " << kMaxInstrs << " instructions";
+      const int k = prog.num_instrs++;
+      char *end = nullptr;
+      if (token[0] == 'i' || token[0] == 'c') {
+        if (token[0] == 'i') {
+          prog.code[k] = kInput;
+          prog.input[k] = static_cast<int>(strtol(token.c_str() + 1, &end, 10));
+          CHECK(prog.input[k] >= 0 && prog.input[k] < num_inputs)
+              << "fused program uses input " << token << " of " << num_inputs;
+        } else {
+          prog.code[k] = kConst;
+          prog.value[k] = strtod(token.c_str() + 1, &end);
+        }
+        CHECK(token.size() > 1 && *end == '\0') << "invalid token " << token;
+        ++depth;
+        CHECK(depth <= kMaxStack) << "fused program needs more than "
+                                  << kMaxStack << " stack entries";
+        continue;
+      }
+      int op = kAdd;
+      while (op <= kLog && token != names[op]) ++op;
+      CHECK_LE(op, kLog) << "unknown operation " << token << " in fused program";
+      prog.code[k] = op;
+      const int num_operands = op < kNeg ? 2 : 1;
+      CHECK_GE(depth, num_operands) << "missing operand of " << token << " in fused program";
+      depth -= num_operands - 1;
+    }
+    CHECK_EQ(depth, 1) << "fused program must leave exactly one value, in \"" << program << "\"";
+    return prog;
+  }
+  /*!
+   * \brief evaluate the program at one index.
+   * \param in pointers to the inputs
+   * \param i the index
+   */
+  template<typename DType>
+  MSHADOW_XINLINE DType Eval(const DType *const *in, index_t i) const {
+    DType stack[kMaxStack];
+    int top = -1;
+    for (int k = 0; k < num_instrs; ++k) {
+      switch (code[k]) {
+        case kInput: stack[++top] = in[input[k]][i]; break;
+        case kConst: stack[++top] = DType(value[k]); break;
+        case kAdd: --top; stack[top] = stack[top] + stack[top + 1]; break;
+        case kSub: --top; stack[top] = stack[top] - stack[top + 1]; break;
+        case kMul: --top; stack[top] = stack[top] * stack[top + 1]; break;
+        case kDiv: --top; stack[top] = stack[top] / stack[top + 1]; break;
+        case kNeg: stack[top] = -stack[top]; break;
+        case kSqrt: stack[top] = Sqrt(stack[top]); break;
+        case kSquare: stack[top] = stack[top] * stack[top]; break;
+        case kAbs: stack[top] = Abs(stack[top]); break;
+        case kExp: stack[top] = Exp(stack[top]); break;
+        case kLog: stack[top] = Log(stack[top]); break;
+        default: break;
+      }
+    }
+    return stack[0];
+  }
+  // math functions in the precision of the type, float for float and half
+  template<typename DType>
+  MSHADOW_XINLINE static DType Sqrt(DType x) { return DType(sqrtf(static_cast<float>(x))); }
+  MSHADOW_XINLINE static double Sqrt(double x) { return sqrt(x); }
+  template<typename DType>
+  MSHADOW_XINLINE static DType Abs(DType x) { return DType(fabsf(static_cast<float>(x))); }
+  MSHADOW_XINLINE static double Abs(double x) { return fabs(x); }
+  template<typename DType>
+  MSHADOW_XINLINE static DType Exp(DType x) { return DType(expf(static_cast<float>(x))); }
+  MSHADOW_XINLINE static double Exp(double x) { return exp(x); }
+  template<typename DType>
+  MSHADOW_XINLINE static DType Log(DType x) { return DType(logf(static_cast<float>(x))); }
+  MSHADOW_XINLINE static double Log(double x) { return log(x); }
+};
+
 // type holder for random number generators
 struct UniformDistribution {};
 
@@ -113,6 +236,10 @@ template<typename Device>
 void EvalClip(const TBlob &src, const real_t &a_min, const real_t &a_max,
               TBlob *ret, RunContext ctx);
 
+template<typename Device>
+void EvalFused(const FusedProgram &prog, const std::vector<TBlob> &in,
+               TBlob *ret, RunContext ctx);
+
 template<typename Device, typename OP>
 void Eval(const TBlob &lhs, const TBlob &mhs, const TBlob &rhs, TBlob *ret, RunContext ctx);
 
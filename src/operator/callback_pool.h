@@ -0,0 +1,110 @@
+/*!
+ * Copyright (c) 2016 by Contributors
+ * \file callback_pool.h
+ * \brief threads running the callbacks of the operators implemented in a
+ *  frontend language.
+ */
+#ifndef MXNET_OPERATOR_CALLBACK_POOL_H_
+#define MXNET_OPERATOR_CALLBACK_POOL_H_
+
+#include <dmlc/base.h>
+#include <dmlc/logging.h>
+#include <dmlc/concurrency.h>
+#include <dmlc/parameter.h>
+#include <mxnet/base.h>
+#include <functional>
+#include <memory>
+#include <mutex>
+#include <string>
+#include "../engine/thread_pool.h"
+
+namespace mxnet {
+namespace op {
+
+/*!
+ * \brief threads running the callbacks of the operators implemented in a
+ *  frontend language, such as python, so that an engine thread does not
+ *  wait for the interpreter while the callback runs.
+ *
+ *  The number of threads is MXNET_CALLBACK_NTHREADS, 2 by default.
+ */
+class CallbackPool {
+ public:
+  /*!
+   * \brief run a function on one of the threads.
+   * \param fn the function
+   */
+  inline void Push(std::function<void()> fn) {
+    queue_.Push(std::move(fn));
+  }
+  /*! \return the pool singleton */
+  static CallbackPool *Get() {
+    // never deleted, the threads may be waiting in the interpreter at exit
+    static CallbackPool *inst = new CallbackPool();
+    return inst;
+  }
+  /*!
+   * \return whether operators can complete after their callbacks run on the
+   *  pool, false with NaiveEngine, which requires every operator to complete
+   *  before it returns, the callbacks then run on the calling thread.
+   */
+  static bool AsyncSupported() {
+#if MXNET_PREDICT_ONLY
+    return false;
+#else
+    static const bool ret =
+        dmlc::GetEnv("MXNET_ENGINE_TYPE", std::string()) != "NaiveEngine";
+    return ret;
+#endif
+  }
+  /*!
+   * \brief record the failure of a callback, which cannot throw on the pool
+   *  threads, it is raised by the next ThrowIfError.
+   * \param msg the error message
+   */
+  static void SetError(const std::string &msg) {
+    LOG(ERROR) << msg;
+    std::lock_guard<std::mutex> lock(ErrorMutex());
+    if (Error().empty()) Error() = msg;
+  }
+  /*! \brief throw the error recorded by SetError, if any, and clear it */
+  static void ThrowIfError() {
+    std::string msg;
+    {
+      std::lock_guard<std::mutex> lock(ErrorMutex());
+      msg.swap(Error());
+    }
+    if (!msg.empty()) LOG(FATAL) << msg;
+  }
+
+ private:
+  CallbackPool() {
+    int num_threads = dmlc::GetEnv("MXNET_CALLBACK_NTHREADS", 2);
+    pool_.reset(new engine::ThreadPool(num_threads, [this]() { Run(); }));
+  }
+  /*! \brief thread entry */
+  void Run() {
+    std::function<void()> fn;
+    while (queue_.Pop(&fn)) {
+      fn();
+    }
+  }
+  /*! \brief the first error not raised yet */
+  static std::string &Error() {
+    static std::string error;
+    return error;
+  }
+  static std::mutex &ErrorMutex() {
+    static std::mutex mutex;
+    return mutex;
+  }
+  /*! \brief the functions to run */
+  dmlc::ConcurrentBlockingQueue<std::function<void()> > queue_;
+  /*! \brief the threads */
+  std::unique_ptr<engine::ThreadPool> pool_;
+  DISALLOW_COPY_AND_ASSIGN(CallbackPool);
+};
+
+}  // namespace op
+}  // namespace mxnet
+#endif  // MXNET_OPERATOR_CALLBACK_POOL_H_
@@ -0,0 +1,282 @@
+/*!
+ * Copyright (c) 2016 by Contributors
+ * \file custom_op-inl.h
+ * \brief operator implemented in a frontend language with NDArray,
+ *  running asynchronously on the callback threads.
+*/
+
+#ifndef MXNET_OPERATOR_CUSTOM_OP_INL_H_
+#define MXNET_OPERATOR_CUSTOM_OP_INL_H_
+#include <dmlc/logging.h>
+#include <dmlc/parameter.h>
+#include <mxnet/operator.h>
+#include <mxnet/ndarray.h>
+#include <mxnet/c_api.h>
+#include <map>
+#include <mutex>
+#include <vector>
+#include <string>
+#include <utility>
+#include "./operator_common.h"
+#include "./callback_pool.h"
+
+namespace mxnet {
+namespace op {
+
+struct CustomOpParam : public dmlc::Parameter<CustomOpParam> {
+  void *info;
+
+  CustomOpPropInfo *pinfo;
+  int num_inputs_, num_outputs_, num_auxs_;
+  DMLC_DECLARE_PARAMETER(CustomOpParam) {
+    DMLC_DECLARE_FIELD(info);
+  }
+};
+
+/*!
+ * \brief shape of the scratch array of a custom operator, empty if none.
+ * \param pinfo the callbacks of the operator
+ * \param in_shape shapes of the inputs
+ */
+inline TShape CustomScratchShape(CustomOpPropInfo *pinfo,
+                                 const std::vector<TShape> &in_shape) {
+  std::vector<unsigned*> shapes;
+  std::vector<int> ndims;
+  for (const TShape &shape : in_shape) {
+    shapes.push_back(const_cast<unsigned*>(shape.data()));
+    ndims.push_back(shape.ndim());
+  }
+  int ndim = 0;
+  unsigned *scratch = NULL;
+  CHECK(pinfo->scratch_shape(shapes.size(), ndims.data(), shapes.data(),
+                             &ndim, &scratch, pinfo->p_scratch_shape));
+  return TShape(scratch, scratch + ndim);
+}
+
+/*!
+ * \brief operator whose forward and backward run on the callback threads,
+ *  so that the engine threads keep running other operators meanwhile.
+ *  The callbacks take the arrays as NDArray and push operations on them,
+ *  the operator completes when these operations complete.
+ *  With NaiveEngine the callbacks run synchronously on the engine thread.
+ */
+class CustomOp : public Operator {
+ public:
+  CustomOp(CustomOpInfo info, Context ctx, CustomOpPropInfo *pinfo)
+      : info_(info), ctx_(ctx), pinfo_(pinfo) {}
+
+  ~CustomOp() {
+    CHECK(info_.del(info_.p_del));
+  }
+
+  virtual void Forward(const OpContext &ctx,
+                       const std::vector<TBlob> &in_data,
+                       const std::vector<OpReqType> &req,
+                       const std::vector<TBlob> &out_data,
+                       const std::vector<TBlob> &aux_args);
+
+  virtual void Backward(const OpContext &ctx,
+                        const std::vector<TBlob> &out_grad,
+                        const std::vector<TBlob> &in_data,
+                        const std::vector<TBlob> &out_data,
+                        const std::vector<OpReqType> &req,
+                        const std::vector<TBlob> &in_grad,
+                        const std::vector<TBlob> &aux_args);
+
+  virtual ExecType exec_type() const {
+    return CallbackPool::AsyncSupported() ? kAsync : kSync;
+  }
+
+ private:
+  typedef bool (*Callback)(int, void**, const int*, const int*, bool, void*);
+  /*!
+   * \brief append the blobs as NDArray with tag. A blob sharing the memory
+   *  of an array already appended, such as the output of an inplace pair,
+   *  shares its variable, so that the operations pushed on both are ordered.
+   */
+  void AddArrays(const std::vector<TBlob> &blobs, int tag,
+                 std::vector<NDArray> *arrays, std::vector<int> *tags) {
+    for (const TBlob &blob : blobs) {
+      bool shared = false;
+      for (size_t i = 0; i < arrays->size() && !shared; ++i) {
+        const NDArray &arr = (*arrays)[i];
+        if (arr.data().dptr_ == blob.dptr_ && arr.shape().Size() == blob.shape_.Size()) {
+          arrays->push_back(arr.Reshape(blob.shape_));
+          shared = true;
+        }
+      }
+      if (!shared) arrays->push_back(NDArray(blob, ctx_.dev_id));
+      tags->push_back(tag);
+    }
+  }
+  /*! \brief append the scratch array if the operator has one */
+  void AddScratch(const OpContext &ctx, const std::vector<TBlob> &in_data,
+                  std::vector<NDArray> *arrays, std::vector<int> *tags);
+  /*!
+   * \brief run the callback on the callback threads, or on the calling
+   *  thread if the engine does not support it.
+   */
+  void Run(const OpContext &ctx, Callback callback, void *payload,
+           const std::vector<NDArray> &arrays, const std::vector<int> &tags,
+           const std::vector<OpReqType> &req);
+
+  CustomOpInfo info_;
+  Context ctx_;
+  CustomOpPropInfo *pinfo_;
+  /*! \brief scratch shape by input shapes, to call the frontend once per shape */
+  std::map<std::vector<std::vector<index_t> >, TShape> scratch_shapes_;
+  std::mutex mutex_;
+};  // CustomOp
+
+#if DMLC_USE_CXX11
+class CustomOpProp : public OperatorProperty {
+ public:
+  std::vector<std::string> ListArguments() const override {
+    return List(param_.pinfo->list_arguments, param_.pinfo->p_list_arguments);
+  }
+
+  std::vector<std::string> ListOutputs() const override {
+    return List(param_.pinfo->list_outputs, param_.pinfo->p_list_outputs);
+  }
+
+  std::vector<std::string> ListAuxiliaryStates() const override {
+    return List(param_.pinfo->list_auxiliary_states, param_.pinfo->p_list_auxiliary_states);
+  }
+
+  int NumOutputs() const override {
+    return param_.num_outputs_;
+  }
+
+  void Init(const std::vector<std::pair<std::string, std::string> >& kwargs) override {
+    param_.Init(kwargs);
+    for (auto iter = kwargs.begin(); iter != kwargs.end(); ++iter) {
+      if (iter->first == "info") {
+        sscanf(iter->second.c_str(), "%p", &param_.pinfo);
+      }
+    }
+    param_.num_inputs_ = ListArguments().size();
+    param_.num_outputs_ = ListOutputs().size();
+    param_.num_auxs_ = ListAuxiliaryStates().size();
+  }
+
+  std::map<std::string, std::string> GetParams() const override {
+    return param_.__DICT__();
+  }
+
+  bool InferShape(std::vector<TShape> *in_shape,
+                  std::vector<TShape> *out_shape,
+                  std::vector<TShape> *aux_shape) const override {
+    std::vector<unsigned*> shapes;
+    std::vector<int> ndims;
+    for (auto iter = in_shape->begin(); iter != in_shape->end(); ++iter) {
+      shapes.push_back(iter->data());
+      ndims.push_back(iter->ndim());
+    }
+    const int num_tensor = param_.num_inputs_ + param_.num_outputs_ + param_.num_auxs_;
+    shapes.resize(num_tensor);
+    ndims.resize(num_tensor);
+    CHECK(param_.pinfo->infer_shape(shapes.size(), ndims.data(), shapes.data(),
+                                    param_.pinfo->p_infer_shape));
+    for (unsigned i = 0; i < in_shape->size(); ++i) {
+      SHAPE_ASSIGN_CHECK(*in_shape, i, TShape(shapes[i], shapes[i]+ndims[i]));
+    }
+    out_shape->clear();
+    for (int i = param_.num_inputs_; i < param_.num_inputs_ + param_.num_outputs_; ++i) {
+      out_shape->push_back(TShape(shapes[i], shapes[i]+ndims[i]));
+    }
+    aux_shape->clear();
+    for (int i = param_.num_inputs_ + param_.num_outputs_; i < num_tensor; ++i) {
+      aux_shape->push_back(TShape(shapes[i], shapes[i]+ndims[i]));
+    }
+    return true;
+  }
+
+  OperatorProperty* Copy() const override {
+    CustomOpProp *prop_sym = new CustomOpProp();
+    prop_sym->param_ = this->param_;
+    return prop_sym;
+  }
+
+  std::string TypeString() const override {
+    return "_Custom";
+  }
+
+  std::vector<ResourceRequest> ForwardResource(
+      const std::vector<TShape> &in_shape) const override {
+    if (CustomScratchShape(param_.pinfo, in_shape).ndim() == 0) return {};
+    return {ResourceRequest::kTempSpace};
+  }
+
+  std::vector<ResourceRequest> BackwardResource(
+      const std::vector<TShape> &in_shape) const override {
+    return ForwardResource(in_shape);
+  }
+
+  std::vector<int> DeclareBackwardDependency(
+    const std::vector<int> &out_grad,
+    const std::vector<int> &in_data,
+    const std::vector<int> &out_data) const override {
+    int num_dep;
+    int *rdeps;
+    CHECK(param_.pinfo->declare_backward_dependency(
+        out_grad.data(), in_data.data(), out_data.data(), &num_dep, &rdeps,
+        param_.pinfo->p_declare_backward_dependency));
+    std::vector<int> deps;
+    deps.insert(deps.end(), rdeps, rdeps+num_dep);
+    return deps;
+  }
+
+  std::vector<std::pair<int, void*> > ForwardInplaceOption(
+    const std::vector<int> &in_data,
+    const std::vector<void*> &out_data) const override {
+    std::vector<std::pair<int, void*> > ret;
+    for (const auto &pair : InplacePairs(false)) {
+      ret.push_back(std::make_pair(in_data.at(pair.first), out_data.at(pair.second)));
+    }
+    return ret;
+  }
+
+  std::vector<std::pair<int, void*> > BackwardInplaceOption(
+    const std::vector<int> &out_grad,
+    const std::vector<int> &in_data,
+    const std::vector<int> &out_data,
+    const std::vector<void*> &in_grad) const override {
+    std::vector<std::pair<int, void*> > ret;
+    for (const auto &pair : InplacePairs(true)) {
+      ret.push_back(std::make_pair(out_grad.at(pair.first), in_grad.at(pair.second)));
+    }
+    return ret;
+  }
+
+  Operator* CreateOperator(Context ctx) const override;
+
+ private:
+  /*! \brief call a callback listing names */
+  static std::vector<std::string> List(bool (*callback)(char***, void*), void *payload) {
+    char ** args = NULL;
+    CHECK(callback(&args, payload));
+    std::vector<std::string> ret;
+    for (int i = 0; args[i] != NULL; ++i) {
+      ret.push_back(args[i]);
+    }
+    return ret;
+  }
+  /*! \brief the pairs of indices that can share memory */
+  std::vector<std::pair<int, int> > InplacePairs(bool backward) const {
+    int num_pairs = 0;
+    int *pairs = NULL;
+    CHECK(param_.pinfo->inplace_option(backward, &num_pairs, &pairs,
+                                       param_.pinfo->p_inplace_option));
+    std::vector<std::pair<int, int> > ret;
+    for (int i = 0; i < num_pairs; ++i) {
+      ret.push_back(std::make_pair(pairs[2 * i], pairs[2 * i + 1]));
+    }
+    return ret;
+  }
+
+  CustomOpParam param_;
+};  // class CustomOpProp
+#endif  // DMLC_USE_CXX11
+}  // namespace op
+}  // namespace mxnet
+#endif  // MXNET_OPERATOR_CUSTOM_OP_INL_H_
@@ -0,0 +1,147 @@
+/*!
+ * Copyright (c) 2016 by Contributors
+ * \file custom_op.cc
+ * \brief operator implemented in a frontend language with NDArray,
+ *  running asynchronously on the callback threads.
+*/
+#include "./custom_op-inl.h"
+#include <mxnet/base.h>
+#include <mxnet/engine.h>
+#include <algorithm>
+
+namespace mxnet {
+namespace op {
+
+namespace {
+// the scratch space of the operator as a blob of shape
+template<typename xpu>
+TBlob ScratchBlob(const OpContext &ctx, const TShape &shape) {
+  mshadow::Tensor<xpu, 1, real_t> space = ctx.requested[0].get_space<xpu>(
+      mshadow::Shape1(shape.Size()), ctx.get_stream<xpu>());
+  return TBlob(space.dptr_, shape, xpu::kDevMask);
+}
+}  // namespace
+
+void CustomOp::AddScratch(const OpContext &ctx, const std::vector<TBlob> &in_data,
+                          std::vector<NDArray> *arrays, std::vector<int> *tags) {
+  if (ctx.requested.empty()) return;
+  std::vector<std::vector<index_t> > key;
+  for (const TBlob &blob : in_data) {
+    key.push_back(std::vector<index_t>(blob.shape_.data(),
+                                       blob.shape_.data() + blob.shape_.ndim()));
+  }
+  TShape shape;
+  {
+    std::lock_guard<std::mutex> lock(mutex_);
+    auto it = scratch_shapes_.find(key);
+    if (it == scratch_shapes_.end()) {
+      std::vector<TShape> in_shape;
+      for (const TBlob &blob : in_data) in_shape.push_back(blob.shape_);
+      it = scratch_shapes_.insert(
+          std::make_pair(key, CustomScratchShape(pinfo_, in_shape))).first;
+    }
+    shape = it->second;
+  }
+  if (shape.ndim() == 0) return;
+  switch (ctx_.dev_mask()) {
+    case cpu::kDevMask:
+      arrays->push_back(NDArray(ScratchBlob<cpu>(ctx, shape), ctx_.dev_id));
+      break;
+#if MXNET_USE_CUDA
+    case gpu::kDevMask:
+      arrays->push_back(NDArray(ScratchBlob<gpu>(ctx, shape), ctx_.dev_id));
+      break;
+#endif
+    default: LOG(FATAL) << MXNET_GPU_NOT_ENABLED_ERROR;
+  }
+  tags->push_back(5);
+}
+
+void CustomOp::Run(const OpContext &ctx, Callback callback, void *payload,
+                   const std::vector<NDArray> &arrays, const std::vector<int> &tags,
+                   const std::vector<OpReqType> &req) {
+  std::vector<int> reqs(req.begin(), req.end());
+  bool is_train = ctx.is_train;
+  auto call = [callback, payload, arrays, tags, reqs, is_train]() {
+    std::vector<void*> ptrs;
+    for (const NDArray &arr : arrays) {
+      // owned by the callback
+      ptrs.push_back(new NDArray(arr));
+    }
+    if (!callback(static_cast<int>(ptrs.size()), ptrs.data(), tags.data(), reqs.data(),
+                  is_train, payload)) {
+      // the outputs are left as they are, the error is raised by the next wait
+      CallbackPool::SetError("Error in the callback of a custom operator");
+    }
+  };
+  if (!CallbackPool::AsyncSupported()) {
+    // the operations pushed by the callback complete before it returns
+    call();
+    return;
+  }
+  engine::CallbackOnComplete on_complete = ctx.async_on_complete;
+  Context exec_ctx = ctx_;
+  CallbackPool::Get()->Push([call, arrays, on_complete, exec_ctx]() {
+    call();
+    std::vector<Engine::VarHandle> vars;
+    for (const NDArray &arr : arrays) {
+      if (std::find(vars.begin(), vars.end(), arr.var()) == vars.end()) {
+        vars.push_back(arr.var());
+      }
+    }
+    // complete after the operations pushed by the callback, including the
+    // ones reading the inputs, whose memory is reused afterwards
+    Engine::Get()->PushSync([arrays, on_complete](RunContext rctx) {
+        on_complete();
+      }, exec_ctx, {}, vars);
+  });
+}
+
+void CustomOp::Forward(const OpContext &ctx,
+                       const std::vector<TBlob> &in_data,
+                       const std::vector<OpReqType> &req,
+                       const std::vector<TBlob> &out_data,
+                       const std::vector<TBlob> &aux_args) {
+  std::vector<NDArray> arrays;
+  std::vector<int> tags;
+  AddArrays(in_data, 0, &arrays, &tags);
+  AddArrays(out_data, 1, &arrays, &tags);
+  AddArrays(aux_args, 4, &arrays, &tags);
+  AddScratch(ctx, in_data, &arrays, &tags);
+  Run(ctx, info_.forward, info_.p_forward, arrays, tags, req);
+}
+
+void CustomOp::Backward(const OpContext &ctx,
+                        const std::vector<TBlob> &out_grad,
+                        const std::vector<TBlob> &in_data,
+                        const std::vector<TBlob> &out_data,
+                        const std::vector<OpReqType> &req,
+                        const std::vector<TBlob> &in_grad,
+                        const std::vector<TBlob> &aux_args) {
+  std::vector<NDArray> arrays;
+  std::vector<int> tags;
+  AddArrays(in_data, 0, &arrays, &tags);
+  AddArrays(out_data, 1, &arrays, &tags);
+  AddArrays(in_grad, 2, &arrays, &tags);
+  AddArrays(out_grad, 3, &arrays, &tags);
+  AddArrays(aux_args, 4, &arrays, &tags);
+  AddScratch(ctx, in_data, &arrays, &tags);
+  Run(ctx, info_.backward, info_.p_backward, arrays, tags, req);
+}
+
+Operator* CustomOpProp::CreateOperator(Context ctx) const {
+  CustomOpInfo info;
+  CHECK(param_.pinfo->create_operator(ctx.dev_type, ctx.dev_id, &info,
+                                      param_.pinfo->p_create_operator));
+  return new CustomOp(info, ctx, param_.pinfo);
+}
+
+DMLC_REGISTER_PARAMETER(CustomOpParam);
+
+MXNET_REGISTER_OP_PROPERTY(_Custom, CustomOpProp)
+.describe("Stub for implementing an operator in a frontend language with NDArray, "
+          "its forward and backward run asynchronously on the callback threads.")
+.add_arguments(CustomOpParam::__FIELDS__());
+
+}  // namespace op
+}  // namespace mxnet
@@ -11,12 +11,14 @@
 #include <dmlc/parameter.h>
 #include <mxnet/operator.h>
 #include <mxnet/c_api.h>
+#include <mxnet/engine.h>
 #include <map>
 #include <vector>
 #include <string>
 #include <utility>
 #include <sstream>
 #include "./operator_common.h"
+#include "./callback_pool.h"
 
 namespace mxnet {
 namespace op {
@@ -24,6 +26,7 @@ namespace op {
 struct NativeOpParam : public dmlc::Parameter<NativeOpParam> {
   void *info;
   bool need_top_grad;
+  bool async_callback;
 
   NativeOpInfo *pinfo;
   int num_inputs_, num_outputs_;
@@ -32,6 +35,9 @@ struct NativeOpParam : public dmlc::Parameter<NativeOpParam> {
     DMLC_DECLARE_FIELD(need_top_grad).set_default(true)
     .describe("Whether this layer needs out grad for backward. "
       "Should be false for loss layers.");
+    DMLC_DECLARE_FIELD(async_callback).set_default(false)
+    .describe("Whether to run the callbacks on the callback threads instead of "
+      "the engine thread, so that the engine runs other operators meanwhile.");
   }
 };
 
@@ -56,18 +62,16 @@ class NativeOp : public Operator {
     SyncVec(in_data, "in_data", s, 0);
     SyncVec(out_data, "out_data", s, 1);
     s->Wait();
-    param_.pinfo->forward(ptrs.size(), ptrs.data(), ndims.data(), shapes.data(),
-        tags.data(), param_.pinfo->p_forward);
+    std::vector<std::pair<TBlob, Tensor<cpu, 2> > > results;
     for (index_t i = 0; i < out_data.size(); ++i) {
       CHECK_NE(req[i], kAddTo) << "NativeOp doesn't support AddTo for output";
       if (req[i] != kNullOp) {
         std::stringstream ss;
         ss << std::string("out_data") << i;
-        Copy(out_data[i].FlatTo2D<xpu, real_t>(s),
-             buffer_map[ss.str()].second, s);
+        results.push_back(std::make_pair(out_data[i], buffer_map[ss.str()].second));
       }
     }
-    s->Wait();
+    Run(ctx, param_.pinfo->forward, param_.pinfo->p_forward, results);
   }
 
   virtual void Backward(const OpContext &ctx,
@@ -90,18 +94,20 @@ class NativeOp : public Operator {
       SyncVec(out_grad, "out_grad", s, 3);
     }
     s->Wait();
-    param_.pinfo->backward(ptrs.size(), ptrs.data(), ndims.data(), shapes.data(),
-        tags.data(), param_.pinfo->p_backward);
+    std::vector<std::pair<TBlob, Tensor<cpu, 2> > > results;
     for (index_t i = 0; i < in_grad.size(); ++i) {
       CHECK_NE(req[i], kAddTo) << "NativeOp doesn't support AddTo for output";
       if (req[i] != kNullOp) {
         std::stringstream ss;
         ss << std::string("in_grad") << i;
-        Copy(in_grad[i].FlatTo2D<xpu, real_t>(s),
-             buffer_map[ss.str()].second, s);
+        results.push_back(std::make_pair(in_grad[i], buffer_map[ss.str()].second));
       }
     }
-    s->Wait();
+    Run(ctx, param_.pinfo->backward, param_.pinfo->p_backward, results);
+  }
+
+  virtual ExecType exec_type() const {
+    return async() ? kAsync : kSync;
   }
 
  private:
@@ -112,6 +118,61 @@ class NativeOp : public Operator {
   std::vector<int> tags;
   std::map<std::string, std::pair<TShape, mshadow::Tensor<cpu, 2> > > buffer_map;
 
+  typedef void (*Callback)(int, float**, int*, unsigned**, int*, void*);
+  /*! \brief whether the callbacks run on the callback threads, never with NaiveEngine */
+  bool async() const {
+    return param_.async_callback && CallbackPool::AsyncSupported();
+  }
+  /*! \brief context of the operator, used to push the copy of the results */
+  Context get_ctx();
+  /*!
+   * \brief call the callback on the buffers set by SyncVec, then copy the
+   *  results from their buffers to their blobs.
+   *  With async_callback, the callback runs on the callback threads and
+   *  the copy is pushed to the engine, which then completes the operator.
+   *  NaiveEngine requires operators to complete synchronously, so there
+   *  the callback always runs on the engine thread.
+   */
+  void Run(const OpContext &ctx, Callback callback, void *payload,
+           const std::vector<std::pair<TBlob, mshadow::Tensor<cpu, 2> > > &results) {
+    if (!async()) {
+      mshadow::Stream<xpu> *s = ctx.get_stream<xpu>();
+      callback(ptrs.size(), ptrs.data(), ndims.data(), shapes.data(), tags.data(), payload);
+      for (const auto &result : results) {
+        mshadow::Copy(result.first.FlatTo2D<xpu, real_t>(s), result.second, s);
+      }
+      s->Wait();
+      return;
+    }
+    // the buffers are not touched until the operator completes, the shapes
+    // are copied since the blobs do not outlive this call
+    std::vector<std::vector<unsigned> > shape_data(shapes.size());
+    for (size_t i = 0; i < shapes.size(); ++i) {
+      shape_data[i].assign(shapes[i], shapes[i] + ndims[i]);
+    }
+    std::vector<real_t*> ptrs_copy = ptrs;
+    std::vector<int> ndims_copy = ndims;
+    std::vector<int> tags_copy = tags;
+    engine::CallbackOnComplete on_complete = ctx.async_on_complete;
+    Context exec_ctx = get_ctx();
+    CallbackPool::Get()->Push(
+        [callback, payload, shape_data, ptrs_copy, ndims_copy, tags_copy, results,
+         on_complete, exec_ctx]() mutable {
+      std::vector<unsigned*> shape_ptrs(shape_data.size());
+      for (size_t i = 0; i < shape_data.size(); ++i) shape_ptrs[i] = shape_data[i].data();
+      callback(ptrs_copy.size(), ptrs_copy.data(), ndims_copy.data(), shape_ptrs.data(),
+               tags_copy.data(), payload);
+      Engine::Get()->PushSync([results, on_complete](RunContext rctx) {
+          mshadow::Stream<xpu> *s = rctx.get_stream<xpu>();
+          for (const auto &result : results) {
+            mshadow::Copy(result.first.FlatTo2D<xpu, real_t>(s), result.second, s);
+          }
+          s->Wait();
+          on_complete();
+        }, exec_ctx, {}, {});
+    });
+  }
+
   virtual void SyncBuffer(const TBlob &tblob,
                           const std::string &name,
                           mshadow::Stream<xpu> *stream) {
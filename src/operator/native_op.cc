@@ -8,6 +8,11 @@
 
 namespace mxnet {
 namespace op {
+template<>
+Context NativeOp<cpu>::get_ctx() {
+  return Context::CPU();
+}
+
 template<>
 Operator *CreateOp<cpu>(NativeOpParam param) {
   return new NativeOp<cpu>(param);
@@ -7,6 +7,13 @@
 #include "./native_op-inl.h"
 namespace mxnet {
 namespace op {
+template<>
+Context NativeOp<gpu>::get_ctx() {
+  int dev_id;
+  CHECK_EQ(cudaGetDevice(&dev_id), cudaSuccess);
+  return Context::GPU(dev_id);
+}
+
 template<>
 Operator* CreateOp<gpu>(NativeOpParam param) {
   return new NativeOp<gpu>(param);
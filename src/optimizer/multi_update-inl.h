@@ -0,0 +1,208 @@
+/*!
+ *  Copyright (c) 2016 by Contributors
+ * \file multi_update-inl.h
+ * \brief fused update of a group of weights for sgd, adam and rmsprop.
+ */
+#ifndef MXNET_OPTIMIZER_MULTI_UPDATE_INL_H_
+#define MXNET_OPTIMIZER_MULTI_UPDATE_INL_H_
+
+#include <mshadow/tensor.h>
+#include <mxnet/optimizer.h>
+#include <dmlc/parameter.h>
+#include <string>
+#include <vector>
+#include <utility>
+#include "./sgd-inl.h"
+#include "../operator/mshadow_op.h"
+
+namespace mxnet {
+namespace opt {
+
+struct AdamParam : public dmlc::Parameter<AdamParam> {
+  float beta1;
+  float beta2;
+  float epsilon;
+  float rescale_grad;
+  float clip_gradient;
+  DMLC_DECLARE_PARAMETER(AdamParam) {
+    DMLC_DECLARE_FIELD(beta1)
+    .set_default(0.9f)
+    .describe("decay rate of the first moment estimates.");
+    DMLC_DECLARE_FIELD(beta2)
+    .set_default(0.999f)
+    .describe("decay rate of the second moment estimates.");
+    DMLC_DECLARE_FIELD(epsilon)
+    .set_default(1e-8f)
+    .describe("small constant added to the denominator.");
+    DMLC_DECLARE_FIELD(rescale_grad)
+    .set_default(1.0f)
+    .describe("rescale gradient as grad = rescale_grad*grad.");
+    DMLC_DECLARE_FIELD(clip_gradient)
+    .set_default(-1.0f)
+    .describe("If greater than 0, clip gradient to "
+              "grad = max(min(grad, -clip_gradient), clip_gradient). "
+              "Otherwise turned off.");
+  }
+};
+
+struct RMSPropParam : public dmlc::Parameter<RMSPropParam> {
+  float gamma1;
+  float gamma2;
+  float rescale_grad;
+  float clip_gradient;
+  DMLC_DECLARE_PARAMETER(RMSPropParam) {
+    DMLC_DECLARE_FIELD(gamma1)
+    .set_default(0.95f)
+    .describe("decay factor of moving average for gradient, gradient^2.");
+    DMLC_DECLARE_FIELD(gamma2)
+    .set_default(0.9f)
+    .describe("momentum factor.");
+    DMLC_DECLARE_FIELD(rescale_grad)
+    .set_default(1.0f)
+    .describe("rescale gradient as grad = rescale_grad*grad.");
+    DMLC_DECLARE_FIELD(clip_gradient)
+    .set_default(-1.0f)
+    .describe("If greater than 0, clip gradient to "
+              "grad = max(min(grad, -clip_gradient), clip_gradient). "
+              "Otherwise turned off.");
+  }
+};
+
+// The multi_*_update kernels follow the python optimizers: the gradient is
+// rescaled before it is clipped, and states[i] holds the states of weights[i]
+// laid out as in the python create_state.
+
+template<typename xpu>
+void multi_sgd_update(RunContext ctx, const std::vector<TBlob> &weights,
+                      const std::vector<TBlob> &grads, const std::vector<TBlob> &states,
+                      const std::vector<float> &lrs, const std::vector<float> &wds,
+                      const SGDParam& param) {
+  using namespace mshadow;
+  using namespace mshadow::expr;
+  Stream<xpu>* s = ctx.get_stream<xpu>();
+  for (size_t i = 0; i < weights.size(); ++i) {
+    Tensor<xpu, 2> weight2d = weights[i].FlatTo2D<xpu, real_t>(s);
+    Tensor<xpu, 2> grad2d = grads[i].FlatTo2D<xpu, real_t>(s);
+    const float lr = lrs[i], wd = wds[i];
+    if (param.momentum > 0.0f) {
+      Tensor<xpu, 2> mom2d = states[i].FlatTo2D<xpu, real_t>(s);
+      if (param.clip_gradient >= 0.0f) {
+        mom2d = param.momentum*mom2d -
+                lr*(F<sgd_clip>(param.rescale_grad*grad2d, param.clip_gradient) + wd*weight2d);
+      } else {
+        mom2d = param.momentum*mom2d - lr*(param.rescale_grad*grad2d + wd*weight2d);
+      }
+      weight2d += mom2d;
+    } else {
+      if (param.clip_gradient >= 0.0f) {
+        weight2d -= lr*(F<sgd_clip>(param.rescale_grad*grad2d, param.clip_gradient) +
+                    wd*weight2d);
+      } else {
+        weight2d -= lr*(param.rescale_grad*grad2d + wd*weight2d);
+      }
+    }
+  }
+}
+
+template<typename xpu>
+void multi_adam_update(RunContext ctx, const std::vector<TBlob> &weights,
+                       const std::vector<TBlob> &grads, const std::vector<TBlob> &states,
+                       const std::vector<float> &lrs, const std::vector<float> &wds,
+                       const AdamParam& param) {
+  using namespace mshadow;
+  using namespace mshadow::expr;
+  using namespace mxnet::op;
+  Stream<xpu>* s = ctx.get_stream<xpu>();
+  for (size_t i = 0; i < weights.size(); ++i) {
+    Tensor<xpu, 2> weight2d = weights[i].FlatTo2D<xpu, real_t>(s);
+    Tensor<xpu, 2> grad2d = grads[i].FlatTo2D<xpu, real_t>(s);
+    Tensor<xpu, 2> mean2d = states[2 * i].FlatTo2D<xpu, real_t>(s);
+    Tensor<xpu, 2> var2d = states[2 * i + 1].FlatTo2D<xpu, real_t>(s);
+    const float lr = lrs[i], wd = wds[i];
+    if (param.clip_gradient >= 0.0f) {
+      mean2d = param.beta1*mean2d + (1.0f - param.beta1)*
+               F<sgd_clip>(param.rescale_grad*grad2d, param.clip_gradient);
+      var2d = param.beta2*var2d + (1.0f - param.beta2)*
+              F<mshadow_op::square>(F<sgd_clip>(param.rescale_grad*grad2d,
+                                                param.clip_gradient));
+    } else {
+      mean2d = param.beta1*mean2d + (1.0f - param.beta1)*(param.rescale_grad*grad2d);
+      var2d = param.beta2*var2d + (1.0f - param.beta2)*
+              F<mshadow_op::square>(param.rescale_grad*grad2d);
+    }
+    weight2d -= lr*(mean2d/(F<mshadow_op::square_root>(var2d) + param.epsilon) +
+                wd*weight2d);
+  }
+}
+
+template<typename xpu>
+void multi_rmsprop_update(RunContext ctx, const std::vector<TBlob> &weights,
+                          const std::vector<TBlob> &grads, const std::vector<TBlob> &states,
+                          const std::vector<float> &lrs, const std::vector<float> &wds,
+                          const RMSPropParam& param) {
+  using namespace mshadow;
+  using namespace mshadow::expr;
+  using namespace mxnet::op;
+  Stream<xpu>* s = ctx.get_stream<xpu>();
+  for (size_t i = 0; i < weights.size(); ++i) {
+    Tensor<xpu, 2> weight2d = weights[i].FlatTo2D<xpu, real_t>(s);
+    Tensor<xpu, 2> grad2d = grads[i].FlatTo2D<xpu, real_t>(s);
+    Tensor<xpu, 2> n2d = states[3 * i].FlatTo2D<xpu, real_t>(s);
+    Tensor<xpu, 2> g2d = states[3 * i + 1].FlatTo2D<xpu, real_t>(s);
+    Tensor<xpu, 2> delta2d = states[3 * i + 2].FlatTo2D<xpu, real_t>(s);
+    const float lr = lrs[i], wd = wds[i];
+    if (param.clip_gradient >= 0.0f) {
+      n2d = (1.0f - param.gamma1)*F<mshadow_op::square>(
+                F<sgd_clip>(param.rescale_grad*grad2d, param.clip_gradient)) +
+            param.gamma1*n2d;
+      g2d = (1.0f - param.gamma1)*F<sgd_clip>(param.rescale_grad*grad2d, param.clip_gradient) +
+            param.gamma1*g2d;
+      delta2d = param.gamma2*delta2d -
+                lr*(F<sgd_clip>(param.rescale_grad*grad2d, param.clip_gradient)/
+                    F<mshadow_op::square_root>(n2d - F<mshadow_op::square>(g2d) + 1e-4f) +
+                    wd*weight2d);
+    } else {
+      n2d = (1.0f - param.gamma1)*F<mshadow_op::square>(param.rescale_grad*grad2d) +
+            param.gamma1*n2d;
+      g2d = (1.0f - param.gamma1)*(param.rescale_grad*grad2d) + param.gamma1*g2d;
+      delta2d = param.gamma2*delta2d -
+                lr*((param.rescale_grad*grad2d)/
+                    F<mshadow_op::square_root>(n2d - F<mshadow_op::square>(g2d) + 1e-4f) +
+                    wd*weight2d);
+    }
+    weight2d += delta2d;
+  }
+}
+
+void call_multi_sgd_update_cpu(RunContext ctx, const std::vector<TBlob> &weights,
+                               const std::vector<TBlob> &grads, const std::vector<TBlob> &states,
+                               const std::vector<float> &lrs, const std::vector<float> &wds,
+                               const SGDParam& param);
+void call_multi_adam_update_cpu(RunContext ctx, const std::vector<TBlob> &weights,
+                                const std::vector<TBlob> &grads, const std::vector<TBlob> &states,
+                                const std::vector<float> &lrs, const std::vector<float> &wds,
+                                const AdamParam& param);
+void call_multi_rmsprop_update_cpu(RunContext ctx, const std::vector<TBlob> &weights,
+                                   const std::vector<TBlob> &grads,
+                                   const std::vector<TBlob> &states,
+                                   const std::vector<float> &lrs, const std::vector<float> &wds,
+                                   const RMSPropParam& param);
+#if MXNET_USE_CUDA
+void call_multi_sgd_update_gpu(RunContext ctx, const std::vector<TBlob> &weights,
+                               const std::vector<TBlob> &grads, const std::vector<TBlob> &states,
+                               const std::vector<float> &lrs, const std::vector<float> &wds,
+                               const SGDParam& param);
+void call_multi_adam_update_gpu(RunContext ctx, const std::vector<TBlob> &weights,
+                                const std::vector<TBlob> &grads, const std::vector<TBlob> &states,
+                                const std::vector<float> &lrs, const std::vector<float> &wds,
+                                const AdamParam& param);
+void call_multi_rmsprop_update_gpu(RunContext ctx, const std::vector<TBlob> &weights,
+                                   const std::vector<TBlob> &grads,
+                                   const std::vector<TBlob> &states,
+                                   const std::vector<float> &lrs, const std::vector<float> &wds,
+                                   const RMSPropParam& param);
+#endif  // MXNET_USE_CUDA
+
+}  // namespace opt
+}  // namespace mxnet
+#endif  // MXNET_OPTIMIZER_MULTI_UPDATE_INL_H_
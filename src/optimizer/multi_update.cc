@@ -0,0 +1,165 @@
+/*!
+ * Copyright (c) 2016 by Contributors
+ * \file multi_update.cc
+ * \brief fused update of a group of weights
+*/
+#include <mxnet/ndarray.h>
+#include <mxnet/engine.h>
+#include <map>
+#include "./multi_update-inl.h"
+
+
+namespace mxnet {
+namespace opt {
+
+void call_multi_sgd_update_cpu(RunContext ctx, const std::vector<TBlob> &weights,
+                               const std::vector<TBlob> &grads, const std::vector<TBlob> &states,
+                               const std::vector<float> &lrs, const std::vector<float> &wds,
+                               const SGDParam& param) {
+  multi_sgd_update<cpu>(ctx, weights, grads, states, lrs, wds, param);
+}
+void call_multi_adam_update_cpu(RunContext ctx, const std::vector<TBlob> &weights,
+                                const std::vector<TBlob> &grads, const std::vector<TBlob> &states,
+                                const std::vector<float> &lrs, const std::vector<float> &wds,
+                                const AdamParam& param) {
+  multi_adam_update<cpu>(ctx, weights, grads, states, lrs, wds, param);
+}
+void call_multi_rmsprop_update_cpu(RunContext ctx, const std::vector<TBlob> &weights,
+                                   const std::vector<TBlob> &grads,
+                                   const std::vector<TBlob> &states,
+                                   const std::vector<float> &lrs, const std::vector<float> &wds,
+                                   const RMSPropParam& param) {
+  multi_rmsprop_update<cpu>(ctx, weights, grads, states, lrs, wds, param);
+}
+
+DMLC_REGISTER_PARAMETER(AdamParam);
+DMLC_REGISTER_PARAMETER(RMSPropParam);
+
+/*! \brief signature of the multi_*_update kernels */
+template<typename Param>
+struct MultiUpdateFn {
+  typedef void (*Type)(RunContext ctx, const std::vector<TBlob> &weights,
+                       const std::vector<TBlob> &grads, const std::vector<TBlob> &states,
+                       const std::vector<float> &lrs, const std::vector<float> &wds,
+                       const Param& param);
+};
+
+/*!
+ * \brief push the update of a group of weights, one engine operation per device.
+ * \param param parameters of the optimizer
+ * \param num_states number of states of each weight
+ * \param fcpu the cpu kernel
+ * \param fgpu the gpu kernel, nullptr if compiled without cuda
+ */
+template<typename Param>
+void PushMultiUpdate(const Param &param, size_t num_states,
+                     const std::vector<NDArray> &weights,
+                     const std::vector<NDArray> &grads,
+                     const std::vector<NDArray> &states,
+                     const std::vector<float> &lrs,
+                     const std::vector<float> &wds,
+                     typename MultiUpdateFn<Param>::Type fcpu,
+                     typename MultiUpdateFn<Param>::Type fgpu) {
+  CHECK_EQ(weights.size(), grads.size());
+  CHECK_EQ(weights.size(), lrs.size());
+  CHECK_EQ(weights.size(), wds.size());
+  CHECK_EQ(weights.size() * num_states, states.size());
+  // group the weights by device, so each device gets exactly one operation
+  std::map<Context, std::vector<size_t> > groups;
+  for (size_t i = 0; i < weights.size(); ++i) {
+    CHECK_EQ(weights[i].shape(), grads[i].shape())
+        << "weight and gradient " << i << " have different shapes";
+    CHECK(weights[i].ctx() == grads[i].ctx())
+        << "weight and gradient " << i << " are on different devices";
+    for (size_t j = 0; j < num_states; ++j) {
+      CHECK_EQ(weights[i].shape(), states[i * num_states + j].shape())
+          << "weight and state " << i << " have different shapes";
+    }
+    groups[weights[i].ctx()].push_back(i);
+  }
+  for (auto it = groups.begin(); it != groups.end(); ++it) {
+    const Context ctx = it->first;
+    std::vector<NDArray> w, g, s;
+    std::vector<float> lr, wd;
+    std::vector<Engine::VarHandle> const_vars, mutable_vars;
+    for (size_t i : it->second) {
+      w.push_back(weights[i]);
+      g.push_back(grads[i]);
+      lr.push_back(lrs[i]);
+      wd.push_back(wds[i]);
+      const_vars.push_back(grads[i].var());
+      mutable_vars.push_back(weights[i].var());
+      for (size_t j = 0; j < num_states; ++j) {
+        s.push_back(states[i * num_states + j]);
+        mutable_vars.push_back(states[i * num_states + j].var());
+      }
+    }
+    typename MultiUpdateFn<Param>::Type fupdate = nullptr;
+    switch (ctx.dev_type) {
+     case Context::kCPU:
+     case Context::kCPUPinned:
+      fupdate = fcpu;
+      break;
+     case Context::kGPU:
+      CHECK(fgpu != nullptr) << "Please compile with CUDA enabled for cuda features";
+      fupdate = fgpu;
+      break;
+     default:
+      LOG(FATAL) << "Unsupported device type for multi update: " << ctx.dev_type;
+    }
+    Engine::Get()->PushSync([param, fupdate, w, g, s, lr, wd](RunContext rctx) {
+      std::vector<TBlob> wb, gb, sb;
+      for (const NDArray &nd : w) wb.push_back(nd.data());
+      for (const NDArray &nd : g) gb.push_back(nd.data());
+      for (const NDArray &nd : s) sb.push_back(nd.data());
+      fupdate(rctx, wb, gb, sb, lr, wd, param);
+    }, ctx, const_vars, mutable_vars, FnProperty::kNormal);
+  }
+}
+
+}  // namespace opt
+
+void Optimizer::MultiUpdate(const std::string &name,
+                            const std::vector<NDArray> &weights,
+                            const std::vector<NDArray> &grads,
+                            const std::vector<NDArray> &states,
+                            const std::vector<float> &lrs,
+                            const std::vector<float> &wds,
+                            const std::vector<std::pair<std::string, std::string> > &kwargs) {
+  using namespace opt;
+  if (name == "sgd") {
+    SGDParam param;
+    param.Init(kwargs);
+#if MXNET_USE_CUDA
+    PushMultiUpdate(param, param.momentum > 0.0f ? 1 : 0, weights, grads, states, lrs, wds,
+                    call_multi_sgd_update_cpu, call_multi_sgd_update_gpu);
+#else
+    PushMultiUpdate(param, param.momentum > 0.0f ? 1 : 0, weights, grads, states, lrs, wds,
+                    call_multi_sgd_update_cpu, nullptr);
+#endif  // MXNET_USE_CUDA
+  } else if (name == "adam") {
+    AdamParam param;
+    param.Init(kwargs);
+#if MXNET_USE_CUDA
+    PushMultiUpdate(param, 2, weights, grads, states, lrs, wds,
+                    call_multi_adam_update_cpu, call_multi_adam_update_gpu);
+#else
+    PushMultiUpdate(param, 2, weights, grads, states, lrs, wds,
+                    call_multi_adam_update_cpu, nullptr);
+#endif  // MXNET_USE_CUDA
+  } else if (name == "rmsprop") {
+    RMSPropParam param;
+    param.Init(kwargs);
+#if MXNET_USE_CUDA
+    PushMultiUpdate(param, 3, weights, grads, states, lrs, wds,
+                    call_multi_rmsprop_update_cpu, call_multi_rmsprop_update_gpu);
+#else
+    PushMultiUpdate(param, 3, weights, grads, states, lrs, wds,
+                    call_multi_rmsprop_update_cpu, nullptr);
+#endif  // MXNET_USE_CUDA
+  } else {
+    LOG(FATAL) << "Unknown optimizer for multi update: " << name;
+  }
+}
+
+}  // namespace mxnet
@@ -0,0 +1,32 @@
+/*!
+ * Copyright (c) 2016 by Contributors
+ * \file multi_update.cu
+ * \brief fused update of a group of weights
+*/
+#include "./multi_update-inl.h"
+
+namespace mxnet {
+namespace opt {
+
+void call_multi_sgd_update_gpu(RunContext ctx, const std::vector<TBlob> &weights,
+                               const std::vector<TBlob> &grads, const std::vector<TBlob> &states,
+                               const std::vector<float> &lrs, const std::vector<float> &wds,
+                               const SGDParam& param) {
+  multi_sgd_update<gpu>(ctx, weights, grads, states, lrs, wds, param);
+}
+void call_multi_adam_update_gpu(RunContext ctx, const std::vector<TBlob> &weights,
+                                const std::vector<TBlob> &grads, const std::vector<TBlob> &states,
+                                const std::vector<float> &lrs, const std::vector<float> &wds,
+                                const AdamParam& param) {
+  multi_adam_update<gpu>(ctx, weights, grads, states, lrs, wds, param);
+}
+void call_multi_rmsprop_update_gpu(RunContext ctx, const std::vector<TBlob> &weights,
+                                   const std::vector<TBlob> &grads,
+                                   const std::vector<TBlob> &states,
+                                   const std::vector<float> &lrs, const std::vector<float> &wds,
+                                   const RMSPropParam& param) {
+  multi_rmsprop_update<gpu>(ctx, weights, grads, states, lrs, wds, param);
+}
+
+}  // namespace opt
+}  // namespace mxnet
@@ -7,6 +7,11 @@
 #define MXNET_STORAGE_POOLED_STORAGE_MANAGER_H_
 
 #include <mxnet/base.h>
+#include <mxnet/storage.h>
+#include <dmlc/logging.h>
+#include <algorithm>
+#include <iterator>
+#include <list>
 #include <unordered_map>
 #include <vector>
 #include <mutex>
@@ -17,14 +22,21 @@ namespace storage {
 
 /*!
  * \brief Storage manager with a memory pool.
+ *
+ *  Requests are rounded up to size classes, four between two consecutive
+ *  powers of two, so that blocks of close sizes are reused. When the bytes
+ *  allocated from the device would exceed the limit, pooled blocks of the
+ *  least recently used size classes are released until they do not.
  */
-template <class DeviceStorage, size_t kThreshold>
+template <class DeviceStorage>
 class PooledStorageManager final : public StorageManager {
  public:
   /*!
-   * \brief Default constructor.
+   * \brief Constructor.
+   * \param limit bytes allocated from the device, in use or pooled, above
+   *  which pooled blocks are released.
    */
-  PooledStorageManager() = default;
+  explicit PooledStorageManager(size_t limit) : limit_(limit) {}
   /*!
    * \brief Default destructor.
    */
@@ -33,53 +45,150 @@ class PooledStorageManager final : public StorageManager {
   }
   void* Alloc(size_t size) override;
   void Free(void* ptr, size_t size) override;
+  void ReleaseAll() override;
+  Storage::Stats GetStats() override;
+  /*!
+   * \brief the size class of a request.
+   * \param size Size of the request.
+   * \return Size of the block allocated for the request.
+   */
+  static size_t RoundSize(size_t size);
 
  private:
-  void ReleaseAll();
+  /*! \brief smallest size class */
+  static constexpr size_t kMinSize = 128;
+  /*! \brief number of size classes between two powers of two */
+  static constexpr size_t kClassesPerPower = 4;
+  /*! \brief pooled blocks of one size class */
+  struct SizeClass {
+    std::vector<void*> blocks;
+    /*! \brief position of the size class in lru_ */
+    std::list<size_t>::iterator lru_pos;
+  };
+  /*! \brief release pooled blocks until size more bytes fit in the limit */
+  void Trim(size_t size);
+  /*! \brief release all the pooled blocks, mutex_ must be held */
+  void ReleasePooled();
   // internal mutex
   std::mutex mutex_;
-  // used memory
-  size_t used_memory_ = 0;
-  // memory pool
-  std::unordered_map<size_t, std::vector<void*>> memory_pool_;
+  // limit of the allocated bytes
+  size_t limit_;
+  // memory pool by size class, only holds non empty size classes
+  std::unordered_map<size_t, SizeClass> memory_pool_;
+  // size classes of memory_pool_, least recently used first
+  std::list<size_t> lru_;
+  // statistics
+  Storage::Stats stats_;
   DISALLOW_COPY_AND_ASSIGN(PooledStorageManager);
 };  // class PooledStorageManager
 
-template <class DeviceStorage, size_t kThreshold>
-void* PooledStorageManager<DeviceStorage, kThreshold>::Alloc(size_t size) {
+template <class DeviceStorage>
+size_t PooledStorageManager<DeviceStorage>::RoundSize(size_t size) {
+  if (size <= kMinSize) return kMinSize;
+  size_t power = kMinSize;
+  while (power * 2 < size) power *= 2;
+  // power < size <= 2 * power
+  const size_t step = power / kClassesPerPower;
+  return (size + step - 1) / step * step;
+}
+
+template <class DeviceStorage>
+void* PooledStorageManager<DeviceStorage>::Alloc(size_t size) {
   std::lock_guard<std::mutex> lock(mutex_);
-  auto&& reuse_it = memory_pool_.find(size);
-  if (reuse_it == memory_pool_.end() || reuse_it->second.size() == 0) {
-    if (kThreshold <= used_memory_) {
-      ReleaseAll();
+  const size_t rsize = RoundSize(size);
+  ++stats_.num_alloc;
+  stats_.requested_bytes += size;
+  auto reuse_it = memory_pool_.find(rsize);
+  if (reuse_it != memory_pool_.end()) {
+    SizeClass &size_class = reuse_it->second;
+    void *ret = size_class.blocks.back();
+    size_class.blocks.pop_back();
+    stats_.pooled_bytes -= rsize;
+    ++stats_.num_pool_hit;
+    if (size_class.blocks.empty()) {
+      lru_.erase(size_class.lru_pos);
+      memory_pool_.erase(reuse_it);
+    } else {
+      lru_.splice(lru_.end(), lru_, size_class.lru_pos);
     }
-    used_memory_ += size;
-    return DeviceStorage::Alloc(size);
-  } else {
-    auto&& reuse_pool = reuse_it->second;
-    auto ret = reuse_pool.back();
-    reuse_pool.pop_back();
     return ret;
   }
+  if (stats_.allocated_bytes + rsize > limit_) {
+    Trim(rsize);
+  }
+  void *ret;
+  try {
+    ret = DeviceStorage::Alloc(rsize);
+  } catch (const dmlc::Error &) {
+    // out of memory on the device, retry without the pooled blocks
+    if (stats_.pooled_bytes == 0) throw;
+    LOG(INFO) << "Allocation of " << rsize << " bytes failed, releasing "
+              << stats_.pooled_bytes << " pooled bytes";
+    ReleasePooled();
+    ret = DeviceStorage::Alloc(rsize);
+  }
+  stats_.allocated_bytes += rsize;
+  stats_.peak_allocated_bytes = std::max(stats_.peak_allocated_bytes,
+                                         stats_.allocated_bytes);
+  return ret;
 }
 
-template <class DeviceStorage, size_t kThreshold>
-void PooledStorageManager<DeviceStorage, kThreshold>::Free(void* ptr,
-                                                           size_t size) {
+template <class DeviceStorage>
+void PooledStorageManager<DeviceStorage>::Free(void* ptr, size_t size) {
   std::lock_guard<std::mutex> lock(mutex_);
-  auto&& reuse_pool = memory_pool_[size];
-  reuse_pool.push_back(ptr);
+  const size_t rsize = RoundSize(size);
+  stats_.requested_bytes -= size;
+  stats_.pooled_bytes += rsize;
+  SizeClass &size_class = memory_pool_[rsize];
+  if (size_class.blocks.empty()) {
+    size_class.lru_pos = lru_.insert(lru_.end(), rsize);
+  } else {
+    lru_.splice(lru_.end(), lru_, size_class.lru_pos);
+  }
+  size_class.blocks.push_back(ptr);
 }
 
-template <class DeviceStorage, size_t kThreshold>
-void PooledStorageManager<DeviceStorage, kThreshold>::ReleaseAll() {
+template <class DeviceStorage>
+void PooledStorageManager<DeviceStorage>::Trim(size_t size) {
+  while (stats_.allocated_bytes + size > limit_ && !lru_.empty()) {
+    auto it = memory_pool_.find(lru_.front());
+    SizeClass &size_class = it->second;
+    DeviceStorage::Free(size_class.blocks.back());
+    size_class.blocks.pop_back();
+    stats_.allocated_bytes -= it->first;
+    stats_.pooled_bytes -= it->first;
+    ++stats_.num_released;
+    if (size_class.blocks.empty()) {
+      lru_.pop_front();
+      memory_pool_.erase(it);
+    }
+  }
+}
+
+template <class DeviceStorage>
+void PooledStorageManager<DeviceStorage>::ReleasePooled() {
   for (auto&& i : memory_pool_) {
-    for (auto&& j : i.second) {
+    for (auto&& j : i.second.blocks) {
       DeviceStorage::Free(j);
-      used_memory_ -= i.first;
+      stats_.allocated_bytes -= i.first;
+      stats_.pooled_bytes -= i.first;
+      ++stats_.num_released;
     }
   }
   memory_pool_.clear();
+  lru_.clear();
+}
+
+template <class DeviceStorage>
+void PooledStorageManager<DeviceStorage>::ReleaseAll() {
+  std::lock_guard<std::mutex> lock(mutex_);
+  ReleasePooled();
+}
+
+template <class DeviceStorage>
+Storage::Stats PooledStorageManager<DeviceStorage>::GetStats() {
+  std::lock_guard<std::mutex> lock(mutex_);
+  return stats_;
 }
 
 }  // namespace storage
@@ -4,6 +4,7 @@
 #include <mxnet/storage.h>
 #include <mshadow/tensor.h>
 #include <dmlc/logging.h>
+#include <dmlc/parameter.h>
 #include <array>
 #include "./storage_manager.h"
 #include "./naive_storage_manager.h"
@@ -21,17 +22,17 @@ class StorageImpl : public Storage {
  public:
   Handle Alloc(size_t size, Context ctx) override;
   void Free(Handle handle) override;
+  Stats GetStats(Context ctx) override;
+  void ReleaseAll(Context ctx) override;
   StorageImpl() {}
   virtual ~StorageImpl() = default;
 
  private:
-  static constexpr size_t kPoolThreshold = 4096 * 1024 * 1024ul;
   static constexpr size_t kMaxNumberOfDevices = Context::kMaxDevType + 1;
   static constexpr size_t kMaxNumberOfDeviceIDs = Context::kMaxDevID + 1;
 
   template <class DeviceStorage>
-  using CurrentStorageManager =
-      storage::PooledStorageManager<DeviceStorage, kPoolThreshold>;
+  using CurrentStorageManager = storage::PooledStorageManager<DeviceStorage>;
 
   static void ActivateDevice(Context ctx) {
     switch (ctx.dev_type) {
@@ -48,37 +49,42 @@ class StorageImpl : public Storage {
         LOG(FATAL) << "Unimplemented device";
     }
   }
-  // internal storage managers
-  std::array<common::LazyAllocArray<storage::StorageManager>,
-             kMaxNumberOfDevices> storage_managers_;
-};  // struct Storage::Impl
-
-Storage::Handle StorageImpl::Alloc(size_t size, Context ctx) {
-  // space already recycled, ignore request
-  Handle hd;
-  hd.ctx = ctx;
-  hd.size = size;
-  auto&& device = storage_managers_.at(ctx.dev_type);
-  storage::StorageManager *manager = device.Get(
-      ctx.dev_id, [ctx]() {
+  // get the storage manager of a device, created on first use
+  storage::StorageManager *GetManager(Context ctx) {
+    auto&& device = storage_managers_.at(ctx.dev_type);
+    return device.Get(ctx.dev_id, [ctx]() {
+        // bytes of a device kept allocated before pooled blocks are released
+        const size_t limit = dmlc::GetEnv("MXNET_STORAGE_POOL_LIMIT_MB", 4096) * 1024 * 1024ul;
         storage::StorageManager *ptr = nullptr;
         switch (ctx.dev_type) {
           case Context::kCPU: {
-            ptr = new CurrentStorageManager<storage::CPUDeviceStorage>();
+            ptr = new CurrentStorageManager<storage::CPUDeviceStorage>(limit);
             break;
           }
           case Context::kCPUPinned: {
-            ptr = new CurrentStorageManager<storage::PinnedMemoryStorage>();
+            ptr = new CurrentStorageManager<storage::PinnedMemoryStorage>(limit);
             break;
           }
           case Context::kGPU: {
-            ptr = new CurrentStorageManager<storage::GPUDeviceStorage>();
+            ptr = new CurrentStorageManager<storage::GPUDeviceStorage>(limit);
             break;
           }
           default: LOG(FATAL) <<  "Unimplemented device " << ctx.dev_type;
         }
         return ptr;
       });
+  }
+  // internal storage managers
+  std::array<common::LazyAllocArray<storage::StorageManager>,
+             kMaxNumberOfDevices> storage_managers_;
+};  // struct Storage::Impl
+
+Storage::Handle StorageImpl::Alloc(size_t size, Context ctx) {
+  // space already recycled, ignore request
+  Handle hd;
+  hd.ctx = ctx;
+  hd.size = size;
+  storage::StorageManager *manager = this->GetManager(ctx);
   this->ActivateDevice(ctx);
   hd.dptr = manager->Alloc(size);
   return hd;
@@ -96,6 +102,16 @@ void StorageImpl::Free(Storage::Handle handle) {
   maneger->Free(handle.dptr, handle.size);
 }
 
+Storage::Stats StorageImpl::GetStats(Context ctx) {
+  return this->GetManager(ctx)->GetStats();
+}
+
+void StorageImpl::ReleaseAll(Context ctx) {
+  storage::StorageManager *manager = this->GetManager(ctx);
+  this->ActivateDevice(ctx);
+  manager->ReleaseAll();
+}
+
 std::shared_ptr<Storage> Storage::_GetSharedRef() {
 #ifdef __MXNET_JS__
   // dummy code needed for emscripten code to pass
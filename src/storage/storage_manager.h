@@ -6,6 +6,7 @@
 #ifndef MXNET_STORAGE_STORAGE_MANAGER_H_
 #define MXNET_STORAGE_STORAGE_MANAGER_H_
 
+#include <mxnet/storage.h>
 #include <cstddef>
 
 namespace mxnet {
@@ -28,6 +29,17 @@ class StorageManager {
    * \param size Size of the storage.
    */
   virtual void Free(void* ptr, size_t size) = 0;
+  /*!
+   * \brief Release the storage kept for reuse, if any.
+   */
+  virtual void ReleaseAll() {}
+  /*!
+   * \brief Statistics of the storage.
+   * \return the statistics, all zero if not tracked.
+   */
+  virtual Storage::Stats GetStats() {
+    return Storage::Stats();
+  }
   /*!
    * \brief Destructor.
    */
@@ -9,10 +9,25 @@
 #include <memory>
 #include <map>
 #include <set>
+#include <sstream>
+#include <string>
 #include "./graph_executor.h"
 #include "./graph_algorithm.h"
+#include "../engine/profiler.h"
 
 namespace mxnet {
+namespace {
+// escape a string for a json literal
+inline std::string JSONEscape(const std::string &str) {
+  std::string ret;
+  for (char c : str) {
+    if (c == '"' || c == '\\') ret += '\\';
+    ret += c;
+  }
+  return ret;
+}
+}  // namespace
+
 /*!
  * \brief wrapper class that wraps Backward operation as Forward.
  */
@@ -244,6 +259,13 @@ GraphExecutor::GetOpExecEntry(uint32_t nid) {
     if (is_async) {
       op_ctx_ptr->async_on_complete = on_complete;
     }
+    if (engine::Profiler::Get()->IsRunning()) {
+      size_t nbytes = 0;
+      for (const TBlob &b : in_data) nbytes += b.shape_.Size();
+      for (const TBlob &b : out_data) nbytes += b.shape_.Size();
+      for (const TBlob &b : aux_data) nbytes += b.shape_.Size();
+      engine::Profiler::AddMemory(nbytes * sizeof(real_t));
+    }
     op->Forward(*op_ctx_ptr, in_data, req, out_data, aux_data);
     // call on complete only if it is async op
     if (!is_async) {
@@ -582,7 +604,7 @@ void GraphExecutor::InitDataEntryInfo(const std::vector<NDArray> &in_args,
   }
 }
 
-void GraphExecutor::InitDataEntryMemory() {
+void GraphExecutor::PlanDataEntryMemory(GraphStorageAllocator *allocator) {
   // setup the temp ref counter for allocator algorithms
   for (OpNode &op : op_nodes_) {
     for (DataEntryInfo &node : op.outputs) {
@@ -590,8 +612,6 @@ void GraphExecutor::InitDataEntryMemory() {
     }
   }
 
-  // use allocator to allocate memory.
-  GraphStorageAllocator allocator(&graph_, topo_order_, shared_mem_);
   for (size_t i = 0; i < topo_order_.size(); ++i) {
     uint32_t nid = topo_order_[i];
     if (!op_nodes_[nid].activated) continue;
@@ -637,7 +657,7 @@ void GraphExecutor::InitDataEntryMemory() {
         out->op_req = kWriteTo;
       }
       if (out->type == kNotInitialized) {
-        out->storage_id = allocator.Request(
+        out->storage_id = allocator->Request(
             op_nodes_[nid].ctx, out->type_flag, out->shape, nid);
         out->type = kInternalAllocated;
       }
@@ -652,17 +672,32 @@ void GraphExecutor::InitDataEntryMemory() {
       // if we decrease it to zero, means we are ready to relase
       --in->temp_ref_count;
       if (in->temp_ref_count == 0 && in->type == kInternalAllocated) {
-        allocator.Release(in->storage_id, nid);
+        allocator->Release(in->storage_id, nid);
       }
     }
     // check out again, if there is temp_ref_count == 0, release it
     for (DataEntryInfo *out : out_data) {
       if (out->temp_ref_count == 0 && out->type == kInternalAllocated) {
-        allocator.Release(out->storage_id, nid);
+        allocator->Release(out->storage_id, nid);
       }
     }
   }
-  // one pass complete, allocate real memory
+  // one pass complete, get the final storage of each entry
+  allocator->Finalize();
+  for (OpNode &op : op_nodes_) {
+    for (DataEntryInfo &out : op.outputs) {
+      if (out.type == kInternalAllocated) {
+        out.storage_id = allocator->Resolve(out.storage_id);
+      }
+    }
+  }
+}
+
+void GraphExecutor::InitDataEntryMemory() {
+  // use allocator to allocate memory.
+  GraphStorageAllocator allocator(&graph_, topo_order_, shared_mem_, memory_strategy_);
+  this->PlanDataEntryMemory(&allocator);
+  // allocate real memory
   this->total_allocated_bytes_ = allocator.InitStorages();
   // get the real data NDArray into the DataEntryInfo
   for (size_t i = 0; i < topo_order_.size(); ++i) {
@@ -748,11 +783,13 @@ void GraphExecutor::InitOpNodes() {
     OpNode& op_node = op_nodes_[nid];
     if (graph_.nodes[nid].is_forward()) {
       op_node.op.reset(graph_.nodes[nid].op->CreateOperator(op_node.ctx));
+      op_node.opr_name = graph_.nodes[nid].name;
     } else {
       CHECK(graph_.nodes[nid].is_backward());
       op_node.op.reset(new BackwardOpWrapper(
           graph_.nodes[graph_.nodes[nid].backward_source_id].op.get(),
           op_nodes_[graph_.nodes[nid].backward_source_id].op));
+      op_node.opr_name = graph_.nodes[graph_.nodes[nid].backward_source_id].name + "_backward";
     }
     bool allow_cache = true;
     for (StaticGraph::DataEntry e : graph_.nodes[nid].inputs) {
@@ -768,7 +805,8 @@ void GraphExecutor::InitOpNodes() {
           op_node.cached_exec.exec_fun,
           op_node.cached_exec.use_vars,
           op_node.cached_exec.mutate_vars,
-          FnProperty::kNormal);
+          FnProperty::kNormal,
+          op_node.opr_name.c_str());
     }
   }
 }
@@ -798,7 +836,9 @@ void GraphExecutor::RunOps(bool is_train, size_t topo_start, size_t topo_end) {
           opnode.ctx,
           exec.use_vars,
           exec.mutate_vars,
-          FnProperty::kNormal);
+          FnProperty::kNormal,
+          0,
+          opnode.opr_name.c_str());
     }
     if (monitor_callback_) {
       std::vector<std::string> output_names;
@@ -853,6 +893,86 @@ void GraphExecutor::Print(std::ostream &os) const {
   os << "Total " << total_allocated_temp_ <<" TempSpace resource requested\n";
 }
 
+void GraphExecutor::WriteMemoryPlan(const GraphStorageAllocator &allocator,
+                                    size_t external_bytes,
+                                    std::ostream &os) const {  // NOLINT(*)
+  auto ctx_str = [](const Context &ctx) {
+    std::ostringstream ss;
+    ss << (ctx.dev_mask() == cpu::kDevMask ? "cpu" : "gpu") << '(' << ctx.dev_id << ')';
+    return ss.str();
+  };
+  size_t internal_bytes = 0, unshared_bytes = 0;
+  os << "{\"storages\": [";
+  for (size_t i = 0; i < allocator.NumStorages(); ++i) {
+    GraphStorageAllocator::StorageID id = static_cast<GraphStorageAllocator::StorageID>(i);
+    size_t bytes = allocator.StorageBytes(id);
+    internal_bytes += bytes;
+    os << (i == 0 ? "" : ", ") << "{\"id\": " << id << ", \"bytes\": " << bytes
+       << ", \"ctx\": \"" << ctx_str(allocator.StorageContext(id)) << "\"}";
+  }
+  os << "], \"entries\": [";
+  bool first = true;
+  for (uint32_t nid : topo_order_) {
+    if (!op_nodes_[nid].activated) continue;
+    for (size_t j = 0; j < op_nodes_[nid].outputs.size(); ++j) {
+      const DataEntryInfo &info = op_nodes_[nid].outputs[j];
+      if (info.type != kInternalAllocated) continue;
+      size_t bytes = info.shape.Size() * mshadow::mshadow_sizeof(info.type_flag);
+      unshared_bytes += bytes;
+      os << (first ? "" : ", ") << "{\"node\": \"" << JSONEscape(graph_.nodes[nid].name)
+         << "\", \"output\": " << j << ", \"shape\": [";
+      for (index_t k = 0; k < info.shape.ndim(); ++k) {
+        os << (k == 0 ? "" : ", ") << info.shape[k];
+      }
+      os << "], \"bytes\": " << bytes << ", \"storage_id\": " << info.storage_id
+         << ", \"inplace\": " << (info.op_req == kWriteInplace ? "true" : "false") << '}';
+      first = false;
+    }
+  }
+  os << "], \"strategy\": \"" << GraphStorageAllocator::StrategyName(memory_strategy_) << '"'
+     << ", \"internal_bytes\": " << internal_bytes
+     << ", \"unshared_bytes\": " << unshared_bytes
+     << ", \"external_bytes\": " << external_bytes
+     << ", \"peak_bytes\": " << internal_bytes + external_bytes << '}';
+}
+
+std::string GraphExecutor::PlanMemory(Symbol symbol,
+                                      const Context& default_ctx,
+                                      const std::map<std::string, Context>& ctx_map,
+                                      const std::vector<NDArray> &in_args,
+                                      const std::vector<NDArray> &arg_grad_store,
+                                      const std::vector<OpReqType> &grad_req_type,
+                                      const std::vector<NDArray> &aux_states,
+                                      GraphStorageAllocator::Strategy strategy) {
+  enable_inplace_allocation_ = dmlc::GetEnv("MXNET_EXEC_ENABLE_INPLACE", true);
+  memory_strategy_ = strategy;
+  shared_mem_ = std::make_shared<GraphStoragePool>();
+  CHECK_EQ(grad_req_type.size(), arg_grad_store.size());
+  bool need_backward = false;
+  size_t external_bytes = 0;
+  for (size_t i = 0; i < grad_req_type.size(); ++i) {
+    if (grad_req_type[i] == kNullOp) continue;
+    need_backward = true;
+    external_bytes += arg_grad_store[i].shape().Size() *
+        mshadow::mshadow_sizeof(arg_grad_store[i].dtype());
+  }
+  for (const NDArray &arr : in_args) {
+    external_bytes += arr.shape().Size() * mshadow::mshadow_sizeof(arr.dtype());
+  }
+  for (const NDArray &arr : aux_states) {
+    external_bytes += arr.shape().Size() * mshadow::mshadow_sizeof(arr.dtype());
+  }
+  this->InitGraph(symbol, default_ctx, ctx_map,
+                  in_args, arg_grad_store, grad_req_type,
+                  need_backward);
+  this->InitDataEntryInfo(in_args, arg_grad_store, grad_req_type, aux_states);
+  GraphStorageAllocator allocator(&graph_, topo_order_, shared_mem_, memory_strategy_);
+  this->PlanDataEntryMemory(&allocator);
+  std::ostringstream os;
+  this->WriteMemoryPlan(allocator, external_bytes, os);
+  return os.str();
+}
+
 void GraphExecutor::Forward(bool is_train) {
   RunOps(is_train, 0, num_forward_nodes_);
 }
@@ -906,4 +1026,18 @@ Executor *Executor::Bind(Symbol symbol,
              in_args, arg_grad_store, grad_req_type, aux_states, shared_exec);
   return exec;
 }
+
+std::string Executor::PlanMemory(Symbol symbol,
+                                 const Context& default_ctx,
+                                 const std::map<std::string, Context>& group2ctx,
+                                 const std::vector<NDArray> &in_args,
+                                 const std::vector<NDArray> &arg_grad_store,
+                                 const std::vector<OpReqType> &grad_req_type,
+                                 const std::vector<NDArray> &aux_states,
+                                 const std::string &strategy) {
+  GraphExecutor exec;
+  return exec.PlanMemory(symbol, default_ctx, group2ctx,
+                         in_args, arg_grad_store, grad_req_type, aux_states,
+                         GraphStorageAllocator::GetStrategy(strategy));
+}
 }  // namespace mxnet
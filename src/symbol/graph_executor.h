@@ -46,6 +46,8 @@ class GraphExecutor : public Executor {
                    const std::vector<NDArray> &aux_states,
                    Executor* shared_exec = nullptr) {
     enable_inplace_allocation_ = dmlc::GetEnv("MXNET_EXEC_ENABLE_INPLACE", true);
+    memory_strategy_ = GraphStorageAllocator::GetStrategy(
+        dmlc::GetEnv("MXNET_EXEC_MEMORY_STRATEGY", std::string("best_fit")));
     if (shared_exec != NULL) {
       GraphExecutor* gexec = dynamic_cast<GraphExecutor*>(shared_exec);
       CHECK(gexec) << "Input executor for sharing memory must have GraphExecutor type.";
@@ -67,6 +69,15 @@ class GraphExecutor : public Executor {
     this->InitResources();
     this->InitOpNodes();
   }
+  // implement Executor::PlanMemory, only call it once, instead of Init.
+  std::string PlanMemory(Symbol symbol,
+                         const Context& default_ctx,
+                         const std::map<std::string, Context>& ctx_map,
+                         const std::vector<NDArray> &in_args,
+                         const std::vector<NDArray> &arg_grad_store,
+                         const std::vector<OpReqType> &grad_req_type,
+                         const std::vector<NDArray> &aux_states,
+                         GraphStorageAllocator::Strategy strategy);
 
  protected:
   // internal class of wrapping BackwardOp as ForwardOp
@@ -139,6 +150,8 @@ class GraphExecutor : public Executor {
     std::shared_ptr<Operator> op;
     // op context, that is defined for this op.
     OpContext op_ctx;
+    // name of the operator shown by the profiler
+    std::string opr_name;
     // executor, this is only allocated for nodes
     // whose inputs, outputs are pre-defined.
     // otherwise cached_exec.exec_fun == nullptr
@@ -204,8 +217,14 @@ class GraphExecutor : public Executor {
                          const std::vector<NDArray> &arg_grad_store,
                          const std::vector<OpReqType> &grad_req_type,
                          const std::vector<NDArray> &aux_states);
+  // assign the storage of internal data entries, without allocating it
+  void PlanDataEntryMemory(GraphStorageAllocator *allocator);
   // initialize internal data entries NDArray
   void InitDataEntryMemory();
+  // write the memory plan as json
+  void WriteMemoryPlan(const GraphStorageAllocator &allocator,
+                       size_t external_bytes,
+                       std::ostream &os) const;  // NOLINT(*)
   // initialize the internal resources for each op
   void InitResources();
   // initialize OpNode data structure
@@ -226,6 +245,8 @@ class GraphExecutor : public Executor {
   std::vector<uint32_t> topo_order_;
   // whether to enable inplace space
   bool enable_inplace_allocation_;
+  // strategy of the memory planning
+  GraphStorageAllocator::Strategy memory_strategy_;
   // total allocated space in bytes
   size_t total_allocated_bytes_;
   // total allocated temp space
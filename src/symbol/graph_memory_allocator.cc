@@ -3,17 +3,37 @@
  * \file graph_memory_allocator.cc
  * \brief Memory allocator for graph executor.
 */
+#include <limits>
 #include "graph_memory_allocator.h"
 
 namespace mxnet {
 const uint32_t GraphStorageAllocator::kDummyColor = 1 << 31;
 
+GraphStorageAllocator::Strategy
+GraphStorageAllocator::GetStrategy(const std::string &name) {
+  if (name == "best_fit") return kBestFit;
+  if (name == "greedy_lifetime") return kGreedyLifetime;
+  LOG(FATAL) << "Unknown memory planning strategy " << name
+             << ", expect best_fit or greedy_lifetime";
+  return kBestFit;
+}
+
+const char *GraphStorageAllocator::StrategyName(Strategy strategy) {
+  return strategy == kGreedyLifetime ? "greedy_lifetime" : "best_fit";
+}
+
 GraphStorageAllocator::GraphStorageAllocator(
     StaticGraph *graph,
     const std::vector<uint32_t>& topo_order,
-    std::shared_ptr<GraphStoragePool> shared_mem) noexcept(false)
-    : graph_(graph) , num_match_color_(0), shared_mem_(shared_mem) {
+    std::shared_ptr<GraphStoragePool> shared_mem,
+    Strategy strategy) noexcept(false)
+    : graph_(graph) , num_match_color_(0), shared_mem_(shared_mem),
+      strategy_(strategy), finalized_(false) {
   match_range_ = dmlc::GetEnv("MXNET_EXEC_MATCH_RANGE", 16);
+  node_pos_.resize(graph_->nodes.size(), 0);
+  for (size_t i = 0; i < topo_order.size(); ++i) {
+    node_pos_[topo_order[i]] = static_cast<uint32_t>(i);
+  }
   // if we set this to 1, this means no color based match.
   // color based match will cost a bit more memory usually
   // but also enables more parallelization.
@@ -68,8 +88,22 @@ GraphStorageAllocator::Alloc(Context ctx, int type_flag, size_t size) {
 
 GraphStorageAllocator::StorageID
 GraphStorageAllocator::Request(Context ctx, int type_flag, TShape shape, uint32_t node_id) {
-  // search memory block in [size / match_range_, size * match_range_)
+  CHECK(!finalized_) << "Request after Finalize";
   size_t size = shape.Size();
+  if (strategy_ == kGreedyLifetime) {
+    // only record the request, storages are assigned in Finalize
+    RequestEntry req;
+    req.ctx = ctx;
+    req.type_flag = type_flag;
+    req.size = size;
+    req.node_id = node_id;
+    req.begin = node_pos_[node_id];
+    req.end = std::numeric_limits<uint32_t>::max();
+    req.storage_id = kBadStorageID;
+    requests_.push_back(req);
+    return static_cast<StorageID>(requests_.size() - 1);
+  }
+  // search memory block in [size / match_range_, size * match_range_)
   if (match_range_ == 0) return this->Alloc(ctx, type_flag, size);
   auto begin = free_.lower_bound(size / match_range_);
   auto mid = free_.lower_bound(size);
@@ -80,8 +114,7 @@ GraphStorageAllocator::Request(Context ctx, int type_flag, TShape shape, uint32_
     StorageEntry *e = it->second;
     if (e->ctx != ctx) continue;
     if (e->type_flag != type_flag) continue;
-    if (node_color_[e->released_by_node] != kDummyColor
-        && node_color_[e->released_by_node] != node_color_[node_id]) continue;
+    if (!MatchColor(e, node_id)) continue;
     if (!e->data.is_none() && size > e->max_size) continue;
     // Use exect matching strategy
     e->max_size = std::max(size, e->max_size);
@@ -95,8 +128,7 @@ GraphStorageAllocator::Request(Context ctx, int type_flag, TShape shape, uint32_
     StorageEntry *e = it->second;
     if (e->ctx != ctx) continue;
     if (e->type_flag != type_flag) continue;
-    if (node_color_[e->released_by_node] != kDummyColor
-        && node_color_[e->released_by_node] != node_color_[node_id]) continue;
+    if (!MatchColor(e, node_id)) continue;
     if (!e->data.is_none() && size > e->max_size) continue;
     // Use exect matching strategy
     e->max_size = std::max(size, e->max_size);
@@ -110,12 +142,73 @@ GraphStorageAllocator::Request(Context ctx, int type_flag, TShape shape, uint32_
 
 void GraphStorageAllocator::Release(StorageID id, uint32_t node_id) {
   CHECK_NE(id, kBadStorageID);
+  if (strategy_ == kGreedyLifetime) {
+    requests_[id].end = node_pos_[node_id];
+    return;
+  }
   StorageEntry *e = data_[id].get();
   e->released_by_node = node_id;
   free_.insert({e->max_size, e});
 }
 
+void GraphStorageAllocator::Finalize() {
+  CHECK(!finalized_) << "Finalize can only be called once";
+  if (strategy_ == kGreedyLifetime) this->AssignByLifetime();
+  finalized_ = true;
+}
+
+void GraphStorageAllocator::AssignByLifetime() {
+  // place the largest requests first, the storages created for them
+  // are then large enough for all the requests that come later.
+  std::vector<size_t> order(requests_.size());
+  for (size_t i = 0; i < order.size(); ++i) order[i] = i;
+  std::stable_sort(order.begin(), order.end(), [this](size_t a, size_t b) {
+      return requests_[a].size > requests_[b].size;
+    });
+  for (size_t i : order) {
+    RequestEntry &req = requests_[i];
+    StorageEntry *best = nullptr;
+    for (size_t j = 0; j < data_.size() && match_range_ != 0; ++j) {
+      StorageEntry *e = data_[j].get();
+      if (e->ctx != req.ctx) continue;
+      if (e->type_flag != req.type_flag) continue;
+      if (!MatchColor(e, req.node_id)) continue;
+      if (req.size > e->max_size) continue;
+      bool in_use = false;
+      for (const std::pair<uint32_t, uint32_t> &t : e->lifetimes) {
+        // a storage released by a node cannot be used by the outputs of that node
+        if (t.first <= req.end && req.begin <= t.second) {
+          in_use = true; break;
+        }
+      }
+      if (in_use) continue;
+      // the smallest storage that fits
+      if (best == nullptr || e->max_size < best->max_size) best = e;
+    }
+    if (best == nullptr) {
+      best = data_[this->Alloc(req.ctx, req.type_flag, req.size)].get();
+    }
+    // later requests must match the color of the first user
+    if (best->lifetimes.empty()) best->released_by_node = req.node_id;
+    best->lifetimes.push_back(std::make_pair(req.begin, req.end));
+    req.storage_id = best->id;
+  }
+}
+
+GraphStorageAllocator::StorageID GraphStorageAllocator::Resolve(StorageID id) const {
+  CHECK(finalized_) << "Resolve before Finalize";
+  CHECK_NE(id, kBadStorageID);
+  if (strategy_ == kGreedyLifetime) return requests_[id].storage_id;
+  return id;
+}
+
+size_t GraphStorageAllocator::StorageBytes(StorageID id) const {
+  const StorageEntry *e = data_[id].get();
+  return e->max_size * mshadow::mshadow_sizeof(e->type_flag);
+}
+
 size_t GraphStorageAllocator::InitStorages() {
+  CHECK(finalized_) << "InitStorages before Finalize";
   size_t total = 0;
   for (size_t i = 0; i < data_.size(); ++i) {
     StorageEntry *e = data_[i].get();
@@ -9,7 +9,9 @@
 #include <mxnet/symbolic.h>
 #include <mxnet/ndarray.h>
 #include <map>
+#include <string>
 #include <vector>
+#include <utility>
 #include <algorithm>
 #include "./static_graph.h"
 #include "./graph_algorithm.h"
@@ -33,9 +35,16 @@ struct GraphStoragePool {
  *      to request and release resources according to dependency.
  *      - Each call to Request will get a ResourceID that is used to
  *        identify the memory block assigned to each DataEntryInfo.
- *  (2) Allocating phase: GraphExecutor call InitMemory.
+ *  (2) Allocating phase: GraphExecutor call Finalize, then InitStorages.
  *      - Then each DataEntry will call Get to get the real NDArray.
  *  (3) All the memory will be freed up when reference to all the related NDArray ends.
+ *
+ *  Two planning strategies are available:
+ *  - kBestFit assigns the storage when it is requested, reusing the released
+ *    storage whose size is the closest to the request.
+ *  - kGreedyLifetime records the lifetime of every request first, then assigns
+ *    the largest requests first to any storage not in use during their lifetime.
+ *    The storage ids returned by Request are only final after Finalize.
  */
 class GraphStorageAllocator {
  public:
@@ -45,11 +54,24 @@ class GraphStorageAllocator {
   static const StorageID kBadStorageID = -1;
   /*! \brief dummy color for shared mem */
   static const uint32_t kDummyColor;
+  /*! \brief planning strategy */
+  enum Strategy {
+    kBestFit,
+    kGreedyLifetime
+  };
+  /*!
+   * \brief get a strategy by name.
+   * \param name "best_fit" or "greedy_lifetime".
+   */
+  static Strategy GetStrategy(const std::string &name);
+  /*! \brief get the name of a strategy */
+  static const char *StrategyName(Strategy strategy);
   /*! \brief constructor to the graph memory allocator */
   explicit GraphStorageAllocator(
       StaticGraph *graph,
       const std::vector<uint32_t>& topo_order,
-      std::shared_ptr<GraphStoragePool> shared_mem) noexcept(false);
+      std::shared_ptr<GraphStoragePool> shared_mem,
+      Strategy strategy = kBestFit) noexcept(false);
   /*!
    * \brief Request a memory.
    * \param ctx the context of the graph
@@ -63,6 +85,25 @@ class GraphStorageAllocator {
    * \param node_id the node id in the graph that is releasing the memory.
    */
   void Release(StorageID id, uint32_t node_id);
+  /*!
+   * \brief Finish the planning phase, must be called after the last Release.
+   */
+  void Finalize();
+  /*!
+   * \brief Get the final storage of a storage id returned by Request.
+   * \param id the storage id returned by Request.
+   */
+  StorageID Resolve(StorageID id) const;
+  /*! \return number of storages, including those of the shared pool */
+  size_t NumStorages() const {
+    return data_.size();
+  }
+  /*! \return size in bytes of a storage */
+  size_t StorageBytes(StorageID id) const;
+  /*! \return context of a storage */
+  Context StorageContext(StorageID id) const {
+    return data_[id]->ctx;
+  }
   /*!
    * \brief Initialize all the memories requested
    * \return size of memory allocated.
@@ -70,7 +111,7 @@ class GraphStorageAllocator {
   size_t InitStorages();
   /*!
    * \brief Get the the memory allocated in planning phase.
-   * \param id the storage id allocated in planning phase.
+   * \param id the storage id allocated in planning phase, after Resolve.
    * \param shape the shape of the NDArray requested.
    */
   NDArray Get(StorageID id, TShape shape);
@@ -90,9 +131,26 @@ class GraphStorageAllocator {
     uint32_t released_by_node;
     /*! \brief the actual NDArray to hold the data */
     NDArray data;
+    /*! \brief lifetimes assigned to the storage, used by kGreedyLifetime */
+    std::vector<std::pair<uint32_t, uint32_t> > lifetimes;
     /*! \brief constructor */
     StorageEntry() : max_size(0), released_by_node(0) {}
   };
+  /*! \brief a request recorded by kGreedyLifetime */
+  struct RequestEntry {
+    /*! \brief the context of the request */
+    Context ctx;
+    /*! \brief the data type enum of the request */
+    int type_flag;
+    /*! \brief number of elements requested */
+    size_t size;
+    /*! \brief node that requested it */
+    uint32_t node_id;
+    /*! \brief topological positions of the request and the last release */
+    uint32_t begin, end;
+    /*! \brief storage assigned by Finalize */
+    StorageID storage_id;
+  };
   /*!
    * \brief Allocate a StorageID when Request cannot found existing ones.
    * \param ctx the context of the graph
@@ -104,6 +162,13 @@ class GraphStorageAllocator {
    * \param topo_order the topological order in the graph.
    */
   void InitColor(const std::vector<uint32_t> &topo_order);
+  /*! \brief whether a storage can be used by a node, according to colors */
+  inline bool MatchColor(const StorageEntry *e, uint32_t node_id) const {
+    return node_color_[e->released_by_node] == kDummyColor ||
+        node_color_[e->released_by_node] == node_color_[node_id];
+  }
+  /*! \brief assign the recorded requests to storages, kGreedyLifetime */
+  void AssignByLifetime();
   /*! \brief reference to the computation graph */
   StaticGraph *graph_;
   /*! \brief all the resources available */
@@ -122,6 +187,14 @@ class GraphStorageAllocator {
   uint32_t num_match_color_;
   /*! \brief shared memory pool */
   std::shared_ptr<GraphStoragePool> shared_mem_;
+  /*! \brief the planning strategy */
+  Strategy strategy_;
+  /*! \brief position of each node in the topological order */
+  std::vector<uint32_t> node_pos_;
+  /*! \brief requests recorded by kGreedyLifetime */
+  std::vector<RequestEntry> requests_;
+  /*! \brief whether Finalize was called */
+  bool finalized_;
 };
 }  // namespace mxnet
 #endif  // MXNET_SYMBOL_GRAPH_MEMORY_ALLOCATOR_H_
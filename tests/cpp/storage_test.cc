@@ -2,6 +2,8 @@
 #include <gtest/gtest.h>
 #include <dmlc/logging.h>
 #include <mxnet/storage.h>
+#include "../../src/storage/pooled_storage_manager.h"
+#include "../../src/storage/cpu_device_storage.h"
 
 TEST(Storage, Basic_CPU) {
   constexpr size_t kSize = 1024;
@@ -34,3 +36,42 @@ TEST(Storage, Basic_GPU) {
   EXPECT_EQ(handle.dptr, ptr);
 }
 #endif  // MXNET_USE_CUDA
+
+TEST(Storage, SizeClass_CPU) {
+  typedef mxnet::storage::PooledStorageManager<mxnet::storage::CPUDeviceStorage> Manager;
+  EXPECT_EQ(Manager::RoundSize(1), 128U);
+  EXPECT_EQ(Manager::RoundSize(1000), 1024U);
+  EXPECT_EQ(Manager::RoundSize(1025), 1280U);
+  EXPECT_EQ(Manager::RoundSize(1280), 1280U);
+  Manager manager(1 << 20);
+  // blocks of sizes in the same class are reused
+  void *ptr = manager.Alloc(1100);
+  manager.Free(ptr, 1100);
+  EXPECT_EQ(manager.Alloc(1200), ptr);
+  manager.Free(ptr, 1200);
+  mxnet::Storage::Stats stats = manager.GetStats();
+  EXPECT_EQ(stats.num_alloc, 2U);
+  EXPECT_EQ(stats.num_pool_hit, 1U);
+  EXPECT_EQ(stats.allocated_bytes, 1280U);
+  EXPECT_EQ(stats.pooled_bytes, 1280U);
+  manager.ReleaseAll();
+  EXPECT_EQ(manager.GetStats().allocated_bytes, 0U);
+}
+
+TEST(Storage, Trim_CPU) {
+  typedef mxnet::storage::PooledStorageManager<mxnet::storage::CPUDeviceStorage> Manager;
+  Manager manager(4096);
+  void *a = manager.Alloc(1024);
+  void *b = manager.Alloc(2048);
+  manager.Free(a, 1024);
+  manager.Free(b, 2048);
+  // only the least recently used class is released to make room
+  void *c = manager.Alloc(1536);
+  mxnet::Storage::Stats stats = manager.GetStats();
+  EXPECT_EQ(stats.num_released, 1U);
+  EXPECT_EQ(stats.pooled_bytes, 2048U);
+  EXPECT_EQ(stats.allocated_bytes, 2048U + 1536U);
+  EXPECT_EQ(manager.Alloc(2048), b);
+  manager.Free(b, 2048);
+  manager.Free(c, 1536);
+}
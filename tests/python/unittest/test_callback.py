@@ -0,0 +1,82 @@
+# pylint: skip-file
+import gc
+import json
+import os
+import shutil
+import tempfile
+import threading
+import numpy as np
+import mxnet as mx
+from mxnet.model import BatchEndParam
+
+def run_telemetry(fmt, filename, num_batch=10):
+    telemetry = mx.callback.Telemetry(batch_size=32, frequent=5, filename=filename, fmt=fmt)
+    for i in range(num_batch):
+        batch_timing = {'data_wait': 0.001 * i, 'forward_backward': 0.01,
+                        'update': 0.005, 'metric': 0.0}
+        telemetry(BatchEndParam(epoch=0, nbatch=i + 1, eval_metric=None, locals=locals()))
+
+def test_telemetry_json():
+    fd, fname = tempfile.mkstemp()
+    os.close(fd)
+    try:
+        run_telemetry('json', fname)
+        with open(fname) as fin:
+            records = [json.loads(line) for line in fin]
+        assert len(records) == 2
+        assert records[1]['nbatch'] == 10
+        phases = records[0]['phases']
+        assert abs(phases['forward_backward']['p99'] - 0.01) < 1e-9
+        assert phases['data_wait']['p50'] <= phases['data_wait']['p95'] <= phases['data_wait']['p99']
+    finally:
+        os.remove(fname)
+
+def test_telemetry_prometheus():
+    fd, fname = tempfile.mkstemp()
+    os.close(fd)
+    try:
+        run_telemetry('prometheus', fname)
+        with open(fname) as fin:
+            text = fin.read()
+        assert 'mxnet_train_phase_seconds{phase="update",quantile="0.95"} 0.005' in text
+        assert 'mxnet_train_samples_per_second' in text
+    finally:
+        os.remove(fname)
+
+def test_async_checkpoint():
+    num_threads = threading.active_count()
+    tmpdir = tempfile.mkdtemp()
+    try:
+        prefix = os.path.join(tmpdir, 'model')
+        net = mx.symbol.FullyConnected(mx.symbol.Variable('data'), name='fc', num_hidden=4)
+        arg = {'fc_weight': mx.nd.array(np.random.uniform(size=(4, 3))),
+               'fc_bias': mx.nd.zeros((4,))}
+        ckpt = mx.callback.AsyncCheckpoint(prefix, delta=True)
+        ckpt(0, net, arg, {})
+        arg['fc_weight'][:] = 1
+        ckpt(1, net, arg, {})
+        ckpt.close()
+        ckpt.close()
+        assert threading.active_count() == num_threads
+        with open(prefix + '-0002.params.json') as fin:
+            manifest = json.load(fin)['arrays']
+        assert manifest['arg:fc_bias'] == 'model-0001.params'
+        assert manifest['arg:fc_weight'] == 'model-0002.params'
+        _, arg2, aux2 = mx.model.load_checkpoint(prefix, 2)
+        assert len(aux2) == 0
+        for name, value in arg.items():
+            assert np.sum(arg2[name].asnumpy() != value.asnumpy()) == 0
+        # a dropped checkpoint writes the pending one and stops its thread
+        ckpt = mx.callback.AsyncCheckpoint(prefix)
+        ckpt(2, net, arg, {})
+        del ckpt
+        gc.collect()
+        assert threading.active_count() == num_threads
+        assert os.path.exists(prefix + '-0003.params')
+    finally:
+        shutil.rmtree(tmpdir)
+
+if __name__ == '__main__':
+    test_telemetry_json()
+    test_telemetry_prometheus()
+    test_async_checkpoint()
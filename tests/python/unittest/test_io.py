@@ -2,6 +2,8 @@
 import mxnet as mx
 import numpy as np
 import os, gzip
+import shutil
+import tempfile
 import pickle as pickle
 import time
 import sys
@@ -88,7 +90,84 @@ def test_NDArrayIter():
         else:
             assert(labelcount[i] == 100)
 
+def test_NDArrayIter_prefetch():
+    datas = np.random.uniform(size=(1000, 2, 2))
+    labels = np.arange(1000)
+    for last_batch_handle in ['pad', 'discard', 'roll_over']:
+        plain = mx.io.NDArrayIter(datas, labels, 128, False,
+                                  last_batch_handle=last_batch_handle)
+        pooled = mx.io.NDArrayIter(datas, labels, 128, False,
+                                   last_batch_handle=last_batch_handle,
+                                   prefetch_buffer=2)
+        for epoch in range(3):
+            nbatch = 0
+            for expect, batch in zip(plain, pooled):
+                nbatch += 1
+                assert expect.pad == batch.pad
+                assert (expect.data[0].asnumpy() == batch.data[0].asnumpy()).all()
+                assert (expect.label[0].asnumpy() == batch.label[0].asnumpy()).all()
+            assert not pooled.iter_next()
+            assert nbatch == (7 if last_batch_handle == 'discard' else 8)
+            plain.reset()
+            pooled.reset()
+
+def test_NDArrayIter_shuffle():
+    datas = np.arange(1000).reshape((1000, 1)).astype('float32')
+    labels = np.arange(1000)
+    for prefetch_buffer in [0, 2]:
+        dataiter = mx.io.NDArrayIter(datas, labels, 100, True,
+                                     prefetch_buffer=prefetch_buffer)
+        orders = []
+        for epoch in range(2):
+            order = []
+            for batch in dataiter:
+                label = batch.label[0].asnumpy()
+                assert (batch.data[0].asnumpy().flatten() == label).all()
+                order.append(label)
+            order = np.concatenate(order)
+            assert (np.sort(order) == labels).all()
+            orders.append(order)
+            dataiter.reset()
+        # a new permutation is drawn on reset
+        assert (orders[0] != orders[1]).any()
+        # the original arrays are not copied
+        assert dataiter.data_list[0] is datas
+
+def test_RecordIOImageIter():
+    if not mx.recordio.opencv_available:
+        return
+    tmpdir = tempfile.mkdtemp()
+    try:
+        fname = os.path.join(tmpdir, 'test_image_iter.rec')
+        record = mx.recordio.MXRecordIO(fname, 'w')
+        images = [np.random.randint(0, 255, size=(8, 8, 3)).astype(np.uint8) for i in range(10)]
+        for i, img in enumerate(images):
+            header = mx.recordio.IRHeader(0, float(i), i, 0)
+            record.write(mx.recordio.pack_img(header, img, img_fmt='.png'))
+        record.close()
+        dataiter = mx.io.RecordIOImageIter(fname, (3, 8, 8), 4, mean_r=128, mean_g=128,
+                                           mean_b=128, num_workers=2, prefetch_buffer=2)
+        for epoch in range(2):
+            pads = []
+            for nbatch, batch in enumerate(dataiter):
+                data = batch.data[0].asnumpy()
+                label = batch.label[0].asnumpy()
+                for i in range(4 - batch.pad):
+                    idx = nbatch * 4 + i
+                    assert label[i] == idx
+                    expect = images[idx][:, :, ::-1].transpose(2, 0, 1) - 128.0
+                    assert (data[i] == expect).all()
+                pads.append(batch.pad)
+            assert pads == [0, 0, 2]
+            dataiter.reset()
+        del dataiter
+    finally:
+        shutil.rmtree(tmpdir)
+
 if __name__ == "__main__":
     test_NDArrayIter()
+    test_NDArrayIter_prefetch()
+    test_NDArrayIter_shuffle()
+    test_RecordIOImageIter()
     test_MNISTIter()
     test_Cifar10Rec()
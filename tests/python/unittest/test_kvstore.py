@@ -111,6 +111,55 @@ def test_updater(dev = 'cpu'):
         for v in vv:
             check_diff_to_scalar(v, num_devs * num_push)
 
+def test_bucket():
+    """small keys packed into buckets"""
+    kv = mx.kv.create()
+    kv.set_bucket_size(40)
+    bkeys = [1, 2, 3, 4]
+    shapes = [(2, 3), (4,), (5, 5), (3, 2)]
+    kv.init(bkeys, [mx.nd.ones(s) * k for k, s in zip(bkeys, shapes)])
+    assert len(kv._bucket_layout) == 1
+
+    num_devs = 2
+    devs = [mx.Context('cpu', i) for i in range(num_devs)]
+    vals = [[mx.nd.empty(s, d) for d in devs] for s in shapes]
+    kv.pull(bkeys, out=vals)
+    for k, vv in zip(bkeys, vals):
+        for v in vv:
+            check_diff_to_scalar(v, k)
+
+    # a bucket is sent once all of its keys are pushed
+    for k, s in zip(bkeys, shapes):
+        kv.push(k, [mx.nd.ones(s, d) * k for d in devs])
+    for k, vv in zip(bkeys, vals):
+        kv.pull(k, out=vv)
+        for v in vv:
+            check_diff_to_scalar(v, k * num_devs)
+
+    kv.push(bkeys[0], [mx.nd.ones(shapes[0], d) for d in devs])
+    try:
+        kv.pull(bkeys[0], out=vals[0])
+        assert False
+    except ValueError:
+        pass
+
+def test_bucket_updater():
+    """updater sees the unpacked keys"""
+    kv = mx.kv.create()
+    kv.set_bucket_size(100)
+    kv.init(keys, [mx.nd.zeros(shape)] * len(keys))
+    seen = []
+    def bucket_updater(key, recv, local):
+        seen.append(key)
+        local += recv * key
+    kv._set_updater(bucket_updater)
+    kv.push(keys, [mx.nd.ones(shape)] * len(keys))
+    val = [mx.nd.empty(shape) for _ in keys]
+    kv.pull(keys, out=val)
+    assert sorted(seen) == keys
+    for k, v in zip(keys, val):
+        check_diff_to_scalar(v, k)
+
 def test_get_type():
     kvtype = 'local_allreduce_cpu'
     kv = mx.kv.create(kvtype)
@@ -123,3 +172,5 @@ if __name__ == '__main__':
     test_list_kv_pair()
     test_aggregator()
     test_updater()
+    test_bucket()
+    test_bucket_updater()
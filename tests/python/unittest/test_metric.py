@@ -0,0 +1,69 @@
+# pylint: skip-file
+import gc
+import threading
+import mxnet as mx
+import numpy as np
+
+def check_metric(metric, labels, preds, expect):
+    metric.reset()
+    metric.update([mx.nd.array(l) for l in labels], [mx.nd.array(p) for p in preds])
+    name, value = metric.get()
+    assert abs(value - expect) < 1e-5, (name, value, expect)
+
+def test_metrics():
+    pred = np.random.uniform(size=(100, 4))
+    label = np.random.randint(0, 4, size=(100,))
+    check_metric(mx.metric.Accuracy(), [label, label], [pred, pred],
+                 (np.argmax(pred, axis=1) == label).mean())
+
+    pred = np.random.uniform(size=(100, 2))
+    label = np.random.randint(0, 2, size=(100,))
+    pred_label = np.argmax(pred, axis=1)
+    tp = ((pred_label == 1) & (label == 1)).sum()
+    precision = tp / float((pred_label == 1).sum())
+    recall = tp / float((label == 1).sum())
+    check_metric(mx.metric.F1(), [label], [pred],
+                 2 * precision * recall / (precision + recall))
+
+    pred = np.random.uniform(size=(100, 1))
+    label = np.random.uniform(size=(100,))
+    diff = pred.flatten() - label
+    check_metric(mx.metric.MAE(), [label], [pred], np.abs(diff).mean())
+    check_metric(mx.metric.MSE(), [label], [pred], (diff ** 2).mean())
+    check_metric(mx.metric.RMSE(), [label], [pred], np.sqrt((diff ** 2).mean()))
+    # one instance per update, whatever the number of outputs
+    check_metric(mx.metric.RMSE(), [label, label], [pred, pred],
+                 2 * np.sqrt((diff ** 2).mean()))
+
+def test_metric_precision():
+    # the sum is kept as a python float, float32 would drop the increments
+    metric = mx.metric.Accuracy()
+    metric.add_on_device(mx.nd.array([2 ** 24]))
+    for i in range(2 * metric.max_pending):
+        metric.add_on_device(mx.nd.ones((1,)))
+    metric.num_inst = 1
+    assert metric.get()[1] == 2 ** 24 + 2 * metric.max_pending
+
+def test_async_metric():
+    num_threads = threading.active_count()
+    metric = mx.metric.AsyncMetric(mx.metric.Accuracy())
+    expect = mx.metric.Accuracy()
+    for i in range(10):
+        pred = mx.nd.array(np.random.uniform(size=(20, 4)))
+        label = mx.nd.array(np.random.randint(0, 4, size=(20,)))
+        metric.update([label], [pred])
+        expect.update([label], [pred])
+    assert metric.get() == expect.get()
+    metric.close()
+    metric.close()
+    assert threading.active_count() == num_threads
+    # a dropped metric stops its thread
+    metric = mx.metric.AsyncMetric(mx.metric.Accuracy())
+    del metric
+    gc.collect()
+    assert threading.active_count() == num_threads
+
+if __name__ == '__main__':
+    test_metrics()
+    test_metric_precision()
+    test_async_metric()
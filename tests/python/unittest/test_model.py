@@ -0,0 +1,82 @@
+# pylint: skip-file
+import os
+import shutil
+import tempfile
+import numpy as np
+import mxnet as mx
+
+def get_model(**kwargs):
+    net = mx.symbol.FullyConnected(mx.symbol.Variable('data'), name='fc', num_hidden=3)
+    net = mx.symbol.SoftmaxOutput(net, name='softmax')
+    arg_params = {'fc_weight': mx.nd.array(np.random.uniform(-1, 1, (3, 5))),
+                  'fc_bias': mx.nd.array(np.random.uniform(-1, 1, (3,)))}
+    return mx.model.FeedForward(net, arg_params=arg_params, aux_params={}, **kwargs)
+
+def test_predict_cache():
+    model = get_model(numpy_batch_size=4, pred_cache_size=2)
+    x = np.random.uniform(size=(10, 5))
+    out = model.predict(x)
+    fc = np.dot(x, model.arg_params['fc_weight'].asnumpy().T) + model.arg_params['fc_bias'].asnumpy()
+    prob = np.exp(fc) / np.exp(fc).sum(axis=1, keepdims=True)
+    assert out.shape == (10, 3)
+    assert np.abs(out - prob).max() < 1e-5
+    # batches of 4 and the trailing batch of 2
+    stats = model.predictor_cache_stats()
+    assert stats['misses'] == 2 and stats['size'] == 2
+    model.predict(x)
+    stats = model.predictor_cache_stats()
+    assert stats['hits'] == 2 and stats['misses'] == 2
+    # a third shape evicts the least recently used executor
+    out = model.predict(x[:7])
+    assert np.abs(out - prob[:7]).max() < 1e-5
+    stats = model.predictor_cache_stats()
+    assert stats['evictions'] == 1 and stats['size'] == 2
+
+def test_predict_old_pickle():
+    model = get_model(numpy_batch_size=4)
+    x = np.random.uniform(size=(10, 5))
+    expected = model.predict(x)
+    # the state of a model pickled before the predict executors were cached
+    state = model.__getstate__()
+    for key in ['pred_cache_size', '_pred_execs', '_pred_cache_stats']:
+        del state[key]
+    old = mx.model.FeedForward.__new__(mx.model.FeedForward)
+    old.__setstate__(state)
+    assert np.abs(old.predict(x) - expected).max() < 1e-6
+
+def test_predict_iter():
+    model = get_model(numpy_batch_size=4)
+    x = np.random.uniform(size=(10, 5))
+    expected = model.predict(x)
+    outputs = [out[0] for out in model.predict_iter(x)]
+    assert [out.shape[0] for out in outputs] == [4, 4, 2]
+    assert np.abs(np.concatenate(outputs) - expected).max() < 1e-6
+    out = np.zeros((10, 3), dtype=np.float32)
+    for _ in model.predict_iter(x, out=out):
+        pass
+    assert np.abs(out - expected).max() < 1e-6
+
+def test_checkpoint_mmap():
+    model = get_model()
+    tmpdir = tempfile.mkdtemp()
+    try:
+        prefix = os.path.join(tmpdir, 'model')
+        mx.model.save_checkpoint(prefix, 1, model.symbol, model.arg_params,
+                                 model.aux_params, mmap=True)
+        # the format is detected without lazy, by FeedForward.load too
+        _, arg_params, _ = mx.model.load_checkpoint(prefix, 1)
+        model2 = mx.model.FeedForward.load(prefix, 1)
+        for name, arr in model.arg_params.items():
+            assert isinstance(arg_params[name], mx.nd.NDArray)
+            assert np.abs(arg_params[name].asnumpy() - arr.asnumpy()).max() == 0
+            assert np.abs(model2.arg_params[name].asnumpy() - arr.asnumpy()).max() == 0
+        _, arg_params, _ = mx.model.load_checkpoint(prefix, 1, lazy=True)
+        assert sorted(arg_params.keys()) == sorted(model.arg_params.keys())
+    finally:
+        shutil.rmtree(tmpdir)
+
+if __name__ == '__main__':
+    test_predict_cache()
+    test_predict_old_pickle()
+    test_predict_iter()
+    test_checkpoint_mmap()
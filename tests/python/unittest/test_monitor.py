@@ -0,0 +1,45 @@
+# pylint: skip-file
+import gc
+import threading
+import mxnet as mx
+import numpy as np
+
+def run_monitor(mon, num_batch=3):
+    data = mx.sym.Variable('data')
+    fc = mx.sym.FullyConnected(data=data, num_hidden=4, name='fc1')
+    exe = fc.simple_bind(ctx=mx.cpu(), data=(2, 3))
+    np.random.seed(0)
+    for arr in exe.arg_arrays:
+        arr[:] = np.random.uniform(-1, 1, arr.shape)
+    mon.install(exe)
+    res = []
+    for _ in range(num_batch):
+        mon.tic()
+        exe.forward(is_train=True)
+        exe.backward([mx.nd.ones((2, 4))])
+        exe.arg_dict['fc1_weight'][:] -= 0.1 * exe.grad_dict['fc1_weight']
+        res += mon.toc()
+    return res, mon
+
+def test_async_monitor():
+    num_threads = threading.active_count()
+    expected, _ = run_monitor(mx.mon.Monitor(1, pattern='.*weight|.*output', sort=True))
+    res, mon = run_monitor(mx.mon.Monitor(1, pattern='.*weight|.*output', sort=True,
+                                          async_stats=True))
+    # the results of a batch are returned one sampled batch later
+    assert len(res) == len(expected) - len(expected) // 3
+    res += mon.flush()
+    assert [(n, k) for n, k, _ in res] == [(n, k) for n, k, _ in expected]
+    for (_, _, v1), (_, _, v2) in zip(res, expected):
+        assert np.allclose(float(v1), float(v2))
+    mon.close()
+    mon.close()
+    assert threading.active_count() == num_threads
+    # a dropped monitor stops its thread, even when installed to an executor
+    res, mon = run_monitor(mx.mon.Monitor(1, async_stats=True))
+    del mon
+    gc.collect()
+    assert threading.active_count() == num_threads
+
+if __name__ == '__main__':
+    test_async_monitor()
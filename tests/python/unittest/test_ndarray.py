@@ -176,6 +176,32 @@ def test_ndarray_saveload():
     os.remove(fname)
 
 
+def test_ndarray_saveload_mmap():
+    np.random.seed(0)
+    fname = 'tmp_mmap.bin'
+    dmap = {'ndarray xx %s' % i : random_ndarray(np.random.randint(1, 5)) for i in range(10)}
+    dmap['int'] = mx.nd.array(np.arange(7), dtype=np.int32)
+    mx.nd.save_mmap(fname, dmap)
+    dmap2 = mx.nd.load_mmap(fname)
+    assert len(dmap2) == len(dmap)
+    assert not dmap2.is_loaded('int')
+    for k, x in dmap.items():
+        y = dmap2[k]
+        assert y.dtype == x.dtype
+        assert np.sum(x.asnumpy() != y.asnumpy()) == 0
+    assert dmap2['int'] is dmap2['int']
+    subset = mx.nd.load_mmap(fname, names=['ndarray xx 3'])
+    assert list(subset.keys()) == ['ndarray xx 3']
+    assert np.sum(subset['ndarray xx 3'].asnumpy() != dmap['ndarray xx 3'].asnumpy()) == 0
+    try:
+        mx.nd.load_mmap(fname, names=['missing'])
+        assert False
+    except KeyError:
+        pass
+    del dmap2, subset
+    os.remove(fname)
+
+
 def test_ndarray_slice():
     shape = (10,)
     A = mx.nd.array(np.random.uniform(-10, 10, shape))
@@ -202,11 +228,76 @@ def test_dot():
     B = mx.nd.array(b)
     C = mx.nd.dot(A, B)
     assert reldiff(c, C.asnumpy()) < 1e-5
+def test_invoke_batch():
+    shape = (10,)
+    a = np.random.uniform(-10, 10, shape)
+    b = np.random.uniform(-10, 10, shape)
+    A = mx.nd.array(a)
+    B = mx.nd.array(b)
+    C = mx.nd.empty(shape)
+    D = mx.nd.empty(shape)
+    outs = mx.nd.invoke_batch([(mx.nd.NDArray._plus, (A, B), C),
+                               (mx.nd.clip, (C, -2, 2), D),
+                               (mx.nd.NDArray._mul_scalar, (D, 3.0), D)])
+    assert outs[0] is C and outs[2] is D
+    assert reldiff(C.asnumpy(), a + b) < 1e-5
+    assert reldiff(D.asnumpy(), np.clip(a + b, -2, 2) * 3) < 1e-5
+    try:
+        mx.nd.invoke_batch([(np.sum, (A,), C)])
+        assert False
+    except TypeError:
+        pass
+
+def test_fuse():
+    shape = (20, 3)
+    a = np.random.uniform(1, 10, shape)
+    b = np.random.uniform(1, 10, shape)
+    A = mx.nd.array(a)
+    B = mx.nd.array(b)
+    C = mx.nd.zeros(shape)
+    with mx.nd.fuse():
+        expr = 2 * A - mx.nd.sqrt(B) / (A + 1.5)
+        assert isinstance(expr, mx.nd.FusedExpr)
+        C[:] = expr
+        C += A * B
+    assert reldiff(C.asnumpy(), 2 * a - np.sqrt(b) / (a + 1.5) + a * b) < 1e-5
+    # evaluated in place, the output is also an input
+    with mx.nd.fuse():
+        A[:] = mx.nd.exp(-A) * B + mx.nd.square(A)
+    assert reldiff(A.asnumpy(), np.exp(-a) * b + np.square(a)) < 1e-5
+    # expressions too large for one kernel evaluate their operands first
+    with mx.nd.fuse():
+        expr = B
+        for i in range(100):
+            expr = expr * 0.5 + B
+    x = b
+    for i in range(100):
+        x = x * 0.5 + b
+    assert reldiff(expr.asnumpy(), x) < 1e-5
+    # other functions take the evaluated expression
+    with mx.nd.fuse():
+        D = mx.nd.clip(B * 2, 5, 10)
+    assert reldiff(D.asnumpy(), np.clip(b * 2, 5, 10)) < 1e-5
+    # double arrays are evaluated in double
+    a64 = np.random.uniform(1, 10, shape)
+    A64 = mx.nd.array(a64, dtype=np.float64)
+    with mx.nd.fuse():
+        expr = mx.nd.log(mx.nd.exp(A64 * 0.1)) + mx.nd.sqrt(A64) + 1e-12
+    x = np.log(np.exp(a64 * 0.1)) + np.sqrt(a64) + 1e-12
+    assert np.abs(expr.asnumpy() - x).max() < 1e-12
+    # mixed data types are an error of the call, not of the engine
+    try:
+        with mx.nd.fuse():
+            (A64 + B).eval()
+        assert False
+    except mx.base.MXNetError:
+        pass
 
 if __name__ == '__main__':
     test_ndarray_slice()
     test_ndarray_pickle()
     test_ndarray_saveload()
+    test_ndarray_saveload_mmap()
     test_ndarray_copy()
     test_ndarray_elementwise()
     test_ndarray_negate()
@@ -216,3 +307,5 @@ if __name__ == '__main__':
     test_ndarray_choose()
     test_ndarray_onehot()
     test_ndarray_fill()
+    test_invoke_batch()
+    test_fuse()
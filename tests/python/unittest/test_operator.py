@@ -237,6 +237,71 @@ def test_python_op():
     exec1.backward(dy)
     assert reldiff(dy.asnumpy(), dx.asnumpy()) < 1e-5
 
+def test_python_op_async():
+    X = mx.symbol.Variable('X')
+    op = mx.operator.NumpyOp(async_callback=True)
+    s = op.get_symbol(X, name='numpy_op') * 2
+
+    dx = mx.ndarray.zeros((10))
+    dy = mx.ndarray.ones((10))
+    exec1 = s.bind(mx.cpu(), args=[mx.ndarray.zeros((10))], args_grad = {'X': dx})
+    # the numpy views of the buffers are reused across calls
+    for i in range(3):
+        x = np.random.uniform(-1, 1, (10,))
+        exec1.arg_dict['X'][:] = x
+        exec1.forward()
+        assert reldiff(x * 2, exec1.outputs[0].asnumpy()) < 1e-5
+        exec1.backward(dy)
+        # the default backward of NumpyOp sets the gradient to 1
+        assert reldiff(np.ones((10,)), dx.asnumpy()) < 1e-5
+
+def test_custom_op():
+    class Sqr(mx.operator.CustomOp):
+        def forward(self, is_train, req, in_data, out_data, aux, scratch):
+            scratch[:] = in_data[0] * in_data[0]
+            self.assign(out_data[0], req[0], scratch)
+
+        def backward(self, req, out_grad, in_data, out_data, in_grad, aux, scratch):
+            self.assign(in_grad[0], req[0], 2 * in_data[0] * out_grad[0])
+
+    class SqrProp(mx.operator.CustomOpProp):
+        def scratch_shape(self, in_shape):
+            return in_shape[0]
+
+        def create_operator(self, ctx):
+            return Sqr()
+
+    X = mx.symbol.Variable('X')
+    s = SqrProp()(X, name='sqr') * 2
+
+    dx = mx.ndarray.zeros((10))
+    dy = mx.ndarray.ones((10))
+    exec1 = s.bind(mx.cpu(), args=[mx.ndarray.zeros((10))], args_grad = {'X': dx})
+    for i in range(3):
+        x = np.random.uniform(-1, 1, (10,))
+        exec1.arg_dict['X'][:] = x
+        exec1.forward(is_train=True)
+        assert reldiff(x * x * 2, exec1.outputs[0].asnumpy()) < 1e-5
+        exec1.backward(dy)
+        assert reldiff(x * 4, dx.asnumpy()) < 1e-5
+
+    # an error in forward is raised by the next wait instead of aborting
+    class Fail(mx.operator.CustomOp):
+        def forward(self, is_train, req, in_data, out_data, aux):
+            raise ValueError('forward fails')
+
+    class FailProp(mx.operator.CustomOpProp):
+        def create_operator(self, ctx):
+            return Fail()
+
+    exec2 = FailProp()(X, name='fail').bind(mx.cpu(), args=[mx.ndarray.zeros((10))])
+    exec2.forward()
+    try:
+        exec2.outputs[0].asnumpy()
+        assert False
+    except mx.base.MXNetError:
+        pass
+
 def test_swapaxes():
     data = mx.symbol.Variable('data')
     shape = (2, 3, 4)
@@ -699,6 +764,8 @@ if __name__ == '__main__':
     test_slice_channel()
     test_regression()
     test_python_op()
+    test_python_op_async()
+    test_custom_op()
     test_swapaxes()
     test_scalarop();
     test_scalar_pow()
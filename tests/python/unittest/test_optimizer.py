@@ -0,0 +1,57 @@
+# pylint: skip-file
+import numpy as np
+import mxnet as mx
+
+def same_with_tol(a, b, tol=1e-5):
+    return np.sum(np.abs(a - b)) < tol * (np.sum(np.abs(a)) + 1)
+
+def check_update_multi(make_opt, num_steps=3):
+    shapes = [(3, 4), (10,), (2, 3, 5)]
+    opt1 = make_opt()
+    opt2 = make_opt()
+    weights1 = [mx.nd.array(np.random.uniform(-1, 1, s)) for s in shapes]
+    weights2 = [w.copyto(mx.cpu()) for w in weights1]
+    updater1 = mx.optimizer.get_updater(opt1)
+    updater2 = mx.optimizer.get_updater(opt2)
+    indices = list(range(len(shapes)))
+    for _ in range(num_steps):
+        grads = [mx.nd.array(np.random.uniform(-1, 1, s)) for s in shapes]
+        for i in indices:
+            updater1(i, grads[i], weights1[i])
+        updater2(indices, grads, weights2)
+    for w1, w2 in zip(weights1, weights2):
+        assert same_with_tol(w1.asnumpy(), w2.asnumpy())
+
+def test_sgd_update_multi():
+    check_update_multi(lambda: mx.optimizer.SGD(learning_rate=0.1, wd=0.01))
+    check_update_multi(lambda: mx.optimizer.SGD(learning_rate=0.1, momentum=0.9,
+                                                rescale_grad=0.5, clip_gradient=0.2))
+    # the weight decay of the bias depends on the momentum in update
+    arg_names = ['data', 'fc1_weight', 'fc1_bias', 'fc2_weight']
+    check_update_multi(lambda: mx.optimizer.SGD(learning_rate=0.1, wd=0.1,
+                                                arg_names=arg_names))
+    check_update_multi(lambda: mx.optimizer.SGD(learning_rate=0.1, wd=0.1, momentum=0.9,
+                                                arg_names=arg_names))
+
+def test_adam_update_multi():
+    check_update_multi(lambda: mx.optimizer.Adam(learning_rate=0.01, wd=0.01))
+    # every parameter advances its own time step
+    opt = mx.optimizer.Adam()
+    updater = mx.optimizer.get_updater(opt)
+    weights = [mx.nd.zeros((2,)) for i in range(3)]
+    for step in range(2):
+        for i in range(3):
+            updater(i, mx.nd.ones((2,)), weights[i])
+    assert opt.time == {0: 2, 1: 2, 2: 2}
+    updater([0, 1, 2], [mx.nd.ones((2,))] * 3, weights)
+    assert opt.time == {0: 3, 1: 3, 2: 3}
+    check_update_multi(lambda: mx.optimizer.Adam(clip_gradient=0.3))
+
+def test_rmsprop_update_multi():
+    check_update_multi(lambda: mx.optimizer.RMSProp(learning_rate=0.01, wd=0.01))
+    check_update_multi(lambda: mx.optimizer.RMSProp(clip_gradient=0.3))
+
+if __name__ == '__main__':
+    test_sgd_update_multi()
+    test_adam_update_multi()
+    test_rmsprop_update_multi()
@@ -0,0 +1,45 @@
+# pylint: skip-file
+import json
+import os
+import tempfile
+import mxnet as mx
+import numpy as np
+
+def test_profiler():
+    data = mx.sym.Variable('data')
+    fc = mx.sym.FullyConnected(data=data, num_hidden=4, name='fc1')
+    exe = fc.simple_bind(ctx=mx.cpu(), data=(2, 3))
+    for arr in exe.arg_arrays:
+        arr[:] = np.random.uniform(-1, 1, arr.shape)
+
+    mx.profiler.start()
+    exe.forward(is_train=True)
+    exe.backward([mx.nd.ones((2, 4))])
+    mx.nd.waitall()
+    mx.profiler.stop()
+    # not recorded after stop
+    exe.forward()
+    mx.nd.waitall()
+
+    fname = os.path.join(tempfile.mkdtemp(), 'profile.json')
+    mx.profiler.dump(fname)
+    with open(fname) as f:
+        trace = json.load(f)
+    events = [e for e in trace['traceEvents'] if e['ph'] == 'X']
+    names = [e['name'] for e in events]
+    assert names.count('fc1') == 1
+    assert names.count('fc1_backward') == 1
+    for e in events:
+        assert e['dur'] >= 0
+        if e['name'] == 'fc1':
+            # data, weight, bias and output
+            assert e['args']['mem_bytes'] == 4 * (6 + 12 + 4 + 8)
+
+    # dump clears the records
+    mx.profiler.dump(fname)
+    with open(fname) as f:
+        trace = json.load(f)
+    assert len([e for e in trace['traceEvents'] if e['ph'] == 'X']) == 0
+
+if __name__ == '__main__':
+    test_profiler()
@@ -0,0 +1,61 @@
+# pylint: skip-file
+import mxnet as mx
+import numpy as np
+import os
+
+def test_recordio():
+    frec = 'tmp_recordio.rec'
+    N = 255
+
+    writer = mx.recordio.MXRecordIO(frec, 'w')
+    for i in range(N):
+        writer.write(str(i).encode('ascii'))
+    writer.close()
+
+    reader = mx.recordio.MXRecordIO(frec, 'r')
+    for i in range(N):
+        res = reader.read()
+        assert res == str(i).encode('ascii')
+    assert reader.read() is None
+    reader.close()
+    os.remove(frec)
+
+def test_indexed_recordio():
+    fidx = 'tmp_recordio.idx'
+    frec = 'tmp_recordio.rec'
+    N = 255
+
+    writer = mx.recordio.MXIndexedRecordIO(fidx, frec, 'w')
+    for i in range(N):
+        writer.write_idx(i, str(i).encode('ascii'))
+    writer.close()
+
+    reader = mx.recordio.MXIndexedRecordIO(fidx, frec, 'r')
+    keys = list(range(N))
+    np.random.shuffle(keys)
+    for i in keys:
+        res = reader.read_idx(i)
+        assert res == str(i).encode('ascii')
+    # sequential reading continues after the last random access
+    reader.seek(10)
+    assert reader.read() == b'10'
+    assert reader.read() == b'11'
+    reader.close()
+
+    # every record is read by exactly one part
+    records = []
+    for part in range(4):
+        reader = mx.recordio.MXIndexedRecordIO(fidx, frec, 'r', part_index=part, num_parts=4)
+        while True:
+            res = reader.read()
+            if res is None:
+                break
+            records.append(res)
+        reader.close()
+    assert records == [str(i).encode('ascii') for i in range(N)]
+    os.remove(fidx)
+    os.remove(frec)
+
+if __name__ == '__main__':
+    test_recordio()
+    test_indexed_recordio()
@@ -0,0 +1,57 @@
+# pylint: skip-file
+import json
+import numpy as np
+import mxnet as mx
+
+try:
+    import httplib
+except ImportError:
+    import http.client as httplib
+
+def get_server(**kwargs):
+    net = mx.symbol.FullyConnected(mx.symbol.Variable('data'), name='fc', num_hidden=3)
+    net = mx.symbol.SoftmaxOutput(net, name='softmax')
+    arg_params = {'fc_weight': mx.nd.array(np.random.uniform(-1, 1, (3, 5))),
+                  'fc_bias': mx.nd.array(np.random.uniform(-1, 1, (3,)))}
+    server = mx.serving.InferenceServer(net, arg_params, {}, {'data': (5,)}, **kwargs)
+    return server, arg_params
+
+def reference(arg_params, data):
+    fc = np.dot(data, arg_params['fc_weight'].asnumpy().T) + arg_params['fc_bias'].asnumpy()
+    prob = np.exp(fc - fc.max(axis=1, keepdims=True))
+    return prob / prob.sum(axis=1, keepdims=True)
+
+def test_inference_server():
+    # one worker and a latency longer than the test, the requests fill two
+    # batches of 8 samples exactly, which run as soon as they are full
+    server, arg_params = get_server(num_workers=1, max_batch_size=8, max_latency=60)
+    data = [np.random.uniform(size=(n, 5)).astype(np.float32) for n in [1, 3, 2, 2, 7, 1]]
+    requests = [server.submit(data=x) for x in data]
+    for x, request in zip(data, requests):
+        out = request.result(timeout=10)[0]
+        assert out.shape == (x.shape[0], 3)
+        assert np.abs(out - reference(arg_params, x)).max() < 1e-5
+    stats = server.stats()
+    assert stats['num_requests'] == len(data)
+    assert stats['num_batches'] == 2
+    try:
+        server.submit(data=np.zeros((9, 5)))
+        assert False
+    except ValueError:
+        pass
+    server.close()
+
+def test_inference_server_http():
+    server, arg_params = get_server(num_workers=1)
+    http = server.serve(('127.0.0.1', 0))
+    x = np.random.uniform(size=(2, 5)).astype(np.float32)
+    conn = httplib.HTTPConnection('127.0.0.1', http.server_address[1])
+    conn.request('POST', '/', json.dumps({'data': x.tolist()}))
+    out = np.array(json.loads(conn.getresponse().read().decode('utf-8'))['outputs'][0])
+    assert np.abs(out - reference(arg_params, x)).max() < 1e-5
+    http.shutdown()
+    server.close()
+
+if __name__ == '__main__':
+    test_inference_server()
+    test_inference_server_http()
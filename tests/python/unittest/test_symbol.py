@@ -110,6 +110,70 @@ def test_symbol_infer_shape():
     assert arg_shapes['h2h_weight'] == (num_hidden, num_hidden)
 
 
+def test_symbol_plan_memory():
+    data = mx.symbol.Variable('data')
+    net = mx.symbol.FullyConnected(data=data, name='fc1', num_hidden=100)
+    net = mx.symbol.Activation(data=net, name='relu1', act_type='relu')
+    net = mx.symbol.FullyConnected(data=net, name='fc2', num_hidden=100)
+    net = mx.symbol.Activation(data=net, name='relu2', act_type='relu')
+    net = mx.symbol.FullyConnected(data=net, name='fc3', num_hidden=10)
+    net = mx.symbol.SoftmaxOutput(data=net, name='softmax')
+    for strategy in ['best_fit', 'greedy_lifetime']:
+        for grad_req in ['write', 'null']:
+            plan = net.plan_memory(mx.cpu(), grad_req=grad_req, strategy=strategy,
+                                   data=(32, 50))
+            assert plan['strategy'] == strategy
+            storages = dict((s['id'], s['bytes']) for s in plan['storages'])
+            assert plan['internal_bytes'] == sum(storages.values())
+            assert plan['peak_bytes'] == plan['internal_bytes'] + plan['external_bytes']
+            assert plan['internal_bytes'] <= plan['unshared_bytes']
+            nodes = set()
+            for entry in plan['entries']:
+                assert entry['bytes'] == 4 * np.prod(entry['shape'])
+                assert entry['bytes'] <= storages[entry['storage_id']]
+                nodes.add(entry['node'])
+            assert 'fc1' in nodes and 'softmax' in nodes
+            if grad_req == 'null':
+                assert not any(name.endswith('_backward') for name in nodes)
+    try:
+        net.plan_memory(mx.cpu(), strategy='first_fit', data=(32, 50))
+        assert False
+    except mx.base.MXNetError:
+        pass
+
+
+def test_op_signature_cache():
+    import shutil
+    import tempfile
+    cache_dir = tempfile.mkdtemp()
+    old_dir = os.environ.get('MXNET_OP_CACHE_DIR')
+    calls = []
+    def describe(i):
+        calls.append(i)
+        return {'name': 'op%d' % i}
+    try:
+        os.environ['MXNET_OP_CACHE_DIR'] = cache_dir
+        sigs = mx.base._load_op_signatures('test', 3, describe)
+        assert [sig['name'] for sig in sigs] == ['op0', 'op1', 'op2']
+        assert calls == [0, 1, 2]
+        assert len(os.listdir(cache_dir)) == 1
+        # read from the cache
+        assert mx.base._load_op_signatures('test', 3, describe) == sigs
+        assert calls == [0, 1, 2]
+        # another number of operators is another build
+        mx.base._load_op_signatures('test', 2, describe)
+        assert calls == [0, 1, 2, 0, 1]
+        os.environ['MXNET_OP_CACHE_DIR'] = ''
+        mx.base._load_op_signatures('test', 3, describe)
+        assert len(calls) == 8
+    finally:
+        if old_dir is None:
+            del os.environ['MXNET_OP_CACHE_DIR']
+        else:
+            os.environ['MXNET_OP_CACHE_DIR'] = old_dir
+        shutil.rmtree(cache_dir)
+
+
 if __name__ == '__main__':
     test_symbol_infer_shape()
     test_symbol_infer_type()
@@ -118,4 +182,5 @@ if __name__ == '__main__':
     test_symbol_compose()
     test_symbol_saveload()
     test_symbol_pickle()
-
+    test_symbol_plan_memory()
+    test_op_signature_cache()
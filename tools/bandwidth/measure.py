@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Measure the bandwidth of the kvstore reduction
+
+For example, sum 8 arrays of 16M floats placed on 8 cpu executors
+with 16 reduction threads, binding the threads over the sockets:
+
+    OMP_PROC_BIND=spread MXNET_KVSTORE_REDUCTION_NTHREADS=16 \\
+        python measure.py --num-devices 8 --size 16000000
+"""
+from __future__ import print_function
+import os, sys
+import argparse
+import logging
+import time
+curr_path = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(curr_path, "../../python"))
+import mxnet as mx
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Measure the bandwidth of kvstore reduction')
+    parser.add_argument('--kv-store', type=str, default='local_update_cpu',
+                        help='the kvstore type')
+    parser.add_argument('--num-devices', type=int, default=8,
+                        help='number of devices the arrays are pushed from')
+    parser.add_argument('--gpus', action='store_true',
+                        help='push from gpus instead of cpus')
+    parser.add_argument('--size', type=int, default=16 * 1000 * 1000,
+                        help='number of floats of each array')
+    parser.add_argument('--num-keys', type=int, default=1,
+                        help='number of keys pushed in each batch')
+    parser.add_argument('--num-batches', type=int, default=10,
+                        help='number of batches to measure')
+    return parser.parse_args()
+
+def run(args):
+    dev = mx.gpu if args.gpus else mx.cpu
+    devs = [dev(i) for i in range(args.num_devices)]
+    shape = (args.size,)
+    kv = mx.kv.create(args.kv_store)
+    keys = list(range(args.num_keys))
+    kv.init(keys, [mx.nd.zeros(shape) for _ in keys])
+    grads = [[mx.nd.ones(shape, d) for d in devs] for _ in keys]
+    outs = [[mx.nd.empty(shape, d) for d in devs] for _ in keys]
+
+    def batch():
+        """push and pull all keys once"""
+        kv.push(keys, grads)
+        kv.pull(keys, out=outs)
+        for out in outs:
+            out[0].wait_to_read()
+
+    # warm up, this also allocates the buffers
+    batch()
+    tic = time.time()
+    for _ in range(args.num_batches):
+        batch()
+    toc = (time.time() - tic) / args.num_batches
+    # each batch reads every pushed array once during the reduction
+    nbytes = 4. * args.size * args.num_devices * args.num_keys
+    logging.info('kvstore = %s, devices = %d, size = %d, keys = %d',
+                 args.kv_store, args.num_devices, args.size, args.num_keys)
+    logging.info('time per batch = %.3f ms, reduce bandwidth = %.2f GB/s',
+                 toc * 1000, nbytes / toc / 1e9)
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    run(parse_args())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""Measure the update formulas of the Adam and RMSProp optimizers with and
+without mx.nd.fuse.
+
+Without fuse every operation of a formula runs alone and writes a temporary
+array, with fuse each updated array is written by one kernel. Reports the
+milliseconds per update of one weight.
+"""
+# pylint: disable=invalid-name, too-many-arguments
+import argparse
+import os
+import sys
+import time
+
+curr_path = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(curr_path, "../python"))
+import mxnet as mx
+
+def adam(weight, grad, mean, variance, lr=0.002, beta1=0.9, beta2=0.999,
+         epsilon=1e-8, wd=1e-4):
+    """The update of Adam, for a fixed time step."""
+    mean[:] = beta1 * mean + (1. - beta1) * grad
+    variance[:] = beta2 * variance + (1. - beta2) * grad * grad
+    step = lr * mean / (mx.nd.sqrt(variance) + epsilon)
+    step += lr * wd * weight
+    weight[:] += -step
+
+def rmsprop(weight, grad, n, g, delta, lr=0.002, gamma1=0.95, gamma2=0.9, wd=1e-4):
+    """The update of RMSProp."""
+    n[:] = (1 - gamma1) * (grad * grad) + gamma1 * n
+    g[:] = (1 - gamma1) * grad + gamma1 * g
+    delta[:] = gamma2 * delta - lr * (grad / mx.nd.sqrt(n - g * g + 1e-4) + wd * weight)
+    weight[:] += delta
+
+def measure(update, arrays, num_updates, repeat, fused):
+    """Best time in milliseconds of one update."""
+    best = None
+    for _ in range(repeat):
+        mx.nd.waitall()
+        tic = time.time()
+        for _ in range(num_updates):
+            if fused:
+                with mx.nd.fuse():
+                    update(*arrays)
+            else:
+                update(*arrays)
+        mx.nd.waitall()
+        cost = (time.time() - tic) / num_updates * 1e3
+        best = cost if best is None else min(best, cost)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=str, default='1000,100000,10000000',
+                        help='comma separated numbers of elements of the weight')
+    parser.add_argument('--gpu', type=int, default=-1,
+                        help='the gpu to run on, the cpu by default')
+    parser.add_argument('--num-updates', type=int, default=20,
+                        help='number of updates per measure')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of measures, the best is reported')
+    args = parser.parse_args()
+    ctx = mx.gpu(args.gpu) if args.gpu >= 0 else mx.cpu()
+
+    print('%-10s %10s %12s %12s %8s' % ('optimizer', 'size', 'plain(ms)', 'fused(ms)', 'speedup'))
+    for size in [int(i) for i in args.sizes.split(',')]:
+        for name, update, num_states in [('adam', adam, 2), ('rmsprop', rmsprop, 3)]:
+            weight = mx.nd.ones((size,), ctx)
+            grad = mx.random.uniform(-1, 1, (size,), ctx)
+            arrays = [weight, grad] + [mx.nd.zeros((size,), ctx) for _ in range(num_states)]
+            plain = measure(update, arrays, args.num_updates, args.repeat, False)
+            fused = measure(update, arrays, args.num_updates, args.repeat, True)
+            print('%-10s %10d %12.3f %12.3f %8.2f' % (name, size, plain, fused, plain / fused))
+
+if __name__ == '__main__':
+    main()
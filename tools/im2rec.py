@@ -1,3 +1,4 @@
+from __future__ import print_function
 import os
 import sys
 curr_path = os.path.abspath(os.path.dirname(__file__))
@@ -6,8 +7,10 @@ import mxnet as mx
 import random
 import numpy as np
 import argparse
+import itertools
 import threading
-import cv, cv2
+import multiprocessing
+import cv2
 import time
 def list_image(root, recursive, exts):
     image_list = []
@@ -58,108 +61,145 @@ def make_list(prefix_out, root, recursive, exts, num_chunks, train_ratio):
             write_list(prefix_out+str_chunk+'.lst', chunk)
 
 def read_list(path_in):
-    image_list = []
+    """Stream the items of an image list, without loading the whole list."""
     with open(path_in) as fin:
-        for line in fin.readlines():
+        for line in fin:
             line = [i.strip() for i in line.strip().split('\t')]
             item = [int(line[0])] + [line[-1]] + [float(i) for i in line[1:-1]]
-            image_list.append(item)
-    return image_list
+            yield item
 
-def write_record(args, image_list):
-    source = image_list
-    tic = [time.time()]
+def image_encode(args, item):
+    """Read, transform and pack one image. Return None on failure."""
     color_modes = {-1: cv2.IMREAD_UNCHANGED,
                     0: cv2.IMREAD_GRAYSCALE,
                     1: cv2.IMREAD_COLOR}
-    total = len(source)
-    
-    def image_encode(item, q_out):
-        try:
-            img = cv2.imread(os.path.join(args.root, item[1]), color_modes[args.color])
-        except:
-            print 'imread error:', item[1]
-            return
-        if img == None:
-            print 'read none error:', item[1]
-            return
-        if args.center_crop:
-            if img.shape[0] > img.shape[1]:
-                margin = (img.shape[0] - img.shape[1])/2;
-                img = img[margin:margin+img.shape[1], :]
-            else:
-                margin = (img.shape[1] - img.shape[0])/2;
-                img = img[:, margin:margin+img.shape[0]]
-        if args.resize:
-            if img.shape[0] > img.shape[1]:
-                newsize = (img.shape[0]*args.resize/img.shape[1], args.resize)
-            else:
-                newsize = (args.resize, img.shape[1]*args.resize/img.shape[0])
-            img = cv2.resize(img, newsize)
-        header = mx.recordio.IRHeader(0, item[2], item[0], 0)
+    try:
+        img = cv2.imread(os.path.join(args.root, item[1]), color_modes[args.color])
+    except:
+        print('imread error:', item[1])
+        return None
+    if img is None:
+        print('read none error:', item[1])
+        return None
+    if args.center_crop:
+        if img.shape[0] > img.shape[1]:
+            margin = (img.shape[0] - img.shape[1]) // 2
+            img = img[margin:margin+img.shape[1], :]
+        else:
+            margin = (img.shape[1] - img.shape[0]) // 2
+            img = img[:, margin:margin+img.shape[0]]
+    if args.resize:
+        if img.shape[0] > img.shape[1]:
+            newsize = (args.resize, img.shape[0]*args.resize//img.shape[1])
+        else:
+            newsize = (img.shape[1]*args.resize//img.shape[0], args.resize)
+        img = cv2.resize(img, newsize)
+    header = mx.recordio.IRHeader(0, item[2], item[0], 0)
 
-        try:
-            s = mx.recordio.pack_img(header, img, quality=args.quality, img_fmt=args.encoding)
-            q_out.put(('data', s, item))
-        except:
-            print 'pack_img error:',item[1]
-            return
+    try:
+        return mx.recordio.pack_img(header, img, quality=args.quality, img_fmt=args.encoding)
+    except:
+        print('pack_img error:', item[1])
+        return None
 
-    def read_worker(q_in, q_out):
-        while not q_in.empty():
-            item = q_in.get()
-            image_encode(item, q_out)
+def encode_worker(args, q_in, q_out):
+    """Encode (seq, item) from q_in until None, and put (seq, key, record) to q_out."""
+    while True:
+        task = q_in.get()
+        if task is None:
+            break
+        seq, item = task
+        q_out.put((seq, item[0], image_encode(args, item)))
+    q_out.put(None)
 
-    def write_worker(q_out, prefix):
-        pre_time = time.time()
-        sink = []
-        record = mx.recordio.MXRecordIO(prefix+'.rec', 'w')
-        while True:
-            stat, s, item = q_out.get()
-            if stat == 'finish':
-                write_list(prefix+'.lst', sink)
+def resume_record(prefix):
+    """Make the output of an interrupted run consistent for appending.
+    Everything from the last indexed record on is dropped, as it may be
+    incomplete. Return the key of the first image to encode again, or None
+    when there is nothing to resume."""
+    if not os.path.isfile(prefix+'.idx') or not os.path.isfile(prefix+'.rec'):
+        return None
+    size = os.path.getsize(prefix+'.rec')
+    lines = []
+    with open(prefix+'.idx') as fidx:
+        for line in fidx:
+            line = line.strip().split('\t')
+            if len(line) != 2 or int(line[1]) >= size:
                 break
-            record.write(s)
-            sink.append(item)
-            if len(sink) % 1000 == 0:
-                cur_time = time.time()
-                print 'time:', cur_time - pre_time, ' count:', len(sink)
-                pre_time = cur_time
+            lines.append(line)
+    if not lines:
+        return None
+    key, pos = lines.pop()
+    with open(prefix+'.rec', 'r+b') as frec:
+        frec.truncate(int(pos))
+    with open(prefix+'.idx', 'w') as fidx:
+        for line in lines:
+            fidx.write('\t'.join(line) + '\n')
+    return int(key)
 
-    try:
-        import multiprocessing
-        q_in = [multiprocessing.Queue() for i in range(args.num_thread)]
-        q_out = multiprocessing.Queue(1024)
-        for i in range(len(image_list)):
-            q_in[i % len(q_in)].put(image_list[i])
-        read_process = [multiprocessing.Process(target=read_worker, args=(q_in[i], q_out)) \
-                for i in range(args.num_thread)]
-        for p in read_process:
-            p.start()
-        write_process = multiprocessing.Process(target=write_worker, args=(q_out,args.prefix))
-        write_process.start()
-        for p in read_process:
-            p.join()
-        q_out.put(('finish', '', []))
-        write_process.join()
-    except ImportError:
-        print('multiprocessing not available, fall back to single threaded encoding')
-        import Queue
-        q_out = Queue.Queue()
-        record = mx.recordio.MXRecordIO(args.prefix+'.rec', 'w')
-        cnt = 0
-        pre_time = time.time()
-        for item in image_list:
-            image_encode(item, q_out)
-            if q_out.empty():
+def write_record(args, image_list):
+    """Encode the images of image_list with args.num_thread processes and
+    write them in list order to <prefix>.rec, with offsets in <prefix>.idx."""
+    flag = 'w'
+    if args.resume:
+        start_key = resume_record(args.prefix)
+        if start_key is not None:
+            flag = 'a'
+            image_list = itertools.dropwhile(lambda item: item[0] != start_key, image_list)
+            print('resume from image', start_key)
+    record = mx.recordio.MXRecordIO(args.prefix+'.rec', flag)
+    fidx = open(args.prefix+'.idx', flag)
+
+    # each process writes records in list order from queues holding at
+    # most queue_size images, so memory stays bounded for any list size
+    q_in = multiprocessing.Queue(args.queue_size)
+    q_out = multiprocessing.Queue(args.queue_size)
+    in_flight = threading.Semaphore(args.queue_size)
+    def read_list_worker():
+        """Feed the image list to encoding processes."""
+        for seq, item in enumerate(image_list):
+            in_flight.acquire()
+            q_in.put((seq, item[:3]))
+        for _ in range(args.num_thread):
+            q_in.put(None)
+    workers = [multiprocessing.Process(target=encode_worker, args=(args, q_in, q_out))
+               for _ in range(args.num_thread)]
+    for p in workers:
+        p.start()
+    feeder = threading.Thread(target=read_list_worker)
+    feeder.daemon = True
+    feeder.start()
+
+    pending = {}
+    next_seq = 0
+    num_finished = 0
+    cnt = 0
+    pre_time = time.time()
+    while num_finished < len(workers):
+        res = q_out.get()
+        if res is None:
+            num_finished += 1
+            continue
+        pending[res[0]] = res[1:]
+        while next_seq in pending:
+            key, s = pending.pop(next_seq)
+            next_seq += 1
+            in_flight.release()
+            if s is None:
                 continue
-            _, s, _ = q_out.get()
+            # same index format as mx.recordio.MXIndexedRecordIO
+            pos = record.tell()
             record.write(s)
+            fidx.write('%d\t%d\n' % (key, pos))
             cnt += 1
             if cnt % 1000 == 0:
                 cur_time = time.time()
-                print 'time:', cur_time - pre_time, ' count:', cnt
+                print('time:', cur_time - pre_time, ' count:', cnt)
                 pre_time = cur_time
+    for p in workers:
+        p.join()
+    record.close()
+    fidx.close()
 
 def main():
     parser = argparse.ArgumentParser(
@@ -193,9 +233,13 @@ def main():
     rgroup.add_argument('--quality', type=int, default=80,
         help='JPEG quality for encoding, 1-100; or PNG compression for encoding, 1-9')
     rgroup.add_argument('--num_thread', type=int, default=1,
-        help='number of thread to use for encoding. order of images will be different\
-        from the input list if >1. the input list will be modified to match the\
-        resulting order.')
+        help='number of processes to use for encoding. records are written in the\
+        order of the input list.')
+    rgroup.add_argument('--queue_size', type=int, default=1024,
+        help='maximum number of images being encoded or waiting to be written.')
+    rgroup.add_argument('--resume', type=bool, default=False,
+        help='resume an interrupted run from the last record in <prefix>.idx\
+        instead of starting over.')
     rgroup.add_argument('--color', type=int, default=1, choices=[-1, 0, 1],
         help='specify the color mode of the loaded image.\
         1: Loads a color image. Any transparency of image will be neglected. It is the default flag.\
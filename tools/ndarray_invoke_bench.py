@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""Measure the overhead of invoking NDArray functions on small arrays.
+
+Compares, in microseconds per function call:
+- legacy: the ctypes arguments built at every call, as the NDArray functions did,
+- function: the NDArray functions, with their argument types built once,
+- batch: mx.nd.invoke_batch, one call to the library per batch.
+"""
+# pylint: disable=invalid-name, protected-access
+import argparse
+import ctypes
+import os
+import sys
+import time
+
+curr_path = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(curr_path, "../python"))
+import mxnet as mx
+from mxnet.base import _LIB, check_call, c_array, mx_float, NDArrayHandle
+
+def legacy_plus(handle, lhs, rhs, out):
+    """Invoke _plus the way the NDArray functions used to."""
+    check_call(_LIB.MXFuncInvokeEx(handle,
+                                   c_array(NDArrayHandle, (lhs.handle, rhs.handle)),
+                                   c_array(mx_float, ()),
+                                   c_array(NDArrayHandle, (out.handle,)),
+                                   ctypes.c_int(0),
+                                   c_array(ctypes.c_char_p, []),
+                                   c_array(ctypes.c_char_p, [])))
+
+def measure(run, num_calls, repeat):
+    """Best time in microseconds per call of run, which makes num_calls calls."""
+    best = None
+    for _ in range(repeat):
+        mx.nd.waitall()
+        tic = time.time()
+        run()
+        mx.nd.waitall()
+        cost = (time.time() - tic) / num_calls * 1e6
+        best = cost if best is None else min(best, cost)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=16,
+                        help='number of elements of the arrays')
+    parser.add_argument('--num-calls', type=int, default=10000,
+                        help='number of function calls per measure')
+    parser.add_argument('--batch-size', type=int, default=100,
+                        help='number of functions per invoke_batch call')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='number of measures, the best is reported')
+    args = parser.parse_args()
+
+    a = mx.nd.ones((args.size,))
+    b = mx.nd.ones((args.size,))
+    c = mx.nd.empty((args.size,))
+    handle = mx.nd._FUNCTION_ARGS[mx.nd.NDArray._plus][0]
+    batch = [(mx.nd.NDArray._plus, (a, b), c)] * args.batch_size
+    num_batches = args.num_calls // args.batch_size
+
+    def run_legacy():
+        for _ in range(args.num_calls):
+            legacy_plus(handle, a, b, c)
+
+    def run_function():
+        plus = mx.nd.NDArray._plus
+        for _ in range(args.num_calls):
+            plus(a, b, c)
+
+    def run_batch():
+        for _ in range(num_batches):
+            mx.nd.invoke_batch(batch)
+
+    print('%-10s %10s' % ('path', 'us/call'))
+    print('%-10s %10.2f' % ('legacy', measure(run_legacy, args.num_calls, args.repeat)))
+    print('%-10s %10.2f' % ('function', measure(run_function, args.num_calls, args.repeat)))
+    print('%-10s %10.2f' % ('batch', measure(run_batch, num_batches * args.batch_size,
+                                               args.repeat)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+Load generator for mx.serving.InferenceServer
+
+Clients send requests of one sample in closed loop and the latency and
+throughput are reported. By default the server runs in this process on a
+multi layer perceptron with random weights, for example
+
+    python load_generator.py --num-clients 64 --num-workers 8 --max-batch-size 32
+
+Use --url to measure a server started elsewhere with serve((host, port)).
+"""
+from __future__ import print_function
+import os, sys
+import argparse
+import json
+import threading
+import time
+import numpy as np
+curr_path = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(curr_path, "../../python"))
+import mxnet as mx
+
+try:
+    import httplib
+except ImportError:
+    import http.client as httplib
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Measure the latency of batched inference')
+    parser.add_argument('--num-clients', type=int, default=32,
+                        help='number of concurrent clients')
+    parser.add_argument('--num-requests', type=int, default=100,
+                        help='number of requests sent by each client')
+    parser.add_argument('--num-workers', type=int, default=4,
+                        help='number of workers of the server')
+    parser.add_argument('--max-batch-size', type=int, default=32,
+                        help='maximum number of samples in a batch')
+    parser.add_argument('--max-latency', type=float, default=0.005,
+                        help='seconds a request waits to be batched')
+    parser.add_argument('--num-hidden', type=int, default=1024,
+                        help='number of hidden units of the perceptron')
+    parser.add_argument('--input-size', type=int, default=784,
+                        help='number of features of a sample')
+    parser.add_argument('--url', type=str, default=None,
+                        help='host:port of a running server instead of a local one')
+    return parser.parse_args()
+
+def get_server(args):
+    net = mx.symbol.Variable('data')
+    for i in range(3):
+        net = mx.symbol.FullyConnected(net, name='fc%d' % i, num_hidden=args.num_hidden)
+        net = mx.symbol.Activation(net, act_type='relu')
+    net = mx.symbol.FullyConnected(net, name='out', num_hidden=10)
+    net = mx.symbol.SoftmaxOutput(net, name='softmax')
+    arg_shapes, _, _ = net.infer_shape(data=(1, args.input_size))
+    arg_params = dict((name, mx.nd.array(np.random.uniform(-0.1, 0.1, shape)))
+                      for name, shape in zip(net.list_arguments(), arg_shapes)
+                      if name not in ('data', 'softmax_label'))
+    return mx.serving.InferenceServer(net, arg_params, {}, {'data': (args.input_size,)},
+                                      num_workers=args.num_workers,
+                                      max_batch_size=args.max_batch_size,
+                                      max_latency=args.max_latency)
+
+def run(args):
+    server = None if args.url else get_server(args)
+    latencies = [[] for _ in range(args.num_clients)]
+
+    def client(latency):
+        """send requests one after the other"""
+        sample = np.random.uniform(size=(1, args.input_size)).astype(np.float32)
+        if args.url:
+            conn = httplib.HTTPConnection(args.url)
+            body = json.dumps({'data': sample.tolist()})
+        for _ in range(args.num_requests):
+            tic = time.time()
+            if args.url:
+                conn.request('POST', '/', body)
+                json.loads(conn.getresponse().read().decode('utf-8'))
+            else:
+                server.predict(data=sample)
+            latency.append(time.time() - tic)
+
+    tic = time.time()
+    threads = [threading.Thread(target=client, args=(l,)) for l in latencies]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    toc = time.time() - tic
+    latencies = np.array(sum(latencies, [])) * 1000
+    print('throughput: %.1f requests/sec' % (len(latencies) / toc))
+    print('latency: p50 %.2f ms, p95 %.2f ms, p99 %.2f ms' % tuple(
+        np.percentile(latencies, [50, 95, 99])))
+    if server is not None:
+        stats = server.stats()
+        print('mean batch size: %.2f, padded samples: %d' % (
+            float(stats['num_samples']) / stats['num_batches'], stats['num_padded']))
+        server.close()
+
+if __name__ == "__main__":
+    run(parse_args())
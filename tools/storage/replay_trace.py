@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+Replay an allocation trace on the cpu memory pool and report its statistics
+
+A trace has one event per line, `alloc <id> <bytes>` or `free <id>`. Without
+--trace, a trace of a bucketing workload is generated: each batch allocates
+arrays proportional to a random sequence length, then frees them. For example
+
+    MXNET_STORAGE_POOL_LIMIT_MB=256 python replay_trace.py --num-batches 2000
+"""
+from __future__ import print_function
+import os, sys
+import argparse
+import random
+import time
+import numpy as np
+curr_path = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(curr_path, "../../python"))
+import mxnet as mx
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Replay an allocation trace on the memory pool')
+    parser.add_argument('--trace', type=str, default=None,
+                        help='the trace file, a bucketing trace is generated if not given')
+    parser.add_argument('--num-batches', type=int, default=1000,
+                        help='number of batches of the generated trace')
+    parser.add_argument('--buckets', type=str, default='10,20,30,40,50,60',
+                        help='sequence lengths of the generated trace')
+    parser.add_argument('--arrays-per-step', type=int, default=8,
+                        help='arrays allocated per sequence step in the generated trace')
+    parser.add_argument('--array-size', type=int, default=32 * 1024,
+                        help='bytes of an array for one sample of the generated trace')
+    parser.add_argument('--save-trace', type=str, default=None,
+                        help='write the generated trace to this file')
+    return parser.parse_args()
+
+def generate_trace(args):
+    """allocations of a bucketing lstm-like workload with varying batch sizes"""
+    buckets = [int(b) for b in args.buckets.split(',')]
+    events = []
+    next_id = 0
+    for _ in range(args.num_batches):
+        seq_len = random.choice(buckets)
+        batch_size = random.randint(16, 32)
+        ids = []
+        for _ in range(seq_len * args.arrays_per_step):
+            events.append(('alloc', next_id, batch_size * args.array_size))
+            ids.append(next_id)
+            next_id += 1
+        for i in ids:
+            events.append(('free', i, 0))
+    return events
+
+def read_trace(fname):
+    events = []
+    with open(fname) as fin:
+        for line in fin:
+            fields = line.split()
+            if not fields:
+                continue
+            if fields[0] == 'alloc':
+                events.append(('alloc', int(fields[1]), int(fields[2])))
+            elif fields[0] == 'free':
+                events.append(('free', int(fields[1]), 0))
+            else:
+                raise ValueError('Unknown event %s' % line)
+    return events
+
+def run(args):
+    events = read_trace(args.trace) if args.trace else generate_trace(args)
+    if args.save_trace:
+        with open(args.save_trace, 'w') as fout:
+            for event, i, size in events:
+                fout.write('alloc %d %d\n' % (i, size) if event == 'alloc' else 'free %d\n' % i)
+    ctx = mx.cpu()
+    before = mx.storage.stats(ctx)
+    live = {}
+    tic = time.time()
+    for event, i, size in events:
+        if event == 'alloc':
+            live[i] = mx.nd.empty((size,), ctx, dtype=np.uint8)
+        else:
+            del live[i]
+    mx.nd.waitall()
+    toc = time.time() - tic
+    stats = mx.storage.stats(ctx)
+    for key in ['num_alloc', 'num_pool_hit', 'num_released']:
+        stats[key] -= before[key]
+    num_alloc = len([e for e in events if e[0] == 'alloc'])
+    print('replayed %d allocations in %.3f sec, %.2f us per allocation' % (
+        num_alloc, toc, toc * 1e6 / max(num_alloc, 1)))
+    print('pool hit rate %.2f%%, %d blocks released' % (
+        100.0 * stats['num_pool_hit'] / max(stats['num_alloc'], 1), stats['num_released']))
+    print('peak allocated %.1f MB, now allocated %.1f MB, pooled %.1f MB' % (
+        stats['peak_allocated_bytes'] / 1e6, stats['allocated_bytes'] / 1e6,
+        stats['pooled_bytes'] / 1e6))
+
+if __name__ == "__main__":
+    run(parse_args())